@@ -8,6 +8,7 @@
 # See C source code for _functools credits/copyright
 
 from _functools import partial, reduce
+from _functools import _lru_cache_wrapper    # PyPy extension
 
 # update_wrapper() and wraps() are tools to help write
 # wrapper functions that can handle naive introspection
@@ -103,3 +104,48 @@ def cmp_to_key(mycmp):
         def __hash__(self):
             raise TypeError('hash not implemented')
     return K
+
+# PyPy extension: a backport of Python 3's lru_cache(), implemented in the
+# _functools module
+
+_CacheInfo = None
+
+def _get_cache_info_type():
+    # created on first use: importing collections when functools is
+    # imported would slow down the startup
+    global _CacheInfo
+    if _CacheInfo is None:
+        from collections import namedtuple
+        _CacheInfo = namedtuple("CacheInfo",
+                                ["hits", "misses", "maxsize", "currsize"])
+    return _CacheInfo
+
+def lru_cache(maxsize=128, typed=False):
+    """Least-recently-used cache decorator.
+
+    If *maxsize* is set to None, the LRU features are disabled and the cache
+    can grow without bound.
+
+    If *typed* is True, arguments of different types will be cached separately.
+    For example, f(3.0) and f(3) will be treated as distinct calls with
+    distinct results.
+
+    Arguments to the cached function must be hashable.
+
+    View the cache statistics named tuple (hits, misses, maxsize, currsize)
+    with f.cache_info().  Clear the cache and statistics with f.cache_clear().
+    Access the underlying function with f.__wrapped__.
+
+    See:  http://en.wikipedia.org/wiki/Cache_algorithms#Least_Recently_Used
+
+    """
+    if maxsize is not None and not isinstance(maxsize, (int, long)):
+        raise TypeError('Expected maxsize to be an integer or None')
+
+    def decorating_function(user_function):
+        wrapper = _lru_cache_wrapper(user_function, maxsize, typed,
+                                     _get_cache_info_type())
+        wrapper.__wrapped__ = user_function
+        return update_wrapper(wrapper, user_function)
+
+    return decorating_function
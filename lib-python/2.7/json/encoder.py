@@ -206,6 +206,21 @@ class JSONEncoder(object):
         '{"foo": ["bar", "baz"]}'
 
         """
+        if type(self).iterencode.im_func is not _iterencode:
+            # a subclass overriding iterencode(): use it, like CPython
+            chunks = self.iterencode(o, _one_shot=True)
+            if not isinstance(chunks, (list, tuple)):
+                chunks = list(chunks)
+            return ''.join(chunks)
+        if (_pypyjson_encode is not None and self.encoding == 'utf-8' and
+                (self.indent is None or type(self.indent) is int) and
+                type(self.item_separator) is str and
+                type(self.key_separator) is str):
+            return _pypyjson_encode(o, self.skipkeys, self.ensure_ascii,
+                                    self.check_circular, self.allow_nan,
+                                    self.sort_keys, self.indent,
+                                    self.item_separator, self.key_separator,
+                                    self.default)
         if self.check_circular:
             markers = {}
         else:
@@ -536,3 +551,9 @@ try:
     from _pypyjson import raw_encode_basestring_ascii
 except ImportError:
     pass
+_iterencode = JSONEncoder.iterencode.im_func
+
+try:
+    from _pypyjson import encode as _pypyjson_encode
+except ImportError:
+    _pypyjson_encode = None
@@ -247,6 +247,19 @@ class _socketobject(object):
             return self._sock.sendto(data, param2, param3)
     sendto.__doc__ = _realsocket.sendto.__doc__
 
+    if hasattr(_realsocket, 'sendmsg'):
+        def sendmsg(self, buffers, ancdata=None, flags=0, address=None):
+            return self._sock.sendmsg(buffers, ancdata, flags, address)
+        sendmsg.__doc__ = _realsocket.sendmsg.__doc__
+
+        def recvmsg(self, bufsize, ancbufsize=0, flags=0):
+            return self._sock.recvmsg(bufsize, ancbufsize, flags)
+        recvmsg.__doc__ = _realsocket.recvmsg.__doc__
+
+        def recvmsg_into(self, buffers, ancbufsize=0, flags=0):
+            return self._sock.recvmsg_into(buffers, ancbufsize, flags)
+        recvmsg_into.__doc__ = _realsocket.recvmsg_into.__doc__
+
     def close(self):
         s = self._sock
         self._sock = _closedsocket()
@@ -4,8 +4,7 @@ from test import test_support
 from test.test_support import precisionbigmemtest, _2G
 import unittest
 
-# PyPy: was: cET = test_support.import_module('xml.etree.cElementTree')
-cET = None
+cET = test_support.import_module('xml.etree.cElementTree')
 
 
 @unittest.skipUnless(cET, 'requires _elementtree')
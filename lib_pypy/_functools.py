@@ -75,3 +75,106 @@ class partial(object):
             self.__dict__.clear()
         else:
             self.__dict__.update(d)
+
+
+class _lru_cache_wrapper(object):
+    """_lru_cache_wrapper(func, maxsize, typed, cache_info_type)
+
+    Create a cached callable that wraps another function.  See
+    functools.lru_cache().
+    """
+
+    _kwd_mark = object()
+
+    def __init__(self, func, maxsize, typed, cache_info_type):
+        if not callable(func):
+            raise TypeError("the first argument must be callable")
+        if maxsize is not None:
+            maxsize = max(maxsize, 0)
+        self._func = func
+        self._maxsize = maxsize
+        self._typed = typed
+        self._cache_info_type = cache_info_type
+        self.cache_clear()
+
+    def _make_key(self, args, kwds):
+        if not kwds and not self._typed and len(args) == 1:
+            if type(args[0]) in (int, str):
+                return args[0]
+        key = args
+        if kwds:
+            key += (self._kwd_mark,)
+            for item in kwds.iteritems():
+                key += item
+        if self._typed:
+            key += tuple([type(v) for v in args])
+            if kwds:
+                key += tuple([type(v) for v in kwds.itervalues()])
+        return key
+
+    def __call__(self, *args, **kwds):
+        if self._maxsize == 0:
+            self._misses += 1
+            return self._func(*args, **kwds)
+        key = self._make_key(args, kwds)
+        cache = self._cache
+        if self._maxsize is None:
+            try:
+                result = cache[key]
+            except KeyError:
+                pass
+            else:
+                self._hits += 1
+                return result
+            self._misses += 1
+            result = self._func(*args, **kwds)
+            cache[key] = result
+            return result
+        # the links are lists [prev, next, key, result]
+        root = self._root
+        link = cache.get(key)
+        if link is not None:
+            link_prev, link_next, _, result = link
+            link_prev[1] = link_next
+            link_next[0] = link_prev
+            first = root[1]
+            first[0] = root[1] = link
+            link[0] = root
+            link[1] = first
+            self._hits += 1
+            return result
+        self._misses += 1
+        result = self._func(*args, **kwds)
+        if key in cache:
+            # the call added the same key, e.g. by a recursive call
+            return result
+        if len(cache) >= self._maxsize:
+            oldest = root[0]
+            oldest[0][1] = root
+            root[0] = oldest[0]
+            del cache[oldest[2]]
+            if self._root is not root:
+                return result
+        first = root[1]
+        link = [root, first, key, result]
+        first[0] = root[1] = cache[key] = link
+        return result
+
+    def __get__(self, obj, type=None):
+        if obj is None:
+            return self
+        return _MethodType(self, obj, type)
+
+    def cache_info(self):
+        """Report the cache statistics."""
+        return self._cache_info_type(self._hits, self._misses, self._maxsize,
+                                     len(self._cache))
+
+    def cache_clear(self):
+        """Clear the cache and the cache statistics."""
+        self._cache = {}
+        self._root = []
+        self._root[:] = [self._root, self._root, None, None]
+        self._hits = self._misses = 0
+
+_MethodType = type(_lru_cache_wrapper.cache_clear)
@@ -21,8 +21,10 @@ import time as _timemodule
 import math as _math
 import struct as _struct
 
-# for cpyext, use these as base classes
+# for cpyext, use these as base classes.  They also store the fields
+# ('_year', '_month'...) unboxed and implement a few of the hot methods.
 from __pypy__._pypydatetime import dateinterop, deltainterop, timeinterop
+from __pypy__._pypydatetime import parse_isoformat as _parse_isoformat
 
 _SENTINEL = object()
 
@@ -184,13 +186,6 @@ def _build_struct_time(y, m, d, hh, mm, ss, dstflag):
     dnum = _days_before_month(y, m) + d
     return _timemodule.struct_time((y, m, d, hh, mm, ss, wday, dnum, dstflag))
 
-def _format_time(hh, mm, ss, us):
-    # Skip trailing microseconds when us==0.
-    result = "%02d:%02d:%02d" % (hh, mm, ss)
-    if us:
-        result += ".%06d" % us
-    return result
-
 # Correctly substitute for %z and %Z escapes in strftime formats.
 def _wrap_strftime(object, format, timetuple):
     year = timetuple[0]
@@ -453,7 +448,7 @@ class timedelta(deltainterop):
     Representation: (days, seconds, microseconds).  Why?  Because I
     felt like it.
     """
-    __slots__ = '_days', '_seconds', '_microseconds', '_hashcode'
+    __slots__ = ()
 
     def __new__(cls, days=_SENTINEL, seconds=_SENTINEL, microseconds=_SENTINEL,
                 milliseconds=_SENTINEL, minutes=_SENTINEL, hours=_SENTINEL, weeks=_SENTINEL):
@@ -649,7 +644,7 @@ class timedelta(deltainterop):
 
     def _cmp(self, other):
         assert isinstance(other, timedelta)
-        return _cmp(self._getstate(), other._getstate())
+        return self._cmp_delta(other)
 
     def __hash__(self):
         if self._hashcode == -1:
@@ -701,7 +696,7 @@ class date(dateinterop):
     Properties (readonly):
     year, month, day
     """
-    __slots__ = '_year', '_month', '_day', '_hashcode'
+    __slots__ = ()
 
     def __new__(cls, year, month=None, day=None):
         """Constructor.
@@ -802,7 +797,7 @@ class date(dateinterop):
         - http://www.w3.org/TR/NOTE-datetime
         - http://www.cl.cam.ac.uk/~mgk25/iso-time.html
         """
-        return "%04d-%02d-%02d" % (self._year, self._month, self._day)
+        return self._isodate()
 
     __str__ = isoformat
 
@@ -899,9 +894,7 @@ class date(dateinterop):
 
     def _cmp(self, other):
         assert isinstance(other, date)
-        y, m, d = self._year, self._month, self._day
-        y2, m2, d2 = other._year, other._month, other._day
-        return _cmp((y, m, d), (y2, m2, d2))
+        return self._cmp_date(other)
 
     def __hash__(self):
         "Hash."
@@ -1090,7 +1083,7 @@ class time(timeinterop):
     Properties (readonly):
     hour, minute, second, microsecond, tzinfo
     """
-    __slots__ = '_hour', '_minute', '_second', '_microsecond', '_tzinfo', '_hashcode'
+    __slots__ = ()
 
     def __new__(cls, hour=0, minute=0, second=0, microsecond=0, tzinfo=None):
         """Constructor.
@@ -1199,10 +1192,7 @@ class time(timeinterop):
             base_compare = myoff == otoff
 
         if base_compare:
-            return _cmp((self._hour, self._minute, self._second,
-                         self._microsecond),
-                        (other._hour, other._minute, other._second,
-                         other._microsecond))
+            return self._cmp_time(other)
         if myoff is None or otoff is None:
             raise TypeError("can't compare offset-naive and offset-aware times")
         myhhmm = self._hour * 60 + self._minute - myoff
@@ -1262,8 +1252,7 @@ class time(timeinterop):
         This is 'HH:MM:SS.mmmmmm+zz:zz', or 'HH:MM:SS+zz:zz' if
         self.microsecond == 0.
         """
-        s = _format_time(self._hour, self._minute, self._second,
-                         self._microsecond)
+        s = self._isotime()
         tz = self._tzstr()
         if tz:
             s += tz
@@ -1407,7 +1396,7 @@ class datetime(date):
     The year, month and day arguments are required. tzinfo may be None, or an
     instance of a tzinfo subclass. The remaining arguments may be ints or longs.
     """
-    __slots__ = date.__slots__ + time.__slots__
+    __slots__ = ()
 
     def __new__(cls, year, month=None, day=None, hour=0, minute=0, second=0,
                 microsecond=0, tzinfo=None):
@@ -1626,9 +1615,7 @@ class datetime(date):
         Optional argument sep specifies the separator between date and
         time, default 'T'.
         """
-        s = ("%04d-%02d-%02d%c" % (self._year, self._month, self._day, sep) +
-             _format_time(self._hour, self._minute, self._second,
-                          self._microsecond))
+        s = "%s%c%s" % (self._isodate(), sep, self._isotime())
         off = self._utcoffset()
         if off is not None:
             if off < 0:
@@ -1663,6 +1650,11 @@ class datetime(date):
     @classmethod
     def strptime(cls, date_string, format):
         'string, format -> new datetime parsed from a string (like time.strptime()).'
+        if isinstance(date_string, str) and isinstance(format, str):
+            # fast path for the common ISO 8601 formats
+            fields = _parse_isoformat(date_string, format)
+            if fields is not None:
+                return cls(*fields)
         from _strptime import _strptime
         # _strptime._strptime returns a two-element tuple.  The first
         # element is a time.struct_time object.  The second is the
@@ -1793,12 +1785,7 @@ class datetime(date):
             base_compare = myoff == otoff
 
         if base_compare:
-            return _cmp((self._year, self._month, self._day,
-                         self._hour, self._minute, self._second,
-                         self._microsecond),
-                        (other._year, other._month, other._day,
-                         other._hour, other._minute, other._second,
-                         other._microsecond))
+            return self._cmp_datetime(other)
         if myoff is None or otoff is None:
             raise TypeError("can't compare offset-naive and offset-aware datetimes")
         # XXX What follows could be done more efficiently...
@@ -36,7 +36,8 @@ working_modules.update([
     "cStringIO", "thread", "itertools", "pyexpat", "cpyext", "array",
     "binascii", "_multiprocessing", '_warnings', "_collections",
     "_multibytecodec", "micronumpy", "_continuation", "_cffi_backend",
-    "_csv", "_cppyy", "_pypyjson", "_jitlog",
+    "_csv", "_cppyy", "_pypyjson", "_jitlog", "cPickle", "_heapq", "_bisect",
+    "_functools", "_elementtree",
     # "_hashlib", "crypt"
 ])
 
@@ -97,6 +98,7 @@ module_dependencies = {
     'cpyext': [('objspace.usemodules.array', True)],
     '_cppyy': [('objspace.usemodules.cpyext', True)],
     'faulthandler': [('objspace.usemodules._vmprof', True)],
+    '_elementtree': [('objspace.usemodules.pyexpat', True)],
     }
 module_suggests = {
     # the reason you want _rawffi is for ctypes, which
@@ -144,6 +146,14 @@ pypy_optiondescription = OptionDescription("objspace", "Object Space Options", [
     BoolOption("lonepycfiles", "Import pyc files with no matching py file",
                default=False),
 
+    StrOption("frozen_modules",
+              "Comma-separated list of top-level app-level modules from "
+              "lib_pypy or lib-python to compile into the executable and "
+              "import without reading their file; 'startup' stands for "
+              "the modules imported by 'pypy -c pass'",
+              cmdline="--frozen-modules",
+              default=None),
+
     StrOption("soabi",
               "Tag to differentiate extension modules built for different Python interpreters",
               cmdline="--soabi",
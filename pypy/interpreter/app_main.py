@@ -34,6 +34,8 @@ PyPy options and arguments:
 -X track-resources : track the creation of files and sockets and display
                      a warning if they are not closed explicitly
 -X faulthandler    : attempt to display tracebacks when PyPy crashes
+-X importtime      : show how long each import takes, on stderr; also
+                     PYTHONPROFILEIMPORTTIME=x
 """
 # Missing vs CPython: PYTHONHOME, PYTHONCASEOK
 USAGE2 = """
@@ -45,6 +47,9 @@ PYTHONIOENCODING: Encoding[:errors] used for stdin/stdout/stderr.
 PYPY_IRC_TOPIC: if set to a non-empty value, print a random #pypy IRC
                topic at startup of interactive mode.
 PYPYLOG: If set to a non-empty value, enable logging.
+PYPY_JIT_WARMUP_PROFILE: file listing the loops compiled by the JIT in
+               previous runs; they are compiled early, and the file is
+               rewritten at exit.
 """
 
 try:
@@ -278,9 +283,12 @@ def set_runtime_options(options, Xparam, *args):
         sys.pypy_set_track_resources(True)
     elif Xparam == 'faulthandler':
         run_faulthandler()
+    elif Xparam == 'importtime':
+        sys.pypy_set_import_time(True)
     else:
         print >> sys.stderr, 'usage: %s -X [options]' % (get_sys_executable(),)
-        print >> sys.stderr, '[options] can be: track-resources, faulthandler'
+        print >> sys.stderr, ('[options] can be: track-resources, '
+                              'faulthandler, importtime')
         raise SystemExit
 
 class CommandLineError(Exception):
@@ -551,6 +559,8 @@ def parse_command_line(argv):
             options["unbuffered"] = 1
         parse_env('PYTHONVERBOSE', "verbose", options)
         parse_env('PYTHONOPTIMIZE', "optimize", options)
+        if getenv('PYTHONPROFILEIMPORTTIME'):
+            sys.pypy_set_import_time(True)
     if (options["interactive"] or
         (not options["ignore_environment"] and getenv('PYTHONINSPECT'))):
         options["inspect"] = 1
@@ -615,6 +625,17 @@ def run_command_line(interactive,
     mainmodule = type(sys)('__main__')
     sys.modules['__main__'] = mainmodule
 
+    # load the JIT warmup profile before 'import site', to catch the
+    # code objects of the whole stdlib
+    warmup_profile = not ignore_environment and getenv(
+        'PYPY_JIT_WARMUP_PROFILE')
+    if warmup_profile and 'pypyjit' in sys.builtin_module_names:
+        import pypyjit
+        try:
+            pypyjit.load_warmup_profile(warmup_profile, save_at_exit=True)
+        except (IOError, OSError, ValueError) as e:
+            print >> sys.stderr, "Warning: JIT warmup profile: %s" % (e,)
+
     if not no_site:
         try:
             import site
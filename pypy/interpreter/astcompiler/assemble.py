@@ -276,6 +276,131 @@ class PythonCodeMaker(ast.ASTVisitor):
             self.lineno = lineno
             self.lineno_set = False
 
+    def _optimize_blocks(self, blocks):
+        """Run the peephole optimizations on the linearized blocks and
+        return the blocks that are still reachable, in the same order.
+        """
+        for i in range(len(blocks)):
+            blocks[i].position = i
+        for block in blocks:
+            self._optimize_block_instructions(block)
+        for block in blocks:
+            for instr in block.instructions:
+                if instr.has_jump:
+                    self._thread_jump(block, instr)
+        blocks = _reachable_blocks(blocks)
+        _remove_jumps_to_next_block(blocks)
+        return blocks
+
+    def _optimize_block_instructions(self, block):
+        """Simplify the instructions of a single block:
+
+        * a LOAD_CONST followed by a POP_JUMP_IF_xxx is turned into
+          either a JUMP_ABSOLUTE or nothing at all;
+
+        * UNARY_NOT followed by POP_JUMP_IF_xxx jumps on the opposite
+          condition instead;
+
+        * UNARY_NOT after a COMPARE_OP of "in", "not in", "is" or
+          "is not" is removed and the comparison is inverted;
+
+        * everything after an unconditional exit from the block is
+          dropped.
+        """
+        instructions = block.instructions
+        result = []
+        lineno = 0     # line number of a removed instruction, to keep
+        i = 0
+        while i < len(instructions):
+            instr = instructions[i]
+            if lineno and not instr.lineno:
+                instr.lineno = lineno
+            lineno = 0
+            op = instr.opcode
+            if i + 1 < len(instructions):
+                next_instr = instructions[i + 1]
+                next_op = next_instr.opcode
+                if (op == ops.LOAD_CONST and
+                        (next_op == ops.POP_JUMP_IF_FALSE or
+                         next_op == ops.POP_JUMP_IF_TRUE)):
+                    w_const = self.consts_w[instr.arg]
+                    jump_if = next_op == ops.POP_JUMP_IF_TRUE
+                    lineno = instr.lineno or next_instr.lineno
+                    i += 2
+                    if self.space.is_true(w_const) == jump_if:
+                        next_instr.opcode = ops.JUMP_ABSOLUTE
+                        next_instr.lineno = lineno
+                        result.append(next_instr)
+                        break
+                    continue
+                if op == ops.UNARY_NOT and (next_op == ops.POP_JUMP_IF_FALSE or
+                                            next_op == ops.POP_JUMP_IF_TRUE):
+                    if next_op == ops.POP_JUMP_IF_FALSE:
+                        next_instr.opcode = ops.POP_JUMP_IF_TRUE
+                    else:
+                        next_instr.opcode = ops.POP_JUMP_IF_FALSE
+                    lineno = instr.lineno
+                    i += 1
+                    continue
+                if (op == ops.COMPARE_OP and next_op == ops.UNARY_NOT and
+                        instr.arg in _inverted_compare_ops):
+                    instr.arg = _inverted_compare_ops[instr.arg]
+                    result.append(instr)
+                    lineno = next_instr.lineno
+                    i += 2
+                    continue
+            result.append(instr)
+            i += 1
+            if _is_unconditional_exit(op):
+                break
+        block.instructions = result
+
+    def _thread_jump(self, block, instr):
+        """Make 'instr' jump directly to where the execution really
+        continues, skipping empty blocks and chains of unconditional
+        jumps.  Conditional jumps are only ever redirected forward: in
+        the interpreter, only JUMP_ABSOLUTE closes a loop for the JIT.
+        """
+        op = instr.opcode
+        target = instr.jump[0]
+        if op == ops.JUMP_ABSOLUTE or op == ops.JUMP_FORWARD:
+            new_target = _follow_jumps(target, -1)
+            if (new_target.instructions and
+                    new_target.instructions[0].opcode == ops.RETURN_VALUE):
+                # a jump to a RETURN is just a RETURN
+                instr.opcode = ops.RETURN_VALUE
+                instr.arg = 0
+                instr.has_jump = False
+            elif new_target is not target:
+                instr.opcode = ops.JUMP_ABSOLUTE
+                instr.jump = (new_target, True)
+        elif op == ops.POP_JUMP_IF_FALSE or op == ops.POP_JUMP_IF_TRUE:
+            instr.jump = (_follow_jumps(target, block.position), True)
+        elif op == ops.JUMP_IF_FALSE_OR_POP or op == ops.JUMP_IF_TRUE_OR_POP:
+            if op == ops.JUMP_IF_FALSE_OR_POP:
+                pop_jump_op = ops.POP_JUMP_IF_FALSE
+            else:
+                pop_jump_op = ops.POP_JUMP_IF_TRUE
+            # the jump of 'x and y' or 'x or y' often lands on a test of
+            # the same value: if it does, go directly to that test's target
+            for i in range(_MAX_JUMP_THREADING):
+                target = _follow_jumps(target, block.position)
+                if not target.instructions:
+                    break
+                first = target.instructions[0]
+                if first.opcode != op and first.opcode != pop_jump_op:
+                    break
+                new_target = first.jump[0]
+                if new_target.position <= block.position:
+                    break
+                target = new_target
+                if first.opcode == pop_jump_op:
+                    # the value is popped now, so stop here
+                    instr.opcode = pop_jump_op
+                    target = _follow_jumps(target, block.position)
+                    break
+            instr.jump = (target, True)
+
     def _resolve_block_targets(self, blocks):
         """Compute the arguments of jump instructions."""
         last_extended_arg_count = 0
@@ -287,7 +412,6 @@ class PythonCodeMaker(ast.ASTVisitor):
         while True:
             extended_arg_count = 0
             offset = 0
-            force_redo = False
             # Calculate the code offset of each block.
             for block in blocks:
                 block.offset = offset
@@ -298,26 +422,6 @@ class PythonCodeMaker(ast.ASTVisitor):
                     offset += instr.size()
                     if instr.has_jump:
                         target, absolute = instr.jump
-                        op = instr.opcode
-                        # Optimize an unconditional jump going to another
-                        # unconditional jump.
-                        if op == ops.JUMP_ABSOLUTE or op == ops.JUMP_FORWARD:
-                            if target.instructions:
-                                target_op = target.instructions[0].opcode
-                                if target_op == ops.JUMP_ABSOLUTE:
-                                    target = target.instructions[0].jump[0]
-                                    instr.opcode = ops.JUMP_ABSOLUTE
-                                    absolute = True
-                                elif target_op == ops.RETURN_VALUE:
-                                    # Replace JUMP_* to a RETURN into
-                                    # just a RETURN
-                                    instr.opcode = ops.RETURN_VALUE
-                                    instr.arg = 0
-                                    instr.has_jump = False
-                                    # The size of the code changed,
-                                    # we have to trigger another pass
-                                    force_redo = True
-                                    continue
                         if absolute:
                             jump_arg = target.offset
                         else:
@@ -325,8 +429,7 @@ class PythonCodeMaker(ast.ASTVisitor):
                         instr.arg = jump_arg
                         if jump_arg > 0xFFFF:
                             extended_arg_count += 1
-            if (extended_arg_count == last_extended_arg_count and
-                not force_redo):
+            if extended_arg_count == last_extended_arg_count:
                 break
             else:
                 last_extended_arg_count = extended_arg_count
@@ -382,10 +485,7 @@ class PythonCodeMaker(ast.ASTVisitor):
                       jump_op == ops.JUMP_IF_FALSE_OR_POP):
                     depth -= 1
                 self._next_stack_depth_walk(instr.jump[0], target_depth)
-                if jump_op == ops.JUMP_ABSOLUTE or jump_op == ops.JUMP_FORWARD:
-                    # Nothing more can occur.
-                    break
-            elif jump_op == ops.RETURN_VALUE or jump_op == ops.RAISE_VARARGS:
+            if _is_unconditional_exit(jump_op):
                 # Nothing more can occur.
                 break
         else:
@@ -451,7 +551,7 @@ class PythonCodeMaker(ast.ASTVisitor):
                 self.first_lineno = self.first_block.instructions[0].lineno
             else:
                 self.first_lineno = 1
-        blocks = self.first_block.post_order()
+        blocks = self._optimize_blocks(self.first_block.post_order())
         self._resolve_block_targets(blocks)
         lnotab = self._build_lnotab(blocks)
         stack_depth = self._stacksize(blocks)
@@ -480,6 +580,97 @@ class PythonCodeMaker(ast.ASTVisitor):
                       self.compile_info.hidden_applevel)
 
 
+# bound the number of blocks followed when threading jumps, to stop on
+# an infinite loop like 'while 1: pass'
+_MAX_JUMP_THREADING = 20
+
+_inverted_compare_ops = {}
+for _op1, _op2 in [('in', 'not in'), ('is', 'is not')]:
+    _inverted_compare_ops[ops.cmp_op.index(_op1)] = ops.cmp_op.index(_op2)
+    _inverted_compare_ops[ops.cmp_op.index(_op2)] = ops.cmp_op.index(_op1)
+del _op1, _op2
+
+
+def _is_unconditional_exit(op):
+    """Return True if the execution never continues after 'op'."""
+    return (op == ops.RETURN_VALUE or op == ops.RAISE_VARARGS or
+            op == ops.JUMP_ABSOLUTE or op == ops.JUMP_FORWARD or
+            op == ops.BREAK_LOOP or op == ops.CONTINUE_LOOP)
+
+
+def _follow_jumps(target, after_position):
+    """Follow empty blocks and blocks starting with an unconditional
+    jump from 'target'.  Stops before reaching a block whose position
+    is not strictly after 'after_position'.
+    """
+    for i in range(_MAX_JUMP_THREADING):
+        if target.instructions:
+            first = target.instructions[0]
+            if not (first.opcode == ops.JUMP_ABSOLUTE or
+                    first.opcode == ops.JUMP_FORWARD):
+                break
+            new_target = first.jump[0]
+        elif target.next_block is not None:
+            new_target = target.next_block
+        else:
+            break
+        if new_target.position <= after_position:
+            break
+        target = new_target
+    return target
+
+
+def _reachable_blocks(blocks):
+    """Return the blocks that can be reached from the first one,
+    keeping their relative order.
+    """
+    for block in blocks:
+        block.marked = 0
+    pending = [blocks[0]]
+    blocks[0].marked = 1
+    while pending:
+        block = pending.pop()
+        for instr in block.instructions:
+            if instr.has_jump:
+                _mark_reachable(pending, instr.jump[0])
+            if _is_unconditional_exit(instr.opcode):
+                break
+        else:
+            if block.next_block is not None:
+                _mark_reachable(pending, block.next_block)
+    return [block for block in blocks if block.marked]
+
+def _mark_reachable(pending, block):
+    if not block.marked:
+        block.marked = 1
+        pending.append(block)
+
+def _remove_jumps_to_next_block(blocks):
+    """Remove the unconditional jumps that go to the code which directly
+    follows them anyway, possibly after some empty blocks.
+    """
+    for i in range(len(blocks) - 1):
+        block = blocks[i]
+        if not block.instructions:
+            continue
+        last = block.instructions[-1]
+        if last.opcode != ops.JUMP_ABSOLUTE and last.opcode != ops.JUMP_FORWARD:
+            continue
+        target = last.jump[0]
+        j = i + 1
+        while blocks[j] is not target:
+            if blocks[j].instructions or j + 1 == len(blocks):
+                break
+            j += 1
+        else:
+            if last.lineno:
+                # keep it: it may be the only instruction of its line,
+                # and moving the line number would add line events
+                continue
+            block.instructions.pop()
+            block.next_block = blocks[i + 1]
+
+
 def _list_from_dict(d, offset=0):
     result = [None] * len(d)
     for obj, index in d.iteritems():
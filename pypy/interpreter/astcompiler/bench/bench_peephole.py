@@ -0,0 +1,60 @@
+"""Measure cold code: compile many small functions full of branches
+and call each of them only a few times, so that they run in the
+interpreter and never get JIT-compiled.  Also prints the total size of
+the generated bytecode.  Compare the output of two pypys to see the
+effect of the bytecode optimizations done by the assembler.
+
+Run with a translated pypy:
+
+    pypy bench_peephole.py [functions [calls]]
+"""
+
+import sys, time
+
+TEMPLATE = '''
+def f%(n)d(a, b, c):
+    total = 0
+    for i in a:
+        if i in [1, 2, 3] and not (i is None):
+            if b:
+                total += i
+            elif c:
+                total -= i
+            else:
+                continue
+        elif not i in (%(n)d, 7):
+            total += 1 if b else 2
+        else:
+            break
+    return (b and c) and total or -total
+'''
+
+def make_source(n):
+    return ''.join([TEMPLATE % {'n': i} for i in xrange(n)])
+
+def main(n=2000, calls=3):
+    source = make_source(n)
+    t = time.time()
+    code = compile(source, '<bench>', 'exec')
+    t_compile = time.time() - t
+    d = {}
+    exec code in d
+    funcs = [d['f%d' % i] for i in xrange(n)]
+    size = 0
+    for func in funcs:
+        size += len(func.__code__.co_code)
+    args = range(12)
+    t = time.time()
+    for j in xrange(calls):
+        for func in funcs:
+            func(args, j & 1, j & 2)
+    t_run = time.time() - t
+    print 'functions:        %8d' % n
+    print 'bytecode bytes:   %8d  (%.1f per function)' % (size,
+                                                           size / float(n))
+    print 'compile time:     %8.3f s' % t_compile
+    print 'cold run time:    %8.3f s  (%d calls per function)' % (t_run,
+                                                                   calls)
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -1,5 +1,6 @@
 import py, sys
 from pypy.interpreter.astcompiler import codegen, astbuilder, symtable, optimize
+from pypy.interpreter.astcompiler import assemble
 from pypy.interpreter.pyparser import pyparse
 from pypy.interpreter.pyparser.test import expressions
 from pypy.interpreter.pycode import PyCode
@@ -23,7 +24,7 @@ def generate_function_code(expr, space):
     symbols = symtable.SymtableBuilder(space, ast, info)
     generator = codegen.FunctionCodeGenerator(
         space, 'function', function_ast, 1, symbols, info)
-    blocks = generator.first_block.post_order()
+    blocks = generator._optimize_blocks(generator.first_block.post_order())
     generator._resolve_block_targets(blocks)
     return generator, blocks
 
@@ -426,6 +427,38 @@ class TestCompiler(BaseTestCompiler):
         yield self.st, "k=2; x = sum(n+2 for n in [6, 1, k])", 'x', 15
         yield self.st, "k=2; x = sum(n+2 for n in (6, 1, k))", 'x', 15
 
+    def test_peephole_control_flow(self):
+        decl = py.code.Source("""
+            def f(a, b, c):
+                if a:
+                    if b:
+                        return 1
+                    elif c:
+                        return 2
+                else:
+                    return 3 if not c else 4
+                return (a and b) and c or 5
+            def g(n):
+                total = 0
+                for i in range(n):
+                    if i == 3:
+                        break
+                    while i:
+                        i -= 1
+                        if i & 1:
+                            continue
+                        total += i + 1
+                    assert i == 0
+                else:
+                    total = -total
+                return total
+            x = [f(a, b, c) for a in (0, 1) for b in (0, 1) for c in (0, 1)]
+            y = (g(2), g(5), 6 if 1 else 7, 6 if 0 else 7)
+        """)
+        decl = str(decl) + "\n"
+        yield self.st, decl, 'x', [3, 4, 3, 4, 5, 2, 1, 1]
+        yield self.st, decl, 'y', (-1, 2, 6, 7)
+
     def test_closure(self):
         decl = py.code.Source("""
             def make_adder(n):
@@ -1186,6 +1219,115 @@ class TestOptimizations:
             assert ops.BUILD_SET not in counts
             assert ops.LOAD_CONST in counts
 
+    def test_fold_constant_condition(self):
+        source = """def f(x, y):
+            return x if 1 else y
+        """
+        counts = self.count_instructions(source)
+        assert counts == {ops.LOAD_FAST: 1, ops.RETURN_VALUE: 1}
+
+        source = """def f(x, y):
+            return x if '' else y
+        """
+        counts = self.count_instructions(source)
+        assert counts[ops.LOAD_FAST] == 1
+        assert ops.LOAD_CONST not in counts
+        assert ops.POP_JUMP_IF_FALSE not in counts
+
+    def test_remove_unreachable_blocks(self):
+        source = """def f(x):
+            for i in x:
+                break
+        """
+        counts = self.count_instructions(source)
+        assert ops.JUMP_ABSOLUTE not in counts
+        assert counts[ops.BREAK_LOOP] == 1
+
+    def test_remove_jump_to_next_block(self):
+        source = """def f(x, y):
+            if not x:
+                y()
+        """
+        counts = self.count_instructions(source)
+        assert ops.JUMP_FORWARD not in counts
+        assert ops.JUMP_ABSOLUTE not in counts
+        assert counts[ops.POP_JUMP_IF_TRUE] == 1
+
+    def test_jump_threading(self):
+        source = """def f(a, b, c, d):
+            if a:
+                if b:
+                    c()
+                else:
+                    d()
+            else:
+                c()
+            return (a and b) and c
+        """
+        code, blocks = generate_function_code(source, self.space)
+        for block in blocks:
+            for instr in block.instructions:
+                if instr.has_jump:
+                    target = instr.jump[0]
+                    assert target.instructions
+                    target_op = target.instructions[0].opcode
+                    assert target_op != ops.JUMP_FORWARD
+                    assert target_op != ops.JUMP_ABSOLUTE
+                    if instr.opcode == ops.JUMP_IF_FALSE_OR_POP:
+                        assert target_op != ops.JUMP_IF_FALSE_OR_POP
+
+    def test_conditional_jumps_not_threaded_backwards(self):
+        source = """def f(a, b):
+            while a:
+                if b:
+                    a()
+        """
+        code, blocks = generate_function_code(source, self.space)
+        for block in blocks:
+            for instr in block.instructions:
+                if instr.opcode == ops.POP_JUMP_IF_FALSE:
+                    assert instr.jump[0].position > block.position
+
+    def _peephole(self, instructions):
+        code, blocks = generate_function_code("def f(): pass", self.space)
+        block = assemble.Block()
+        block.instructions = instructions
+        code._optimize_block_instructions(block)
+        return block.instructions
+
+    def test_invert_not_before_jump(self):
+        target = assemble.Block()
+        jump = assemble.Instruction(ops.POP_JUMP_IF_FALSE)
+        jump.jump_to(target, True)
+        result = self._peephole([assemble.Instruction(ops.LOAD_FAST, 0),
+                                 assemble.Instruction(ops.UNARY_NOT),
+                                 jump])
+        assert [instr.opcode for instr in result] == [ops.LOAD_FAST,
+                                                      ops.POP_JUMP_IF_TRUE]
+        assert result[1].jump[0] is target
+
+    def test_invert_compare_op(self):
+        for op1, op2 in [('in', 'not in'), ('not in', 'in'),
+                         ('is', 'is not'), ('is not', 'is')]:
+            result = self._peephole([
+                assemble.Instruction(ops.COMPARE_OP, ops.cmp_op.index(op1)),
+                assemble.Instruction(ops.UNARY_NOT),
+                assemble.Instruction(ops.RETURN_VALUE)])
+            assert [(instr.opcode, instr.arg) for instr in result] == [
+                (ops.COMPARE_OP, ops.cmp_op.index(op2)),
+                (ops.RETURN_VALUE, 0)]
+        result = self._peephole([
+            assemble.Instruction(ops.COMPARE_OP, ops.cmp_op.index('<')),
+            assemble.Instruction(ops.UNARY_NOT)])
+        assert len(result) == 2
+
+    def test_truncate_after_exit(self):
+        result = self._peephole([assemble.Instruction(ops.LOAD_FAST, 0),
+                                 assemble.Instruction(ops.RETURN_VALUE),
+                                 assemble.Instruction(ops.LOAD_FAST, 0),
+                                 assemble.Instruction(ops.RETURN_VALUE)])
+        assert len(result) == 2
+
     def test_dont_fold_huge_powers(self):
         for source in (
             "2 ** 3000",         # not constant-folded: too big
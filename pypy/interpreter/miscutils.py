@@ -15,6 +15,7 @@ class ThreadLocals:
     """
     _immutable_fields_ = ['_value?']
     _value = None
+    _switch_interval = 5000
 
     def get_ec(self):
         return self._value
@@ -37,6 +38,20 @@ class ThreadLocals:
     def getallvalues(self):
         return {0: self._value}
 
+    def setswitchinterval(self, microseconds):
+        self._switch_interval = microseconds
+
+    def getswitchinterval(self):
+        return self._switch_interval
+
+    def get_gil_stats(self):
+        from rpython.rlib import rgil
+        from rpython.rlib.rarithmetic import r_longlong
+        return [r_longlong(0)] * rgil.STATS
+
+    def reset_gil_stats(self):
+        pass
+
     def _cleanup_(self):
         # should still be unfilled at this point during translation.
         # but in some corner cases it is not...  unsure why
@@ -53,6 +53,8 @@ def cpython_code_signature(code):
 class CodeHookCache(object):
     def __init__(self, space):
         self._code_hook = None
+        # a pypyjit.interp_warmup.WarmupProfile with entries to preload
+        self._jit_warmup_profile = None
 
 class PyCode(eval.Code):
     "CPython-style code objects."
@@ -108,7 +110,10 @@ class PyCode(eval.Code):
         return True
 
     def new_code_hook(self):
-        code_hook = self.space.fromcache(CodeHookCache)._code_hook
+        cache = self.space.fromcache(CodeHookCache)
+        if cache._jit_warmup_profile is not None:
+            cache._jit_warmup_profile.new_code(self)
+        code_hook = cache._code_hook
         if code_hook is not None:
             try:
                 self.space.call_function(code_hook, self)
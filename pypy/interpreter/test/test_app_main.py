@@ -231,6 +231,21 @@ class TestParseCommandLine:
         self.check(['-X', 'track-resources'], {}, sys_argv=[''], run_stdin=True)
         assert myflag[0] == True
 
+    def test_import_time(self, monkeypatch):
+        myflag = [False]
+        def pypy_set_import_time(flag):
+            myflag[0] = flag
+        monkeypatch.setattr(sys, 'pypy_set_import_time', pypy_set_import_time, raising=False)
+        self.check(['-X', 'importtime'], {}, sys_argv=[''], run_stdin=True)
+        assert myflag[0] == True
+        myflag[0] = False
+        self.check([], {'PYTHONPROFILEIMPORTTIME': '1'}, sys_argv=[''], run_stdin=True)
+        assert myflag[0] == True
+        myflag[0] = False
+        self.check(['-E'], {'PYTHONPROFILEIMPORTTIME': '1'}, sys_argv=[''], run_stdin=True,
+                   ignore_environment=1)
+        assert myflag[0] == False
+
 class TestInteraction:
     """
     These tests require pexpect (UNIX-only).
@@ -0,0 +1,50 @@
+"""Measure the datetime operations that dominate log processing: parsing
+ISO 8601 timestamps, comparing and adding timedeltas, and formatting them
+back with isoformat().
+
+Run with a translated pypy:
+
+    pypy bench_datetime.py [count [repeat]]
+"""
+
+import sys, time
+from datetime import datetime, timedelta
+
+def make_lines(count):
+    start = datetime(2019, 7, 3, 12, 0, 0)
+    step = timedelta(seconds=1, microseconds=1234)
+    return [(start + i * step).strftime('%Y-%m-%d %H:%M:%S.%f')
+            for i in range(count)]
+
+def parse(lines):
+    return [datetime.strptime(line, '%Y-%m-%d %H:%M:%S.%f') for line in lines]
+
+def shift_and_compare(stamps):
+    offset = timedelta(hours=2)
+    limit = stamps[len(stamps) // 2] + offset
+    return len([stamp for stamp in stamps if stamp + offset < limit])
+
+def format_all(stamps):
+    return [stamp.isoformat() for stamp in stamps]
+
+def bench(func, arg, repeat):
+    best = None
+    for i in range(repeat):
+        t = time.time()
+        func(arg)
+        t = time.time() - t
+        if best is None or t < best:
+            best = t
+    return best
+
+def main(count=200000, repeat=5):
+    lines = make_lines(count)
+    stamps = parse(lines)
+    for name, func, arg in [('strptime', parse, lines),
+                            ('add and compare', shift_and_compare, stamps),
+                            ('isoformat', format_all, stamps)]:
+        t = bench(func, arg, repeat)
+        print '%-16s %8.3f s  %10.0f per second' % (name, t, count / t)
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,28 @@
+from rpython.rlib import rgil
+
+
+def gil_stats(space):
+    """Return a dict with statistics about the contention on the GIL:
+    'contended' is the number of times a thread had to wait for it,
+    'wait_time' and 'max_wait_time' are the total and the longest time
+    spent waiting, in seconds, 'drop_requests' is the number of waits
+    that ended after asking the thread holding the GIL to drop it (see
+    sys.setswitchinterval()), and 'handoffs' is the number of times a
+    thread gave the GIL to a waiting thread."""
+    stats = space.threadlocals.get_gil_stats()
+    w_result = space.newdict()
+    space.setitem_str(w_result, 'contended',
+            space.newint(stats[rgil.STAT_CONTENDED]))
+    space.setitem_str(w_result, 'wait_time',
+            space.newfloat(float(stats[rgil.STAT_WAIT_TIME]) * 1e-6))
+    space.setitem_str(w_result, 'max_wait_time',
+            space.newfloat(float(stats[rgil.STAT_MAX_WAIT_TIME]) * 1e-6))
+    space.setitem_str(w_result, 'drop_requests',
+            space.newint(stats[rgil.STAT_DROP_REQUESTS]))
+    space.setitem_str(w_result, 'handoffs',
+            space.newint(stats[rgil.STAT_HANDOFFS]))
+    return w_result
+
+def reset_gil_stats(space):
+    """Reset all the counters returned by gil_stats() to zero."""
+    space.threadlocals.reset_gil_stats()
@@ -1,24 +1,274 @@
 from pypy.interpreter.baseobjspace import W_Root
-from pypy.interpreter.typedef import TypeDef
-from pypy.interpreter.gateway import interp2app
+from pypy.interpreter.typedef import TypeDef, GetSetProperty
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from rpython.rlib.rstring import StringBuilder
 from rpython.tool.sourcetools import func_with_new_name
 
-def create_class(name):
-    class W_Class(W_Root):
-        'builtin base clasee for datetime.%s to allow interop with cpyext' % name
-        def descr_new__(space, w_type):
-            return space.allocate_instance(W_Class, w_type)
+# The fields of the lib_pypy/datetime.py classes are stored unboxed in
+# these base classes, and exposed as the '_year', '_month'... attributes
+# that the app-level code uses.  datetime.datetime inherits from
+# datetime.date, so W_DateTime_Date also has the fields of a time.
 
-    W_Class.typedef = TypeDef(name,
-        __new__ = interp2app(func_with_new_name(
-                                    W_Class.descr_new__.im_func,
-                                    '%s_new' % (name,))),
-        )
-    W_Class.typedef.acceptable_as_base_class = True
-    return W_Class
+def int_field(cls, name):
+    def fget(space, w_self):
+        return space.newint(getattr(w_self, name))
+    def fset(space, w_self, w_value):
+        setattr(w_self, name, space.int_w(w_value))
+    fget = func_with_new_name(fget, 'fget_' + name)
+    fset = func_with_new_name(fset, 'fset_' + name)
+    return GetSetProperty(fget, fset, cls=cls, name='_' + name)
 
-W_DateTime_Time = create_class('pypydatetime_time')
-W_DateTime_Date = create_class('pypydatetime_date')
-W_DateTime_Delta = create_class('pypydatetime_delta')
+def tzinfo_field(cls):
+    def fget(space, w_self):
+        if w_self.w_tzinfo is None:
+            return space.w_None
+        return w_self.w_tzinfo
+    def fset(space, w_self, w_value):
+        w_self.w_tzinfo = None if space.is_none(w_value) else w_value
+    fget = func_with_new_name(fget, 'fget_tzinfo_' + cls.__name__)
+    fset = func_with_new_name(fset, 'fset_tzinfo_' + cls.__name__)
+    return GetSetProperty(fget, fset, cls=cls, name='_tzinfo')
 
+def _cmp(a, b):
+    if a < b:
+        return -1
+    if a > b:
+        return 1
+    return 0
 
+def _append_int(builder, value, width):
+    # zero-padded, like '%0*d' % (width, value) for a non-negative value
+    digits = str(value)
+    for i in range(width - len(digits)):
+        builder.append('0')
+    builder.append(digits)
+
+def _format_date(builder, year, month, day):
+    _append_int(builder, year, 4)
+    builder.append('-')
+    _append_int(builder, month, 2)
+    builder.append('-')
+    _append_int(builder, day, 2)
+
+def _format_time(builder, hour, minute, second, microsecond):
+    # skip trailing microseconds when microsecond == 0
+    _append_int(builder, hour, 2)
+    builder.append(':')
+    _append_int(builder, minute, 2)
+    builder.append(':')
+    _append_int(builder, second, 2)
+    if microsecond:
+        builder.append('.')
+        _append_int(builder, microsecond, 6)
+
+
+class W_DateTime_Date(W_Root):
+    'builtin base class for datetime.date to allow interop with cpyext'
+    year = 0
+    month = 0
+    day = 0
+    hour = 0
+    minute = 0
+    second = 0
+    microsecond = 0
+    w_tzinfo = None
+    hashcode = -1
+
+    def descr_new__(space, w_type):
+        return space.allocate_instance(W_DateTime_Date, w_type)
+
+    def descr_cmp_date(self, space, w_other):
+        other = space.interp_w(W_DateTime_Date, w_other)
+        return space.newint(self._cmp_date(other))
+
+    def descr_cmp_datetime(self, space, w_other):
+        other = space.interp_w(W_DateTime_Date, w_other)
+        result = self._cmp_date(other)
+        if result == 0:
+            result = _cmp(self._seconds(), other._seconds())
+            if result == 0:
+                result = _cmp(self.microsecond, other.microsecond)
+        return space.newint(result)
+
+    def _cmp_date(self, other):
+        result = _cmp(self.year, other.year)
+        if result == 0:
+            result = _cmp(self.month, other.month)
+            if result == 0:
+                result = _cmp(self.day, other.day)
+        return result
+
+    def _seconds(self):
+        return (self.hour * 60 + self.minute) * 60 + self.second
+
+    def descr_isodate(self, space):
+        builder = StringBuilder(10)
+        _format_date(builder, self.year, self.month, self.day)
+        return space.newtext(builder.build())
+
+    def descr_isotime(self, space):
+        builder = StringBuilder(15)
+        _format_time(builder, self.hour, self.minute, self.second,
+                     self.microsecond)
+        return space.newtext(builder.build())
+
+W_DateTime_Date.typedef = TypeDef('pypydatetime_date',
+    __new__ = interp2app(W_DateTime_Date.descr_new__.im_func),
+    _year = int_field(W_DateTime_Date, 'year'),
+    _month = int_field(W_DateTime_Date, 'month'),
+    _day = int_field(W_DateTime_Date, 'day'),
+    _hour = int_field(W_DateTime_Date, 'hour'),
+    _minute = int_field(W_DateTime_Date, 'minute'),
+    _second = int_field(W_DateTime_Date, 'second'),
+    _microsecond = int_field(W_DateTime_Date, 'microsecond'),
+    _tzinfo = tzinfo_field(W_DateTime_Date),
+    _hashcode = int_field(W_DateTime_Date, 'hashcode'),
+    _cmp_date = interp2app(W_DateTime_Date.descr_cmp_date),
+    _cmp_datetime = interp2app(W_DateTime_Date.descr_cmp_datetime),
+    _isodate = interp2app(W_DateTime_Date.descr_isodate),
+    _isotime = interp2app(W_DateTime_Date.descr_isotime),
+    )
+W_DateTime_Date.typedef.acceptable_as_base_class = True
+
+
+class W_DateTime_Time(W_Root):
+    'builtin base class for datetime.time to allow interop with cpyext'
+    hour = 0
+    minute = 0
+    second = 0
+    microsecond = 0
+    w_tzinfo = None
+    hashcode = -1
+
+    def descr_new__(space, w_type):
+        return space.allocate_instance(W_DateTime_Time, w_type)
+
+    def descr_cmp_time(self, space, w_other):
+        other = space.interp_w(W_DateTime_Time, w_other)
+        result = _cmp(self._seconds(), other._seconds())
+        if result == 0:
+            result = _cmp(self.microsecond, other.microsecond)
+        return space.newint(result)
+
+    def _seconds(self):
+        return (self.hour * 60 + self.minute) * 60 + self.second
+
+    def descr_isotime(self, space):
+        builder = StringBuilder(15)
+        _format_time(builder, self.hour, self.minute, self.second,
+                     self.microsecond)
+        return space.newtext(builder.build())
+
+W_DateTime_Time.typedef = TypeDef('pypydatetime_time',
+    __new__ = interp2app(W_DateTime_Time.descr_new__.im_func),
+    _hour = int_field(W_DateTime_Time, 'hour'),
+    _minute = int_field(W_DateTime_Time, 'minute'),
+    _second = int_field(W_DateTime_Time, 'second'),
+    _microsecond = int_field(W_DateTime_Time, 'microsecond'),
+    _tzinfo = tzinfo_field(W_DateTime_Time),
+    _hashcode = int_field(W_DateTime_Time, 'hashcode'),
+    _cmp_time = interp2app(W_DateTime_Time.descr_cmp_time),
+    _isotime = interp2app(W_DateTime_Time.descr_isotime),
+    )
+W_DateTime_Time.typedef.acceptable_as_base_class = True
+
+
+class W_DateTime_Delta(W_Root):
+    'builtin base class for datetime.timedelta to allow interop with cpyext'
+    days = 0
+    seconds = 0
+    microseconds = 0
+    hashcode = -1
+
+    def descr_new__(space, w_type):
+        return space.allocate_instance(W_DateTime_Delta, w_type)
+
+    def descr_cmp_delta(self, space, w_other):
+        other = space.interp_w(W_DateTime_Delta, w_other)
+        result = _cmp(self.days, other.days)
+        if result == 0:
+            result = _cmp(self.seconds, other.seconds)
+            if result == 0:
+                result = _cmp(self.microseconds, other.microseconds)
+        return space.newint(result)
+
+W_DateTime_Delta.typedef = TypeDef('pypydatetime_delta',
+    __new__ = interp2app(W_DateTime_Delta.descr_new__.im_func),
+    _days = int_field(W_DateTime_Delta, 'days'),
+    _seconds = int_field(W_DateTime_Delta, 'seconds'),
+    _microseconds = int_field(W_DateTime_Delta, 'microseconds'),
+    _hashcode = int_field(W_DateTime_Delta, 'hashcode'),
+    _cmp_delta = interp2app(W_DateTime_Delta.descr_cmp_delta),
+    )
+W_DateTime_Delta.typedef.acceptable_as_base_class = True
+
+# ____________________________________________________________
+
+
+def _parse_digits(s, start, count):
+    # returns -1 if s[start:start+count] is not made of exactly 'count' digits
+    if start + count > len(s):
+        return -1
+    result = 0
+    for i in range(start, start + count):
+        c = s[i]
+        if not ('0' <= c <= '9'):
+            return -1
+        result = result * 10 + (ord(c) - ord('0'))
+    return result
+
+@unwrap_spec(date_string='text', format='text')
+def parse_isoformat(space, date_string, format):
+    """Parse 'date_string' if 'format' is one of '%Y-%m-%d',
+    '%Y-%m-%dT%H:%M:%S' or '%Y-%m-%dT%H:%M:%S.%f' (with 'T' or ' ' as the
+    separator) and 'date_string' is in the canonical zero-padded form.
+    Returns the tuple (year, month, day, hour, minute, second, microsecond),
+    or None if the string must be parsed by _strptime instead, including
+    when a field is outside of the range accepted by _strptime."""
+    if not format.startswith('%Y-%m-%d'):
+        return space.w_None
+    rest = format[8:]
+    if rest == '':
+        has_time = has_fraction = False
+    elif rest[1:] == '%H:%M:%S' and rest[0] in 'T ':
+        has_time = True
+        has_fraction = False
+    elif rest[1:] == '%H:%M:%S.%f' and rest[0] in 'T ':
+        has_time = has_fraction = True
+    else:
+        return space.w_None
+    s = date_string
+    hour = minute = second = microsecond = 0
+    year = _parse_digits(s, 0, 4)
+    month = _parse_digits(s, 5, 2)
+    day = _parse_digits(s, 8, 2)
+    if (year < 0 or not 1 <= month <= 12 or not 1 <= day <= 31 or
+            s[4] != '-' or s[7] != '-'):
+        return space.w_None
+    end = 10
+    if has_time:
+        if len(s) < 19 or s[10] != rest[0] or s[13] != ':' or s[16] != ':':
+            return space.w_None
+        hour = _parse_digits(s, 11, 2)
+        minute = _parse_digits(s, 14, 2)
+        second = _parse_digits(s, 17, 2)
+        if (not 0 <= hour <= 23 or not 0 <= minute <= 59 or
+                not 0 <= second <= 61):
+            return space.w_None
+        end = 19
+        if has_fraction:
+            if len(s) < 21 or s[19] != '.':
+                return space.w_None
+            ndigits = min(len(s) - 20, 6)
+            microsecond = _parse_digits(s, 20, ndigits)
+            if microsecond < 0:
+                return space.w_None
+            for i in range(6 - ndigits):
+                microsecond *= 10
+            end = 20 + ndigits
+    if end != len(s):
+        return space.w_None
+    return space.newtuple([space.newint(year), space.newint(month),
+                           space.newint(day), space.newint(hour),
+                           space.newint(minute), space.newint(second),
+                           space.newint(microsecond)])
@@ -32,6 +32,8 @@ class ThreadModule(MixedModule):
     interpleveldefs = {
         '_signals_enter':  'interp_signal.signals_enter',
         '_signals_exit':   'interp_signal.signals_exit',
+        'gil_stats':       'interp_gil.gil_stats',
+        'reset_gil_stats': 'interp_gil.reset_gil_stats',
     }
 
 
@@ -65,6 +67,7 @@ class PyPyDateTime(MixedModule):
         'dateinterop'  : 'interp_pypydatetime.W_DateTime_Date',
         'timeinterop'  : 'interp_pypydatetime.W_DateTime_Time',
         'deltainterop' : 'interp_pypydatetime.W_DateTime_Delta',
+        'parse_isoformat' : 'interp_pypydatetime.parse_isoformat',
     }
 
 class PyPyBufferable(MixedModule):
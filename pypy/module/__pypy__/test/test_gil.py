@@ -0,0 +1,36 @@
+from pypy.module.thread.test.support import GenericTestThread
+
+
+class AppTestGILStatsNoThread:
+    spaceconfig = dict(usemodules=['__pypy__'])
+
+    def test_gil_stats(self):
+        from __pypy__ import thread
+        stats = thread.gil_stats()
+        assert sorted(stats) == ['contended', 'drop_requests', 'handoffs',
+                                 'max_wait_time', 'wait_time']
+        assert set(stats.values()) == set([0])
+        thread.reset_gil_stats()
+
+
+class AppTestGILStats(GenericTestThread):
+    spaceconfig = dict(usemodules=['__pypy__', 'thread', 'time'])
+
+    def test_gil_stats(self):
+        import __pypy__, thread, time
+        __pypy__.thread.reset_gil_stats()
+        done = []
+        def busy():
+            for i in range(20000):
+                pass
+            done.append(None)
+        thread.start_new_thread(busy, ())
+        while not done:
+            time.sleep(0.01)
+        stats = __pypy__.thread.gil_stats()
+        assert stats['contended'] >= 1
+        assert stats['wait_time'] >= stats['max_wait_time'] > 0.0
+        __pypy__.thread.reset_gil_stats()
+        stats = __pypy__.thread.gil_stats()
+        assert stats['contended'] == 0
+        assert stats['wait_time'] == 0.0
@@ -0,0 +1,95 @@
+class AppTestPyPyDateTime(object):
+    spaceconfig = dict(usemodules=['time', 'struct', 'binascii'])
+
+    def test_fields(self):
+        from __pypy__._pypydatetime import dateinterop, timeinterop
+        class D(dateinterop):
+            __slots__ = ()
+        d = D()
+        assert d._year == d._hour == 0
+        assert d._tzinfo is None
+        d._year = 2019
+        d._month = 7
+        d._day = 3
+        assert (d._year, d._month, d._day) == (2019, 7, 3)
+        raises(TypeError, setattr, d, '_year', 'x')
+        assert not hasattr(d, '__dict__')
+        t = timeinterop.__new__(timeinterop)
+        t._tzinfo = tz = object()
+        assert t._tzinfo is tz
+        t._tzinfo = None
+        assert t._tzinfo is None
+
+    def test_cmp_and_format(self):
+        from __pypy__._pypydatetime import dateinterop, timeinterop
+        from __pypy__._pypydatetime import deltainterop
+        def make(cls, **fields):
+            obj = cls.__new__(cls)
+            for key, value in fields.items():
+                setattr(obj, '_' + key, value)
+            return obj
+        a = make(dateinterop, year=2019, month=7, day=3, hour=5)
+        b = make(dateinterop, year=2019, month=7, day=3, hour=4,
+                 microsecond=999999)
+        assert a._cmp_date(b) == 0
+        assert a._cmp_datetime(b) == 1
+        assert b._cmp_datetime(a) == -1
+        assert b._isodate() == '2019-07-03'
+        assert b._isotime() == '04:00:00.999999'
+        assert a._isotime() == '05:00:00'
+        t = make(timeinterop, hour=23, minute=5, second=9, microsecond=12)
+        assert t._isotime() == '23:05:09.000012'
+        assert t._cmp_time(make(timeinterop, hour=23, minute=6)) == -1
+        d1 = make(deltainterop, days=-1, seconds=5)
+        d2 = make(deltainterop, days=-1, seconds=5, microseconds=1)
+        assert d1._cmp_delta(d2) == -1
+        assert d2._cmp_delta(d1) == 1
+        assert d1._cmp_delta(d1) == 0
+        raises(TypeError, a._cmp_date, t)
+
+    def test_parse_isoformat(self):
+        from __pypy__._pypydatetime import parse_isoformat
+        assert parse_isoformat('2019-07-03', '%Y-%m-%d') == (
+            2019, 7, 3, 0, 0, 0, 0)
+        assert parse_isoformat('2019-07-03T12:34:56',
+                               '%Y-%m-%dT%H:%M:%S') == (
+            2019, 7, 3, 12, 34, 56, 0)
+        assert parse_isoformat('2019-07-03 12:34:56.5',
+                               '%Y-%m-%d %H:%M:%S.%f') == (
+            2019, 7, 3, 12, 34, 56, 500000)
+        assert parse_isoformat('2019-07-03 12:34:56.000123',
+                               '%Y-%m-%d %H:%M:%S.%f') == (
+            2019, 7, 3, 12, 34, 56, 123)
+        for string, format in [
+                ('2019-7-03', '%Y-%m-%d'),
+                ('2019-07-03 ', '%Y-%m-%d'),
+                ('2019-13-03', '%Y-%m-%d'),
+                ('2019-07-03', '%d/%m/%Y'),
+                ('2019-07-03T12:34:56', '%Y-%m-%d %H:%M:%S'),
+                ('2019-07-03 24:00:00', '%Y-%m-%d %H:%M:%S'),
+                ('2019-07-03 12:34:56.', '%Y-%m-%d %H:%M:%S.%f'),
+                ('2019-07-03 12:34:56.1234567', '%Y-%m-%d %H:%M:%S.%f'),
+                ('2019-07-03 12:34', '%Y-%m-%d %H:%M'),
+                ]:
+            assert parse_isoformat(string, format) is None
+
+    def test_datetime_module(self):
+        import datetime, pickle, copy
+        d = datetime.datetime(2019, 7, 3, 12, 34, 56, 789)
+        assert d.isoformat() == '2019-07-03T12:34:56.000789'
+        assert str(d.date()) == '2019-07-03'
+        assert str(d.time()) == '12:34:56.000789'
+        assert d == datetime.datetime.strptime('2019-07-03 12:34:56.000789',
+                                               '%Y-%m-%d %H:%M:%S.%f')
+        assert d < d + datetime.timedelta(microseconds=1)
+        assert datetime.timedelta(1) > datetime.timedelta(0, 86399)
+        raises(ValueError, datetime.datetime.strptime, '2019-02-30',
+               '%Y-%m-%d')
+        class MyDateTime(datetime.datetime):
+            pass
+        m = MyDateTime(2019, 7, 3)
+        m.extra = 42
+        m2 = copy.copy(m)
+        assert type(m2) is MyDateTime and m2 == m
+        assert pickle.loads(pickle.dumps(d)) == d
+        assert pickle.loads(pickle.dumps(d.time())) == d.time()
@@ -0,0 +1,63 @@
+"""Compare the built-in _bisect module with the pure Python functions of
+lib-python/2.7/bisect.py, on sorted lists of ints, floats, strings and
+tuples.
+
+Run with a translated pypy:
+
+    pypy bench_bisect.py [size]
+"""
+
+import sys, time
+
+def import_bisect(blocked):
+    saved = sys.modules.pop('bisect', None)
+    if blocked:
+        sys.modules['_bisect'] = None    # makes 'from _bisect import *' fail
+    try:
+        import bisect
+        return bisect
+    finally:
+        if blocked:
+            del sys.modules['_bisect']
+        if saved is not None:
+            sys.modules['bisect'] = saved
+        else:
+            del sys.modules['bisect']
+
+def make_data(n):
+    ints = range(0, 2 * n, 2)
+    return [
+        ('int', ints),
+        ('float', [x / 7.0 for x in ints]),
+        ('str', ['key%09d' % x for x in ints]),
+        ('tuple', [(x, -x) for x in ints]),
+    ]
+
+def bench(module, data, lookups):
+    t0 = time.time()
+    bisect_left = module.bisect_left
+    bisect_right = module.bisect_right
+    for i in xrange(lookups):
+        x = data[(i * 7919) % len(data)]
+        bisect_left(data, x)
+        bisect_right(data, x)
+    t1 = time.time()
+    lst = []
+    for i in xrange(0, len(data), 10):
+        module.insort(lst, data[(i * 7919) % len(data)])
+    t2 = time.time()
+    return t1 - t0, t2 - t1
+
+def main(argv):
+    n = int(argv[1]) if len(argv) > 1 else 100000
+    modules = [('bisect.py', import_bisect(True)),
+               ('_bisect', import_bisect(False))]
+    print '%-10s %-6s %10s %10s' % ('module', 'items', 'bisect', 'insort')
+    for kind, data in make_data(n):
+        for name, module in modules:
+            bench(module, data, 10 * n)      # warm up the JIT
+            print '%-10s %-6s %10.3f %10.3f' % (
+                (name, kind) + bench(module, data, 10 * n))
+
+if __name__ == '__main__':
+    main(sys.argv)
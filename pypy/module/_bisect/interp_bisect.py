@@ -0,0 +1,132 @@
+from rpython.rlib.objectmodel import specialize
+from rpython.rlib.rarithmetic import intmask, r_uint
+
+from pypy.interpreter.error import oefmt
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.objspace.std.bytesobject import W_BytesObject
+from pypy.objspace.std.floatobject import W_FloatObject
+from pypy.objspace.std.intobject import W_IntObject
+from pypy.objspace.std.listobject import (
+    W_ListObject, BytesListStrategy, FloatListStrategy, IntegerListStrategy)
+
+
+def _middle(lo, hi):
+    # lo + hi may not fit in a signed integer
+    return intmask((r_uint(lo) + r_uint(hi)) >> 1)
+
+@specialize.argtype(1)
+def _bisect_unboxed(items, x, lo, hi, left):
+    while lo < hi:
+        mid = _middle(lo, hi)
+        if left:
+            less = items[mid] < x
+        else:
+            less = not (x < items[mid])
+        if less:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+def _bisect_w(space, w_a, w_x, lo, hi, left):
+    while lo < hi:
+        mid = _middle(lo, hi)
+        w_litem = space.getitem(w_a, space.newint(mid))
+        if left:
+            less = space.is_true(space.lt(w_litem, w_x))
+        else:
+            less = not space.is_true(space.lt(w_x, w_litem))
+        if less:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+def _bisect(space, w_a, w_x, lo, hi, left):
+    if lo < 0:
+        raise oefmt(space.w_ValueError, "lo must be non-negative")
+    if hi == -1:
+        hi = space.len_w(w_a)
+    if type(w_a) is W_ListObject and hi <= w_a.length():
+        # an exact list whose items and 'x' compare without running any
+        # app-level code
+        strategy = w_a.strategy
+        if (type(w_x) is W_IntObject and
+                strategy is space.fromcache(IntegerListStrategy)):
+            return _bisect_unboxed(w_a.getitems_int(), space.int_w(w_x),
+                                   lo, hi, left)
+        if (type(w_x) is W_FloatObject and
+                strategy is space.fromcache(FloatListStrategy)):
+            return _bisect_unboxed(w_a.getitems_float(), space.float_w(w_x),
+                                   lo, hi, left)
+        if (type(w_x) is W_BytesObject and
+                strategy is space.fromcache(BytesListStrategy)):
+            return _bisect_unboxed(w_a.getitems_bytes(), space.bytes_w(w_x),
+                                   lo, hi, left)
+    return _bisect_w(space, w_a, w_x, lo, hi, left)
+
+def _insert(space, w_a, index, w_x):
+    if space.is_w(space.type(w_a), space.w_list):
+        assert isinstance(w_a, W_ListObject)
+        w_a.descr_insert(space, index, w_x)
+    else:
+        space.call_method(w_a, 'insert', space.newint(index), w_x)
+
+
+@unwrap_spec(lo=int, hi=int)
+def bisect_left(space, w_a, w_x, lo=0, hi=-1):
+    """bisect_left(a, x[, lo[, hi]]) -> index
+
+Return the index where to insert item x in list a, assuming a is sorted.
+
+The return value i is such that all e in a[:i] have e < x, and all e in
+a[i:] have e >= x.  So if x already appears in the list, i points just
+before the leftmost x already there.
+
+Optional args lo (default 0) and hi (default len(a)) bound the
+slice of a to be searched.
+"""
+    return space.newint(_bisect(space, w_a, w_x, lo, hi, True))
+
+@unwrap_spec(lo=int, hi=int)
+def bisect_right(space, w_a, w_x, lo=0, hi=-1):
+    """bisect_right(a, x[, lo[, hi]]) -> index
+
+Return the index where to insert item x in list a, assuming a is sorted.
+
+The return value i is such that all e in a[:i] have e <= x, and all e in
+a[i:] have e > x.  So if x already appears in the list, i points just
+beyond the rightmost x already there
+
+Optional args lo (default 0) and hi (default len(a)) bound the
+slice of a to be searched.
+"""
+    return space.newint(_bisect(space, w_a, w_x, lo, hi, False))
+
+@unwrap_spec(lo=int, hi=int)
+def insort_left(space, w_a, w_x, lo=0, hi=-1):
+    """insort_left(a, x[, lo[, hi]])
+
+Insert item x in list a, and keep it sorted assuming a is sorted.
+
+If x is already in a, insert it to the left of the leftmost x.
+
+Optional args lo (default 0) and hi (default len(a)) bound the
+slice of a to be searched.
+"""
+    index = _bisect(space, w_a, w_x, lo, hi, True)
+    _insert(space, w_a, index, w_x)
+
+@unwrap_spec(lo=int, hi=int)
+def insort_right(space, w_a, w_x, lo=0, hi=-1):
+    """insort_right(a, x[, lo[, hi]])
+
+Insert item x in list a, and keep it sorted assuming a is sorted.
+
+If x is already in a, insert it to the right of the rightmost x.
+
+Optional args lo (default 0) and hi (default len(a)) bound the
+slice of a to be searched.
+"""
+    index = _bisect(space, w_a, w_x, lo, hi, False)
+    _insert(space, w_a, index, w_x)
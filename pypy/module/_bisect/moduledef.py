@@ -0,0 +1,28 @@
+"""
+Mixed-module definition for the _bisect module.
+lib-python/2.7/bisect.py contains the pure Python version of these functions;
+it imports the ones below if this module is enabled.
+"""
+
+from pypy.interpreter.mixedmodule import MixedModule
+
+
+class Module(MixedModule):
+    """Bisection algorithms.
+
+This module provides support for maintaining a list in sorted order without
+having to sort the list after each insertion. For long lists of items with
+expensive comparison operations, this can be an improvement over the more
+common approach."""
+
+    interpleveldefs = {
+        'bisect': 'interp_bisect.bisect_right',
+        'bisect_left': 'interp_bisect.bisect_left',
+        'bisect_right': 'interp_bisect.bisect_right',
+        'insort': 'interp_bisect.insort_right',
+        'insort_left': 'interp_bisect.insort_left',
+        'insort_right': 'interp_bisect.insort_right',
+    }
+
+    appleveldefs = {
+    }
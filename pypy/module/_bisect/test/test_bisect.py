@@ -0,0 +1,63 @@
+class AppTestBisect:
+    spaceconfig = {
+        "usemodules": ['_bisect'],
+    }
+
+    def test_dict(self):
+        import _bisect
+        _bisect.__dict__  # crashes if entries in moduledef.py can't be resolved
+
+    def test_bisect(self):
+        import _bisect
+        from UserList import UserList
+        for data, x in [([1, 2, 2, 3, 5, 8], 2),
+                        ([0.5, 1.0, 1.0, 2.5], 1.0),
+                        (["a", "b", "b", "d"], "b"),
+                        ([(1, 'a'), (2, 'b'), (2, 'b')], (2, 'b')),
+                        ([1, 2, 2, 3, 5, 8], 2.0),
+                        ([0.5, 1.0, 1.0, 2.5], 1)]:
+            for seq in (data, UserList(data)):
+                left = _bisect.bisect_left(seq, x)
+                right = _bisect.bisect_right(seq, x)
+                assert left == [i for i in range(len(data)) if data[i] < x][-1] + 1
+                assert right == [i for i in range(len(data)) if data[i] <= x][-1] + 1
+                assert _bisect.bisect(seq, x) == right
+                assert _bisect.bisect_left(seq, x, 2) == max(left, 2)
+                assert _bisect.bisect_right(seq, x, 0, 1) == 1
+                assert _bisect.bisect_right(seq, x, lo=0, hi=1) == 1
+
+    def test_bisect_bounds(self):
+        import _bisect
+        raises(ValueError, _bisect.bisect_left, [1, 2, 3], 5, -1, 3)
+        raises(ValueError, _bisect.insort_right, [1, 2, 3], 5, -1)
+        raises(IndexError, _bisect.bisect_left, [1, 2, 3], 5, 0, 10)
+        assert _bisect.bisect_left([1, 2, 3], 5, 10) == 10
+        raises(TypeError, _bisect.bisect_left, 10, 10)
+
+    def test_insort(self):
+        import _bisect
+        from __pypy__ import strategy
+        for data, strat in [([5, 3, 8, 1, 9, 2, 7], "IntegerListStrategy"),
+                            ([0.5, -3.0, 8.25, 2.0], "FloatListStrategy"),
+                            (["pear", "apple", "fig"], "BytesListStrategy"),
+                            ([(2, 'b'), (1, 'a'), (3, 'c')], "ObjectListStrategy")]:
+            lst = []
+            for item in data:
+                _bisect.insort_left(lst, item)
+                _bisect.insort(lst, item)
+            assert lst == sorted(data + data)
+            assert strategy(lst) == strat
+        lst = [1, 2]
+        _bisect.insort(lst, 3, 10)
+        assert lst == [1, 2, 3]
+
+    def test_insort_list_subclass(self):
+        import _bisect
+        class List(list):
+            data = []
+            def insert(self, index, item):
+                self.data.insert(index, item)
+        lst = List()
+        _bisect.insort_left(lst, 10)
+        _bisect.insort_right(lst, 5)
+        assert lst.data == [5, 10]
@@ -0,0 +1,189 @@
+# The parts of _elementtree written at app-level.  Like CPython's
+# _elementtree.c, most of the API is shared with xml.etree.ElementTree,
+# but that module can only be imported at run-time, so these functions
+# import it when they are called, and _bootstrap() adds the shared names
+# to the module when it is imported.
+
+def _bootstrap(module):
+    from xml.etree import ElementTree as ET
+
+    class ElementTree(ET.ElementTree):
+        __doc__ = ET.ElementTree.__doc__
+
+        def parse(self, source, parser=None):
+            close_source = False
+            if not hasattr(source, "read"):
+                source = open(source, "rb")
+                close_source = True
+            try:
+                if parser is None:
+                    parser = module.XMLParser()
+                    self._root = parser._parse(source)
+                    return self._root
+                while True:
+                    data = source.read(65536)
+                    if not data:
+                        break
+                    parser.feed(data)
+                self._root = parser.close()
+                return self._root
+            finally:
+                if close_source:
+                    source.close()
+
+    # the serializer of ElementTree recognizes comments and processing
+    # instructions by their tag, which must be ET.Comment or ET.PI, so
+    # the factories of this module are proxies comparing equal to them
+    class CommentProxy:
+        def __call__(self, text=None):
+            element = module.Element(ET.Comment)
+            element.text = text
+            return element
+        def __cmp__(self, other):
+            return cmp(ET.Comment, other)
+
+    class PIProxy:
+        def __call__(self, target, text=None):
+            element = module.Element(ET.PI)
+            element.text = target
+            if text:
+                element.text = target + " " + text
+            return element
+        def __cmp__(self, other):
+            return cmp(ET.PI, other)
+
+    ElementTree.__module__ = module.__name__
+    module.ElementTree = ElementTree
+    module.Comment = CommentProxy()
+    module.PI = module.ProcessingInstruction = PIProxy()
+    for name in ['ParseError', 'QName', 'dump', 'iselement', 'tostring',
+                 'tostringlist', 'register_namespace', 'ElementPath']:
+        setattr(module, name, getattr(ET, name))
+
+
+def XML(text, parser=None):
+    """Parse an XML document from a string constant, and return its root
+    element."""
+    if not parser:
+        from _elementtree import XMLParser
+        parser = XMLParser()
+    parser.feed(text)
+    return parser.close()
+
+def XMLID(text, parser=None):
+    """Parse an XML document from a string constant, and return a tuple
+    (root element, dictionary mapping the "id" attributes to elements)."""
+    if not parser:
+        from _elementtree import XMLParser
+        parser = XMLParser()
+    parser.feed(text)
+    tree = parser.close()
+    ids = {}
+    for elem in tree.iter():
+        id = elem.get("id")
+        if id:
+            ids[id] = elem
+    return tree, ids
+
+def fromstringlist(sequence, parser=None):
+    """Parse an XML document from a sequence of string fragments."""
+    if not parser:
+        from _elementtree import XMLParser
+        parser = XMLParser()
+    for text in sequence:
+        parser.feed(text)
+    return parser.close()
+
+def parse(source, parser=None):
+    """Parse an XML document into an ElementTree."""
+    from _elementtree import ElementTree
+    tree = ElementTree()
+    tree.parse(source, parser)
+    return tree
+
+def iterparse(source, events=None, parser=None, clear=False):
+    """Parse an XML document into an element tree incrementally, and
+    return an iterator of (event, element) pairs.  'events' lists the
+    events to report among "start", "end", "start-ns" and "end-ns", by
+    default only "end".
+
+    PyPy extension: if 'clear' is true, the subelements of an element
+    are removed from it when the iterator goes past its "end" event, so
+    they are freed as soon as they are no longer used instead of staying
+    in the tree until the end of the parsing.  Each element is complete
+    when its "end" event is reported; only the empty element stays in
+    its parent.  This does the usual elem.clear() of a streaming loop,
+    except that the text, tail and attributes are kept."""
+    close_source = False
+    if not hasattr(source, "read"):
+        source = open(source, "rb")
+        close_source = True
+    try:
+        if parser is None:
+            from _elementtree import XMLParser
+            parser = XMLParser()
+        return _IterParseIterator(source, events, parser, close_source,
+                                  clear)
+    except:
+        if close_source:
+            source.close()
+        raise
+
+class _IterParseIterator(object):
+
+    def __init__(self, source, events, parser, close_source, clear):
+        self._file = source
+        self._close_file = close_source
+        self._events = []
+        self._index = 0
+        self._error = None
+        self.root = self._root = None
+        self._parser = parser
+        self._clear = clear
+        self._finished = None
+        parser._setevents(self._events, events, clear)
+
+    def next(self):
+        if self._finished is not None:
+            # the consumer is done with the element of the last "end" event
+            del self._finished[:]
+            self._finished = None
+        try:
+            while True:
+                try:
+                    item = self._events[self._index]
+                    self._index += 1
+                    if self._clear and item[0] == "end":
+                        self._finished = item[1]
+                    return item
+                except IndexError:
+                    pass
+                if self._error:
+                    e = self._error
+                    self._error = None
+                    raise e
+                if self._parser is None:
+                    self.root = self._root
+                    break
+                # load event buffer
+                del self._events[:]
+                self._index = 0
+                data = self._file.read(16384)
+                if data:
+                    try:
+                        self._parser.feed(data)
+                    except SyntaxError as exc:
+                        self._error = exc
+                else:
+                    self._root = self._parser.close()
+                    self._parser = None
+        except:
+            if self._close_file:
+                self._file.close()
+            raise
+        if self._close_file:
+            self._file.close()
+        raise StopIteration
+
+    def __iter__(self):
+        return self
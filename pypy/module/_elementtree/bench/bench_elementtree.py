@@ -0,0 +1,66 @@
+"""Measure parsing a generated document with xml.etree.cElementTree,
+both in one go and with iterparse(), with and without clear=True.
+
+Run with a translated pypy:
+
+    pypy bench_elementtree.py [items [repeat]]
+"""
+
+import sys, time
+from StringIO import StringIO
+from xml.etree import cElementTree as ET
+
+def make_document(n):
+    parts = ['<catalog xmlns:x="urn:example">']
+    for i in xrange(n):
+        parts.append('<item id="%d" x:kind="thing"><name>item %d</name>'
+                     '<price>%d.50</price><!-- note --></item>' % (i, i, i))
+    parts.append('</catalog>')
+    return ''.join(parts)
+
+def parse_all(data):
+    root = ET.fromstring(data)
+    return len(root.findall('item'))
+
+def iterparse_keep(data):
+    count = 0
+    for event, elem in ET.iterparse(StringIO(data)):
+        if elem.tag == 'item':
+            count += 1
+    return count
+
+def iterparse_clear(data):
+    count = 0
+    for event, elem in ET.iterparse(StringIO(data), clear=True):
+        if elem.tag == 'item':
+            count += 1
+    return count
+
+def bench(func, arg, repeat):
+    best = None
+    for i in range(repeat):
+        t = time.time()
+        func(arg)
+        t = time.time() - t
+        if best is None or t < best:
+            best = t
+    return best
+
+def main(n=200000, repeat=5):
+    data = make_document(n)
+    print 'document: %d bytes, %d items' % (len(data), n)
+    modes = [('fromstring', parse_all),
+             ('iterparse', iterparse_keep)]
+    try:
+        ET.iterparse(StringIO('<a/>'), clear=True)
+    except TypeError:     # not PyPy's _elementtree
+        pass
+    else:
+        modes.append(('iterparse(clear=True)', iterparse_clear))
+    for name, func in modes:
+        t = bench(func, data, repeat)
+        print '%-22s %8.3f s  %10.1f MB per second' % (
+            name, t, len(data) / t / 1e6)
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
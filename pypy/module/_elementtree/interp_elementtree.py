@@ -0,0 +1,1087 @@
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import OperationError, oefmt
+from pypy.interpreter.gateway import interp2app, unwrap_spec, WrappedDefault
+from pypy.interpreter.typedef import (
+    TypeDef, GetSetProperty, interp_attrproperty_w)
+from pypy.module.pyexpat import interp_pyexpat
+from rpython.rlib import rutf8
+from rpython.rtyper.lltypesystem import lltype, rffi
+
+
+class State(object):
+    """Lazily imported app-level helpers."""
+
+    def __init__(self, space):
+        self.w_ElementPath = None
+        self.w_deepcopy = None
+        self.reprs_w = []       # the elements whose repr() is in progress
+
+    def get_ElementPath(self, space):
+        if self.w_ElementPath is None:
+            space.call_method(space.builtin, '__import__',
+                              space.newtext('xml.etree.ElementPath'))
+            w_modules = space.sys.get('modules')
+            self.w_ElementPath = space.getitem(
+                w_modules, space.newtext('xml.etree.ElementPath'))
+        return self.w_ElementPath
+
+    def get_deepcopy(self, space):
+        if self.w_deepcopy is None:
+            w_copy = space.call_method(space.builtin, '__import__',
+                                       space.newtext('copy'))
+            self.w_deepcopy = space.getattr(w_copy, space.newtext('deepcopy'))
+        return self.w_deepcopy
+
+def call_elementpath(space, name, *args_w):
+    w_ElementPath = space.fromcache(State).get_ElementPath(space)
+    return space.call_method(w_ElementPath, name, *args_w)
+
+def wrap_none(space, w_obj):
+    if w_obj is None:
+        return space.w_None
+    return w_obj
+
+def unwrap_none(space, w_obj):
+    if space.is_none(w_obj):
+        return None
+    return w_obj
+
+def is_simple_path(space, w_path):
+    # like checkpath() in CPython's _elementtree.c: a path without any of
+    # the characters of ElementPath, outside of a '{namespace}', is a tag
+    if space.isinstance_w(w_path, space.w_bytes):
+        path = space.bytes_w(w_path)
+    elif space.isinstance_w(w_path, space.w_unicode):
+        path = space.utf8_w(w_path)
+    else:
+        return False
+    check = True
+    for c in path:
+        if c == '{':
+            check = False
+        elif c == '}':
+            check = True
+        elif check and c in '/*[@.':
+            return False
+    return True
+
+def new_attrib(space, w_attrib, kwds_w):
+    """A copy of the dict 'w_attrib' updated with 'kwds_w', or None if
+    that would be empty."""
+    if w_attrib is not None and not space.is_true(w_attrib):
+        w_attrib = None
+    if w_attrib is None and not kwds_w:
+        return None
+    if w_attrib is None:
+        w_result = space.newdict()
+    else:
+        w_result = space.call_method(w_attrib, 'copy')
+    for key, w_value in kwds_w.items():
+        space.setitem_str(w_result, key, w_value)
+    return w_result
+
+def check_attrib(space, w_attrib):
+    if not space.isinstance_w(w_attrib, space.w_dict):
+        raise oefmt(space.w_TypeError, "attrib must be dict, not %T",
+                    w_attrib)
+
+
+class W_Element(W_Root):
+    """An XML element.  The attributes are stored in a dict that is only
+    created when needed, and the subelements in a list that is None as
+    long as there are none; text and tail are None for app-level None."""
+
+    w_tag = None
+    w_attrib = None
+    w_text = None
+    w_tail = None
+    children_w = None
+
+    def __init__(self, w_tag, w_attrib):
+        self.w_tag = w_tag
+        self.w_attrib = w_attrib
+
+    def descr_init(self, space, __args__):
+        args_w, kwds_w = __args__.unpack()
+        if len(args_w) < 1 or len(args_w) > 2:
+            raise oefmt(space.w_TypeError,
+                        "Element() takes 1 or 2 arguments (%d given)",
+                        len(args_w))
+        w_attrib = None
+        if len(args_w) == 2:
+            w_attrib = args_w[1]
+        elif 'attrib' in kwds_w:
+            w_attrib = kwds_w.pop('attrib')
+        if w_attrib is not None:
+            check_attrib(space, w_attrib)
+        self.w_tag = args_w[0]
+        self.w_attrib = new_attrib(space, w_attrib, kwds_w)
+        self.w_text = None
+        self.w_tail = None
+        self.children_w = None
+
+    def append_child(self, w_child):
+        if self.children_w is None:
+            self.children_w = [w_child]
+        else:
+            self.children_w.append(w_child)
+
+    def nchildren(self):
+        if self.children_w is None:
+            return 0
+        return len(self.children_w)
+
+    def get_attrib(self, space):
+        if self.w_attrib is None:
+            self.w_attrib = space.newdict()
+        return self.w_attrib
+
+    # ____________________________________________________________
+    # attributes
+
+    def descr_get_tag(self, space):
+        return wrap_none(space, self.w_tag)
+
+    def descr_set_tag(self, space, w_value):
+        self.w_tag = w_value
+
+    def descr_get_text(self, space):
+        return wrap_none(space, self.w_text)
+
+    def descr_set_text(self, space, w_value):
+        self.w_text = unwrap_none(space, w_value)
+
+    def descr_get_tail(self, space):
+        return wrap_none(space, self.w_tail)
+
+    def descr_set_tail(self, space, w_value):
+        self.w_tail = unwrap_none(space, w_value)
+
+    def descr_get_attrib(self, space):
+        return self.get_attrib(space)
+
+    def descr_set_attrib(self, space, w_value):
+        self.w_attrib = w_value
+
+    def descr_del_attribute(self, space):
+        raise oefmt(space.w_AttributeError, "can't delete attribute")
+
+    # ____________________________________________________________
+    # subelements
+
+    def descr_len(self, space):
+        return space.newint(self.nchildren())
+
+    def descr_getitem(self, space, w_index):
+        if space.isinstance_w(w_index, space.w_slice):
+            start, stop, step, size = space.decode_index4(w_index,
+                                                          self.nchildren())
+            # __index__() may have changed the subelements
+            length = self.nchildren()
+            result_w = []
+            for i in range(size):
+                if start >= length or start < 0:
+                    break
+                result_w.append(self.children_w[start])
+                start += step
+            return space.newlist(result_w)
+        index = self._get_index(space, w_index)
+        return self.children_w[index]
+
+    def _get_index(self, space, w_index):
+        index = space.getindex_w(w_index, space.w_IndexError)
+        length = self.nchildren()
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise oefmt(space.w_IndexError, "child index out of range")
+        return index
+
+    def descr_setitem(self, space, w_index, w_value):
+        if space.isinstance_w(w_index, space.w_slice):
+            start, stop, step, size = space.decode_index4(w_index,
+                                                          self.nchildren())
+            items_w = space.listview(w_value)
+            children_w = self.children_w
+            if children_w is None:
+                children_w = []
+            length = len(children_w)
+            start = min(start, length)
+            if step == 1:
+                stop = min(max(stop, start), length)
+                self.children_w = (children_w[:start] + items_w +
+                                   children_w[stop:])
+                return
+            if len(items_w) != size:
+                raise oefmt(space.w_ValueError,
+                            "attempt to assign sequence of size %d to "
+                            "extended slice of size %d", len(items_w), size)
+            for i in range(size):
+                if 0 <= start < len(children_w):
+                    children_w[start] = items_w[i]
+                start += step
+            return
+        index = self._get_index(space, w_index)
+        self.children_w[index] = w_value
+
+    def descr_delitem(self, space, w_index):
+        if space.isinstance_w(w_index, space.w_slice):
+            start, stop, step, size = space.decode_index4(w_index,
+                                                          self.nchildren())
+            children_w = self.children_w
+            if children_w is None or size == 0:
+                return
+            if step < 0:
+                start = start + step * (size - 1)
+                step = -step
+            remaining_w = []
+            for i in range(len(children_w)):
+                if (start <= i < start + step * size and
+                        (i - start) % step == 0):
+                    continue
+                remaining_w.append(children_w[i])
+            self.children_w = remaining_w
+            return
+        index = self._get_index(space, w_index)
+        del self.children_w[index]
+
+    def descr_append(self, space, w_element):
+        if not isinstance(w_element, W_Element):
+            raise oefmt(space.w_TypeError,
+                        "append() argument 1 must be Element, not %T",
+                        w_element)
+        self.append_child(w_element)
+
+    def descr_extend(self, space, w_elements):
+        for w_element in space.fixedview(w_elements):
+            self.append_child(w_element)
+
+    @unwrap_spec(index=int)
+    def descr_insert(self, space, index, w_element):
+        if not isinstance(w_element, W_Element):
+            raise oefmt(space.w_TypeError,
+                        "insert() argument 2 must be Element, not %T",
+                        w_element)
+        length = self.nchildren()
+        if index < 0:
+            index = max(index + length, 0)
+        index = min(index, length)
+        if self.children_w is None:
+            self.children_w = [w_element]
+        else:
+            self.children_w.insert(index, w_element)
+
+    def descr_remove(self, space, w_element):
+        if not isinstance(w_element, W_Element):
+            raise oefmt(space.w_TypeError,
+                        "remove() argument 1 must be Element, not %T",
+                        w_element)
+        for i in range(self.nchildren()):
+            if self.children_w[i] is w_element:
+                del self.children_w[i]
+                return
+        raise oefmt(space.w_ValueError, "list.remove(x): x not in list")
+
+    def descr_getchildren(self, space):
+        if self.children_w is None:
+            return space.newlist([])
+        return space.newlist(self.children_w[:])
+
+    def descr_clear(self, space):
+        """Reset the element: remove all subelements, clear all
+        attributes, and set the text and tail attributes to None."""
+        self.w_attrib = None
+        self.w_text = None
+        self.w_tail = None
+        self.children_w = None
+
+    # ____________________________________________________________
+    # attribute access
+
+    @unwrap_spec(w_default=WrappedDefault(None))
+    def descr_get(self, space, w_key, w_default):
+        if self.w_attrib is None:
+            return w_default
+        w_value = space.finditem(self.w_attrib, w_key)
+        if w_value is None:
+            return w_default
+        return w_value
+
+    def descr_set(self, space, w_key, w_value):
+        space.setitem(self.get_attrib(space), w_key, w_value)
+
+    def descr_keys(self, space):
+        if self.w_attrib is None:
+            return space.newlist([])
+        return space.call_method(self.w_attrib, 'keys')
+
+    def descr_items(self, space):
+        if self.w_attrib is None:
+            return space.newlist([])
+        return space.call_method(self.w_attrib, 'items')
+
+    # ____________________________________________________________
+    # searching
+
+    def _find_child(self, space, w_tag):
+        i = 0
+        # the comparisons can run app-level code that changes the children
+        while i < self.nchildren():
+            w_child = self.children_w[i]
+            if (isinstance(w_child, W_Element) and
+                    space.eq_w(wrap_none(space, w_child.w_tag), w_tag)):
+                return w_child
+            i += 1
+        return None
+
+    @unwrap_spec(w_namespaces=WrappedDefault(None))
+    def descr_find(self, space, w_path, w_namespaces):
+        if space.is_none(w_namespaces) and is_simple_path(space, w_path):
+            return wrap_none(space, self._find_child(space, w_path))
+        return call_elementpath(space, 'find', self, w_path, w_namespaces)
+
+    @unwrap_spec(w_default=WrappedDefault(None),
+                 w_namespaces=WrappedDefault(None))
+    def descr_findtext(self, space, w_path, w_default, w_namespaces):
+        if space.is_none(w_namespaces) and is_simple_path(space, w_path):
+            w_child = self._find_child(space, w_path)
+            if w_child is None:
+                return w_default
+            assert isinstance(w_child, W_Element)
+            if w_child.w_text is None:
+                return space.newtext('')
+            return w_child.w_text
+        return call_elementpath(space, 'findtext', self, w_path, w_default,
+                                w_namespaces)
+
+    @unwrap_spec(w_namespaces=WrappedDefault(None))
+    def descr_findall(self, space, w_path, w_namespaces):
+        if space.is_none(w_namespaces) and is_simple_path(space, w_path):
+            result_w = []
+            i = 0
+            while i < self.nchildren():
+                w_child = self.children_w[i]
+                if (isinstance(w_child, W_Element) and
+                        space.eq_w(wrap_none(space, w_child.w_tag), w_path)):
+                    result_w.append(w_child)
+                i += 1
+            return space.newlist(result_w)
+        return call_elementpath(space, 'findall', self, w_path, w_namespaces)
+
+    @unwrap_spec(w_namespaces=WrappedDefault(None))
+    def descr_iterfind(self, space, w_path, w_namespaces):
+        return call_elementpath(space, 'iterfind', self, w_path, w_namespaces)
+
+    @unwrap_spec(w_tag=WrappedDefault(None))
+    def descr_iter(self, space, w_tag):
+        if (space.isinstance_w(w_tag, space.w_basestring) and
+                space.eq_w(w_tag, space.newtext('*'))):
+            w_tag = space.w_None
+        return W_ElementIter(self, unwrap_none(space, w_tag), False)
+
+    @unwrap_spec(w_tag=WrappedDefault(None))
+    def descr_getiterator(self, space, w_tag):
+        w_iter = self.descr_iter(space, w_tag)
+        return space.newlist(space.unpackiterable(w_iter))
+
+    def descr_itertext(self, space):
+        return W_ElementIter(self, None, True)
+
+    # ____________________________________________________________
+    # copying
+
+    def descr_makeelement(self, space, w_tag, w_attrib):
+        check_attrib(space, w_attrib)
+        return W_Element(w_tag, new_attrib(space, w_attrib, {}))
+
+    def descr_copy(self, space):
+        w_attrib = None
+        if self.w_attrib is not None:
+            w_attrib = space.call_method(self.w_attrib, 'copy')
+        elem = W_Element(self.w_tag, w_attrib)
+        elem.w_text = self.w_text
+        elem.w_tail = self.w_tail
+        if self.children_w is not None:
+            elem.children_w = self.children_w[:]
+        return elem
+
+    def descr_deepcopy(self, space, w_memo):
+        w_deepcopy = space.fromcache(State).get_deepcopy(space)
+        elem = W_Element(deepcopy(space, w_deepcopy, self.w_tag, w_memo),
+                         deepcopy(space, w_deepcopy, self.w_attrib, w_memo))
+        elem.w_text = deepcopy(space, w_deepcopy, self.w_text, w_memo)
+        elem.w_tail = deepcopy(space, w_deepcopy, self.w_tail, w_memo)
+        if self.children_w is not None:
+            elem.children_w = [deepcopy(space, w_deepcopy, w_child, w_memo)
+                               for w_child in self.children_w]
+        return elem
+
+    def descr_repr(self, space):
+        reprs_w = space.fromcache(State).reprs_w
+        for w_elem in reprs_w:
+            if w_elem is self:
+                raise oefmt(space.w_RuntimeError,
+                            "reentrant call inside Element.__repr__")
+        reprs_w.append(self)
+        try:
+            tag_repr = space.text_w(space.repr(wrap_none(space, self.w_tag)))
+        finally:
+            reprs_w.pop()
+        return space.newtext("<Element %s at 0x%s>" % (
+            tag_repr, self.getaddrstring(space)))
+
+
+def deepcopy(space, w_deepcopy, w_obj, w_memo):
+    if w_obj is None:
+        return None
+    return space.call_function(w_deepcopy, w_obj, w_memo)
+
+def W_Element___new__(space, w_subtype, __args__):
+    return space.allocate_instance(W_Element, w_subtype)
+
+def _make_property(name):
+    return GetSetProperty(getattr(W_Element, 'descr_get_' + name),
+                          getattr(W_Element, 'descr_set_' + name),
+                          W_Element.descr_del_attribute, cls=W_Element)
+
+W_Element.typedef = TypeDef(
+    '_elementtree.Element',
+    __new__ = interp2app(W_Element___new__),
+    __init__ = interp2app(W_Element.descr_init),
+    __repr__ = interp2app(W_Element.descr_repr),
+    __len__ = interp2app(W_Element.descr_len),
+    __getitem__ = interp2app(W_Element.descr_getitem),
+    __setitem__ = interp2app(W_Element.descr_setitem),
+    __delitem__ = interp2app(W_Element.descr_delitem),
+    __copy__ = interp2app(W_Element.descr_copy),
+    __deepcopy__ = interp2app(W_Element.descr_deepcopy),
+    tag = _make_property('tag'),
+    text = _make_property('text'),
+    tail = _make_property('tail'),
+    attrib = _make_property('attrib'),
+    append = interp2app(W_Element.descr_append),
+    extend = interp2app(W_Element.descr_extend),
+    insert = interp2app(W_Element.descr_insert),
+    remove = interp2app(W_Element.descr_remove),
+    getchildren = interp2app(W_Element.descr_getchildren),
+    clear = interp2app(W_Element.descr_clear),
+    get = interp2app(W_Element.descr_get),
+    set = interp2app(W_Element.descr_set),
+    keys = interp2app(W_Element.descr_keys),
+    items = interp2app(W_Element.descr_items),
+    find = interp2app(W_Element.descr_find),
+    findtext = interp2app(W_Element.descr_findtext),
+    findall = interp2app(W_Element.descr_findall),
+    iterfind = interp2app(W_Element.descr_iterfind),
+    iter = interp2app(W_Element.descr_iter),
+    getiterator = interp2app(W_Element.descr_getiterator),
+    itertext = interp2app(W_Element.descr_itertext),
+    makeelement = interp2app(W_Element.descr_makeelement),
+    __doc__ = """Element(tag, attrib={}, **extra)
+
+An XML element.""",
+    )
+
+
+def SubElement(space, w_parent, w_tag, __args__):
+    """SubElement(parent, tag, attrib={}, **extra) -> Element
+
+Create an element and append it to 'parent'."""
+    if not isinstance(w_parent, W_Element):
+        raise oefmt(space.w_TypeError,
+                    "SubElement() argument 1 must be Element, not %T",
+                    w_parent)
+    args_w, kwds_w = __args__.unpack()
+    if len(args_w) > 1:
+        raise oefmt(space.w_TypeError,
+                    "SubElement() takes at most 3 arguments (%d given)",
+                    len(args_w) + 2)
+    w_attrib = None
+    if len(args_w) == 1:
+        w_attrib = args_w[0]
+    elif 'attrib' in kwds_w:
+        w_attrib = kwds_w.pop('attrib')
+    if w_attrib is not None:
+        check_attrib(space, w_attrib)
+    elem = W_Element(w_tag, new_attrib(space, w_attrib, kwds_w))
+    w_parent.append_child(elem)
+    return elem
+
+
+class W_ElementIter(W_Root):
+    """The iterator of Element.iter() or, if 'gettext' is true, of
+    Element.itertext().  The elements being visited are kept in 'stack',
+    along with the index of their next subelement in 'indices'.  Like in
+    ElementTree.py, subelements that are not Elements are iterated over
+    by calling their own iter() or itertext() method."""
+
+    def __init__(self, root, w_tag, gettext):
+        self.stack = [root]
+        self.indices = [0]
+        self.w_tag = w_tag
+        self.gettext = gettext
+        self.started = False
+        self.w_subiter = None
+        self.w_subtail = None
+
+    def descr_iter(self, space):
+        return self
+
+    def descr_next(self, space):
+        while True:
+            if self.w_subiter is not None:
+                w_result = self._next_foreign(space)
+            elif self.gettext:
+                w_result = self._next_text(space)
+            else:
+                w_result = self._next_element(space)
+            if w_result is not None:
+                return w_result
+            if self.w_subiter is None and not self.stack:
+                break
+        self.stack = []
+        self.indices = []
+        raise OperationError(space.w_StopIteration, space.w_None)
+
+    def _matches(self, space, elem):
+        return (self.w_tag is None or
+                space.eq_w(wrap_none(space, elem.w_tag), self.w_tag))
+
+    def _next_child(self, space):
+        # returns the next subelement of the element at the top of the
+        # stack, or None after popping that element if there is none left.
+        # Also returns None after starting to iterate over a subelement
+        # that is not an Element.
+        elem = self.stack[-1]
+        i = self.indices[-1]
+        if i >= elem.nchildren():
+            self.stack.pop()
+            self.indices.pop()
+            return None
+        self.indices[-1] = i + 1
+        w_child = elem.children_w[i]
+        if isinstance(w_child, W_Element):
+            return w_child
+        if self.gettext:
+            w_subiter = space.call_method(w_child, 'itertext')
+            self.w_subtail = space.getattr(w_child, space.newtext('tail'))
+        else:
+            w_subiter = space.call_method(w_child, 'iter',
+                                          wrap_none(space, self.w_tag))
+        self.w_subiter = space.iter(w_subiter)
+        return None
+
+    def _next_foreign(self, space):
+        try:
+            return space.next(self.w_subiter)
+        except OperationError as e:
+            if not e.match(space, space.w_StopIteration):
+                raise
+        self.w_subiter = None
+        w_tail = self.w_subtail
+        self.w_subtail = None
+        if w_tail is not None and space.is_true(w_tail):
+            return w_tail
+        return None
+
+    def _next_element(self, space):
+        if not self.started:
+            self.started = True
+            if self.stack and self._matches(space, self.stack[0]):
+                return self.stack[0]
+        while self.stack:
+            child = self._next_child(space)
+            if child is not None:
+                self.stack.append(child)
+                self.indices.append(0)
+                if self._matches(space, child):
+                    return child
+            elif self.w_subiter is not None:
+                break
+        return None
+
+    def _next_text(self, space):
+        if not self.started:
+            self.started = True
+            if not self.stack:
+                return None
+            root = self.stack[0]
+            if not has_text_tag(space, root):
+                self.stack = []
+                self.indices = []
+                return None
+            if is_nonempty(space, root.w_text):
+                return root.w_text
+        while self.stack:
+            elem = self.stack[-1]
+            child = self._next_child(space)
+            if child is None:
+                if self.w_subiter is not None:
+                    break
+                # 'elem' is done; report its tail unless it is the root
+                if self.stack and is_nonempty(space, elem.w_tail):
+                    return elem.w_tail
+            elif has_text_tag(space, child):
+                self.stack.append(child)
+                self.indices.append(0)
+                if is_nonempty(space, child.w_text):
+                    return child.w_text
+            elif is_nonempty(space, child.w_tail):
+                return child.w_tail
+        return None
+
+def has_text_tag(space, elem):
+    # like in ElementTree.py, comments and processing instructions (whose
+    # tag is a function) have no text
+    w_tag = elem.w_tag
+    return w_tag is None or space.isinstance_w(w_tag, space.w_basestring)
+
+def is_nonempty(space, w_text):
+    return w_text is not None and space.is_true(w_text)
+
+W_ElementIter.typedef = TypeDef(
+    '_elementtree.ElementIterator',
+    __iter__ = interp2app(W_ElementIter.descr_iter),
+    next = interp2app(W_ElementIter.descr_next),
+    )
+W_ElementIter.typedef.acceptable_as_base_class = False
+
+# ____________________________________________________________
+
+
+class W_TreeBuilder(W_Root):
+    """Builds a tree from the start(), data() and end() calls.  When it
+    is the target of an XMLParser, the parser calls the interp-level
+    methods directly.  With 'clear_finished' set, the subelements of an
+    element are removed from it when it ends, so they are freed as soon
+    as they are no longer used (see iterparse(clear=True))."""
+
+    def __init__(self, space, w_element_factory):
+        self.w_element_factory = w_element_factory
+        self.stack_w = []
+        self.w_root = None
+        self.w_last = None      # the last element started or ended
+        self.w_data = None      # the pending character data, if any
+        self.data_w = None      # all of it, if there is more than one part
+        self.tail = False       # if the data is the tail of 'w_last'
+        self.clear_finished = False
+
+    def start(self, space, w_tag, w_attrib):
+        # 'w_attrib' is None if there are no attributes
+        self.flush_data(space)
+        if self.w_element_factory is None:
+            w_elem = W_Element(w_tag, w_attrib)
+        else:
+            if w_attrib is None:
+                w_attrib = space.newdict()
+            w_elem = space.call_function(self.w_element_factory, w_tag,
+                                         w_attrib)
+        if self.stack_w:
+            w_parent = self.stack_w[-1]
+            if isinstance(w_parent, W_Element):
+                w_parent.append_child(w_elem)
+            else:
+                space.call_method(w_parent, 'append', w_elem)
+        elif self.w_root is None:
+            self.w_root = w_elem
+        self.stack_w.append(w_elem)
+        self.w_last = w_elem
+        self.tail = False
+        return w_elem
+
+    def end(self, space):
+        self.flush_data(space)
+        if not self.stack_w:
+            raise oefmt(space.w_IndexError, "pop from empty stack")
+        w_elem = self.stack_w.pop()
+        self.w_last = w_elem
+        self.tail = True
+        if self.clear_finished:
+            release_children(space, w_elem)
+        return w_elem
+
+    def data(self, space, w_data):
+        if self.w_data is None:
+            self.w_data = w_data
+        elif self.data_w is None:
+            self.data_w = [self.w_data, w_data]
+        else:
+            self.data_w.append(w_data)
+
+    def flush_data(self, space):
+        if self.w_data is None:
+            return
+        if self.data_w is None:
+            w_text = self.w_data
+        else:
+            w_text = space.call_method(space.newtext(''), 'join',
+                                       space.newlist(self.data_w))
+            self.data_w = None
+        self.w_data = None
+        w_last = self.w_last
+        if w_last is None:
+            return
+        if isinstance(w_last, W_Element):
+            if self.tail:
+                w_last.w_tail = w_text
+            else:
+                w_last.w_text = w_text
+        else:
+            name = 'tail' if self.tail else 'text'
+            space.setattr(w_last, space.newtext(name), w_text)
+
+    def close(self, space):
+        self.flush_data(space)
+        return wrap_none(space, self.w_root)
+
+    def descr_start(self, space, w_tag, w_attrib):
+        if not space.is_true(w_attrib):
+            w_attrib = None
+        return self.start(space, w_tag, w_attrib)
+
+    def descr_end(self, space, w_tag):
+        return self.end(space)
+
+    def descr_data(self, space, w_data):
+        self.data(space, w_data)
+
+    def descr_close(self, space):
+        return self.close(space)
+
+
+def release_children(space, w_elem):
+    if isinstance(w_elem, W_Element):
+        w_elem.children_w = None
+    else:
+        space.delitem(w_elem, space.newslice(space.w_None, space.w_None,
+                                             space.w_None))
+
+@unwrap_spec(w_element_factory=WrappedDefault(None))
+def W_TreeBuilder___new__(space, w_subtype, w_element_factory):
+    r = space.allocate_instance(W_TreeBuilder, w_subtype)
+    r.__init__(space, unwrap_none(space, w_element_factory))
+    return r
+
+W_TreeBuilder.typedef = TypeDef(
+    '_elementtree.TreeBuilder',
+    __new__ = interp2app(W_TreeBuilder___new__),
+    start = interp2app(W_TreeBuilder.descr_start),
+    end = interp2app(W_TreeBuilder.descr_end),
+    data = interp2app(W_TreeBuilder.descr_data),
+    close = interp2app(W_TreeBuilder.descr_close),
+    __doc__ = """TreeBuilder(element_factory=None)
+
+Build an element tree from a series of start(), data() and end() calls.""",
+    )
+
+# ____________________________________________________________
+
+
+XML_ERROR_UNDEFINED_ENTITY = 11
+
+def fixtext(space, w_text):
+    # the expat parser returns UTF-8 encoded strings; like ElementTree.py
+    # we return them as str if they are ASCII, and as unicode otherwise
+    if w_text is None or space.is_w(w_text, space.w_None):
+        return w_text
+    text = space.bytes_w(w_text)
+    if rutf8.first_non_ascii_char(text) < 0:
+        return w_text
+    length = rutf8.check_utf8(text, True)
+    return space.newutf8(text, length)
+
+def parse_error(space, message, code, line, column):
+    w_module = space.getbuiltinmodule('_elementtree')
+    w_ParseError = space.getattr(w_module, space.newtext('ParseError'))
+    w_error = space.call_function(w_ParseError, space.newtext(message))
+    space.setattr(w_error, space.newtext('code'), space.newint(code))
+    space.setattr(w_error, space.newtext('position'),
+                  space.newtuple([space.newint(line), space.newint(column)]))
+    return OperationError(w_ParseError, w_error)
+
+
+class W_XMLParser(W_Root):
+    """An XML parser that builds the tree through a pyexpat parser.  The
+    handlers of the pyexpat parser are the interp-level methods of this
+    class, and when the target is a plain TreeBuilder they call it
+    directly, so building the tree runs no app-level code."""
+
+    def __init__(self, space, w_target, w_encoding):
+        if w_target is None:
+            w_target = W_TreeBuilder(space, None)
+        self.w_target = w_target
+        self.builder = None
+        if type(w_target) is W_TreeBuilder:
+            self.builder = w_target
+        self.w_handle_start = None
+        self.w_handle_data = None
+        self.w_handle_end = None
+        self.w_handle_comment = None
+        self.w_handle_pi = None
+        self.w_handle_close = None
+        self.w_handle_doctype = None
+        if self.builder is None:
+            self.w_handle_start = self._lookup(space, 'start')
+            self.w_handle_data = self._lookup(space, 'data')
+            self.w_handle_end = self._lookup(space, 'end')
+            self.w_handle_comment = self._lookup(space, 'comment')
+            self.w_handle_pi = self._lookup(space, 'pi')
+            self.w_handle_close = self._lookup(space, 'close')
+            self.w_handle_doctype = self._lookup(space, 'doctype')
+        self.w_names = space.newdict()
+        self.w_entity = space.newdict()
+        self.w_events = None
+        self.w_start_event = None
+        self.w_end_event = None
+        self.w_start_ns_event = None
+        self.w_end_ns_event = None
+
+        parser = interp_pyexpat.ParserCreate(space, w_encoding,
+                                             space.newtext('}'))
+        assert isinstance(parser, interp_pyexpat.W_XMLParserType)
+        parser.returns_unicode = False
+        parser.ordered_attributes = True
+        parser.specified_attributes = True
+        parser.buffer = []
+        self.parser = parser
+        self._sethandler(space, 'StartElementHandler', '_start')
+        self._sethandler(space, 'EndElementHandler', '_end')
+        self._sethandler(space, 'DefaultHandlerExpand', '_default')
+        if self.builder is not None or self.w_handle_data is not None:
+            self._sethandler(space, 'CharacterDataHandler', '_data')
+        if self.w_handle_comment is not None:
+            self._sethandler(space, 'CommentHandler', '_comment')
+        if self.w_handle_pi is not None:
+            self._sethandler(space, 'ProcessingInstructionHandler', '_pi')
+        if self.w_handle_doctype is not None:
+            self._sethandler(space, 'StartDoctypeDeclHandler', '_doctype')
+
+    def _lookup(self, space, name):
+        # a missing method is fine, but other errors are not ignored
+        try:
+            return space.getattr(self.w_target, space.newtext(name))
+        except OperationError as e:
+            if not e.match(space, space.w_AttributeError):
+                raise
+            return None
+
+    def _sethandler(self, space, name, methname):
+        space.setattr(self.parser, space.newtext(name),
+                      space.getattr(self, space.newtext(methname)))
+
+    def fixname(self, space, w_key):
+        # expand qnames, and convert name strings to ascii, if possible
+        w_name = space.finditem(self.w_names, w_key)
+        if w_name is None:
+            key = space.bytes_w(w_key)
+            w_name = w_key
+            if '}' in key:
+                w_name = space.newbytes('{' + key)
+            w_name = fixtext(space, w_name)
+            space.setitem(self.w_names, w_key, w_name)
+        return w_name
+
+    def _add_event(self, space, w_event, w_value):
+        space.call_method(self.w_events, 'append',
+                          space.newtuple([w_event, w_value]))
+
+    # ____________________________________________________________
+    # the handlers of the pyexpat parser
+
+    def handle_start(self, space, w_tag, w_attrib_in):
+        w_tag = self.fixname(space, w_tag)
+        attrib_w = space.fixedview(w_attrib_in)
+        w_attrib = None
+        if attrib_w:
+            w_attrib = space.newdict()
+            for i in range(0, len(attrib_w) - 1, 2):
+                space.setitem(w_attrib, self.fixname(space, attrib_w[i]),
+                              fixtext(space, attrib_w[i + 1]))
+        if self.builder is not None:
+            w_elem = self.builder.start(space, w_tag, w_attrib)
+        elif self.w_handle_start is not None:
+            if w_attrib is None:
+                w_attrib = space.newdict()
+            w_elem = space.call_function(self.w_handle_start, w_tag, w_attrib)
+        else:
+            w_elem = space.w_None
+        if self.w_start_event is not None:
+            self._add_event(space, self.w_start_event, w_elem)
+
+    def handle_end(self, space, w_tag):
+        if self.builder is not None:
+            w_elem = self.builder.end(space)
+        elif self.w_handle_end is not None:
+            w_elem = space.call_function(self.w_handle_end,
+                                         self.fixname(space, w_tag))
+        else:
+            w_elem = space.w_None
+        if self.w_end_event is not None:
+            self._add_event(space, self.w_end_event, w_elem)
+
+    def handle_data(self, space, w_data):
+        if self.builder is not None:
+            self.builder.data(space, fixtext(space, w_data))
+        else:
+            space.call_function(self.w_handle_data, fixtext(space, w_data))
+
+    def handle_default(self, space, w_text):
+        text = space.bytes_w(w_text)
+        if not text.startswith('&'):
+            return
+        # an entity that expat did not expand, "&name;"
+        end = len(text) - 1
+        assert end >= 1
+        w_key = fixtext(space, space.newbytes(text[1:end]))
+        w_value = space.finditem(self.w_entity, w_key)
+        if w_value is not None:
+            if self.builder is not None:
+                self.builder.data(space, w_value)
+            elif self.w_handle_data is not None:
+                space.call_function(self.w_handle_data, w_value)
+            return
+        line = interp_pyexpat.XML_GetCurrentLineNumber(self.parser.itself)
+        column = interp_pyexpat.XML_GetCurrentColumnNumber(self.parser.itself)
+        line = rffi.cast(lltype.Signed, line)
+        column = rffi.cast(lltype.Signed, column)
+        raise parse_error(space, "undefined entity %s: line %d, column %d" %
+                          (text, line, column),
+                          XML_ERROR_UNDEFINED_ENTITY, line, column)
+
+    def handle_comment(self, space, w_text):
+        space.call_function(self.w_handle_comment, fixtext(space, w_text))
+
+    def handle_pi(self, space, w_target, w_data):
+        space.call_function(self.w_handle_pi, fixtext(space, w_target),
+                            fixtext(space, w_data))
+
+    def handle_doctype(self, space, w_name, w_sysid, w_pubid,
+                       w_has_internal_subset):
+        space.call_function(self.w_handle_doctype, fixtext(space, w_name),
+                            fixtext(space, w_pubid), fixtext(space, w_sysid))
+
+    def handle_start_ns(self, space, w_prefix, w_uri):
+        if space.is_w(w_prefix, space.w_None):
+            w_prefix = space.newtext('')
+        if space.is_w(w_uri, space.w_None):
+            w_uri = space.newtext('')
+        self._add_event(space, self.w_start_ns_event, space.newtuple([
+            fixtext(space, w_prefix), fixtext(space, w_uri)]))
+
+    def handle_end_ns(self, space, w_prefix):
+        self._add_event(space, self.w_end_ns_event, space.w_None)
+
+    # ____________________________________________________________
+    # the public methods
+
+    def _parse(self, space, data, isfinal):
+        try:
+            self.parser.Parse(space, data, isfinal)
+        except OperationError as e:
+            w_error = space.fromcache(interp_pyexpat.Cache).w_error
+            if not e.match(space, w_error):
+                raise
+            w_value = e.get_w_value(space)
+            raise parse_error(
+                space, space.text_w(space.str(w_value)),
+                space.int_w(space.getattr(w_value, space.newtext('code'))),
+                space.int_w(space.getattr(w_value, space.newtext('lineno'))),
+                space.int_w(space.getattr(w_value, space.newtext('offset'))))
+
+    def descr_feed(self, space, w_data):
+        """Feed encoded data to the parser."""
+        self._parse(space, space.text_w(w_data), False)
+
+    def descr_close(self, space):
+        """Finish feeding data to the parser, and return the result of
+        the close() method of the target."""
+        self._parse(space, '', True)
+        if self.builder is not None:
+            return self.builder.close(space)
+        if self.w_handle_close is not None:
+            return space.call_function(self.w_handle_close)
+        return space.w_None
+
+    def descr_parse_file(self, space, w_file):
+        while True:
+            w_data = space.call_method(w_file, 'read', space.newint(65536))
+            if not space.is_true(w_data):
+                break
+            self.descr_feed(space, w_data)
+        return self.descr_close(space)
+
+    @unwrap_spec(w_event_set=WrappedDefault(None), clear=bool)
+    def descr_setevents(self, space, w_events, w_event_set, clear=False):
+        if not space.isinstance_w(w_events, space.w_list):
+            raise oefmt(space.w_TypeError, "events must be a list, not %T",
+                        w_events)
+        if clear and self.builder is None:
+            raise oefmt(space.w_TypeError,
+                        "clearing finished elements is only supported "
+                        "with a TreeBuilder target")
+        self.w_events = w_events
+        self.w_start_event = None
+        self.w_end_event = None
+        self.w_start_ns_event = None
+        self.w_end_ns_event = None
+        if space.is_none(w_event_set):
+            self.w_end_event = space.newtext('end')
+            return
+        for w_event in space.unpackiterable(w_event_set):
+            event = space.text_w(w_event)
+            if event == 'start':
+                self.w_start_event = w_event
+            elif event == 'end':
+                self.w_end_event = w_event
+            elif event == 'start-ns':
+                self.w_start_ns_event = w_event
+                self._sethandler(space, 'StartNamespaceDeclHandler',
+                                 '_start_ns')
+            elif event == 'end-ns':
+                self.w_end_ns_event = w_event
+                self._sethandler(space, 'EndNamespaceDeclHandler', '_end_ns')
+            else:
+                raise oefmt(space.w_ValueError, "unknown event '%s'", event)
+        if clear and self.w_end_event is None:
+            # nobody will see the elements at their end event: release
+            # the subelements right away.  Otherwise the iterator does it
+            # when it goes past the end event.
+            self.builder.clear_finished = True
+
+    def descr_get_version(self, space):
+        return space.newtext("Expat %d.%d.%d" % (
+            interp_pyexpat.XML_MAJOR_VERSION,
+            interp_pyexpat.XML_MINOR_VERSION,
+            interp_pyexpat.XML_MICRO_VERSION))
+
+
+@unwrap_spec(w_html=WrappedDefault(0), w_target=WrappedDefault(None),
+             w_encoding=WrappedDefault(None))
+def W_XMLParser___new__(space, w_subtype, w_html, w_target, w_encoding):
+    r = space.allocate_instance(W_XMLParser, w_subtype)
+    r.__init__(space, unwrap_none(space, w_target), w_encoding)
+    return r
+
+W_XMLParser.typedef = TypeDef(
+    '_elementtree.XMLParser',
+    __new__ = interp2app(W_XMLParser___new__),
+    feed = interp2app(W_XMLParser.descr_feed),
+    close = interp2app(W_XMLParser.descr_close),
+    _parse = interp2app(W_XMLParser.descr_parse_file),
+    _setevents = interp2app(W_XMLParser.descr_setevents),
+    _start = interp2app(W_XMLParser.handle_start),
+    _end = interp2app(W_XMLParser.handle_end),
+    _data = interp2app(W_XMLParser.handle_data),
+    _default = interp2app(W_XMLParser.handle_default),
+    _comment = interp2app(W_XMLParser.handle_comment),
+    _pi = interp2app(W_XMLParser.handle_pi),
+    _doctype = interp2app(W_XMLParser.handle_doctype),
+    _start_ns = interp2app(W_XMLParser.handle_start_ns),
+    _end_ns = interp2app(W_XMLParser.handle_end_ns),
+    target = interp_attrproperty_w('w_target', W_XMLParser),
+    entity = interp_attrproperty_w('w_entity', W_XMLParser),
+    version = GetSetProperty(W_XMLParser.descr_get_version, cls=W_XMLParser),
+    __doc__ = """XMLParser(html=0, target=None, encoding=None)
+
+An XML parser based on pyexpat, building an element tree by default.""",
+    )
@@ -0,0 +1,36 @@
+"""
+Mixed-module definition for the _elementtree module.
+lib_pypy/_elementtree.py contains the pure Python version, which is used if
+this module is disabled.
+"""
+
+from pypy.interpreter.mixedmodule import MixedModule
+
+
+class Module(MixedModule):
+    """A fast implementation of the ElementTree API, with the elements
+    built directly by the expat parser."""
+
+    appleveldefs = {
+        '_bootstrap':       'app_elementtree._bootstrap',
+        'XML':              'app_elementtree.XML',
+        'fromstring':       'app_elementtree.XML',
+        'XMLID':            'app_elementtree.XMLID',
+        'fromstringlist':   'app_elementtree.fromstringlist',
+        'parse':            'app_elementtree.parse',
+        'iterparse':        'app_elementtree.iterparse',
+    }
+
+    interpleveldefs = {
+        'VERSION':          'space.newtext("1.0.6")',
+        '__version__':      'space.newtext("1.0.6")',
+        'Element':          'interp_elementtree.W_Element',
+        'SubElement':       'interp_elementtree.SubElement',
+        'TreeBuilder':      'interp_elementtree.W_TreeBuilder',
+        'XMLParser':        'interp_elementtree.W_XMLParser',
+        'XMLTreeBuilder':   'interp_elementtree.W_XMLParser',
+    }
+
+    def startup(self, space):
+        # add the names shared with xml.etree.ElementTree
+        space.call_function(self.get('_bootstrap'), self)
@@ -0,0 +1,197 @@
+from pypy.module.pyexpat.interp_pyexpat import global_storage
+
+
+class AppTestElement:
+    spaceconfig = dict(usemodules=['_elementtree', 'pyexpat'])
+
+    def teardown_class(cls):
+        global_storage.clear()
+
+    def test_basic(self):
+        from _elementtree import Element, SubElement
+        e = Element('root', {'a': '1'}, b='2')
+        assert e.tag == 'root'
+        assert e.attrib == {'a': '1', 'b': '2'}
+        assert e.text is None and e.tail is None
+        assert len(e) == 0
+        s = SubElement(e, 'child', x='y')
+        assert len(e) == 1 and e[0] is s and e[-1] is s
+        assert s.get('x') == 'y' and s.get('z', 5) == 5
+        e.set('c', '3')
+        assert sorted(e.keys()) == ['a', 'b', 'c']
+        assert Element('x').items() == []
+        raises(TypeError, Element, 'x', 42)
+        raises(TypeError, e.append, 42)
+        raises(IndexError, "e[1]")
+        raises(AttributeError, "del e.tag")
+        assert repr(e).startswith("<Element 'root' at 0x")
+
+    def test_sequence(self):
+        from _elementtree import Element
+        e = Element('root')
+        children = [Element('c%d' % i) for i in range(6)]
+        e.extend(children)
+        assert e[1:3] == children[1:3]
+        assert e[::-2] == children[::-2]
+        e[1:3] = [Element('new')]
+        assert [c.tag for c in e] == ['c0', 'new', 'c3', 'c4', 'c5']
+        del e[::2]
+        assert [c.tag for c in e] == ['new', 'c4']
+        e.insert(0, children[0])
+        e.remove(children[4])
+        assert [c.tag for c in e] == ['c0', 'new']
+        raises(ValueError, e.remove, children[4])
+        e[0] = children[1]
+        assert e.getchildren() == [children[1], e[1]]
+        e.clear()
+        assert len(e) == 0 and e.attrib == {}
+
+    def test_find_and_iter(self):
+        from _elementtree import XML
+        e = XML('<a><b>1</b><c><b>2</b>tail</c><b/>x</a>')
+        assert e.find('b').text == '1'
+        assert e.find('d') is None
+        assert e.findtext('c') == ''
+        assert e.findtext('d', 'default') == 'default'
+        assert [b.text for b in e.findall('b')] == ['1', None]
+        assert [b.text for b in e.findall('.//b')] == ['1', '2', None]
+        assert e.find('c/b').text == '2'
+        assert [x.tag for x in e.iter()] == ['a', 'b', 'c', 'b', 'b']
+        assert [x.text for x in e.iter('b')] == ['1', '2', None]
+        assert len(e.getiterator('*')) == 5
+        assert list(e.itertext()) == ['1', '2', 'tail', 'x']
+
+    def test_copy(self):
+        import copy
+        from _elementtree import XML
+        e = XML('<a x="1">text<b/></a>')
+        e2 = copy.copy(e)
+        e3 = copy.deepcopy(e)
+        e[0].tag = 'c'
+        assert e2[0].tag == 'c' and e3[0].tag == 'b'
+        assert e2.attrib == e3.attrib == {'x': '1'}
+        assert e3.attrib is not e.attrib
+        assert e3.text == 'text'
+
+    def test_parser(self):
+        import _elementtree as ET
+        root = ET.XML('<root a="1" xmlns:n="urn:n"><n:x>caf\xc3\xa9</n:x>'
+                      '<y>&amp;</y><!-- c --></root>')
+        assert root.attrib == {'a': '1'}
+        assert root[0].tag == '{urn:n}x'
+        assert type(root[0].tag) is str
+        assert root[0].text == u'caf\xe9'
+        assert root[1].text == '&'
+        assert len(root) == 2
+        e = raises(ET.ParseError, ET.XML, '<a>&foo;</a>').value
+        assert e.position == (1, 3)
+        e = raises(ET.ParseError, ET.XML, '<a></b>').value
+        assert str(e) == 'mismatched tag: line 1, column 5'
+        assert ET.tostring(root[1]) == '<y>&amp;</y>'
+        assert isinstance(ET.ElementTree(root), ET.ElementTree)
+
+    def test_parser_entity_and_target(self):
+        import _elementtree as ET
+        parser = ET.XMLParser()
+        parser.entity['e'] = 'value'
+        parser.feed("<!DOCTYPE a [<!ENTITY % ents SYSTEM 'ents.xml'> %ents;]>"
+                    "<a>&e;</a>")
+        assert parser.close().text == 'value'
+        log = []
+        class Target(object):
+            def start(self, tag, attrib):
+                log.append(('start', tag, attrib))
+            def end(self, tag):
+                log.append(('end', tag))
+            def data(self, data):
+                log.append(('data', data))
+            def comment(self, text):
+                log.append(('comment', text))
+            def close(self):
+                return 42
+        parser = ET.XMLParser(target=Target())
+        parser.feed('<a b="c">d<!--e--></a>')
+        assert parser.close() == 42
+        assert log == [('start', 'a', {'b': 'c'}), ('data', 'd'),
+                       ('comment', 'e'), ('end', 'a')]
+
+    def test_treebuilder(self):
+        from _elementtree import TreeBuilder
+        b = TreeBuilder()
+        b.start('a', {})
+        b.data('x')
+        b.data('y')
+        b.start('b', {'k': 'v'})
+        b.end('b')
+        b.data('tail')
+        b.end('a')
+        root = b.close()
+        assert root.tag == 'a' and root.text == 'xy'
+        assert root[0].attrib == {'k': 'v'} and root[0].tail == 'tail'
+
+    def test_iterparse(self):
+        import _elementtree as ET
+        from StringIO import StringIO
+        source = '<a xmlns="urn:x"><b>1</b><b>2</b></a>'
+        events = [(event, getattr(elem, 'tag', elem)) for event, elem in
+                  ET.iterparse(StringIO(source),
+                               ('start', 'end', 'start-ns', 'end-ns'))]
+        assert events == [('start-ns', ('', 'urn:x')),
+                          ('start', '{urn:x}a'), ('start', '{urn:x}b'),
+                          ('end', '{urn:x}b'), ('start', '{urn:x}b'),
+                          ('end', '{urn:x}b'), ('end', '{urn:x}a'),
+                          ('end-ns', None)]
+        it = ET.iterparse(StringIO(source))
+        assert [elem.text for event, elem in it] == ['1', '2', None]
+        assert len(it.root) == 2
+        it = ET.iterparse(StringIO(source), clear=True)
+        assert [elem.text for event, elem in it] == ['1', '2', None]
+        assert len(it.root) == 0
+        it = ET.iterparse(StringIO('<a/>junk'))
+        assert next(it)[0] == 'end'
+        raises(ET.ParseError, next, it)
+
+    def test_iterparse_clear(self):
+        import _elementtree as ET
+        from StringIO import StringIO
+        source = ('<db><rec><f>1</f><g/></rec><rec><f>2</f></rec>'
+                  '<rec><f>3</f></rec></db>')
+        seen = []
+        records = []
+        for event, elem in ET.iterparse(StringIO(source), clear=True):
+            if elem.tag == 'rec':
+                seen.append((len(elem), elem.findtext('f')))
+                records.append(elem)
+        assert seen == [(2, '1'), (1, '2'), (1, '3')]
+        # released once the iterator went past their end event
+        assert [len(rec) for rec in records] == [0, 0, 0]
+        # with only "start" events, elements are released when they end
+        it = ET.iterparse(StringIO(source), ('start',), clear=True)
+        starts = [elem for event, elem in it]
+        assert len(starts) == 8
+        assert [len(elem) for elem in starts] == [0] * 8
+
+    def test_comment_and_foreign_children(self):
+        import _elementtree as ET
+        from xml.etree import ElementTree as pyET
+        a = ET.Element('a')
+        a.append(ET.Comment('foo'))
+        assert a[0].tag == pyET.Comment and a[0].tag == ET.Comment
+        assert [e.tag for e in a.iter(ET.Comment)] == [pyET.Comment]
+        assert ET.tostring(a) == '<a><!--foo--></a>'
+        # like ElementInclude, put a pure Python element in the tree
+        a[0] = pyET.XML('<b>x<c/>y</b>')
+        a[0].tail = 'z'
+        ET.SubElement(a, 'd')
+        assert [e.tag for e in a.iter()] == ['a', 'b', 'c', 'd']
+        assert [e.tag for e in a.iter('c')] == ['c']
+        assert list(a.itertext()) == ['x', 'y', 'z']
+
+    def test_target_lookup_errors(self):
+        import _elementtree as ET
+        class Target(object):
+            def __getattr__(self, name):
+                if name == 'data':
+                    raise ValueError(name)
+                raise AttributeError(name)
+        raises(ValueError, ET.XMLParser, target=Target())
@@ -0,0 +1,67 @@
+"""Measure calls through functools.partial() and a memoized function,
+comparing the built-in functools.lru_cache() with a hand-written
+dictionary-based decorator.
+
+Run with a translated pypy:
+
+    pypy bench_functools.py [calls [repeat]]
+"""
+
+import functools, sys, time
+
+def add(a, b, c=0):
+    return a + b + c
+
+def memoize(func):
+    cache = {}
+    def wrapper(*args):
+        try:
+            return cache[args]
+        except KeyError:
+            result = cache[args] = func(*args)
+            return result
+    return wrapper
+
+def square(n):
+    return n * n
+
+def call_partial(n):
+    p = functools.partial(add, 1, c=2)
+    total = 0
+    for i in xrange(n):
+        total += p(i)
+    return total
+
+def call_cached(func, n):
+    total = 0
+    for i in xrange(n):
+        total += func(i & 255)
+    return total
+
+def bench(func, arg, repeat):
+    best = None
+    for i in range(repeat):
+        t = time.time()
+        func(arg)
+        t = time.time() - t
+        if best is None or t < best:
+            best = t
+    return best
+
+def main(n=10000000, repeat=5):
+    modes = [('partial', call_partial),
+             ('hand-written memoize',
+              lambda n, f=memoize(square): call_cached(f, n))]
+    if hasattr(functools, 'lru_cache'):
+        modes.append(('lru_cache(None)',
+                      lambda n, f=functools.lru_cache(None)(square):
+                          call_cached(f, n)))
+        modes.append(('lru_cache(512)',
+                      lambda n, f=functools.lru_cache(512)(square):
+                          call_cached(f, n)))
+    for name, func in modes:
+        t = bench(func, n, repeat)
+        print '%-22s %8.3f s  %12.0f calls per second' % (name, t, n / t)
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
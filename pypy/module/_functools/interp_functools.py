@@ -0,0 +1,314 @@
+from pypy.interpreter.argument import Arguments
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import oefmt
+from pypy.interpreter.function import descr_function_get
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.typedef import (
+    TypeDef, GetSetProperty, descr_get_dict, descr_set_dict,
+    interp_attrproperty_w, make_weakref_descr)
+from pypy.objspace.std.bytesobject import W_BytesObject
+from pypy.objspace.std.intobject import W_IntObject
+
+
+class W_Partial(W_Root):
+    _immutable_fields_ = ['w_func?', 'w_args?', 'args_w?[*]', 'w_keywords?']
+
+    def __init__(self, space, w_func, args_w, w_keywords):
+        self.w_func = w_func
+        self.w_args = space.newtuple(args_w)
+        self.args_w = args_w
+        self.w_keywords = w_keywords
+        self.w_dict = None
+
+    def getdict(self, space):
+        if self.w_dict is None:
+            self.w_dict = space.newdict(instance=True)
+        return self.w_dict
+
+    def setdict(self, space, w_dict):
+        if not space.isinstance_w(w_dict, space.w_dict):
+            raise oefmt(space.w_TypeError,
+                        "setting partial object's dictionary to a non-dict")
+        self.w_dict = w_dict
+
+    def descr_del_dict(self, space):
+        raise oefmt(space.w_TypeError,
+                    "a partial object's dictionary may not be deleted")
+
+    def descr_call(self, space, __args__):
+        args_w = self.args_w + __args__.arguments_w
+        if __args__.keywords:
+            if space.len_w(self.w_keywords) > 0:
+                w_args, w_kwds = __args__.topacked()
+                w_merged = space.call_method(self.w_keywords, "copy")
+                space.call_method(w_merged, "update", w_kwds)
+                args = Arguments(space, args_w, w_starstararg=w_merged)
+            else:
+                args = __args__.replace_arguments(args_w)
+        else:
+            args = Arguments(space, args_w, w_starstararg=self.w_keywords)
+        return space.call_args(self.w_func, args)
+
+    def descr_reduce(self, space):
+        if self.w_dict is None or space.len_w(self.w_dict) == 0:
+            w_dict = space.w_None
+        else:
+            w_dict = self.w_dict
+        return space.newtuple([
+            space.type(self),
+            space.newtuple([self.w_func]),
+            space.newtuple([self.w_func, self.w_args,
+                            self.w_keywords, w_dict])])
+
+    def descr_setstate(self, space, w_state):
+        if (not space.isinstance_w(w_state, space.w_tuple) or
+                space.len_w(w_state) != 4):
+            raise oefmt(space.w_TypeError, "invalid partial state")
+        w_func, w_args, w_keywords, w_dict = space.fixedview(w_state, 4)
+        if (not space.is_true(space.callable(w_func)) or
+                not space.isinstance_w(w_args, space.w_tuple) or
+                not (space.is_none(w_keywords) or
+                     space.isinstance_w(w_keywords, space.w_dict))):
+            raise oefmt(space.w_TypeError, "invalid partial state")
+        if not space.is_w(space.type(w_args), space.w_tuple):
+            w_args = space.newtuple(space.fixedview(w_args))
+        self.w_func = w_func
+        self.w_args = w_args
+        self.args_w = space.fixedview(w_args)
+        if space.is_none(w_keywords):
+            w_keywords = space.newdict()
+        elif not space.is_w(space.type(w_keywords), space.w_dict):
+            w_keywords = space.call_function(space.w_dict, w_keywords)
+        self.w_keywords = w_keywords
+        if space.is_none(w_dict):
+            self.w_dict = None
+        else:
+            space.call_method(self.getdict(space), "update", w_dict)
+
+
+def W_Partial___new__(space, w_subtype, __args__):
+    args_w, kwds_w = __args__.unpack()
+    if len(args_w) < 1:
+        raise oefmt(space.w_TypeError,
+                    "type 'partial' takes at least one argument")
+    w_func = args_w[0]
+    if not space.is_true(space.callable(w_func)):
+        raise oefmt(space.w_TypeError, "the first argument must be callable")
+    w_keywords = space.newdict()
+    for key, w_value in kwds_w.items():
+        space.setitem_str(w_keywords, key, w_value)
+    r = space.allocate_instance(W_Partial, w_subtype)
+    r.__init__(space, w_func, args_w[1:], w_keywords)
+    return r
+
+W_Partial.typedef = TypeDef(
+    'functools.partial',
+    __new__ = interp2app(W_Partial___new__),
+    __call__ = interp2app(W_Partial.descr_call),
+    __reduce__ = interp2app(W_Partial.descr_reduce),
+    __setstate__ = interp2app(W_Partial.descr_setstate),
+    func = interp_attrproperty_w('w_func', W_Partial,
+                                 doc="function object to use in future "
+                                     "partial calls"),
+    args = interp_attrproperty_w('w_args', W_Partial,
+                                 doc="tuple of arguments to future partial "
+                                     "calls"),
+    keywords = interp_attrproperty_w('w_keywords', W_Partial,
+                                     doc="dictionary of keyword arguments "
+                                         "to future partial calls"),
+    __dict__ = GetSetProperty(descr_get_dict, descr_set_dict,
+                              W_Partial.descr_del_dict, cls=W_Partial),
+    __weakref__ = make_weakref_descr(W_Partial),
+    __doc__ = """partial(func, *args, **keywords) - new function with partial
+application of the given arguments and keywords.
+""",
+    )
+
+# ____________________________________________________________
+
+
+class CacheLink(W_Root):
+    # an entry of a bounded cache: the links form a circular doubly linked
+    # list, from the most recently used entry to the least recently used
+    # one, starting after the root link of the cache
+    def __init__(self, w_key, w_result):
+        self.w_key = w_key
+        self.w_result = w_result
+        self.prev = self
+        self.next = self
+
+    def unlink(self):
+        self.prev.next = self.next
+        self.next.prev = self.prev
+
+    def insert_after(self, link):
+        self.prev = link
+        self.next = link.next
+        link.next.prev = self
+        link.next = self
+
+
+class KwdMark(object):
+    def __init__(self, space):
+        self.w_mark = space.call_function(space.w_object)
+
+
+class W_LRUCacheWrapper(W_Root):
+    """The object returned by functools.lru_cache().  The cache is an
+    ordinary dict, so calls with a single int or str argument use the
+    keys directly and get the corresponding dict strategies."""
+
+    def __init__(self, space, w_func, maxsize, typed, w_cache_info_type):
+        self.w_func = w_func
+        self.maxsize = maxsize          # -1 means unbounded
+        self.typed = typed
+        self.w_cache_info_type = w_cache_info_type
+        self.w_dict = None
+        self._reset(space)
+
+    def _reset(self, space):
+        self.w_cache = space.newdict()
+        self.root = CacheLink(None, None)
+        self.hits = 0
+        self.misses = 0
+
+    def getdict(self, space):
+        if self.w_dict is None:
+            self.w_dict = space.newdict(instance=True)
+        return self.w_dict
+
+    def make_key(self, space, __args__):
+        args_w = __args__.arguments_w
+        keywords = __args__.keywords
+        if not keywords and not self.typed and len(args_w) == 1:
+            w_arg = args_w[0]
+            if (type(w_arg) is W_IntObject or type(w_arg) is W_BytesObject):
+                return w_arg
+        nargs = len(args_w)
+        nkwds = len(keywords) if keywords else 0
+        size = nargs
+        if nkwds:
+            size += 1 + 2 * nkwds
+        if self.typed:
+            size += nargs + nkwds
+        items_w = [None] * size
+        for i in range(nargs):
+            items_w[i] = args_w[i]
+        j = nargs
+        if nkwds:
+            items_w[j] = space.fromcache(KwdMark).w_mark
+            j += 1
+            # like Arguments.topacked(), for the names that are not str
+            names_w = __args__.keyword_names_w
+            limit = nkwds
+            if names_w is not None:
+                limit -= len(names_w)
+            for i in range(nkwds):
+                if i < limit:
+                    items_w[j] = space.newtext(keywords[i])
+                else:
+                    items_w[j] = names_w[i - limit]
+                items_w[j + 1] = __args__.keywords_w[i]
+                j += 2
+        if self.typed:
+            for i in range(nargs):
+                items_w[j] = space.type(args_w[i])
+                j += 1
+            for i in range(nkwds):
+                items_w[j] = space.type(__args__.keywords_w[i])
+                j += 1
+        return space.newtuple(items_w)
+
+    def descr_call(self, space, __args__):
+        if self.maxsize == 0:
+            self.misses += 1
+            return space.call_args(self.w_func, __args__)
+        w_key = self.make_key(space, __args__)
+        if self.maxsize < 0:
+            w_result = space.finditem(self.w_cache, w_key)
+            if w_result is not None:
+                self.hits += 1
+                return w_result
+            self.misses += 1
+            w_result = space.call_args(self.w_func, __args__)
+            space.setitem(self.w_cache, w_key, w_result)
+            return w_result
+        return self._call_bounded(space, w_key, __args__)
+
+    def _call_bounded(self, space, w_key, __args__):
+        w_link = space.finditem(self.w_cache, w_key)
+        if w_link is not None:
+            link = space.interp_w(CacheLink, w_link)
+            if link.prev is not self.root:
+                link.unlink()
+                link.insert_after(self.root)
+            self.hits += 1
+            return link.w_result
+        self.misses += 1
+        w_result = space.call_args(self.w_func, __args__)
+        if space.finditem(self.w_cache, w_key) is not None:
+            # the call added the same key, e.g. by a recursive call
+            return w_result
+        root = self.root
+        if space.len_w(self.w_cache) >= self.maxsize:
+            oldest = root.prev
+            oldest.unlink()
+            space.delitem(self.w_cache, oldest.w_key)
+            if self.root is not root:
+                # cache_clear() was called while deleting the key
+                return w_result
+        link = CacheLink(w_key, w_result)
+        link.insert_after(root)
+        space.setitem(self.w_cache, w_key, link)
+        return w_result
+
+    def descr_cache_info(self, space):
+        """Report the cache statistics."""
+        if self.maxsize < 0:
+            w_maxsize = space.w_None
+        else:
+            w_maxsize = space.newint(self.maxsize)
+        return space.call_function(self.w_cache_info_type,
+                                   space.newint(self.hits),
+                                   space.newint(self.misses),
+                                   w_maxsize,
+                                   space.newint(space.len_w(self.w_cache)))
+
+    def descr_cache_clear(self, space):
+        """Clear the cache and the cache statistics."""
+        self._reset(space)
+
+CacheLink.typedef = TypeDef('_functools._cache_link')
+
+
+@unwrap_spec(typed=bool)
+def W_LRUCacheWrapper___new__(space, w_subtype, w_func, w_maxsize, typed,
+                              w_cache_info_type):
+    if not space.is_true(space.callable(w_func)):
+        raise oefmt(space.w_TypeError, "the first argument must be callable")
+    if space.is_none(w_maxsize):
+        maxsize = -1
+    elif (space.isinstance_w(w_maxsize, space.w_int) or
+          space.isinstance_w(w_maxsize, space.w_long)):
+        maxsize = max(space.int_w(w_maxsize), 0)
+    else:
+        raise oefmt(space.w_TypeError,
+                    "maxsize should be integer or None")
+    r = space.allocate_instance(W_LRUCacheWrapper, w_subtype)
+    r.__init__(space, w_func, maxsize, typed, w_cache_info_type)
+    return r
+
+W_LRUCacheWrapper.typedef = TypeDef(
+    'functools._lru_cache_wrapper',
+    __new__ = interp2app(W_LRUCacheWrapper___new__),
+    __call__ = interp2app(W_LRUCacheWrapper.descr_call),
+    __get__ = interp2app(descr_function_get),
+    cache_info = interp2app(W_LRUCacheWrapper.descr_cache_info),
+    cache_clear = interp2app(W_LRUCacheWrapper.descr_cache_clear),
+    __dict__ = GetSetProperty(descr_get_dict, cls=W_LRUCacheWrapper),
+    __weakref__ = make_weakref_descr(W_LRUCacheWrapper),
+    __doc__ = """_lru_cache_wrapper(func, maxsize, typed, cache_info_type)
+
+Create a cached callable that wraps another function.  See
+functools.lru_cache().""",
+    )
@@ -0,0 +1,20 @@
+"""
+Mixed-module definition for the _functools module.
+lib_pypy/_functools.py contains the pure Python version, which is used if
+this module is disabled.
+"""
+
+from pypy.interpreter.mixedmodule import MixedModule
+
+
+class Module(MixedModule):
+    """Tools that operate on functions."""
+
+    interpleveldefs = {
+        'partial': 'interp_functools.W_Partial',
+        '_lru_cache_wrapper': 'interp_functools.W_LRUCacheWrapper',
+        'reduce': 'space.builtin.get("reduce")',
+    }
+
+    appleveldefs = {
+    }
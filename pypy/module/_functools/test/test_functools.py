@@ -0,0 +1,166 @@
+class AppTestPartial:
+    spaceconfig = dict(usemodules=['_functools'])
+
+    def test_basic(self):
+        from _functools import partial
+        def f(*args, **kw):
+            return args, kw
+        p = partial(f, 1, 2, a=3)
+        assert p(4, b=5) == ((1, 2, 4), {'a': 3, 'b': 5})
+        assert p(a=6) == ((1, 2), {'a': 6})
+        assert p() == ((1, 2), {'a': 3})
+        assert p.func is f
+        assert p.args == (1, 2)
+        assert p.keywords == {'a': 3}
+        assert partial(f)(1, c=2) == ((1,), {'c': 2})
+        assert partial(f).keywords == {}
+        raises(TypeError, partial)
+        raises(TypeError, partial, 42)
+
+    def test_keywords_are_shared(self):
+        from _functools import partial
+        p = partial(dict, x=1)
+        p.keywords['y'] = 2
+        assert p() == {'x': 1, 'y': 2}
+        assert p.keywords == {'x': 1, 'y': 2}
+
+    def test_dict_and_weakref(self):
+        from _functools import partial
+        import _weakref
+        p = partial(len)
+        p.attr = 42
+        assert p.__dict__ == {'attr': 42}
+        raises(TypeError, "del p.__dict__")
+        raises(TypeError, "p.__dict__ = 5")
+        r = _weakref.ref(p)
+        assert r() is p
+
+    def test_subclass(self):
+        from _functools import partial
+        class MyPartial(partial):
+            def __call__(self, *args):
+                return 'my', partial.__call__(self, *args)
+        p = MyPartial(max, 3)
+        assert p(5) == ('my', 5)
+        assert type(p) is MyPartial
+
+    def test_reduce_setstate(self):
+        from _functools import partial
+        p = partial(max, 3, key=abs)
+        p.attr = 'x'
+        cls, args, state = p.__reduce__()
+        assert cls is partial and args == (max,)
+        assert state == (max, (3,), {'key': abs}, {'attr': 'x'})
+        q = cls(*args)
+        q.__setstate__(state)
+        assert q(-5) == -5
+        assert q.attr == 'x'
+        q.__setstate__((min, (1, 2), None, None))
+        assert q() == 1
+        assert q.keywords == {}
+        raises(TypeError, q.__setstate__, (min, [1], None, None))
+        raises(TypeError, q.__setstate__, (min,))
+
+
+class AppTestLRUCache:
+    spaceconfig = dict(usemodules=['_functools'])
+
+    def setup_class(cls):
+        cls.w_CacheInfo = cls.space.appexec([], """():
+            def CacheInfo(*args):
+                return args
+            return CacheInfo
+        """)
+
+    def test_bounded(self):
+        from _functools import _lru_cache_wrapper
+        calls = []
+        def f(x):
+            calls.append(x)
+            return x * 2
+        c = _lru_cache_wrapper(f, 2, False, self.CacheInfo)
+        assert c(1) == 2
+        assert c(2) == 4
+        assert c(1) == 2
+        assert c.cache_info() == (1, 2, 2, 2)
+        assert c(3) == 6          # evicts 2, the least recently used
+        assert c(1) == 2
+        assert c(2) == 4
+        assert calls == [1, 2, 3, 2]
+        assert c.cache_info() == (2, 4, 2, 2)
+        c.cache_clear()
+        assert c.cache_info() == (0, 0, 2, 0)
+
+    def test_unbounded_and_zero(self):
+        from _functools import _lru_cache_wrapper
+        c = _lru_cache_wrapper(lambda *args: len(args), None, False,
+                               self.CacheInfo)
+        for i in range(100):
+            c(i, i)
+            c(i, i)
+        assert c.cache_info() == (100, 100, None, 100)
+        c = _lru_cache_wrapper(lambda x: x, 0, False, self.CacheInfo)
+        c(1); c(1)
+        assert c.cache_info() == (0, 2, 0, 0)
+        c = _lru_cache_wrapper(lambda x: x, -5, False, self.CacheInfo)
+        assert c.cache_info() == (0, 0, 0, 0)
+        raises(TypeError, _lru_cache_wrapper, 42, 1, False, self.CacheInfo)
+        raises(TypeError, _lru_cache_wrapper, len, 'x', False, self.CacheInfo)
+
+    def test_keys(self):
+        from _functools import _lru_cache_wrapper
+        def f(*args, **kwds):
+            return args, kwds
+        c = _lru_cache_wrapper(f, 10, False, self.CacheInfo)
+        assert c(1, a=2) == ((1,), {'a': 2})
+        assert c(1, a=2) == ((1,), {'a': 2})
+        assert c(1, 'a', 2) == ((1, 'a', 2), {})
+        assert c('x') == (('x',), {})
+        assert c(1.0, a=2) == ((1,), {'a': 2})     # 1.0 == 1
+        assert c.cache_info() == (2, 3, 10, 3)
+        raises(TypeError, c, [])
+        t = _lru_cache_wrapper(f, 10, True, self.CacheInfo)
+        assert t(1) == ((1,), {})
+        assert type(t(1.0)[0][0]) is float
+        assert t.cache_info() == (0, 2, 10, 2)
+
+    def test_recursive(self):
+        from _functools import _lru_cache_wrapper
+        def fib(n):
+            if n < 2:
+                return n
+            return cached(n - 1) + cached(n - 2)
+        cached = _lru_cache_wrapper(fib, 3, False, self.CacheInfo)
+        assert cached(30) == 832040
+        assert cached.cache_info() == (28, 31, 3, 3)
+
+    def test_method_and_wraps(self):
+        from _functools import _lru_cache_wrapper
+        class A(object):
+            def f(self, x):
+                return self, x
+            f = _lru_cache_wrapper(f, 10, False, self.CacheInfo)
+        a = A()
+        assert a.f(5) == (a, 5)
+        assert A.f(a, 5) == (a, 5)
+        assert A.__dict__['f'].cache_info() == (1, 1, 10, 1)
+        w = A.__dict__['f']
+        w.__name__ = 'f'
+        w.__doc__ = 'doc'
+        assert (w.__name__, w.__doc__) == ('f', 'doc')
+        assert w.__dict__ == {'__name__': 'f', '__doc__': 'doc'}
+
+    def test_functools_lru_cache(self):
+        import functools
+        @functools.lru_cache(maxsize=2)
+        def f(x):
+            return x
+        @functools.lru_cache()
+        def g(x):
+            return x
+        f(1)
+        f(1)
+        info = f.cache_info()
+        assert info == (1, 1, 2, 1)
+        assert (info.hits, info.misses) == (1, 1)
+        assert type(g.cache_info()) is type(info)
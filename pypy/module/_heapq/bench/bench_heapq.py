@@ -0,0 +1,66 @@
+"""Compare the built-in _heapq module with the pure Python functions of
+lib-python/2.7/heapq.py, on heaps of ints, floats, strings and tuples.
+
+Run with a translated pypy:
+
+    pypy bench_heapq.py [size]
+"""
+
+import sys, time
+
+def import_heapq(blocked):
+    saved = sys.modules.pop('heapq', None)
+    if blocked:
+        sys.modules['_heapq'] = None     # makes 'from _heapq import *' fail
+    try:
+        import heapq
+        return heapq
+    finally:
+        if blocked:
+            del sys.modules['_heapq']
+        if saved is not None:
+            sys.modules['heapq'] = saved
+        else:
+            del sys.modules['heapq']
+
+def make_data(n):
+    ints = [(i * 7919) % n for i in xrange(n)]
+    return [
+        ('int', ints),
+        ('float', [x / 7.0 for x in ints]),
+        ('str', ['key%d' % x for x in ints]),
+        ('tuple', [(x, -x) for x in ints]),
+    ]
+
+def bench(module, data):
+    t0 = time.time()
+    heap = []
+    for x in data:
+        module.heappush(heap, x)
+    while heap:
+        module.heappop(heap)
+    t1 = time.time()
+    heap = data[:]
+    module.heapify(heap)
+    for x in data:
+        module.heapreplace(heap, x)
+    t2 = time.time()
+    module.nsmallest(100, data)
+    module.nlargest(100, data)
+    t3 = time.time()
+    return t1 - t0, t2 - t1, t3 - t2
+
+def main(argv):
+    n = int(argv[1]) if len(argv) > 1 else 200000
+    modules = [('heapq.py', import_heapq(True)),
+               ('_heapq', import_heapq(False))]
+    print '%-10s %-6s %10s %10s %10s' % ('module', 'items', 'push/pop',
+                                         'replace', 'nsmallest')
+    for kind, data in make_data(n):
+        for name, module in modules:
+            bench(module, data)      # warm up the JIT
+            print '%-10s %-6s %10.3f %10.3f %10.3f' % (
+                (name, kind) + bench(module, data))
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,306 @@
+"""Interp-level version of the heap queue functions of heapq.py.
+
+The heap is always a list.  If it uses one of the unboxed list strategies,
+the sifting works directly on the unwrapped items; otherwise it compares
+the items with lt_w(), checking after every comparison that the app-level
+code it may have run did not change the size of the list.
+"""
+
+from rpython.rlib.objectmodel import specialize
+from rpython.rlib.unroll import unrolling_iterable
+
+from pypy.interpreter.error import OperationError, oefmt
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.module.__builtin__.interp_classobj import W_InstanceObject
+from pypy.objspace.std.bytesobject import W_BytesObject
+from pypy.objspace.std.floatobject import W_FloatObject
+from pypy.objspace.std.intobject import W_IntObject
+from pypy.objspace.std.listobject import (
+    W_ListObject, BytesListStrategy, FloatListStrategy, IntegerListStrategy)
+
+
+def lt_w(space, w_x, w_y):
+    """Like heapq.cmp_lt(): use __lt__ if available; otherwise, try __le__."""
+    if type(w_x) is W_IntObject and type(w_y) is W_IntObject:
+        return space.int_w(w_x) < space.int_w(w_y)
+    if type(w_x) is W_FloatObject and type(w_y) is W_FloatObject:
+        return space.float_w(w_x) < space.float_w(w_y)
+    if type(w_x) is W_BytesObject and type(w_y) is W_BytesObject:
+        return space.bytes_w(w_x) < space.bytes_w(w_y)
+    if space.lookup(w_x, '__lt__') is not None and (
+            not isinstance(w_x, W_InstanceObject) or
+            space.findattr(w_x, space.newtext('__lt__')) is not None):
+        return space.is_true(space.lt(w_x, w_y))
+    return not space.is_true(space.le(w_y, w_x))
+
+
+def make_unboxed_heap(strategy, getitems, name, lt):
+    """Make the sift functions for the lists using 'strategy'.  They can't
+    run app-level code, so the size of the list can't change under them."""
+
+    def siftdown(heap, startpos, pos):
+        newitem = heap[pos]
+        while pos > startpos:
+            parentpos = (pos - 1) >> 1
+            parent = heap[parentpos]
+            if not lt(newitem, parent):
+                break
+            heap[pos] = parent
+            pos = parentpos
+        heap[pos] = newitem
+
+    def siftup(heap, pos):
+        endpos = len(heap)
+        startpos = pos
+        newitem = heap[pos]
+        childpos = 2 * pos + 1
+        while childpos < endpos:
+            rightpos = childpos + 1
+            if rightpos < endpos and not lt(heap[childpos], heap[rightpos]):
+                childpos = rightpos
+            heap[pos] = heap[childpos]
+            pos = childpos
+            childpos = 2 * pos + 1
+        heap[pos] = newitem
+        siftdown(heap, startpos, pos)
+
+    def heapify(heap):
+        for i in range(len(heap) // 2 - 1, -1, -1):
+            siftup(heap, i)
+
+    class UnboxedHeap(object):
+        pass
+    UnboxedHeap.__name__ = 'UnboxedHeap_' + name
+    UnboxedHeap.strategy = strategy
+    UnboxedHeap.getitems = staticmethod(getitems)
+    UnboxedHeap.siftdown = staticmethod(siftdown)
+    UnboxedHeap.siftup = staticmethod(siftup)
+    UnboxedHeap.heapify = staticmethod(heapify)
+    return UnboxedHeap
+
+def _lt(x, y):
+    return x < y
+
+def _gt(x, y):
+    return y < x
+
+def _make_unboxed_heaps(lt, suffix):
+    return unrolling_iterable([
+        make_unboxed_heap(IntegerListStrategy,
+                          lambda w_list: w_list.getitems_int(),
+                          'int' + suffix, lt),
+        make_unboxed_heap(FloatListStrategy,
+                          lambda w_list: w_list.getitems_float(),
+                          'float' + suffix, lt),
+        make_unboxed_heap(BytesListStrategy,
+                          lambda w_list: w_list.getitems_bytes(),
+                          'bytes' + suffix, lt),
+    ])
+
+unboxed_heaps = _make_unboxed_heaps(_lt, '')
+unboxed_maxheaps = _make_unboxed_heaps(_gt, '_max')
+
+
+def _check_size(space, heap, size):
+    if heap.length() != size:
+        raise oefmt(space.w_RuntimeError,
+                    "list changed size during iteration")
+
+def _siftdown_w(space, heap, startpos, pos, maxheap):
+    size = heap.length()
+    if pos >= size:
+        raise oefmt(space.w_IndexError, "index out of range")
+    w_newitem = heap.getitem(pos)
+    while pos > startpos:
+        parentpos = (pos - 1) >> 1
+        w_parent = heap.getitem(parentpos)
+        if maxheap:
+            less = lt_w(space, w_parent, w_newitem)
+        else:
+            less = lt_w(space, w_newitem, w_parent)
+        _check_size(space, heap, size)
+        if not less:
+            break
+        heap.setitem(pos, w_parent)
+        pos = parentpos
+    heap.setitem(pos, w_newitem)
+
+def _siftup_w(space, heap, pos, maxheap):
+    endpos = heap.length()
+    startpos = pos
+    if pos >= endpos:
+        raise oefmt(space.w_IndexError, "index out of range")
+    w_newitem = heap.getitem(pos)
+    childpos = 2 * pos + 1
+    while childpos < endpos:
+        rightpos = childpos + 1
+        if rightpos < endpos:
+            w_child = heap.getitem(childpos)
+            w_right = heap.getitem(rightpos)
+            if maxheap:
+                less = lt_w(space, w_right, w_child)
+            else:
+                less = lt_w(space, w_child, w_right)
+            _check_size(space, heap, endpos)
+            if not less:
+                childpos = rightpos
+        heap.setitem(pos, heap.getitem(childpos))
+        pos = childpos
+        childpos = 2 * pos + 1
+    heap.setitem(pos, w_newitem)
+    _siftdown_w(space, heap, startpos, pos, maxheap)
+
+@specialize.arg(4)
+def _siftdown(space, heap, startpos, pos, maxheap):
+    strategy = heap.strategy
+    for unboxed in (unboxed_maxheaps if maxheap else unboxed_heaps):
+        if strategy is space.fromcache(unboxed.strategy):
+            unboxed.siftdown(unboxed.getitems(heap), startpos, pos)
+            return
+    _siftdown_w(space, heap, startpos, pos, maxheap)
+
+@specialize.arg(3)
+def _siftup(space, heap, pos, maxheap):
+    strategy = heap.strategy
+    for unboxed in (unboxed_maxheaps if maxheap else unboxed_heaps):
+        if strategy is space.fromcache(unboxed.strategy):
+            unboxed.siftup(unboxed.getitems(heap), pos)
+            return
+    _siftup_w(space, heap, pos, maxheap)
+
+@specialize.arg(2)
+def _heapify(space, heap, maxheap):
+    strategy = heap.strategy
+    for unboxed in (unboxed_maxheaps if maxheap else unboxed_heaps):
+        if strategy is space.fromcache(unboxed.strategy):
+            unboxed.heapify(unboxed.getitems(heap))
+            return
+    for i in range(heap.length() // 2 - 1, -1, -1):
+        _siftup_w(space, heap, i, maxheap)
+
+def _check_heap(space, w_heap):
+    if not isinstance(w_heap, W_ListObject):
+        raise oefmt(space.w_TypeError, "heap argument must be a list")
+    return w_heap
+
+
+def heappush(space, w_heap, w_item):
+    """heappush(heap, item) -> None. Push item onto heap, maintaining the heap invariant."""
+    heap = _check_heap(space, w_heap)
+    heap.append(w_item)
+    _siftdown(space, heap, 0, heap.length() - 1, False)
+
+def heappop(space, w_heap):
+    """Pop the smallest item off the heap, maintaining the heap invariant."""
+    heap = _check_heap(space, w_heap)
+    if heap.length() == 0:
+        raise oefmt(space.w_IndexError, "index out of range")
+    w_lastelt = heap.pop_end()
+    if heap.length() == 0:
+        return w_lastelt
+    w_returnitem = heap.getitem(0)
+    heap.setitem(0, w_lastelt)
+    _siftup(space, heap, 0, False)
+    return w_returnitem
+
+def heapreplace(space, w_heap, w_item):
+    """Pop and return the current smallest value, and add the new item.
+
+This is more efficient than heappop() followed by heappush(), and can be
+more appropriate when using a fixed-size heap.  Note that the value
+returned may be larger than item!  That constrains reasonable uses of
+this routine unless written as part of a conditional replacement:
+
+    if item > heap[0]:
+        item = heapreplace(heap, item)
+"""
+    heap = _check_heap(space, w_heap)
+    if heap.length() == 0:
+        raise oefmt(space.w_IndexError, "index out of range")
+    w_returnitem = heap.getitem(0)
+    heap.setitem(0, w_item)
+    _siftup(space, heap, 0, False)
+    return w_returnitem
+
+def heappushpop(space, w_heap, w_item):
+    """heappushpop(heap, item) -> value. Push item on the heap, then pop and return the smallest item
+from the heap. The combined action runs more efficiently than
+heappush() followed by a separate call to heappop()."""
+    heap = _check_heap(space, w_heap)
+    if heap.length() == 0:
+        return w_item
+    if not lt_w(space, heap.getitem(0), w_item):
+        return w_item
+    if heap.length() == 0:
+        raise oefmt(space.w_IndexError, "index out of range")
+    w_returnitem = heap.getitem(0)
+    heap.setitem(0, w_item)
+    _siftup(space, heap, 0, False)
+    return w_returnitem
+
+def heapify(space, w_heap):
+    """Transform list into a heap, in-place, in O(len(heap)) time."""
+    heap = _check_heap(space, w_heap)
+    _heapify(space, heap, False)
+
+
+def _first_items(space, w_iter, n):
+    items_w = []
+    for i in range(n):
+        try:
+            w_item = space.next(w_iter)
+        except OperationError as e:
+            if not e.match(space, space.w_StopIteration):
+                raise
+            break
+        items_w.append(w_item)
+    return space.newlist(items_w)
+
+@specialize.arg(3)
+def _select(space, n, w_iterable, maxheap):
+    # keeps the n largest items seen so far in a heap, or the n smallest
+    # ones in a max-heap, and replaces its top with the new items that
+    # are larger (smaller) than it
+    w_iter = space.iter(w_iterable)
+    heap = _first_items(space, w_iter, n)
+    if heap.length() == 0:
+        return heap
+    _heapify(space, heap, maxheap)
+    w_top = heap.getitem(0)
+    while True:
+        try:
+            w_elem = space.next(w_iter)
+        except OperationError as e:
+            if not e.match(space, space.w_StopIteration):
+                raise
+            break
+        if maxheap:
+            replace = lt_w(space, w_elem, w_top)
+        else:
+            replace = lt_w(space, w_top, w_elem)
+        if replace:
+            heap.setitem(0, w_elem)
+            _siftup(space, heap, 0, maxheap)
+            w_top = heap.getitem(0)
+    return heap
+
+@unwrap_spec(n=int)
+def nlargest(space, n, w_iterable):
+    """Find the n largest elements in a dataset.
+
+Equivalent to:  sorted(iterable, reverse=True)[:n]
+"""
+    heap = _select(space, n, w_iterable, False)
+    heap.descr_sort(space)
+    heap.reverse()
+    return heap
+
+@unwrap_spec(n=int)
+def nsmallest(space, n, w_iterable):
+    """Find the n smallest elements in a dataset.
+
+Equivalent to:  sorted(iterable)[:n]
+"""
+    heap = _select(space, n, w_iterable, True)
+    heap.descr_sort(space)
+    return heap
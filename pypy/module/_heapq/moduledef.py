@@ -0,0 +1,29 @@
+"""
+Mixed-module definition for the _heapq module.
+lib-python/2.7/heapq.py contains the pure Python version of these functions;
+it imports the ones below if this module is enabled.
+"""
+
+from pypy.interpreter.mixedmodule import MixedModule
+
+
+class Module(MixedModule):
+    """Heap queue algorithm (a.k.a. priority queue).
+
+Heaps are arrays for which a[k] <= a[2*k+1] and a[k] <= a[2*k+2] for
+all k, counting elements from 0.  For the sake of comparison,
+non-existing elements are considered to be infinite.  The interesting
+property of a heap is that a[0] is always its smallest element."""
+
+    interpleveldefs = {
+        'heappush': 'interp_heapq.heappush',
+        'heappop': 'interp_heapq.heappop',
+        'heappushpop': 'interp_heapq.heappushpop',
+        'heapreplace': 'interp_heapq.heapreplace',
+        'heapify': 'interp_heapq.heapify',
+        'nlargest': 'interp_heapq.nlargest',
+        'nsmallest': 'interp_heapq.nsmallest',
+    }
+
+    appleveldefs = {
+    }
@@ -0,0 +1,107 @@
+class AppTestHeapq:
+    spaceconfig = {
+        "usemodules": ['_heapq'],
+    }
+
+    def setup_class(cls):
+        cls.w_check_heap = cls.space.appexec([], """():
+            def check_heap(heap):
+                for pos in range(1, len(heap)):
+                    assert heap[(pos - 1) >> 1] <= heap[pos]
+            return check_heap
+        """)
+
+    def test_dict(self):
+        import _heapq
+        _heapq.__dict__  # crashes if entries in moduledef.py can't be resolved
+
+    def test_push_pop(self):
+        import _heapq
+        from __pypy__ import strategy
+        for data, strat in [([5, 3, 8, 1, 9, 2, 7], "IntegerListStrategy"),
+                            ([0.5, -3.0, 8.25, 1e10, 2.0], "FloatListStrategy"),
+                            (["pear", "apple", "fig", "kiwi"], "BytesListStrategy"),
+                            ([(2, 'b'), (1, 'a'), (3, 'c')], "ObjectListStrategy")]:
+            heap = []
+            for item in data:
+                _heapq.heappush(heap, item)
+                self.check_heap(heap)
+            assert strategy(heap) == strat
+            result = [_heapq.heappop(heap) for i in range(len(data))]
+            assert result == sorted(data)
+            assert heap == []
+        raises(IndexError, _heapq.heappop, [])
+
+    def test_heapify(self):
+        import _heapq
+        for data in [[i * 7919 % 101 for i in range(50)],
+                     [i * 7919 % 101 / 7.0 for i in range(50)],
+                     [str(i * 7919 % 101) for i in range(50)],
+                     [(i * 7919 % 11, i) for i in range(50)]]:
+            heap = data[:]
+            _heapq.heapify(heap)
+            self.check_heap(heap)
+            assert sorted(heap) == sorted(data)
+        raises(TypeError, _heapq.heapify, (3, 2, 1))
+
+    def test_mixed_types(self):
+        import _heapq
+        heap = [1, 4, 7]
+        _heapq.heappush(heap, 2.5)
+        _heapq.heappush(heap, 0L)
+        assert heap[0] == 0
+        assert [_heapq.heappop(heap) for i in range(5)] == [0, 1, 2.5, 4, 7]
+
+    def test_replace_pushpop(self):
+        import _heapq
+        heap = [1, 5, 3]
+        assert _heapq.heapreplace(heap, 4) == 1
+        assert heap == [3, 5, 4]
+        assert _heapq.heappushpop(heap, 2) == 2
+        assert _heapq.heappushpop(heap, 6) == 3
+        assert heap == [4, 5, 6]
+        assert _heapq.heappushpop([], 7) == 7
+        raises(IndexError, _heapq.heapreplace, [], 1)
+
+    def test_nlargest_nsmallest(self):
+        import _heapq
+        for data in [[i * 7919 % 1009 for i in range(200)],
+                     [i * 7919 % 1009 / 7.0 for i in range(200)],
+                     [(i * 7919 % 11, i) for i in range(200)]]:
+            for n in (-1, 0, 1, 5, 199, 200, 300):
+                assert _heapq.nsmallest(n, data) == sorted(data)[:max(n, 0)]
+                assert _heapq.nlargest(n, iter(data)) == sorted(
+                    data, reverse=True)[:max(n, 0)]
+        raises(TypeError, _heapq.nlargest, 2, 42)
+
+    def test_only_le(self):
+        import _heapq
+        class LE:
+            def __init__(self, x):
+                self.x = x
+            def __le__(self, other):
+                return self.x >= other.x
+        heap = [LE(x) for x in [3, 1, 4, 1, 5, 9, 2, 6]]
+        _heapq.heapify(heap)
+        result = [_heapq.heappop(heap).x for i in range(8)]
+        assert result == [9, 6, 5, 4, 3, 2, 1, 1]
+
+    def test_mutating_heap(self):
+        import _heapq
+        class SideEffectLT(object):
+            def __init__(self, value, heap):
+                self.value = value
+                self.heap = heap
+            def __lt__(self, other):
+                self.heap[:] = []
+                return self.value < other.value
+        heap = []
+        heap.extend(SideEffectLT(i, heap) for i in range(200))
+        raises(RuntimeError, _heapq.heappush, heap, SideEffectLT(5, heap))
+        heap.extend(SideEffectLT(i, heap) for i in range(200))
+        raises(RuntimeError, _heapq.heappop, heap)
+
+    def test_not_a_list(self):
+        import _heapq
+        raises(TypeError, _heapq.heappush, 10, 10)
+        raises(TypeError, _heapq.heappop, (1, 2))
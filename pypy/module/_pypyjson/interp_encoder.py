@@ -1,6 +1,17 @@
+import math
 from rpython.rlib.rstring import StringBuilder
-from rpython.rlib import rutf8
+from rpython.rlib import rutf8, jit
+from rpython.rlib.listsort import make_timsort_class
 from pypy.interpreter import unicodehelper
+from pypy.interpreter.error import oefmt
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.objspace.std.bytesobject import W_BytesObject
+from pypy.objspace.std.dictmultiobject import (
+    W_DictObject, BytesDictStrategy, IntDictStrategy)
+from pypy.objspace.std.floatobject import W_FloatObject, float2string
+from pypy.objspace.std.intobject import W_IntObject
+from pypy.objspace.std.listobject import W_ListObject
+from pypy.objspace.std.unicodeobject import W_UnicodeObject
 
 
 HEX = '0123456789abcdef'
@@ -16,35 +27,21 @@ ESCAPE_BEFORE_SPACE = [ESCAPE_DICT.get(chr(_i), '\\u%04x' % _i)
                        for _i in range(32)]
 
 
-def raw_encode_basestring_ascii(space, w_string):
-    if space.isinstance_w(w_string, space.w_bytes):
-        s = space.bytes_w(w_string)
-        for i in range(len(s)):
-            c = s[i]
-            if c >= ' ' and c <= '~' and c != '"' and c != '\\':
-                pass
-            else:
-                first = i
-                break
-        else:
-            # the input is a string with only non-special ascii chars
-            return w_string
+def _is_safe_ascii(c):
+    return c >= ' ' and c <= '~' and c != '"' and c != '\\'
 
-        unicodehelper.check_utf8_or_raise(space, s)
-        sb = StringBuilder(len(s))
-        sb.append_slice(s, 0, first)
-    else:
-        # We used to check if 'u' contains only safe characters, and return
-        # 'w_string' directly.  But this requires an extra pass over all
-        # characters, and the expected use case of this function, from
-        # json.encoder, will anyway re-encode a unicode result back to
-        # a string (with the ascii encoding).  This requires two passes
-        # over the characters.  So we may as well directly turn it into a
-        # string here --- only one pass.
-        s = space.utf8_w(w_string)
-        sb = StringBuilder(len(s))
-        first = 0
+def _first_unsafe_ascii(s):
+    """Return the index of the first character of 's' that needs escaping
+    by raw_encode_basestring_ascii(), or -1 if there is none."""
+    for i in range(len(s)):
+        if not _is_safe_ascii(s[i]):
+            return i
+    return -1
 
+def _append_escaped_ascii(sb, s, first):
+    # 's' is valid utf-8, and the first 'first' characters are known to be
+    # plain ascii that can be copied as they are
+    sb.append_slice(s, 0, first)
     it = rutf8.Utf8StringIterator(s)
     for i in range(first):
         it.next()
@@ -77,5 +74,449 @@ def raw_encode_basestring_ascii(space, w_string):
                 sb.append(HEX[(s2 >> 4) & 0x0f])
                 sb.append(HEX[s2 & 0x0f])
 
+def _append_escaped(sb, s):
+    # the escaping done by raw_encode_basestring(): only '"', '\\' and
+    # control characters.  Works bytewise on both str and utf-8.
+    start = 0
+    for i in range(len(s)):
+        c = s[i]
+        if c == '"' or c == '\\':
+            sb.append_slice(s, start, i)
+            sb.append('\\')
+            sb.append(c)
+            start = i + 1
+        elif c < ' ':
+            sb.append_slice(s, start, i)
+            sb.append(ESCAPE_BEFORE_SPACE[ord(c)])
+            start = i + 1
+    sb.append_slice(s, start, len(s))
+
+def _is_ascii(s):
+    for c in s:
+        if ord(c) >= 0x80:
+            return False
+    return True
+
+
+def raw_encode_basestring_ascii(space, w_string):
+    if space.isinstance_w(w_string, space.w_bytes):
+        s = space.bytes_w(w_string)
+        first = _first_unsafe_ascii(s)
+        if first < 0:
+            # the input is a string with only non-special ascii chars
+            return w_string
+        unicodehelper.check_utf8_or_raise(space, s)
+    else:
+        # We used to check if 'u' contains only safe characters, and return
+        # 'w_string' directly.  But this requires an extra pass over all
+        # characters, and the expected use case of this function, from
+        # json.encoder, will anyway re-encode a unicode result back to
+        # a string (with the ascii encoding).  This requires two passes
+        # over the characters.  So we may as well directly turn it into a
+        # string here --- only one pass.
+        s = space.utf8_w(w_string)
+        first = 0
+    sb = StringBuilder(len(s))
+    _append_escaped_ascii(sb, s, first)
     res = sb.build()
     return space.newtext(res)
+
+
+class DictItem(object):
+    def __init__(self, w_key, w_value):
+        self.w_key = w_key
+        self.w_value = w_value
+
+BytesBaseTimSort = make_timsort_class()
+IntBaseTimSort = make_timsort_class()
+ItemBaseTimSort = make_timsort_class()
+
+class BytesSort(BytesBaseTimSort):
+    def lt(self, a, b):
+        return a < b
+
+class IntSort(IntBaseTimSort):
+    def lt(self, a, b):
+        return a < b
+
+class ItemSort(ItemBaseTimSort):
+    def lt(self, a, b):
+        space = self.space
+        return space.is_true(space.lt(a.w_key, b.w_key))
+
+
+class JSONEncoder(object):
+    """ Interp-level version of json.encoder.JSONEncoder.encode().  Walks
+    the object graph and writes the output directly into a StringBuilder,
+    looking at the storage of lists and dicts with the usual strategies
+    without wrapping their items. """
+
+    def __init__(self, space, skipkeys, ensure_ascii, check_circular,
+                 allow_nan, sort_keys, indent, item_separator, key_separator,
+                 w_default):
+        self.space = space
+        self.skipkeys = skipkeys
+        self.ensure_ascii = ensure_ascii
+        self.check_circular = check_circular
+        self.allow_nan = allow_nan
+        self.sort_keys = sort_keys
+        self.indent = indent    # -1 means no indentation
+        self.item_separator = item_separator
+        self.key_separator = key_separator
+        self.w_default = w_default
+        self.markers = {}
+        self.builder = StringBuilder()
+        # only used if not ensure_ascii: the result is a unicode if any
+        # unicode string was encoded, like with StringOrUnicodeBuilder
+        self.is_unicode = False
+        self.w_nonascii_bytes = None
+
+    def build(self):
+        space = self.space
+        s = self.builder.build()
+        if not self.is_unicode:
+            return space.newbytes(s)
+        if self.w_nonascii_bytes is not None:
+            # mixing unicode and non-ascii str: raises UnicodeDecodeError
+            space.call_method(self.w_nonascii_bytes, 'decode',
+                              space.newtext('ascii'))
+        length = unicodehelper.check_utf8_or_raise(space, s)
+        return space.newutf8(s, length)
+
+    # ____________________________________________________________
+    # strings and numbers
+
+    def encode_bytes(self, s, w_string):
+        sb = self.builder
+        sb.append('"')
+        if self.ensure_ascii:
+            first = _first_unsafe_ascii(s)
+            if first < 0:
+                sb.append(s)
+            else:
+                unicodehelper.check_utf8_or_raise(self.space, s)
+                _append_escaped_ascii(sb, s, first)
+        else:
+            if self.w_nonascii_bytes is None and not _is_ascii(s):
+                if w_string is None:
+                    w_string = self.space.newbytes(s)
+                self.w_nonascii_bytes = w_string
+            _append_escaped(sb, s)
+        sb.append('"')
+
+    def encode_utf8(self, s):
+        sb = self.builder
+        sb.append('"')
+        if self.ensure_ascii:
+            _append_escaped_ascii(sb, s, 0)
+        else:
+            self.is_unicode = True
+            _append_escaped(sb, s)
+        sb.append('"')
+
+    def encode_string(self, w_string):
+        space = self.space
+        if space.isinstance_w(w_string, space.w_bytes):
+            self.encode_bytes(space.bytes_w(w_string), w_string)
+        else:
+            self.encode_utf8(space.utf8_w(w_string))
+
+    def int_repr(self, w_obj):
+        # like str(o) at app-level, which subclasses can override
+        if type(w_obj) is W_IntObject:
+            return str(w_obj.intval)
+        space = self.space
+        return space.text_w(space.str(w_obj))
+
+    def float_repr(self, x):
+        if math.isnan(x):
+            text = 'NaN'
+        elif math.isinf(x):
+            if x > 0.0:
+                text = 'Infinity'
+            else:
+                text = '-Infinity'
+        else:
+            return float2string(x, 'r', 0)
+        if not self.allow_nan:
+            raise oefmt(self.space.w_ValueError,
+                        "Out of range float values are not JSON compliant: "
+                        "%s", float2string(x, 'r', 0))
+        return text
+
+    # ____________________________________________________________
+    # containers
+
+    def mark(self, w_obj):
+        if self.check_circular:
+            if w_obj in self.markers:
+                raise oefmt(self.space.w_ValueError,
+                            "Circular reference detected")
+            self.markers[w_obj] = None
+
+    def unmark(self, w_obj):
+        if self.check_circular:
+            del self.markers[w_obj]
+
+    def emit_indent(self, level):
+        # returns the new indentation level
+        if self.indent >= 0:
+            level += 1
+            self.newline(level)
+        return level
+
+    def emit_unindent(self, level):
+        if self.indent >= 0:
+            self.newline(level - 1)
+
+    def newline(self, level):
+        self.builder.append('\n')
+        if self.indent > 0:
+            self.builder.append_multiple_char(' ', self.indent * level)
+
+    def separator(self, level):
+        self.builder.append(self.item_separator)
+        if self.indent >= 0:
+            self.newline(level)
+
+    def encode_list(self, w_list, level):
+        space = self.space
+        if type(w_list) is W_ListObject:
+            if w_list.length() == 0:
+                self.builder.append('[]')
+                return
+            intlist = space.listview_int(w_list)
+            if intlist is not None:
+                self.mark(w_list)
+                self.builder.append('[')
+                level = self.emit_indent(level)
+                for i in range(len(intlist)):
+                    if i > 0:
+                        self.separator(level)
+                    self.builder.append(str(intlist[i]))
+                self.emit_unindent(level)
+                self.builder.append(']')
+                self.unmark(w_list)
+                return
+            floatlist = space.listview_float(w_list)
+            if floatlist is not None:
+                self.mark(w_list)
+                self.builder.append('[')
+                level = self.emit_indent(level)
+                for i in range(len(floatlist)):
+                    if i > 0:
+                        self.separator(level)
+                    self.builder.append(self.float_repr(floatlist[i]))
+                self.emit_unindent(level)
+                self.builder.append(']')
+                self.unmark(w_list)
+                return
+            byteslist = space.listview_bytes(w_list)
+            if byteslist is not None:
+                self.mark(w_list)
+                self.builder.append('[')
+                level = self.emit_indent(level)
+                for i in range(len(byteslist)):
+                    if i > 0:
+                        self.separator(level)
+                    self.encode_bytes(byteslist[i], None)
+                self.emit_unindent(level)
+                self.builder.append(']')
+                self.unmark(w_list)
+                return
+            items_w = w_list.getitems_fixedsize()
+        elif space.is_w(space.type(w_list), space.w_tuple):
+            items_w = space.fixedview(w_list)
+        else:
+            # a list or tuple subclass: iterate over it, like the
+            # app-level version does, in case __iter__ is overridden
+            items_w = space.unpackiterable(w_list)
+        if not items_w:
+            self.builder.append('[]')
+            return
+        self.mark(w_list)
+        self.builder.append('[')
+        level = self.emit_indent(level)
+        for i in range(len(items_w)):
+            if i > 0:
+                self.separator(level)
+            self.encode_any(items_w[i], level)
+        self.emit_unindent(level)
+        self.builder.append(']')
+        self.unmark(w_list)
+
+    def encode_dict(self, w_dict, level):
+        space = self.space
+        if type(w_dict) is W_DictObject:
+            if w_dict.length() == 0:
+                self.builder.append('{}')
+                return
+            strategy = w_dict.get_strategy()
+            if isinstance(strategy, BytesDictStrategy):
+                d = strategy.unerase(w_dict.dstorage)
+                keys = d.keys()
+                if self.sort_keys:
+                    BytesSort(keys).sort()
+                values_w = [d[key] for key in keys]
+                self.mark(w_dict)
+                self.builder.append('{')
+                level = self.emit_indent(level)
+                for i in range(len(keys)):
+                    if i > 0:
+                        self.separator(level)
+                    self.encode_bytes(keys[i], None)
+                    self.builder.append(self.key_separator)
+                    self.encode_any(values_w[i], level)
+                self.emit_unindent(level)
+                self.builder.append('}')
+                self.unmark(w_dict)
+                return
+            if isinstance(strategy, IntDictStrategy):
+                d = strategy.unerase(w_dict.dstorage)
+                intkeys = d.keys()
+                if self.sort_keys:
+                    IntSort(intkeys).sort()
+                values_w = [d[key] for key in intkeys]
+                self.mark(w_dict)
+                self.builder.append('{')
+                level = self.emit_indent(level)
+                for i in range(len(intkeys)):
+                    if i > 0:
+                        self.separator(level)
+                    self.encode_bytes(str(intkeys[i]), None)
+                    self.builder.append(self.key_separator)
+                    self.encode_any(values_w[i], level)
+                self.emit_unindent(level)
+                self.builder.append('}')
+                self.unmark(w_dict)
+                return
+            items = []
+            iterator = w_dict.iteritems()
+            while True:
+                w_key, w_value = iterator.next_item()
+                if w_key is None:
+                    break
+                items.append(DictItem(w_key, w_value))
+        else:
+            # a dict subclass: go through its (maybe overridden) methods,
+            # like the app-level version does
+            if self.sort_keys:
+                w_items = space.call_method(w_dict, 'items')
+            else:
+                w_items = space.call_method(w_dict, 'iteritems')
+            items = []
+            for w_item in space.listview(w_items):
+                w_key, w_value = space.fixedview(w_item, 2)
+                items.append(DictItem(w_key, w_value))
+            if not items:
+                self.builder.append('{}')
+                return
+        if self.sort_keys:
+            sorter = ItemSort(items)
+            sorter.space = space
+            sorter.sort()
+        self.mark(w_dict)
+        self.builder.append('{')
+        level = self.emit_indent(level)
+        first = True
+        for item in items:
+            w_key = item.w_key
+            if space.isinstance_w(w_key, space.w_basestring):
+                key = None
+            elif space.isinstance_w(w_key, space.w_float):
+                key = self.float_repr(space.float_w(w_key))
+            elif space.is_w(w_key, space.w_True):
+                key = 'true'
+            elif space.is_w(w_key, space.w_False):
+                key = 'false'
+            elif space.is_w(w_key, space.w_None):
+                key = 'null'
+            elif (space.isinstance_w(w_key, space.w_int) or
+                  space.isinstance_w(w_key, space.w_long)):
+                key = self.int_repr(w_key)
+            elif self.skipkeys:
+                continue
+            else:
+                raise oefmt(space.w_TypeError,
+                            "key %R is not a string", w_key)
+            if first:
+                first = False
+            else:
+                self.separator(level)
+            if key is None:
+                self.encode_string(w_key)
+            else:
+                self.encode_bytes(key, None)
+            self.builder.append(self.key_separator)
+            self.encode_any(item.w_value, level)
+        self.emit_unindent(level)
+        self.builder.append('}')
+        self.unmark(w_dict)
+
+    # ____________________________________________________________
+
+    def encode_any(self, w_obj, level):
+        space = self.space
+        # fast paths for the exact types first
+        if type(w_obj) is W_BytesObject:
+            self.encode_bytes(space.bytes_w(w_obj), w_obj)
+        elif type(w_obj) is W_UnicodeObject:
+            self.encode_utf8(space.utf8_w(w_obj))
+        elif type(w_obj) is W_IntObject:
+            self.builder.append(str(w_obj.intval))
+        elif type(w_obj) is W_FloatObject:
+            self.builder.append(self.float_repr(w_obj.floatval))
+        elif type(w_obj) is W_ListObject:
+            self.encode_list(w_obj, level)
+        elif type(w_obj) is W_DictObject:
+            self.encode_dict(w_obj, level)
+        # then the same sequence of checks as json.encoder
+        elif space.isinstance_w(w_obj, space.w_basestring):
+            self.encode_string(w_obj)
+        elif space.is_w(w_obj, space.w_None):
+            self.builder.append('null')
+        elif space.is_w(w_obj, space.w_True):
+            self.builder.append('true')
+        elif space.is_w(w_obj, space.w_False):
+            self.builder.append('false')
+        elif (space.isinstance_w(w_obj, space.w_int) or
+              space.isinstance_w(w_obj, space.w_long)):
+            self.builder.append(self.int_repr(w_obj))
+        elif space.isinstance_w(w_obj, space.w_float):
+            self.builder.append(self.float_repr(space.float_w(w_obj)))
+        elif (space.isinstance_w(w_obj, space.w_list) or
+              space.isinstance_w(w_obj, space.w_tuple)):
+            self.encode_list(w_obj, level)
+        elif space.isinstance_w(w_obj, space.w_dict):
+            self.encode_dict(w_obj, level)
+        else:
+            self.mark(w_obj)
+            if self.w_default is None:
+                raise oefmt(space.w_TypeError,
+                            "%R is not JSON serializable", w_obj)
+            w_res = space.call_function(self.w_default, w_obj)
+            self.encode_any(w_res, level)
+            self.unmark(w_obj)
+
+
+@jit.dont_look_inside
+@unwrap_spec(skipkeys=bool, ensure_ascii=bool, check_circular=bool,
+             allow_nan=bool, sort_keys=bool, item_separator='text',
+             key_separator='text')
+def encode(space, w_obj, skipkeys=False, ensure_ascii=True,
+           check_circular=True, allow_nan=True, sort_keys=False,
+           w_indent=None, item_separator=', ', key_separator=': ',
+           w_default=None):
+    """Return the JSON representation of 'w_obj', with the same meaning for
+    the arguments as json.JSONEncoder (the encoding is always utf-8)."""
+    if space.is_none(w_indent):
+        indent = -1
+    else:
+        indent = max(space.int_w(w_indent), 0)
+    if space.is_none(w_default):
+        w_default = None
+    encoder = JSONEncoder(space, skipkeys, ensure_ascii, check_circular,
+                          allow_nan, sort_keys, indent, item_separator,
+                          key_separator, w_default)
+    encoder.encode_any(w_obj, 0)
+    return encoder.build()
@@ -538,3 +538,127 @@ class AppTest(object):
         a = '{"abc": "4", "k": 1, "k": 1.5, "c": null, "k": 2}'
         d = _pypyjson.loads(a)
         assert d == {u"abc": u"4", u"c": None, u"k": 2}
+
+    def test_encode_simple(self):
+        import _pypyjson
+        enc = _pypyjson.encode
+        assert enc(None) == 'null'
+        assert enc(True) == 'true'
+        assert enc(False) == 'false'
+        assert enc(42) == '42'
+        assert enc(-2**70) == str(-2**70)
+        assert enc(1.5) == '1.5'
+        assert enc(1e300) == '1e+300'
+        assert enc(float('nan')) == 'NaN'
+        assert enc(float('-inf')) == '-Infinity'
+        raises(ValueError, enc, float('inf'), False, True, True, False)
+        assert enc("a\"b\n") == '"a\\"b\\n"'
+        assert enc(u"\u1234") == '"\\u1234"'
+        assert enc([]) == '[]'
+        assert enc(()) == '[]'
+        assert enc({}) == '{}'
+        assert enc([1, (2, 3.5), {"a": None}]) == '[1, [2, 3.5], {"a": null}]'
+
+    def test_encode_list_strategies(self):
+        import _pypyjson
+        assert _pypyjson.encode(range(5)) == '[0, 1, 2, 3, 4]'
+        assert _pypyjson.encode([1.5, 2.0]) == '[1.5, 2.0]'
+        assert _pypyjson.encode(["a", "b\t"]) == '["a", "b\\t"]'
+        raises(ValueError, _pypyjson.encode, [float('nan')], False, True,
+               True, False)
+
+    def test_encode_dict_keys(self):
+        import _pypyjson
+        enc = _pypyjson.encode
+        assert enc({"a": 1}) == '{"a": 1}'
+        assert enc({5: 1}) == '{"5": 1}'
+        assert enc({u"\xe9": 1}) == '{"\\u00e9": 1}'
+        d = {1.5: 1, None: 2, True: 3, 7L: 4}
+        assert enc(d, sort_keys=True) == (
+            '{"null": 2, "true": 3, "1.5": 1, "7": 4}')
+        raises(TypeError, enc, {(1,): 2})
+        assert enc({(1,): 2, "a": 3}, skipkeys=True) == '{"a": 3}'
+        d = dict.fromkeys("hello world")
+        assert enc(d, sort_keys=True) == (
+            '{" ": null, "d": null, "e": null, "h": null, '
+            '"l": null, "o": null, "r": null, "w": null}')
+        d = dict.fromkeys(range(10, 0, -3), 0)
+        assert enc(d, sort_keys=True) == '{"1": 0, "4": 0, "7": 0, "10": 0}'
+
+    def test_encode_indent_and_separators(self):
+        import _pypyjson
+        obj = {"a": [1, {"b": []}]}
+        assert _pypyjson.encode(obj, indent=2) == (
+            '{\n  "a": [\n    1, \n    {\n      "b": []\n    }\n  ]\n}')
+        assert _pypyjson.encode(obj, indent=0, item_separator=',') == (
+            '{\n"a": [\n1,\n{\n"b": []\n}\n]\n}')
+        assert _pypyjson.encode(obj, item_separator=',',
+                                key_separator=':') == '{"a":[1,{"b":[]}]}'
+
+    def test_encode_default_and_circular(self):
+        import _pypyjson
+        class A(object):
+            pass
+        a = A()
+        exc = raises(TypeError, _pypyjson.encode, a)
+        assert str(exc.value).endswith("is not JSON serializable")
+        assert _pypyjson.encode([a], default=lambda o: "A") == '["A"]'
+        lst = []
+        lst.append(lst)
+        raises(ValueError, _pypyjson.encode, lst)
+        d = {}
+        d["d"] = d
+        raises(ValueError, _pypyjson.encode, d)
+        raises(ValueError, _pypyjson.encode, a, default=lambda o: [o])
+        shared = [1]
+        assert _pypyjson.encode([shared, shared]) == '[[1], [1]]'
+
+    def test_encode_subclasses(self):
+        import _pypyjson
+        class MyInt(int):
+            def __str__(self):
+                return "seven"
+        class MyList(list):
+            def __iter__(self):
+                return iter([1, 2])
+        class MyDict(dict):
+            def iteritems(self):
+                return iter([("x", 1)])
+        assert _pypyjson.encode(MyInt(7)) == 'seven'
+        assert _pypyjson.encode(MyList([5])) == '[1, 2]'
+        assert _pypyjson.encode(MyDict(a=5)) == '{"x": 1}'
+        class MyTuple(tuple):
+            def __iter__(self):
+                return iter(["t"])
+        assert _pypyjson.encode([MyList([1.5, 2.5]), MyTuple((3,))]) == (
+            '[[1, 2], ["t"]]')
+        assert _pypyjson.encode({"k": MyList(["a", "b"])}) == '{"k": [1, 2]}'
+
+    def test_encode_not_ensure_ascii(self):
+        import _pypyjson
+        res = _pypyjson.encode(["\xc3\xa9\n"], ensure_ascii=False)
+        assert res == '["\xc3\xa9\\n"]'
+        assert type(res) is str
+        res = _pypyjson.encode([u"\xe9", "a"], ensure_ascii=False)
+        assert res == u'["\xe9", "a"]'
+        assert type(res) is unicode
+        raises(UnicodeDecodeError, _pypyjson.encode, [u"a", "\xc3\xa9"],
+               ensure_ascii=False)
+
+
+class AppTestJSONModule(object):
+    spaceconfig = {"usemodules": ["_pypyjson", "struct"]}
+
+    def test_json_module_uses_encode(self):
+        import json
+        assert json.dumps({"a": [1, 2.5, None]}, sort_keys=True,
+                          indent=1) == (
+            '{\n "a": [\n  1, \n  2.5, \n  null\n ]\n}')
+
+    def test_iterencode_override(self):
+        import json
+        class Encoder(json.JSONEncoder):
+            def iterencode(self, o, _one_shot=False):
+                return iter(['"over', 'ridden"'])
+        assert Encoder().encode([1, 2]) == '"overridden"'
+        assert json.dumps([1, 2], cls=Encoder) == '"overridden"'
@@ -0,0 +1,98 @@
+"""Measure the throughput of serving a file over a loopback TCP socket,
+copying it through app-level strings, through a preallocated bytearray
+with os.readv() and socket.sendmsg(), and with os.sendfile().
+
+Run with a translated pypy:
+
+    pypy bench_fileserve.py [megabytes [repeat]]
+"""
+
+import os, sys, socket, tempfile, threading, time
+
+CHUNK = 256 * 1024
+
+def serve_copy(conn, fd, size):
+    f = os.fdopen(os.dup(fd), 'rb')
+    try:
+        f.seek(0)
+        while True:
+            data = f.read(CHUNK)
+            if not data:
+                break
+            conn.sendall(data)
+    finally:
+        f.close()
+
+def serve_sendmsg(conn, fd, size):
+    buf = bytearray(CHUNK)
+    view = memoryview(buf)
+    os.lseek(fd, 0, 0)
+    while True:
+        n = os.readv(fd, [buf])
+        if n == 0:
+            break
+        sent = 0
+        while sent < n:
+            sent += conn.sendmsg([view[sent:n]])
+
+def serve_sendfile(conn, fd, size):
+    offset = 0
+    while offset < size:
+        n = os.sendfile(conn.fileno(), fd, offset, size - offset)
+        if n == 0:
+            break
+        offset += n
+
+def receive(sock, size):
+    buf = bytearray(CHUNK)
+    got = 0
+    while got < size:
+        n = sock.recv_into(buf)
+        if n == 0:
+            break
+        got += n
+    return got
+
+def bench(serve, fd, size):
+    serv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    serv.bind(('127.0.0.1', 0))
+    serv.listen(1)
+    def server():
+        conn, addr = serv.accept()
+        try:
+            serve(conn, fd, size)
+        finally:
+            conn.close()
+    thread = threading.Thread(target=server)
+    thread.start()
+    cli = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    t = time.time()
+    cli.connect(serv.getsockname())
+    got = receive(cli, size)
+    t = time.time() - t
+    thread.join()
+    cli.close()
+    serv.close()
+    assert got == size
+    return t
+
+def main(megabytes=64, repeat=5):
+    size = megabytes << 20
+    f = tempfile.TemporaryFile()
+    block = os.urandom(1 << 20)
+    for i in range(megabytes):
+        f.write(block)
+    f.flush()
+    fd = f.fileno()
+    modes = [('read + sendall', serve_copy)]
+    if hasattr(os, 'readv') and hasattr(socket.socket, 'sendmsg'):
+        modes.append(('readv + sendmsg', serve_sendmsg))
+    if hasattr(os, 'sendfile'):
+        modes.append(('sendfile', serve_sendfile))
+    for name, serve in modes:
+        best = min([bench(serve, fd, size) for i in range(repeat)])
+        print '%-16s %8.1f MB/s' % (name, megabytes / best)
+    f.close()
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
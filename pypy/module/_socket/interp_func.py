@@ -345,3 +345,29 @@ if hasattr(rsocket, 'sethostname'):
             res = rsocket.sethostname(hostname)
         except SocketError as e:
             raise converted_error(space, e)
+
+if hasattr(rsocket, 'CMSG_LEN'):
+    @unwrap_spec(length=int)
+    def CMSG_LEN(space, length):
+        """CMSG_LEN(length) -> control message length
+
+        Return the total length, without trailing padding, of an ancillary
+        data item with associated data of the given length.
+        """
+        if length < 0:
+            raise oefmt(space.w_OverflowError,
+                        "CMSG_LEN() argument out of range")
+        return space.newint(rsocket.CMSG_LEN(length))
+
+    @unwrap_spec(length=int)
+    def CMSG_SPACE(space, length):
+        """CMSG_SPACE(length) -> buffer size
+
+        Return the buffer size needed for recvmsg() to receive an ancillary
+        data item with associated data of the given length, along with any
+        trailing padding.
+        """
+        if length < 0:
+            raise oefmt(space.w_OverflowError,
+                        "CMSG_SPACE() argument out of range")
+        return space.newint(rsocket.CMSG_SPACE(length))
@@ -1,5 +1,6 @@
 import sys
 from rpython.rlib import rsocket, rweaklist
+from rpython.rlib.buffer import raw_address_buffers, copy_back_raw_buffers
 from rpython.rlib.rarithmetic import intmask
 from rpython.rlib.rsocket import (
     RSocket, AF_INET, SOCK_STREAM, SocketError, SocketErrorWithErrno,
@@ -530,6 +531,106 @@ class W_Socket(W_Root):
         except SocketError as e:
             raise converted_error(space, e)
 
+    def _wrap_recvmsg_result(self, space, w_data, ancdata, msg_flags, address):
+        ancdata_w = [space.newtuple([space.newint(level), space.newint(type),
+                                     space.newbytes(data)])
+                     for level, type, data in ancdata]
+        if address is not None:
+            w_addr = addr_as_object(address, self.sock.fd, space)
+        else:
+            w_addr = space.w_None
+        return space.newtuple([w_data, space.newlist(ancdata_w),
+                               space.newint(msg_flags), w_addr])
+
+    @unwrap_spec(bufsize=int, ancbufsize=int, flags=int)
+    def recvmsg_w(self, space, bufsize, ancbufsize=0, flags=0):
+        """recvmsg(bufsize[, ancbufsize[, flags]]) -> (data, ancdata, msg_flags, address)
+
+        Receive normal data (up to bufsize bytes) and ancillary data from
+        the socket.  The ancbufsize argument sets the size in bytes of the
+        buffer used to receive the ancillary data; it defaults to 0, meaning
+        that no ancillary data will be received.  ancdata is a list of
+        (cmsg_level, cmsg_type, cmsg_data) tuples.
+        """
+        if bufsize < 0:
+            raise oefmt(space.w_ValueError,
+                        "negative buffer size in recvmsg()")
+        if ancbufsize < 0:
+            raise oefmt(space.w_ValueError,
+                        "invalid ancillary data buffer length")
+        try:
+            data, ancdata, msg_flags, address = self.sock.recvmsg(
+                bufsize, ancbufsize, flags)
+        except SocketError as e:
+            raise converted_error(space, e)
+        return self._wrap_recvmsg_result(space, space.newbytes(data),
+                                         ancdata, msg_flags, address)
+
+    @unwrap_spec(ancbufsize=int, flags=int)
+    def recvmsg_into_w(self, space, w_buffers, ancbufsize=0, flags=0):
+        """recvmsg_into(buffers[, ancbufsize[, flags]]) -> (nbytes, ancdata, msg_flags, address)
+
+        Like recvmsg(), but receive the normal data directly into the
+        sequence of writable buffers 'buffers', e.g. preallocated
+        bytearrays, filling each one before going on to the next.
+        """
+        if ancbufsize < 0:
+            raise oefmt(space.w_ValueError,
+                        "invalid ancillary data buffer length")
+        buffers = [space.writebuf_w(w_buf)
+                   for w_buf in space.unpackiterable(w_buffers)]
+        raw_buffers = raw_address_buffers(buffers)
+        try:
+            nbytes, ancdata, msg_flags, address = self.sock.recvmsg_into(
+                raw_buffers, ancbufsize, flags)
+        except SocketError as e:
+            raise converted_error(space, e)
+        copy_back_raw_buffers(buffers, raw_buffers, nbytes)
+        return self._wrap_recvmsg_result(space, space.newint(nbytes),
+                                         ancdata, msg_flags, address)
+
+    @unwrap_spec(flags=int)
+    def sendmsg_w(self, space, w_buffers, w_ancdata=None, flags=0,
+                  w_address=None):
+        """sendmsg(buffers[, ancdata[, flags[, address]]]) -> count
+
+        Send normal and ancillary data to the socket, gathering the
+        non-ancillary data from the sequence of buffers 'buffers' without
+        copying it.  The ancdata argument is a sequence of (cmsg_level,
+        cmsg_type, cmsg_data) tuples.  The address argument, if given and
+        not None, is the destination address for unconnected sockets.
+        Return the number of bytes sent.
+        """
+        buffers = [space.readbuf_w(w_buf)
+                   for w_buf in space.unpackiterable(w_buffers)]
+        ancillary = []
+        if not space.is_none(w_ancdata):
+            for w_item in space.unpackiterable(w_ancdata):
+                items_w = space.fixedview(w_item)
+                if len(items_w) != 3:
+                    raise oefmt(space.w_TypeError,
+                                "ancillary data items must be (level, type, "
+                                "data) tuples")
+                ancillary.append((space.int_w(items_w[0]),
+                                  space.int_w(items_w[1]),
+                                  space.readbuf_w(items_w[2]).as_str()))
+        try:
+            address = None
+            if not space.is_none(w_address):
+                address = self.addr_from_object(space, w_address)
+            count = self.sock.sendmsg_buffers(raw_address_buffers(buffers),
+                                              ancillary, flags, address)
+        except SocketError as e:
+            raise converted_error(space, e)
+        if count == -1000:
+            raise explicit_socket_error(
+                space, "sending multiple control messages not supported")
+        if count == -1001:
+            raise explicit_socket_error(space, "ancillary data item too large")
+        if count == -1002:
+            raise explicit_socket_error(space, "too much ancillary data")
+        return space.newint(count)
+
     @unwrap_spec(cmd=int)
     def ioctl_w(self, space, cmd, w_option):
         from rpython.rtyper.lltypesystem import rffi, lltype
@@ -725,6 +826,8 @@ setsockopt settimeout shutdown _reuse _drop recv_into recvfrom_into
 for name in ('dup',):
     if not hasattr(RSocket, name):
         socketmethodnames.remove(name)
+if rsocket._c.HAVE_SENDMSG:
+    socketmethodnames.extend(['recvmsg', 'recvmsg_into', 'sendmsg'])
 if hasattr(rsocket._c, 'WSAIoctl'):
     socketmethodnames.append('ioctl')
 
@@ -762,8 +865,11 @@ listen(n) -- start listening for incoming connections
 makefile([mode, [bufsize]]) -- return a file object for the socket [*]
 recv(buflen[, flags]) -- receive data
 recvfrom(buflen[, flags]) -- receive data and sender's address
+recvmsg(bufsize[, ancbufsize[, flags]]) -- receive data and ancillary data [*]
+recvmsg_into(buffers[, ancbufsize[, flags]]) -- recvmsg() into buffers [*]
 sendall(data[, flags]) -- send all data
 send(data[, flags]) -- send data, may not send all of it
+sendmsg(buffers[, ancdata[, flags[, address]]]) -- send data and ancillary data [*]
 sendto(data[, flags], addr) -- send data to a given address
 setblocking(0 | 1) -- set or clear the blocking I/O flag
 setsockopt(level, optname, value) -- set socket options
@@ -858,6 +858,51 @@ class AppTestSocketTCP:
         exc = raises(ValueError, cli.recvfrom_into, buf, 1024)
         assert str(exc.value) == "nbytes is greater than the length of the buffer"
 
+    def test_sendmsg_recvmsg(self):
+        import socket
+        if not hasattr(socket.socket, 'sendmsg'):
+            skip("no sendmsg()")
+        cli = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        cli.connect(self.serv.getsockname())
+        conn, addr = self.serv.accept()
+        count = conn.sendmsg([b'dupa ', bytearray(b'was '),
+                              memoryview(b'here\n')])
+        assert count == 14
+        data, ancdata, msg_flags, address = cli.recvmsg(1024)
+        assert data == b'dupa was here\n'
+        assert ancdata == []
+        assert msg_flags == 0
+        raises(ValueError, cli.recvmsg, -1)
+        raises(ValueError, cli.recvmsg, 1024, -1)
+        raises(TypeError, conn.sendmsg, [b'x'], [(1, 2)])
+
+    def test_recvmsg_into(self):
+        import socket
+        if not hasattr(socket.socket, 'recvmsg_into'):
+            skip("no recvmsg_into()")
+        cli = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        cli.connect(self.serv.getsockname())
+        conn, addr = self.serv.accept()
+        conn.sendall(b'dupa was here\n')
+        buf1 = bytearray(5)
+        buf2 = bytearray(1024)
+        nbytes, ancdata, msg_flags, address = cli.recvmsg_into(
+            [buf1, memoryview(buf2)])
+        assert nbytes == 14
+        assert buf1 == b'dupa '
+        assert buf2[:9] == b'was here\n'
+        assert ancdata == []
+        raises(TypeError, cli.recvmsg_into, [b'read-only'])
+
+    def test_cmsg_len(self):
+        import _socket
+        if not hasattr(_socket, 'CMSG_LEN'):
+            skip("no CMSG_LEN()")
+        assert _socket.CMSG_LEN(0) > 0
+        assert _socket.CMSG_LEN(4) == _socket.CMSG_LEN(0) + 4
+        assert _socket.CMSG_SPACE(4) >= _socket.CMSG_LEN(4)
+        raises(OverflowError, _socket.CMSG_LEN, -1)
+
     def test_family(self):
         import socket
         cli = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -0,0 +1,45 @@
+"""Measure patterns with nested repetitions, whose backtracking can take
+an exponential time, with the backtracking engine and with the NFA engine
+of rsre.  The inputs almost match, which is the worst case for
+backtracking.
+
+Run with a translated pypy:
+
+    pypy bench_nfa.py [length [repeat]]
+"""
+
+import sys, time
+import _sre, sre_compile, sre_parse
+
+PATTERNS = [
+    (r'(a+)+b', 'a'),
+    (r'(?:a|aa)*c', 'a'),
+    (r'(\w+\s?)+;', 'word '),
+    (r'((?:ab|a)(?:c|bc))+d', 'abc'),
+]
+
+def compile(pattern, engine):
+    p = sre_parse.parse(pattern, 0)
+    code = sre_compile._code(p, 0)
+    return _sre.compile(pattern, p.pattern.flags, code,
+                        p.pattern.groups - 1, engine=engine)
+
+def bench(regex, string, repeat):
+    best = None
+    for i in range(repeat):
+        t = time.time()
+        regex.search(string)
+        t = time.time() - t
+        if best is None or t < best:
+            best = t
+    return best
+
+def main(length=22, repeat=5):
+    for pattern, unit in PATTERNS:
+        string = unit * length
+        for engine in ['backtrack', 'nfa']:
+            t = bench(compile(pattern, engine), string, repeat)
+            print '%-28s %-10s %10.6f s' % (pattern, engine, t)
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,63 @@
+"""Measure re.search() on generated log lines, with patterns that don't
+start with a literal prefix but contain a required literal string, in
+the style of log parsing scripts.
+
+Run with a translated pypy:
+
+    pypy bench_sre.py [lines [repeat]]
+"""
+
+import re, sys, time
+
+PATTERNS = [
+    r'(\d+) ERROR',
+    r'(GET|POST) /api/(\w+)',
+    r'\d\d:\d\d:\d\d \[(\w+)\] timeout',
+    r'[a-z]+=(\d+)ms',
+    r'.*user=(\w+) denied',
+]
+
+def make_lines(n):
+    levels = ['INFO', 'DEBUG', 'WARN', 'INFO', 'INFO', 'ERROR']
+    lines = []
+    for i in xrange(n):
+        level = levels[i % len(levels)]
+        method = 'POST' if i % 7 == 0 else 'GET'
+        path = '/api/items' if i % 5 == 0 else '/static/app.js'
+        extra = ''
+        if i % 97 == 0:
+            extra = ' at 12:00:00 [worker] timeout, user=bob denied'
+        lines.append('2024-01-02 12:%02d:%02d %d %s %s %s status=200 '
+                     'elapsed=%dms%s' % (i % 60, i % 60, i, level, method,
+                                         path, i % 1000, extra))
+    return lines
+
+def search_all(regex, lines):
+    count = 0
+    search = regex.search
+    for line in lines:
+        if search(line) is not None:
+            count += 1
+    return count
+
+def bench(regex, lines, repeat):
+    best = None
+    for i in range(repeat):
+        t = time.time()
+        search_all(regex, lines)
+        t = time.time() - t
+        if best is None or t < best:
+            best = t
+    return best
+
+def main(n=200000, repeat=5):
+    lines = make_lines(n)
+    for pattern in PATTERNS:
+        regex = re.compile(pattern)
+        count = search_all(regex, lines)
+        t = bench(regex, lines, repeat)
+        print '%-36s %8d matches %8.3f s  %10.0f lines per second' % (
+            pattern, count, t, n / t)
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -13,7 +13,7 @@ from rpython.rlib.rstring import StringBuilder
 #
 # Constants and exposed functions
 
-from rpython.rlib.rsre import rsre_core, rsre_utf8
+from rpython.rlib.rsre import rsre_core, rsre_utf8, rsre_nfa
 from rpython.rlib.rsre.rsre_char import CODESIZE, MAXREPEAT, getlower, set_unicode_db
 
 
@@ -437,10 +437,14 @@ def _sub_append_slice(ctx, space, use_builder, sublist_w,
     else:
         sublist_w.append(slice_w(space, ctx, start, end, space.w_None))
 
+ENGINES = {'auto': rsre_nfa.ENGINE_AUTO,
+           'backtrack': rsre_nfa.ENGINE_BACKTRACK,
+           'nfa': rsre_nfa.ENGINE_NFA}
+
 @unwrap_spec(flags=int, groups=int, w_groupindex=WrappedDefault(None),
-             w_indexgroup=WrappedDefault(None))
+             w_indexgroup=WrappedDefault(None), engine='text')
 def SRE_Pattern__new__(space, w_subtype, w_pattern, flags, w_code,
-              groups=0, w_groupindex=None, w_indexgroup=None):
+              groups=0, w_groupindex=None, w_indexgroup=None, engine='auto'):
     n = space.len_w(w_code)
     code = [intmask(space.uint_w(space.getitem(w_code, space.newint(i))))
             for i in range(n)]
@@ -455,6 +459,17 @@ def SRE_Pattern__new__(space, w_subtype, w_pattern, flags, w_code,
     # objects all the time would be bad for the JIT, which relies on the
     # identity of the CompiledPattern() object.
     srepat.code = rsre_core.CompiledPattern(code, flags)
+    # 'engine' is a PyPy extension: 'nfa' forces the linear-time engine
+    # of rsre_nfa, and 'backtrack' disables its automatic selection
+    try:
+        engine_num = ENGINES[engine]
+    except KeyError:
+        raise oefmt(space.w_ValueError, "unknown regex engine '%s'", engine)
+    try:
+        rsre_nfa.select_engine(srepat.code, engine_num)
+    except rsre_nfa.NotSupported as e:
+        raise oefmt(space.w_ValueError,
+                    "pattern not supported by the NFA engine: %s", e.msg)
     srepat.num_groups = groups
     srepat.w_groupindex = w_groupindex
     srepat.w_indexgroup = w_indexgroup
@@ -95,6 +95,26 @@ class AppTestSrePattern:
         raises(OverflowError, re.compile, r".{,%d}" % self.s.MAXREPEAT)
         raises(OverflowError, re.compile, r".{%d,}?" % self.s.MAXREPEAT)
 
+    def test_engine(self):
+        import re, _sre, sre_compile, sre_parse
+        def compile(pattern, engine):
+            p = sre_parse.parse(pattern, 0)
+            code = sre_compile._code(p, 0)
+            return _sre.compile(pattern, p.pattern.flags, code,
+                                p.pattern.groups - 1, engine=engine)
+        for engine in ['auto', 'backtrack', 'nfa']:
+            p = compile(r'(a|bc)+(d)?', engine)
+            m = p.search('xxabcad')
+            assert m.span() == (2, 7)
+            assert m.span(1) == (5, 6)
+            assert m.span(2) == (6, 7)
+        p = compile(r'(a+)+b', 'auto')
+        assert p.match('a' * 100) is None
+        raises(ValueError, compile, r'(a)\1', 'nfa')
+        raises(ValueError, compile, r'(?=a)', 'nfa')
+        raises(ValueError, compile, r'a', 'dfa')
+        assert compile(r'(a)\1', 'auto').match('aa').span() == (0, 2)
+
     def test_match_none(self):
         import re
         p = re.compile("bla")
@@ -0,0 +1,54 @@
+"""Measure the overhead of vmprof on an allocation-heavy loop: without
+vmprof, with the usual time sampling, and with allocation sampling at
+_vmprof.DEFAULT_ALLOC_INTERVAL and at a few smaller intervals.
+
+Run with a translated pypy:
+
+    pypy bench_alloc.py [iterations [repeat]]
+"""
+
+import sys, tempfile, time
+import _vmprof
+
+class Point(object):
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+def work(n):
+    total = 0
+    for i in xrange(n):
+        p = Point(i, [i] * 4)
+        d = {'p': p, 's': str(i)}
+        total += len(d['s']) + p.y[3]
+    return total
+
+def bench(n, repeat, alloc_interval):
+    best = None
+    for i in range(repeat):
+        f = tempfile.TemporaryFile()
+        if alloc_interval is not None:
+            _vmprof.enable(f.fileno(), 0.001, 0, 0, 0, 0, alloc_interval)
+        t = time.time()
+        work(n)
+        t = time.time() - t
+        if alloc_interval is not None:
+            _vmprof.disable()
+        f.close()
+        if best is None or t < best:
+            best = t
+    return best
+
+def main(n=5000000, repeat=5):
+    work(n // 10)      # warm up the JIT
+    base = bench(n, repeat, None)
+    print '%-28s %8.3f s' % ('no vmprof', base)
+    modes = [('time sampling', 0)]
+    for interval in [_vmprof.DEFAULT_ALLOC_INTERVAL, 64 * 1024, 8 * 1024]:
+        modes.append(('alloc sampling, %d KB' % (interval // 1024), interval))
+    for name, interval in modes:
+        t = bench(n, repeat, interval)
+        print '%-28s %8.3f s  %+6.1f%%' % (name, t, (t / base - 1.0) * 100)
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
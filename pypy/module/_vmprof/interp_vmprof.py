@@ -5,6 +5,7 @@ from pypy.interpreter.pycode import PyCode
 from pypy.interpreter.baseobjspace import W_Root
 from rpython.rlib import rvmprof, jit
 from pypy.interpreter.error import oefmt
+from pypy.module.gc.hook import LowLevelGcHooks
 
 # ____________________________________________________________
 
@@ -39,6 +40,15 @@ def _init_ready(pycode):
 PyCode._init_ready = _init_ready
 
 
+class __extend__(LowLevelGcHooks):
+    # allocation sampling: the GC calls these when it is incminimark
+    def get_gc_alloc_sample_interval(self):
+        return rvmprof.get_alloc_interval()
+
+    def on_gc_alloc_sample(self, size, sampled_bytes):
+        rvmprof.report_allocation(size, sampled_bytes)
+
+
 # ____________________________________________________________
 
 
@@ -51,17 +61,25 @@ def VMProfError(space, e):
     return OperationError(w_VMProfError, space.newtext(e.msg))
 
 
-@unwrap_spec(fileno=int, period=float, memory=int, lines=int, native=int, real_time=int)
-def enable(space, fileno, period, memory, lines, native, real_time):
+@unwrap_spec(fileno=int, period=float, memory=int, lines=int, native=int,
+             real_time=int, alloc_interval=int)
+def enable(space, fileno, period, memory, lines, native, real_time,
+           alloc_interval=0):
     """Enable vmprof.  Writes go to the given 'fileno', a file descriptor
     opened for writing.  *The file descriptor must remain open at least
     until disable() is called.*
 
     'interval' is a float representing the sampling interval, in seconds.
     Must be smaller than 1.0
+
+    If 'alloc_interval' is not 0, the stack of the allocation that crosses
+    every 'alloc_interval' bytes allocated is also recorded, as an
+    allocation sample standing for that many bytes.  DEFAULT_ALLOC_INTERVAL
+    is a good default.
     """
     try:
-        rvmprof.enable(fileno, period, memory, native, real_time)
+        rvmprof.enable(fileno, period, memory, native, real_time,
+                       alloc_interval)
     except rvmprof.VMProfError as e:
         raise VMProfError(space, e)
 
@@ -1,5 +1,6 @@
 from pypy.interpreter.mixedmodule import MixedModule
 from rpython.rlib.rvmprof import VMProfPlatformUnsupported
+from rpython.rlib.rvmprof import DEFAULT_ALLOC_INTERVAL
 from rpython.translator.platform import CompilationError
 
 
@@ -19,6 +20,7 @@ class Module(MixedModule):
         'start_sampling': 'interp_vmprof.start_sampling',
 
         'VMProfError': 'space.fromcache(interp_vmprof.Cache).w_VMProfError',
+        'DEFAULT_ALLOC_INTERVAL': 'space.newint(%d)' % DEFAULT_ALLOC_INTERVAL,
     }
 
 
@@ -9,6 +9,7 @@ class AppTestVMProf(object):
     def setup_class(cls):
         cls.w_tmpfilename = cls.space.wrap(str(udir.join('test__vmprof.1')))
         cls.w_tmpfilename2 = cls.space.wrap(str(udir.join('test__vmprof.2')))
+        cls.w_runappdirect = cls.space.wrap(cls.runappdirect)
         cls.w_plain = cls.space.wrap(not cls.runappdirect and
             '__pypy__' not in sys.builtin_module_names)
 
@@ -108,6 +109,77 @@ class AppTestVMProf(object):
         _vmprof.disable()
         assert _vmprof.is_enabled() is False
 
+    def test_enable_alloc_interval(self):
+        import _vmprof
+        assert _vmprof.DEFAULT_ALLOC_INTERVAL > 0
+        tmpfile = open(self.tmpfilename, 'wb')
+        raises(_vmprof.VMProfError, _vmprof.enable, tmpfile.fileno(), 0.01,
+               0, 0, 0, 0, -1)
+        assert _vmprof.is_enabled() is False
+        _vmprof.enable(tmpfile.fileno(), 0.01, 0, 0, 0, 0,
+                       alloc_interval=_vmprof.DEFAULT_ALLOC_INTERVAL)
+        assert _vmprof.is_enabled() is True
+        _vmprof.disable()
+        assert _vmprof.is_enabled() is False
+
+    def test_alloc_samples(self):
+        if not self.runappdirect:
+            skip("the GC only reports allocations when translated")
+        import struct, sys, _vmprof
+        if sys.platform == 'win32':
+            skip("no allocation sampling on Windows")
+        WORD = struct.calcsize('l')
+        PTR = struct.calcsize('P')
+        interval = 4096
+        tmpfile = open(self.tmpfilename, 'wb')
+        _vmprof.enable(tmpfile.fileno(), 0.5, 0, 0, 0, 0,
+                       alloc_interval=interval)
+        def allocate():
+            return [[i] for i in range(100000)]
+        allocate()
+        _vmprof.disable()
+        tmpfile.close()
+        s = open(self.tmpfilename, 'rb').read()
+
+        samples = []
+        i = 5 * WORD + 9    # header, see test_import_vmprof
+        while i < len(s):
+            if s[i] == '\x03':
+                break
+            elif s[i] == '\x01':
+                i += 1
+                _, depth = struct.unpack("ll", s[i:i + 2 * WORD])
+                i += 2 * WORD + depth * PTR + WORD
+            elif s[i] == '\x02':
+                i += 1
+                _, size = struct.unpack("ll", s[i:i + 2 * WORD])
+                i += 2 * WORD + size
+            elif s[i] == '\x06':
+                i += 1+8+8+8
+            elif s[i] == '\x07':
+                i += 1
+                size, = struct.unpack("l", s[i:i + WORD])
+                i += WORD+size
+                size, = struct.unpack("l", s[i:i + WORD])
+                i += WORD+size
+            elif s[i] == '\x09':    # MARKER_ALLOCATION
+                i += 1
+                sampled_bytes, depth = struct.unpack("ll", s[i:i + 2 * WORD])
+                i += 2 * WORD + depth * PTR
+                thread_state, size = struct.unpack("Pl", s[i:i + 2 * WORD])
+                i += 2 * WORD
+                samples.append((sampled_bytes, depth, thread_state, size))
+            else:
+                raise AssertionError(ord(s[i]))
+
+        # at least 100000 small lists of more than one word each
+        assert len(samples) >= 100000 * 2 * WORD // interval // 2
+        for sampled_bytes, depth, thread_state, size in samples:
+            assert sampled_bytes > 0 and sampled_bytes % interval == 0
+            assert depth >= 1
+            assert thread_state == 0
+            assert size > 0
+
     @py.test.mark.xfail(sys.platform.startswith('freebsd'), reason = "not implemented")
     def test_get_profile_path(self):
         import _vmprof
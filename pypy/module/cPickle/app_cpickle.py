@@ -0,0 +1,7 @@
+# The exceptions are shared with pickle.py, like the pure Python
+# lib_pypy/cPickle.py did, so that "except pickle.PicklingError" also
+# catches the errors of this module.
+from pickle import PickleError, PicklingError, UnpicklingError
+
+UnpickleableError = PicklingError
+BadPickleGet = KeyError
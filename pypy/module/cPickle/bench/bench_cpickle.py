@@ -0,0 +1,52 @@
+"""Compare the built-in cPickle module with the pure Python version in
+lib_pypy/cPickle.py on large nested dict/list payloads.
+
+Run with a translated pypy:
+
+    pypy bench_cpickle.py [repetitions]
+"""
+
+import imp, os, sys, time
+
+import cPickle
+
+def load_lib_pypy_cpickle():
+    here = os.path.dirname(os.path.abspath(__file__))
+    path = os.path.join(here, '..', '..', '..', '..', 'lib_pypy', 'cPickle.py')
+    return imp.load_source('lib_pypy_cPickle', os.path.normpath(path))
+
+def make_payload(n):
+    return {
+        'ints': range(n),
+        'floats': [i * 0.5 for i in xrange(n)],
+        'strings': ['item-%d' % i for i in xrange(n)],
+        'records': [{'id': i, 'name': u'user %d' % i, 'tags': ('a', 'b'),
+                     'score': i / 7.0, 'active': i % 2 == 0}
+                    for i in xrange(n // 10)],
+        'nested': [[[i, str(i)] for i in xrange(10)] for j in xrange(n // 100)],
+    }
+
+def bench(module, payload, protocol, repetitions):
+    t0 = time.time()
+    for i in range(repetitions):
+        s = module.dumps(payload, protocol)
+    t1 = time.time()
+    for i in range(repetitions):
+        module.loads(s)
+    t2 = time.time()
+    return t1 - t0, t2 - t1
+
+def main(argv):
+    repetitions = int(argv[1]) if len(argv) > 1 else 10
+    py_cpickle = load_lib_pypy_cpickle()
+    payload = make_payload(100000)
+    print '%-10s %-6s %10s %10s' % ('module', 'proto', 'dumps', 'loads')
+    for protocol in (0, 2):
+        for name, module in [('lib_pypy', py_cpickle), ('builtin', cPickle)]:
+            # warm up the JIT
+            bench(module, payload, protocol, 2)
+            d, l = bench(module, payload, protocol, repetitions)
+            print '%-10s %-6d %10.3f %10.3f' % (name, protocol, d, l)
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,115 @@
+from pypy.interpreter.error import OperationError, oefmt
+from rpython.rlib import objectmodel
+
+
+HIGHEST_PROTOCOL = 2
+
+# number of items written between two MARK/APPENDS or MARK/SETITEMS opcodes
+BATCHSIZE = 1000
+
+# the pickle opcodes, see pickletools.py for a description of each of them
+MARK            = '('
+STOP            = '.'
+POP             = '0'
+POP_MARK        = '1'
+DUP             = '2'
+FLOAT           = 'F'
+INT             = 'I'
+BININT          = 'J'
+BININT1         = 'K'
+LONG            = 'L'
+BININT2         = 'M'
+NONE            = 'N'
+PERSID          = 'P'
+BINPERSID       = 'Q'
+REDUCE          = 'R'
+STRING          = 'S'
+BINSTRING       = 'T'
+SHORT_BINSTRING = 'U'
+UNICODE         = 'V'
+BINUNICODE      = 'X'
+APPEND          = 'a'
+BUILD           = 'b'
+GLOBAL          = 'c'
+DICT            = 'd'
+EMPTY_DICT      = '}'
+APPENDS         = 'e'
+GET             = 'g'
+BINGET          = 'h'
+INST            = 'i'
+LONG_BINGET     = 'j'
+LIST            = 'l'
+EMPTY_LIST      = ']'
+OBJ             = 'o'
+PUT             = 'p'
+BINPUT          = 'q'
+LONG_BINPUT     = 'r'
+SETITEM         = 's'
+TUPLE           = 't'
+EMPTY_TUPLE     = ')'
+SETITEMS        = 'u'
+BINFLOAT        = 'G'
+
+# protocol 2
+PROTO           = '\x80'
+NEWOBJ          = '\x81'
+EXT1            = '\x82'
+EXT2            = '\x83'
+EXT4            = '\x84'
+TUPLE1          = '\x85'
+TUPLE2          = '\x86'
+TUPLE3          = '\x87'
+NEWTRUE         = '\x88'
+NEWFALSE        = '\x89'
+LONG1           = '\x8a'
+LONG4           = '\x8b'
+
+TUPLESIZE2CODE = [EMPTY_TUPLE, TUPLE1, TUPLE2, TUPLE3]
+
+
+class State(object):
+    """Lazily imported app-level helpers from copy_reg and sys."""
+
+    def __init__(self, space):
+        self.w_copy_reg = None
+
+    def get_copy_reg(self, space):
+        if self.w_copy_reg is None:
+            self.w_copy_reg = space.call_method(space.builtin, '__import__',
+                                                space.newtext('copy_reg'))
+        return self.w_copy_reg
+
+def copy_reg_attr(space, name):
+    w_copy_reg = space.fromcache(State).get_copy_reg(space)
+    return space.getattr(w_copy_reg, space.newtext(name))
+
+
+def get_error(space, name):
+    w_module = space.getbuiltinmodule('cPickle')
+    return space.getattr(w_module, space.newtext(name))
+
+@objectmodel.dont_inline
+def unpickling_error(space, msg):
+    return OperationError(get_error(space, 'UnpicklingError'),
+                          space.newtext(msg))
+
+def check_protocol(space, w_protocol):
+    if space.is_none(w_protocol):
+        return 0
+    protocol = space.int_w(w_protocol)
+    if protocol < 0:
+        return HIGHEST_PROTOCOL
+    if protocol > HIGHEST_PROTOCOL:
+        raise oefmt(space.w_ValueError,
+                    "pickle protocol %d asked for; "
+                    "the highest available protocol is %d",
+                    protocol, HIGHEST_PROTOCOL)
+    return protocol
+
+def import_global(space, w_module, w_name):
+    """Like the default 'find_global': __import__(module) and fetch
+    getattr(sys.modules[module], name)."""
+    space.call_method(space.builtin, '__import__', w_module)
+    w_modules = space.sys.get('modules')
+    w_mod = space.getitem(w_modules, w_module)
+    return space.getattr(w_mod, w_name)
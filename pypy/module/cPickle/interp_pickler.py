@@ -0,0 +1,828 @@
+from rpython.rlib import rutf8
+from rpython.rlib.objectmodel import specialize
+from rpython.rlib.rarithmetic import r_uint, intmask
+from rpython.rlib.rfloat import formatd, DTSF_ADD_DOT_0
+from rpython.rlib.rstring import StringBuilder
+from rpython.rlib.rstruct import ieee
+
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import OperationError, oefmt
+from pypy.interpreter.function import Function, BuiltinFunction
+from pypy.interpreter.gateway import interp2app
+from pypy.interpreter.typedef import TypeDef, GetSetProperty
+from pypy.module.__builtin__.interp_classobj import (
+    W_ClassObject, W_InstanceObject)
+from pypy.module.cPickle.interp_cpickle import (
+    BATCHSIZE, TUPLESIZE2CODE, check_protocol,
+    copy_reg_attr, get_error, import_global)
+from pypy.module.cPickle.interp_cpickle import (
+    MARK, STOP, POP, POP_MARK, FLOAT, INT, BININT, BININT1, LONG, BININT2,
+    NONE, PERSID, BINPERSID, REDUCE, STRING, BINSTRING, SHORT_BINSTRING,
+    UNICODE, BINUNICODE, APPEND, BUILD, GLOBAL, DICT, EMPTY_DICT, APPENDS,
+    GET, BINGET, INST, LONG_BINGET, LIST, EMPTY_LIST, OBJ, PUT, BINPUT,
+    LONG_BINPUT, SETITEM, TUPLE, EMPTY_TUPLE, SETITEMS, BINFLOAT, PROTO,
+    NEWOBJ, EXT1, EXT2, EXT4, NEWTRUE, NEWFALSE, LONG1, LONG4)
+
+# when pickling to a file, the output is handed to file.write() in chunks
+# of roughly this size
+FLUSH_SIZE = 64 * 1024
+
+
+def _append_int4(builder, x):
+    x = r_uint(x)
+    builder.append(chr(intmask(x & 0xff)))
+    builder.append(chr(intmask((x >> 8) & 0xff)))
+    builder.append(chr(intmask((x >> 16) & 0xff)))
+    builder.append(chr(intmask((x >> 24) & 0xff)))
+
+HEXDIGITS = '0123456789abcdef'
+
+def _append_hex(builder, x, ndigits):
+    for i in range(ndigits - 1, -1, -1):
+        builder.append(HEXDIGITS[(x >> (4 * i)) & 0xf])
+
+def _append_raw_unicode_escape(builder, utf8):
+    # like u.encode('raw-unicode-escape'), but additionally escaping
+    # backslashes and newlines, as done by pickle.py
+    for ch in rutf8.Utf8StringIterator(utf8):
+        if ch >= 0x10000:
+            builder.append('\\U')
+            _append_hex(builder, ch, 8)
+        elif ch >= 0x100 or ch == ord('\\') or ch == ord('\n'):
+            builder.append('\\u')
+            _append_hex(builder, ch, 4)
+        else:
+            builder.append(chr(ch))
+
+
+class W_Pickler(W_Root):
+    """Interp-level implementation of the pickle protocols 0 to 2.  The
+    output is accumulated in a StringBuilder; the memo maps the pickled
+    objects themselves (i.e. their identity) to their memo index."""
+
+    def __init__(self, space):
+        self.space = space
+        self.proto = 0
+        self.bin = False
+        self.fast = 0
+        self.w_write = None
+        self.builder = StringBuilder()
+        self.memo = {}
+        self.memo_index = 1     # cPickle starts counting at one
+        self.w_persistent_id = None
+        self.w_pers_func = None
+
+    def descr_init(self, space, w_file=None, w_protocol=None):
+        # Pickler(file, protocol=0) or Pickler(protocol): in the latter
+        # case, the pickles are accumulated and returned by getvalue()
+        if (w_protocol is None and w_file is not None and
+                space.isinstance_w(w_file, space.w_int)):
+            w_protocol = w_file
+            w_file = None
+        if space.is_none(w_file):
+            w_file = None
+        self.init(w_file, check_protocol(space, w_protocol))
+
+    def init(self, w_file, protocol):
+        self.proto = protocol
+        self.bin = protocol >= 1
+        if w_file is None:
+            self.w_write = None
+        else:
+            self.w_write = self.space.getattr(w_file,
+                                              self.space.newtext('write'))
+        self.builder = StringBuilder()
+        self.clear_memo()
+
+    # ____________________________________________________________
+    # output
+
+    def write(self, s):
+        self.builder.append(s)
+
+    def flush(self):
+        if self.w_write is not None and self.builder.getlength() > 0:
+            data = self.builder.build()
+            self.builder = StringBuilder()
+            self.space.call_function(self.w_write, self.space.newbytes(data))
+
+    def maybe_flush(self):
+        if (self.w_write is not None and
+                self.builder.getlength() >= FLUSH_SIZE):
+            self.flush()
+
+    # ____________________________________________________________
+    # memo
+
+    def clear_memo(self):
+        self.memo = {}
+        self.memo_index = 1
+
+    def next_memo_index(self):
+        index = self.memo_index
+        self.memo_index = index + 1
+        return index
+
+    def memoize(self, w_obj):
+        if self.fast:
+            return
+        index = self.next_memo_index()
+        self.memo[w_obj] = index
+        self.write_put(index)
+
+    def write_put(self, index):
+        if self.bin:
+            if index < 256:
+                self.write(BINPUT)
+                self.write(chr(index))
+            else:
+                self.write(LONG_BINPUT)
+                _append_int4(self.builder, index)
+        else:
+            self.write(PUT)
+            self.write(str(index))
+            self.write('\n')
+
+    def write_get(self, index):
+        if self.bin:
+            if index < 256:
+                self.write(BINGET)
+                self.write(chr(index))
+            else:
+                self.write(LONG_BINGET)
+                _append_int4(self.builder, index)
+        else:
+            self.write(GET)
+            self.write(str(index))
+            self.write('\n')
+
+    # ____________________________________________________________
+    # the main entry points
+
+    def dump(self, w_obj):
+        space = self.space
+        w_pers_func = space.findattr(self, space.newtext('persistent_id'))
+        if w_pers_func is not None and space.is_w(w_pers_func, space.w_None):
+            w_pers_func = None
+        self.w_pers_func = w_pers_func
+        if self.proto >= 2:
+            self.write(PROTO)
+            self.write(chr(self.proto))
+        try:
+            self.save(w_obj)
+        finally:
+            self.w_pers_func = None
+        self.write(STOP)
+        self.flush()
+
+    def save(self, w_obj, pers_save=False):
+        space = self.space
+        if self.w_pers_func is not None and not pers_save:
+            if self.save_pers(w_obj):
+                return
+        w_type = space.type(w_obj)
+        # atomic objects, never memoized
+        if space.is_w(w_obj, space.w_None):
+            self.write(NONE)
+            return
+        if space.is_w(w_type, space.w_int):
+            self.save_int(space.int_w(w_obj))
+            return
+        if space.is_w(w_type, space.w_float):
+            self.save_float(space.float_w(w_obj))
+            return
+        if space.is_w(w_type, space.w_bool):
+            self.save_bool(space.is_true(w_obj))
+            return
+        if space.is_w(w_type, space.w_long):
+            self.save_long(space.bigint_w(w_obj))
+            return
+        # everything else goes through the memo
+        index = self.memo.get(w_obj, 0)
+        if index > 0:
+            self.write_get(index)
+            return
+        if space.is_w(w_type, space.w_bytes):
+            self.save_bytes(space.bytes_w(w_obj))
+            self.memoize(w_obj)
+        elif space.is_w(w_type, space.w_unicode):
+            self.save_unicode(space.utf8_w(w_obj))
+            self.memoize(w_obj)
+        elif space.is_w(w_type, space.w_tuple):
+            self.save_tuple(w_obj)
+        elif space.is_w(w_type, space.w_list):
+            self.save_list(w_obj)
+        elif space.is_w(w_type, space.w_dict):
+            self.save_dict(w_obj)
+        elif space.is_w(w_type, space.gettypeobject(W_InstanceObject.typedef)):
+            self.save_inst(w_obj)
+        elif (space.is_w(w_type, space.gettypeobject(W_ClassObject.typedef)) or
+              space.is_w(w_type, space.gettypeobject(Function.typedef)) or
+              space.is_w(w_type, space.gettypeobject(BuiltinFunction.typedef))):
+            self.save_global(w_obj)
+        else:
+            self.save_other(w_obj, w_type)
+
+    def save_pers(self, w_obj):
+        space = self.space
+        w_pid = space.call_function(self.w_pers_func, w_obj)
+        if space.is_w(w_pid, space.w_None):
+            return False
+        if self.bin:
+            self.save(w_pid, pers_save=True)
+            self.write(BINPERSID)
+        else:
+            self.write(PERSID)
+            self.write(space.text_w(space.str(w_pid)))
+            self.write('\n')
+        return True
+
+    # ____________________________________________________________
+    # atomic objects
+
+    def save_int(self, x):
+        if self.bin:
+            # If the int is small enough to fit in a signed 4-byte
+            # 2's-comp format, we can store it more efficiently than the
+            # general case.
+            if 0 <= x <= 0xff:
+                self.write(BININT1)
+                self.write(chr(x))
+                return
+            if 0 <= x <= 0xffff:
+                self.write(BININT2)
+                self.write(chr(x & 0xff))
+                self.write(chr(x >> 8))
+                return
+            if -0x80000000 <= x <= 0x7fffffff:
+                self.write(BININT)
+                _append_int4(self.builder, x)
+                return
+        # text pickle, or int too big to fit in signed 4-byte format
+        self.write(INT)
+        self.write(str(x))
+        self.write('\n')
+
+    def save_bool(self, flag):
+        if self.proto >= 2:
+            self.write(NEWTRUE if flag else NEWFALSE)
+        else:
+            self.write('I01\n' if flag else 'I00\n')
+
+    def save_float(self, x):
+        if self.bin:
+            self.write(BINFLOAT)
+            bits = ieee.float_pack(x, 8)
+            for i in range(7, -1, -1):
+                self.write(chr(intmask((bits >> (i * 8)) & 0xff)))
+        else:
+            self.write(FLOAT)
+            self.write(formatd(x, 'r', 0, DTSF_ADD_DOT_0))
+            self.write('\n')
+
+    def save_long(self, big):
+        if self.proto >= 2:
+            if big.sign == 0:
+                self.write(LONG1)
+                self.write('\x00')
+                return
+            if big.sign > 0:
+                nbits = big.bit_length()
+            else:
+                nbits = big.invert().bit_length()
+            nbytes = (nbits >> 3) + 1
+            data = big.tobytes(nbytes, 'little', True)
+            if nbytes < 256:
+                self.write(LONG1)
+                self.write(chr(nbytes))
+            else:
+                self.write(LONG4)
+                _append_int4(self.builder, nbytes)
+            self.write(data)
+        else:
+            self.write(LONG)
+            self.write(big.repr())
+            self.write('\n')
+
+    def save_bytes(self, s):
+        if self.bin:
+            n = len(s)
+            if n < 256:
+                self.write(SHORT_BINSTRING)
+                self.write(chr(n))
+            else:
+                self.write(BINSTRING)
+                _append_int4(self.builder, n)
+            self.write(s)
+        else:
+            from pypy.objspace.std.bytesobject import string_escape_encode
+            self.write(STRING)
+            self.write(string_escape_encode(s, "'"))
+            self.write('\n')
+
+    def save_unicode(self, utf8):
+        if self.bin:
+            self.write(BINUNICODE)
+            _append_int4(self.builder, len(utf8))
+            self.write(utf8)
+        else:
+            self.write(UNICODE)
+            _append_raw_unicode_escape(self.builder, utf8)
+            self.write('\n')
+
+    # ____________________________________________________________
+    # containers
+
+    def save_tuple(self, w_tuple):
+        space = self.space
+        items_w = space.fixedview(w_tuple)
+        n = len(items_w)
+        if n == 0:
+            if self.bin:
+                self.write(EMPTY_TUPLE)
+            else:
+                self.write(MARK)
+                self.write(TUPLE)
+            return
+        if n <= 3 and self.proto >= 2:
+            for w_item in items_w:
+                self.save(w_item)
+            # Subtle.  Same as in the big comment below.
+            index = self.memo.get(w_tuple, 0)
+            if index > 0:
+                for i in range(n):
+                    self.write(POP)
+                self.write_get(index)
+            else:
+                self.write(TUPLESIZE2CODE[n])
+                self.memoize(w_tuple)
+            return
+        # proto 0 or proto 1 and tuple isn't empty, or proto > 1 and tuple
+        # has more than 3 elements.
+        self.write(MARK)
+        for w_item in items_w:
+            self.save(w_item)
+        index = self.memo.get(w_tuple, 0)
+        if index > 0:
+            # Subtle.  d was not in memo when we entered save_tuple(), so
+            # the process of saving the tuple's elements must have saved
+            # the tuple itself:  the tuple is recursive.  The proper action
+            # now is to throw away everything we put on the stack, and
+            # simply GET the tuple (it's already constructed).  This check
+            # could have been done in the "for element" loop instead, but
+            # recursive tuples are a rare thing.
+            if self.bin:
+                self.write(POP_MARK)
+            else:
+                for i in range(n + 1):
+                    self.write(POP)
+            self.write_get(index)
+            return
+        self.write(TUPLE)
+        self.memoize(w_tuple)
+
+    def save_list(self, w_list):
+        space = self.space
+        if self.bin:
+            self.write(EMPTY_LIST)
+        else:
+            self.write(MARK)
+            self.write(LIST)
+        self.memoize(w_list)
+        if self.w_pers_func is None:
+            # fast paths: walk the unboxed storage of the list strategies
+            # directly.  Ints and floats are never memoized; strings are,
+            # but the boxes created by getitem() on a bytes list are fresh
+            # objects anyway, so only their memo index is reserved.
+            ints = space.listview_int(w_list)
+            if ints is not None:
+                self.batch_appends(ints)
+                return
+            floats = space.listview_float(w_list)
+            if floats is not None:
+                self.batch_appends(floats)
+                return
+            strings = space.listview_bytes(w_list)
+            if strings is not None:
+                self.batch_appends(strings)
+                return
+        # a copy: __reduce__ or persistent_id may mutate the list while
+        # its items are being saved
+        self.batch_appends(space.listview(w_list)[:])
+
+    @specialize.argtype(1)
+    def save_unboxed(self, item):
+        if isinstance(item, int):
+            self.save_int(item)
+        elif isinstance(item, float):
+            self.save_float(item)
+        elif isinstance(item, str):
+            self.save_bytes(item)
+            if not self.fast:
+                self.write_put(self.next_memo_index())
+        else:
+            self.save(item)
+
+    @specialize.argtype(1)
+    def batch_appends(self, items):
+        n = len(items)
+        if not self.bin:
+            for i in range(n):
+                self.save_unboxed(items[i])
+                self.write(APPEND)
+                self.maybe_flush()
+            return
+        start = 0
+        while start < n:
+            stop = min(start + BATCHSIZE, n)
+            if stop - start > 1:
+                self.write(MARK)
+            for i in range(start, stop):
+                self.save_unboxed(items[i])
+            self.write(APPENDS if stop - start > 1 else APPEND)
+            self.maybe_flush()
+            start = stop
+
+    def batch_appends_iter(self, w_iter):
+        # the generic version of batch_appends(), for __reduce__ results
+        space = self.space
+        items_w = []
+        while True:
+            try:
+                w_item = space.next(w_iter)
+            except OperationError as e:
+                if not e.match(space, space.w_StopIteration):
+                    raise
+                break
+            items_w.append(w_item)
+            if len(items_w) == BATCHSIZE:
+                self.batch_appends(items_w)
+                items_w = []
+        if items_w:
+            self.batch_appends(items_w)
+
+    def save_dict(self, w_dict):
+        from pypy.objspace.std.dictmultiobject import W_DictMultiObject
+        if self.bin:
+            self.write(EMPTY_DICT)
+        else:
+            self.write(MARK)
+            self.write(DICT)
+        self.memoize(w_dict)
+        assert isinstance(w_dict, W_DictMultiObject)
+        iterator = w_dict.iteritems()
+        keys_w = []
+        values_w = []
+        while True:
+            w_key, w_value = iterator.next_item()
+            if w_key is None:
+                break
+            keys_w.append(w_key)
+            values_w.append(w_value)
+            if len(keys_w) == BATCHSIZE:
+                self.batch_setitems(keys_w, values_w)
+                keys_w = []
+                values_w = []
+        if keys_w:
+            self.batch_setitems(keys_w, values_w)
+
+    def batch_setitems(self, keys_w, values_w):
+        n = len(keys_w)
+        if not self.bin:
+            for i in range(n):
+                self.save(keys_w[i])
+                self.save(values_w[i])
+                self.write(SETITEM)
+                self.maybe_flush()
+            return
+        if n > 1:
+            self.write(MARK)
+        for i in range(n):
+            self.save(keys_w[i])
+            self.save(values_w[i])
+        self.write(SETITEMS if n > 1 else SETITEM)
+        self.maybe_flush()
+
+    def batch_setitems_iter(self, w_iter):
+        # the generic version of batch_setitems(), for __reduce__ results
+        space = self.space
+        keys_w = []
+        values_w = []
+        while True:
+            try:
+                w_item = space.next(w_iter)
+            except OperationError as e:
+                if not e.match(space, space.w_StopIteration):
+                    raise
+                break
+            w_key, w_value = space.fixedview(w_item, 2)
+            keys_w.append(w_key)
+            values_w.append(w_value)
+            if len(keys_w) == BATCHSIZE:
+                self.batch_setitems(keys_w, values_w)
+                keys_w = []
+                values_w = []
+        if keys_w:
+            self.batch_setitems(keys_w, values_w)
+
+    # ____________________________________________________________
+    # classes, instances and everything else
+
+    def save_inst(self, w_obj):
+        space = self.space
+        w_cls = space.getattr(w_obj, space.newtext('__class__'))
+        w_getinitargs = space.findattr(w_obj, space.newtext('__getinitargs__'))
+        if w_getinitargs is not None:
+            args_w = space.listview(space.call_function(w_getinitargs))
+        else:
+            args_w = []
+        self.write(MARK)
+        if self.bin:
+            self.save(w_cls)
+            for w_arg in args_w:
+                self.save(w_arg)
+            self.write(OBJ)
+        else:
+            for w_arg in args_w:
+                self.save(w_arg)
+            self.write(INST)
+            self.write(space.text_w(space.getattr(w_cls,
+                                                  space.newtext('__module__'))))
+            self.write('\n')
+            self.write(space.text_w(space.getattr(w_cls,
+                                                  space.newtext('__name__'))))
+            self.write('\n')
+        self.memoize(w_obj)
+        w_getstate = space.findattr(w_obj, space.newtext('__getstate__'))
+        if w_getstate is not None:
+            w_stuff = space.call_function(w_getstate)
+        else:
+            w_stuff = space.getattr(w_obj, space.newtext('__dict__'))
+        self.save(w_stuff)
+        self.write(BUILD)
+
+    def whichmodule(self, w_obj, w_name):
+        space = self.space
+        w_modules = space.sys.get('modules')
+        w_iter = space.iter(space.call_method(w_modules, 'items'))
+        while True:
+            try:
+                w_item = space.next(w_iter)
+            except OperationError as e:
+                if not e.match(space, space.w_StopIteration):
+                    raise
+                break
+            w_modname, w_module = space.fixedview(w_item, 2)
+            if space.is_w(w_module, space.w_None):
+                continue
+            if space.eq_w(w_modname, space.newtext('__main__')):
+                continue
+            w_found = space.findattr(w_module, w_name)
+            if w_found is not None and space.is_w(w_found, w_obj):
+                return w_modname
+        return space.newtext('__main__')
+
+    def save_global(self, w_obj, w_name=None):
+        space = self.space
+        if w_name is None:
+            w_name = space.getattr(w_obj, space.newtext('__name__'))
+        w_module = space.findattr(w_obj, space.newtext('__module__'))
+        if w_module is None or space.is_w(w_module, space.w_None):
+            w_module = self.whichmodule(w_obj, w_name)
+        module = space.text_w(w_module)
+        name = space.text_w(w_name)
+        try:
+            w_klass = import_global(space, w_module, w_name)
+        except OperationError as e:
+            if not (e.match(space, space.w_ImportError) or
+                    e.match(space, space.w_KeyError) or
+                    e.match(space, space.w_AttributeError)):
+                raise
+            raise oefmt(get_error(space, 'PicklingError'),
+                        "Can't pickle %R: it's not found as %s.%s",
+                        w_obj, module, name)
+        if not space.is_w(w_klass, w_obj):
+            raise oefmt(get_error(space, 'PicklingError'),
+                        "Can't pickle %R: it's not the same object as %s.%s",
+                        w_obj, module, name)
+        if self.proto >= 2:
+            w_registry = copy_reg_attr(space, '_extension_registry')
+            w_code = space.finditem(w_registry,
+                                    space.newtuple([w_module, w_name]))
+            if w_code is not None:
+                code = space.int_w(w_code)
+                if code <= 0xff:
+                    self.write(EXT1)
+                    self.write(chr(code))
+                elif code <= 0xffff:
+                    self.write(EXT2)
+                    self.write(chr(code & 0xff))
+                    self.write(chr(code >> 8))
+                else:
+                    self.write(EXT4)
+                    _append_int4(self.builder, code)
+                return
+        self.write(GLOBAL)
+        self.write(module)
+        self.write('\n')
+        self.write(name)
+        self.write('\n')
+        self.memoize(w_obj)
+
+    def save_other(self, w_obj, w_type):
+        space = self.space
+        # Check copy_reg.dispatch_table
+        w_dispatch_table = copy_reg_attr(space, 'dispatch_table')
+        w_reduce = space.finditem(w_dispatch_table, w_type)
+        if w_reduce is not None:
+            w_rv = space.call_function(w_reduce, w_obj)
+        else:
+            # Check for a class with a custom metaclass; treat as regular
+            # class
+            if space.issubtype_w(w_type, space.w_type):
+                self.save_global(w_obj)
+                return
+            # Check for a __reduce_ex__ method, fall back to __reduce__
+            w_reduce = space.findattr(w_obj, space.newtext('__reduce_ex__'))
+            if w_reduce is not None:
+                w_rv = space.call_function(w_reduce, space.newint(self.proto))
+            else:
+                w_reduce = space.findattr(w_obj, space.newtext('__reduce__'))
+                if w_reduce is None:
+                    raise oefmt(get_error(space, 'PicklingError'),
+                                "Can't pickle %T object: %R", w_obj, w_obj)
+                w_rv = space.call_function(w_reduce)
+        # Check for string returned by reduce(), meaning "save as global"
+        if space.is_w(space.type(w_rv), space.w_bytes):
+            self.save_global(w_obj, w_rv)
+            return
+        # Assert that reduce() returned a tuple
+        if not space.is_w(space.type(w_rv), space.w_tuple):
+            raise oefmt(get_error(space, 'PicklingError'),
+                        "%R must return string or tuple", w_reduce)
+        # Assert that it returned an appropriately sized tuple
+        rv_w = space.fixedview(w_rv)
+        n = len(rv_w)
+        if not 2 <= n <= 5:
+            raise oefmt(get_error(space, 'PicklingError'),
+                        "Tuple returned by %R must have two to five elements",
+                        w_reduce)
+        w_state = rv_w[2] if n > 2 else space.w_None
+        w_listitems = rv_w[3] if n > 3 else space.w_None
+        w_dictitems = rv_w[4] if n > 4 else space.w_None
+        self.save_reduce(rv_w[0], rv_w[1], w_state, w_listitems, w_dictitems,
+                         w_obj)
+
+    def save_reduce(self, w_func, w_args, w_state, w_listitems, w_dictitems,
+                    w_obj):
+        space = self.space
+        if not space.isinstance_w(w_args, space.w_tuple):
+            raise oefmt(get_error(space, 'PicklingError'),
+                        "args from reduce() should be a tuple")
+        if not space.is_true(space.callable(w_func)):
+            raise oefmt(get_error(space, 'PicklingError'),
+                        "func from reduce should be callable")
+        # Protocol 2 special case: if func's name is __newobj__, use NEWOBJ
+        w_funcname = None
+        if self.proto >= 2:
+            w_funcname = space.findattr(w_func, space.newtext('__name__'))
+        if (w_funcname is not None and
+                space.eq_w(w_funcname, space.newtext('__newobj__'))):
+            args_w = space.fixedview(w_args)
+            if len(args_w) == 0:
+                raise oefmt(get_error(space, 'PicklingError'),
+                            "__newobj__ arglist is empty")
+            w_cls = args_w[0]
+            if space.findattr(w_cls, space.newtext('__new__')) is None:
+                raise oefmt(get_error(space, 'PicklingError'),
+                            "args[0] from __newobj__ args has no __new__")
+            if w_obj is not None and not space.is_w(
+                    w_cls, space.getattr(w_obj, space.newtext('__class__'))):
+                raise oefmt(get_error(space, 'PicklingError'),
+                            "args[0] from __newobj__ args has the wrong class")
+            self.save(w_cls)
+            self.save(space.newtuple(args_w[1:]))
+            self.write(NEWOBJ)
+        else:
+            self.save(w_func)
+            self.save(w_args)
+            self.write(REDUCE)
+
+        if w_obj is not None:
+            # If the object is already in the memo, this means it is
+            # recursive. In this case, throw away everything we put on the
+            # stack, and fetch the object back from the memo.
+            index = self.memo.get(w_obj, 0)
+            if index > 0:
+                self.write(POP)
+                self.write_get(index)
+            else:
+                self.memoize(w_obj)
+
+        if not space.is_w(w_listitems, space.w_None):
+            self.batch_appends_iter(w_listitems)
+        if not space.is_w(w_dictitems, space.w_None):
+            self.batch_setitems_iter(w_dictitems)
+        if not space.is_w(w_state, space.w_None):
+            self.save(w_state)
+            self.write(BUILD)
+
+    # ____________________________________________________________
+    # app-level interface
+
+    def descr_dump(self, w_obj):
+        """Write a pickled representation of obj to the open file."""
+        self.dump(w_obj)
+
+    def descr_clear_memo(self):
+        """Clears the pickler's "memo"."""
+        self.clear_memo()
+
+    def descr_getvalue(self):
+        """Return the data accumulated by a Pickler created without a
+        file."""
+        data = self.builder.build()
+        self.builder = StringBuilder()
+        self.builder.append(data)
+        return self.space.newbytes(data)
+
+    def fget_memo(self, space):
+        # same format as in pickle.py: {id(obj): (index, obj)}
+        w_memo = space.newdict()
+        for w_obj, index in self.memo.items():
+            space.setitem(w_memo, space.id(w_obj),
+                          space.newtuple([space.newint(index), w_obj]))
+        return w_memo
+
+    def fset_memo(self, space, w_memo):
+        self.clear_memo()
+        for w_value in space.listview(space.call_method(w_memo, 'values')):
+            w_index, w_obj = space.fixedview(w_value, 2)
+            index = space.int_w(w_index)
+            self.memo[w_obj] = index
+            if index >= self.memo_index:
+                self.memo_index = index + 1
+
+    def fget_persistent_id(self, space):
+        if self.w_persistent_id is None:
+            return space.w_None
+        return self.w_persistent_id
+
+    def fset_persistent_id(self, space, w_func):
+        self.w_persistent_id = w_func
+
+    def fget_fast(self, space):
+        return space.newint(self.fast)
+
+    def fset_fast(self, space, w_fast):
+        self.fast = space.int_w(w_fast)
+
+    def fget_proto(self, space):
+        return space.newint(self.proto)
+
+    def fget_bin(self, space):
+        return space.newint(int(self.bin))
+
+
+def descr_new_pickler(space, w_subtype, __args__):
+    w_self = space.allocate_instance(W_Pickler, w_subtype)
+    W_Pickler.__init__(space.interp_w(W_Pickler, w_self), space)
+    return w_self
+
+W_Pickler.typedef = TypeDef("cPickle.Pickler",
+    __doc__ = """Pickler(file, protocol=0) -- Create a pickler.
+
+This takes a file-like object for writing a pickle data stream.
+The optional proto argument tells the pickler to use the given
+protocol; supported protocols are 0, 1, 2.  The default
+protocol is 0, to be backwards compatible.  If called with a single
+integer argument (the protocol), the pickles are accumulated and can
+be fetched with getvalue().""",
+    __new__ = interp2app(descr_new_pickler),
+    __init__ = interp2app(W_Pickler.descr_init),
+    dump = interp2app(W_Pickler.descr_dump),
+    clear_memo = interp2app(W_Pickler.descr_clear_memo),
+    getvalue = interp2app(W_Pickler.descr_getvalue),
+    memo = GetSetProperty(W_Pickler.fget_memo, W_Pickler.fset_memo),
+    persistent_id = GetSetProperty(W_Pickler.fget_persistent_id,
+                                   W_Pickler.fset_persistent_id),
+    fast = GetSetProperty(W_Pickler.fget_fast, W_Pickler.fset_fast),
+    proto = GetSetProperty(W_Pickler.fget_proto),
+    bin = GetSetProperty(W_Pickler.fget_bin),
+)
+
+
+def dump(space, w_obj, w_file, w_protocol=None):
+    """dump(obj, file, protocol=0) -- Write an object in pickle format to
+    the given file."""
+    pickler = W_Pickler(space)
+    pickler.init(w_file, check_protocol(space, w_protocol))
+    pickler.dump(w_obj)
+
+def dumps(space, w_obj, w_protocol=None):
+    """dumps(obj, protocol=0) -- Return a string containing an object in
+    pickle format."""
+    pickler = W_Pickler(space)
+    pickler.init(None, check_protocol(space, w_protocol))
+    pickler.dump(w_obj)
+    return space.newbytes(pickler.builder.build())
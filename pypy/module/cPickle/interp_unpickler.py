@@ -0,0 +1,637 @@
+from rpython.rlib.rarithmetic import r_uint, intmask, string_to_int
+from rpython.rlib.rbigint import rbigint
+from rpython.rlib.rfloat import string_to_float
+from rpython.rlib.rstring import ParseStringError, ParseStringOverflowError
+from rpython.rlib.rstruct import ieee
+from rpython.rtyper.lltypesystem import rffi
+
+from pypy.interpreter import unicodehelper
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import OperationError, oefmt
+from pypy.interpreter.gateway import interp2app
+from pypy.interpreter.typedef import TypeDef, GetSetProperty
+from pypy.module.__builtin__.interp_classobj import (
+    W_ClassObject, W_InstanceObject)
+from pypy.module.cStringIO.interp_stringio import W_InputOutputType
+from pypy.module.cPickle.interp_cpickle import (
+    HIGHEST_PROTOCOL, copy_reg_attr, unpickling_error,
+    import_global)
+from pypy.module.cPickle.interp_cpickle import (
+    MARK, STOP, POP, POP_MARK, DUP, FLOAT, INT, BININT, BININT1, LONG,
+    BININT2, NONE, PERSID, BINPERSID, REDUCE, STRING, BINSTRING,
+    SHORT_BINSTRING, UNICODE, BINUNICODE, APPEND, BUILD, GLOBAL, DICT,
+    EMPTY_DICT, APPENDS, GET, BINGET, INST, LONG_BINGET, LIST, EMPTY_LIST,
+    OBJ, PUT, BINPUT, LONG_BINPUT, SETITEM, TUPLE, EMPTY_TUPLE, SETITEMS,
+    BINFLOAT, PROTO, NEWOBJ, EXT1, EXT2, EXT4, TUPLE1, TUPLE2, TUPLE3,
+    NEWTRUE, NEWFALSE, LONG1, LONG4)
+
+
+class W_Unpickler(W_Root):
+    """Interp-level unpickler.  The input is read from 'self.data': either
+    the whole string given to loads(), the content of a cStringIO object,
+    or the last chunk returned by file.read().  Opcode arguments are
+    decoded in place, without slicing 'self.data'."""
+
+    def __init__(self, space):
+        self.space = space
+        self.data = ''
+        self.pos = 0
+        self.end = 0
+        self.w_read = None
+        self.w_readline = None
+        self.stringio = None
+        self.stack_w = []
+        self.marks = []
+        self.memo = {}
+        self.find_global_set = False
+        self.w_find_global = None
+        self.w_find_class = None
+        self.w_persistent_load = None
+        self.w_pers_func = None
+
+    def descr_init(self, space, w_file):
+        if isinstance(w_file, W_InputOutputType):
+            # read directly from the buffer of the cStringIO object
+            self.stringio = w_file
+            self.w_read = None
+            self.w_readline = None
+        else:
+            self.stringio = None
+            self.w_read = space.getattr(w_file, space.newtext('read'))
+            self.w_readline = space.getattr(w_file, space.newtext('readline'))
+        self.data = ''
+        self.pos = 0
+        self.end = 0
+        self.memo = {}
+
+    # ____________________________________________________________
+    # input
+
+    def eof(self):
+        return OperationError(self.space.w_EOFError, self.space.w_None)
+
+    def read(self, n):
+        """Make 'n' bytes available in 'self.data' and return the index
+        of the first one."""
+        pos = self.pos
+        if n <= self.end - pos:
+            self.pos = pos + n
+            return pos
+        if self.w_read is None:
+            raise self.eof()
+        space = self.space
+        data = space.bytes_w(space.call_function(self.w_read,
+                                                 space.newint(n)))
+        if len(data) < n:
+            raise self.eof()
+        self.data = data
+        self.pos = n
+        self.end = len(data)
+        return 0
+
+    def readline(self):
+        """Return the next line, without the final newline."""
+        if self.w_readline is None:
+            pos = self.pos
+            if pos >= self.end:
+                raise self.eof()
+            stop = self.data.find('\n', pos, self.end)
+            if stop < 0:
+                stop = self.end
+                self.pos = stop
+            else:
+                self.pos = stop + 1
+            assert stop >= 0
+            return self.data[pos:stop]
+        space = self.space
+        line = space.bytes_w(space.call_function(self.w_readline))
+        if len(line) == 0:
+            raise self.eof()
+        stop = len(line)
+        if line[stop - 1] == '\n':
+            stop -= 1
+        assert stop >= 0
+        return line[:stop]
+
+    def read_byte(self):
+        i = self.read(1)
+        return ord(self.data[i])
+
+    def read_int2(self):
+        i = self.read(2)
+        data = self.data
+        return ord(data[i]) | (ord(data[i + 1]) << 8)
+
+    def read_int4(self):
+        i = self.read(4)
+        data = self.data
+        x = (r_uint(ord(data[i])) |
+             (r_uint(ord(data[i + 1])) << 8) |
+             (r_uint(ord(data[i + 2])) << 16) |
+             (r_uint(ord(data[i + 3])) << 24))
+        return intmask(rffi.cast(rffi.INT, x))
+
+    def read_string(self, n):
+        if n < 0:
+            raise unpickling_error(self.space, "BINSTRING pickle has negative"
+                                               " byte count")
+        i = self.read(n)
+        if i == 0 and n == len(self.data):
+            return self.data
+        return self.data[i:i + n]
+
+    # ____________________________________________________________
+    # the stack
+
+    def push(self, w_obj):
+        self.stack_w.append(w_obj)
+
+    def pop(self):
+        if not self.stack_w:
+            raise unpickling_error(self.space, "unpickling stack underflow")
+        return self.stack_w.pop()
+
+    def top(self):
+        if not self.stack_w:
+            raise unpickling_error(self.space, "unpickling stack underflow")
+        return self.stack_w[-1]
+
+    def marker(self):
+        """Return the position of the topmost mark and remove it."""
+        if not self.marks:
+            raise unpickling_error(self.space, "could not find MARK")
+        k = self.marks.pop()
+        if k > len(self.stack_w):
+            raise unpickling_error(self.space, "unpickling stack underflow")
+        return k
+
+    def pop_mark(self):
+        """Return the list of objects above the topmost mark and remove
+        them from the stack."""
+        k = self.marker()
+        items_w = self.stack_w[k:]
+        del self.stack_w[k:]
+        return items_w
+
+    def pop_mark_newlist(self):
+        """Same as pop_mark(), but wrap the objects into a new list."""
+        k = self.marker()
+        items_w = self.stack_w[k:]
+        del self.stack_w[k:]
+        return self.space.newlist(items_w)
+
+    # ____________________________________________________________
+    # the main loop
+
+    def load(self):
+        space = self.space
+        stringio = self.stringio
+        if stringio is not None:
+            stringio.check_closed()
+            self.data = stringio.getvalue()
+            self.pos = stringio.tell()
+            self.end = len(self.data)
+        self.w_find_class = None
+        if not space.is_w(space.type(self),
+                          space.gettypeobject(W_Unpickler.typedef)):
+            # a subclass, which might override find_class()
+            self.w_find_class = space.getattr(self,
+                                              space.newtext('find_class'))
+        w_pers_func = space.findattr(self, space.newtext('persistent_load'))
+        if w_pers_func is not None and space.is_w(w_pers_func, space.w_None):
+            w_pers_func = None
+        self.w_pers_func = w_pers_func
+        self.stack_w = []
+        self.marks = []
+        try:
+            return self.run()
+        finally:
+            if stringio is not None:
+                stringio.seek(self.pos)
+                self.data = ''
+                self.pos = 0
+                self.end = 0
+            self.stack_w = []
+            self.marks = []
+            self.w_pers_func = None
+
+    def run(self):
+        space = self.space
+        while True:
+            i = self.read(1)
+            op = self.data[i]
+            # the most common opcodes of the binary protocols first
+            if op == BINPUT:
+                self.memo[self.read_byte()] = self.top()
+            elif op == BINGET:
+                self.load_get(self.read_byte())
+            elif op == BININT1:
+                self.push(space.newint(self.read_byte()))
+            elif op == SHORT_BINSTRING:
+                self.push(space.newbytes(self.read_string(self.read_byte())))
+            elif op == BINUNICODE:
+                self.load_binunicode(self.read_int4())
+            elif op == MARK:
+                self.marks.append(len(self.stack_w))
+            elif op == APPENDS:
+                self.load_appends()
+            elif op == SETITEMS:
+                self.load_setitems()
+            elif op == EMPTY_LIST:
+                self.push(space.newlist([]))
+            elif op == EMPTY_DICT:
+                self.push(space.newdict())
+            elif op == EMPTY_TUPLE:
+                self.push(space.newtuple([]))
+            elif op == TUPLE1:
+                w_1 = self.pop()
+                self.push(space.newtuple([w_1]))
+            elif op == TUPLE2:
+                w_2 = self.pop()
+                w_1 = self.pop()
+                self.push(space.newtuple([w_1, w_2]))
+            elif op == TUPLE3:
+                w_3 = self.pop()
+                w_2 = self.pop()
+                w_1 = self.pop()
+                self.push(space.newtuple([w_1, w_2, w_3]))
+            elif op == TUPLE:
+                self.push(space.newtuple(self.pop_mark()))
+            elif op == BININT:
+                self.push(space.newint(self.read_int4()))
+            elif op == BININT2:
+                self.push(space.newint(self.read_int2()))
+            elif op == BINFLOAT:
+                i = self.read(8)
+                x = ieee.unpack_float(self.data[i:i + 8], True)
+                self.push(space.newfloat(x))
+            elif op == NONE:
+                self.push(space.w_None)
+            elif op == NEWTRUE:
+                self.push(space.w_True)
+            elif op == NEWFALSE:
+                self.push(space.w_False)
+            elif op == APPEND:
+                w_value = self.pop()
+                space.call_method(self.top(), 'append', w_value)
+            elif op == SETITEM:
+                w_value = self.pop()
+                w_key = self.pop()
+                space.setitem(self.top(), w_key, w_value)
+            elif op == LONG_BINPUT:
+                self.memo[self.read_int4()] = self.top()
+            elif op == LONG_BINGET:
+                self.load_get(self.read_int4())
+            elif op == BINSTRING:
+                self.push(space.newbytes(self.read_string(self.read_int4())))
+            elif op == LONG1:
+                self.load_binlong(self.read_byte())
+            elif op == LONG4:
+                self.load_binlong(self.read_int4())
+            elif op == PROTO:
+                proto = self.read_byte()
+                if proto > HIGHEST_PROTOCOL:
+                    raise oefmt(space.w_ValueError,
+                                "unsupported pickle protocol: %d", proto)
+            elif op == GLOBAL:
+                w_module = space.newtext(self.readline())
+                w_name = space.newtext(self.readline())
+                self.push(self.find_class(w_module, w_name))
+            elif op == REDUCE:
+                w_args = self.pop()
+                w_func = self.pop()
+                self.push(space.call(w_func, w_args))
+            elif op == NEWOBJ:
+                self.load_newobj()
+            elif op == BUILD:
+                self.load_build()
+            elif op == STOP:
+                break
+            # the text protocol
+            elif op == PUT:
+                self.memo[self.read_memo_key()] = self.top()
+            elif op == GET:
+                self.load_get(self.read_memo_key())
+            elif op == INT:
+                self.load_int()
+            elif op == LONG:
+                self.push(space.call_function(space.w_long,
+                                              space.newtext(self.readline()),
+                                              space.newint(0)))
+            elif op == FLOAT:
+                self.load_float()
+            elif op == STRING:
+                self.load_string()
+            elif op == UNICODE:
+                self.push(space.call_method(space.newbytes(self.readline()),
+                                            'decode',
+                                            space.newtext('raw-unicode-escape')))
+            elif op == LIST:
+                self.push(self.pop_mark_newlist())
+            elif op == DICT:
+                items_w = self.pop_mark()
+                w_dict = space.newdict()
+                for i in range(0, len(items_w) - 1, 2):
+                    space.setitem(w_dict, items_w[i], items_w[i + 1])
+                self.push(w_dict)
+            elif op == INST:
+                w_module = space.newtext(self.readline())
+                w_name = space.newtext(self.readline())
+                w_klass = self.find_class(w_module, w_name)
+                self.instantiate(w_klass, self.pop_mark())
+            elif op == OBJ:
+                args_w = self.pop_mark()
+                if not args_w:
+                    raise unpickling_error(space,
+                                           "unpickling stack underflow")
+                self.instantiate(args_w[0], args_w[1:])
+            # rarely used opcodes
+            elif op == POP:
+                if self.marks and self.marks[-1] == len(self.stack_w):
+                    self.marks.pop()
+                else:
+                    self.pop()
+            elif op == POP_MARK:
+                self.pop_mark()
+            elif op == DUP:
+                self.push(self.top())
+            elif op == PERSID:
+                self.load_persid(space.newtext(self.readline()))
+            elif op == BINPERSID:
+                self.load_persid(self.pop())
+            elif op == EXT1:
+                self.load_extension(self.read_byte())
+            elif op == EXT2:
+                self.load_extension(self.read_int2())
+            elif op == EXT4:
+                self.load_extension(self.read_int4())
+            else:
+                raise unpickling_error(space, "invalid load key, %s." % (
+                    space.text_w(space.repr(space.newbytes(op))),))
+        return self.pop()
+
+    # ____________________________________________________________
+    # opcode implementations
+
+    def read_memo_key(self):
+        line = self.readline()
+        try:
+            return string_to_int(line)
+        except (ParseStringError, ParseStringOverflowError):
+            raise oefmt(self.space.w_ValueError,
+                        "invalid literal for memo key: '%s'", line)
+
+    def load_get(self, index):
+        try:
+            w_obj = self.memo[index]
+        except KeyError:
+            # BadPickleGet is KeyError
+            raise OperationError(self.space.w_KeyError,
+                                 self.space.newint(index))
+        self.push(w_obj)
+
+    def load_int(self):
+        space = self.space
+        line = self.readline()
+        if line == '00':
+            self.push(space.w_False)
+        elif line == '01':
+            self.push(space.w_True)
+        else:
+            try:
+                self.push(space.newint(string_to_int(line)))
+            except (ParseStringError, ParseStringOverflowError):
+                # too large for an int, or malformed: let int() handle it
+                self.push(space.call_function(space.w_int,
+                                              space.newtext(line)))
+
+    def load_binlong(self, n):
+        if n < 0:
+            raise unpickling_error(self.space, "LONG pickle has negative"
+                                               " byte count")
+        big = rbigint.frombytes(self.read_string(n), 'little', True)
+        self.push(self.space.newlong_from_rbigint(big))
+
+    def load_float(self):
+        space = self.space
+        line = self.readline()
+        try:
+            self.push(space.newfloat(string_to_float(line)))
+        except ParseStringError:
+            self.push(space.call_function(space.w_float,
+                                          space.newtext(line)))
+
+    def load_string(self):
+        space = self.space
+        rep = self.readline()
+        n = len(rep)
+        if n < 2 or (rep[0] != "'" and rep[0] != '"') or rep[n - 1] != rep[0]:
+            raise oefmt(space.w_ValueError, "insecure string pickle")
+        stop = n - 1
+        assert stop >= 1
+        self.push(space.call_method(space.newbytes(rep[1:stop]), 'decode',
+                                    space.newtext('string-escape')))
+
+    def load_binunicode(self, n):
+        if n < 0:
+            raise unpickling_error(self.space, "BINUNICODE pickle has"
+                                               " negative byte count")
+        s = self.read_string(n)
+        length = unicodehelper.check_utf8_or_raise(self.space, s)
+        self.push(self.space.newutf8(s, length))
+
+    def load_appends(self):
+        space = self.space
+        w_items = self.pop_mark_newlist()
+        w_list = self.top()
+        if space.is_w(space.type(w_list), space.w_list):
+            space.call_method(w_list, 'extend', w_items)
+        else:
+            w_append = space.getattr(w_list, space.newtext('append'))
+            for w_item in space.listview(w_items):
+                space.call_function(w_append, w_item)
+
+    def load_setitems(self):
+        space = self.space
+        items_w = self.pop_mark()
+        w_dict = self.top()
+        for i in range(0, len(items_w) - 1, 2):
+            space.setitem(w_dict, items_w[i], items_w[i + 1])
+
+    def load_newobj(self):
+        space = self.space
+        w_args = self.pop()
+        w_cls = self.pop()
+        w_new = space.getattr(w_cls, space.newtext('__new__'))
+        args_w = [w_cls] + space.fixedview(w_args)
+        self.push(space.call(w_new, space.newtuple(args_w)))
+
+    def instantiate(self, w_klass, args_w):
+        space = self.space
+        if (not args_w and space.is_w(space.type(w_klass),
+                                      space.gettypeobject(W_ClassObject.typedef))
+                and
+                space.findattr(w_klass,
+                               space.newtext('__getinitargs__')) is None):
+            # an old-style instance, created without calling __init__
+            w_instancetype = space.gettypeobject(W_InstanceObject.typedef)
+            w_value = space.call_function(w_instancetype, w_klass)
+        else:
+            try:
+                w_value = space.call(w_klass, space.newtuple(args_w))
+            except OperationError as e:
+                if not e.match(space, space.w_TypeError):
+                    raise
+                w_name = space.findattr(w_klass, space.newtext('__name__'))
+                if w_name is None:
+                    raise
+                raise oefmt(space.w_TypeError, "in constructor for %s: %s",
+                            space.text_w(w_name),
+                            space.text_w(space.str(e.get_w_value(space))))
+        self.push(w_value)
+
+    def load_build(self):
+        space = self.space
+        w_state = self.pop()
+        w_inst = self.top()
+        w_setstate = space.findattr(w_inst, space.newtext('__setstate__'))
+        if w_setstate is not None:
+            space.call_function(w_setstate, w_state)
+            return
+        w_slotstate = None
+        if space.isinstance_w(w_state, space.w_tuple):
+            state_w = space.fixedview(w_state)
+            if len(state_w) == 2:
+                w_state, w_slotstate = state_w
+        if space.is_true(w_state):
+            w_dict = space.getattr(w_inst, space.newtext('__dict__'))
+            space.call_method(w_dict, 'update', w_state)
+        if w_slotstate is not None and space.is_true(w_slotstate):
+            w_items = space.call_method(w_slotstate, 'items')
+            for w_item in space.listview(w_items):
+                w_key, w_value = space.fixedview(w_item, 2)
+                space.setattr(w_inst, w_key, w_value)
+
+    def load_persid(self, w_pid):
+        if self.w_pers_func is None:
+            raise unpickling_error(self.space,
+                "A load persistent id instruction was encountered,\n"
+                "but no persistent_load function was specified.")
+        self.push(self.space.call_function(self.w_pers_func, w_pid))
+
+    def load_extension(self, code):
+        space = self.space
+        w_code = space.newint(code)
+        w_cache = copy_reg_attr(space, '_extension_cache')
+        w_obj = space.finditem(w_cache, w_code)
+        if w_obj is not None:
+            self.push(w_obj)
+            return
+        w_registry = copy_reg_attr(space, '_inverted_registry')
+        w_key = space.finditem(w_registry, w_code)
+        if w_key is None or not space.is_true(w_key):
+            raise oefmt(space.w_ValueError,
+                        "unregistered extension code %d", code)
+        w_module, w_name = space.fixedview(w_key, 2)
+        w_obj = self.find_class(w_module, w_name)
+        space.setitem(w_cache, w_code, w_obj)
+        self.push(w_obj)
+
+    def find_class(self, w_module, w_name):
+        if self.w_find_class is not None:
+            return self.space.call_function(self.w_find_class, w_module,
+                                            w_name)
+        return self.default_find_class(w_module, w_name)
+
+    def default_find_class(self, w_module, w_name):
+        space = self.space
+        if self.find_global_set:
+            if self.w_find_global is None:
+                raise unpickling_error(space,
+                    "Global and instance pickles are not supported.")
+            return space.call_function(self.w_find_global, w_module, w_name)
+        return import_global(space, w_module, w_name)
+
+    # ____________________________________________________________
+    # app-level interface
+
+    def descr_load(self):
+        """Read a pickled object representation from the open file.
+
+        Return the reconstituted object hierarchy specified in the file."""
+        return self.load()
+
+    def descr_find_class(self, w_module, w_name):
+        return self.default_find_class(w_module, w_name)
+
+    def fget_find_global(self, space):
+        if not self.find_global_set:
+            return space.getattr(self, space.newtext('find_class'))
+        if self.w_find_global is None:
+            return space.w_None
+        return self.w_find_global
+
+    def fset_find_global(self, space, w_func):
+        self.find_global_set = True
+        if space.is_w(w_func, space.w_None):
+            self.w_find_global = None
+        else:
+            self.w_find_global = w_func
+
+    def fget_persistent_load(self, space):
+        if self.w_persistent_load is None:
+            return space.w_None
+        return self.w_persistent_load
+
+    def fset_persistent_load(self, space, w_func):
+        self.w_persistent_load = w_func
+
+    def fget_memo(self, space):
+        w_memo = space.newdict()
+        for index, w_obj in self.memo.items():
+            space.setitem(w_memo, space.newint(index), w_obj)
+        return w_memo
+
+    def fset_memo(self, space, w_memo):
+        self.memo = {}
+        w_items = space.call_method(w_memo, 'items')
+        for w_item in space.listview(w_items):
+            w_key, w_value = space.fixedview(w_item, 2)
+            self.memo[space.int_w(space.int(w_key))] = w_value
+
+
+def descr_new_unpickler(space, w_subtype, __args__):
+    w_self = space.allocate_instance(W_Unpickler, w_subtype)
+    W_Unpickler.__init__(space.interp_w(W_Unpickler, w_self), space)
+    return w_self
+
+W_Unpickler.typedef = TypeDef("cPickle.Unpickler",
+    __doc__ = """Unpickler(file) -- Create an unpickler.
+
+This takes a file-like object for reading a pickle data stream.  The
+file-like object must have two methods, a read() method that takes an
+integer argument, and a readline() method that requires no arguments.""",
+    __new__ = interp2app(descr_new_unpickler),
+    __init__ = interp2app(W_Unpickler.descr_init),
+    load = interp2app(W_Unpickler.descr_load),
+    find_class = interp2app(W_Unpickler.descr_find_class),
+    find_global = GetSetProperty(W_Unpickler.fget_find_global,
+                                 W_Unpickler.fset_find_global),
+    persistent_load = GetSetProperty(W_Unpickler.fget_persistent_load,
+                                     W_Unpickler.fset_persistent_load),
+    memo = GetSetProperty(W_Unpickler.fget_memo, W_Unpickler.fset_memo),
+)
+
+
+def load(space, w_file):
+    """load(file) -- Load a pickle from the given file"""
+    unpickler = W_Unpickler(space)
+    unpickler.descr_init(space, w_file)
+    return unpickler.load()
+
+def loads(space, w_string):
+    """loads(string) -- Load a pickle from the given string"""
+    unpickler = W_Unpickler(space)
+    unpickler.data = space.bytes_w(w_string)
+    unpickler.end = len(unpickler.data)
+    return unpickler.load()
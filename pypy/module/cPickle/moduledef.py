@@ -0,0 +1,28 @@
+from pypy.interpreter.mixedmodule import MixedModule
+
+
+class Module(MixedModule):
+    """C implementation and optimization of the Python pickle module."""
+
+    appleveldefs = {
+        'PickleError':        'app_cpickle.PickleError',
+        'PicklingError':      'app_cpickle.PicklingError',
+        'UnpicklingError':    'app_cpickle.UnpicklingError',
+        'UnpickleableError':  'app_cpickle.UnpickleableError',
+        'BadPickleGet':       'app_cpickle.BadPickleGet',
+    }
+
+    interpleveldefs = {
+        '__version__':        'space.newtext("1.71")',
+        'format_version':     'space.newtext("2.0")',
+        'compatible_formats': 'space.newlist([space.newtext(s) for s in '
+                              '["1.0", "1.1", "1.2", "1.3", "2.0"]])',
+        'HIGHEST_PROTOCOL':   'space.newint(interp_cpickle.HIGHEST_PROTOCOL)',
+
+        'Pickler':            'interp_pickler.W_Pickler',
+        'Unpickler':          'interp_unpickler.W_Unpickler',
+        'dump':               'interp_pickler.dump',
+        'dumps':              'interp_pickler.dumps',
+        'load':               'interp_unpickler.load',
+        'loads':              'interp_unpickler.loads',
+    }
@@ -0,0 +1,286 @@
+class AppTestCPickle:
+    spaceconfig = dict(usemodules=('cPickle', 'cStringIO', 'struct',
+                                   'binascii'))
+
+    def setup_class(cls):
+        cls.space.appexec([], """():
+            import sys, types
+            mod = types.ModuleType('cpickle_test_helpers')
+            exec '''
+class Point(object):
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+class OldStyle:
+    def __init__(self, value):
+        self.value = value
+class WithInitArgs:
+    def __init__(self, value):
+        self.value = value
+    def __getinitargs__(self):
+        return (self.value,)
+''' in mod.__dict__
+            sys.modules['cpickle_test_helpers'] = mod
+            for name in ['Point', 'OldStyle', 'WithInitArgs']:
+                getattr(mod, name).__module__ = 'cpickle_test_helpers'
+        """)
+
+    def test_is_builtin(self):
+        import cPickle, sys
+        assert 'cPickle' in sys.builtin_module_names
+        assert cPickle.HIGHEST_PROTOCOL == 2
+        import pickle
+        assert cPickle.PicklingError is pickle.PicklingError
+        assert cPickle.UnpicklingError is pickle.UnpicklingError
+
+    def test_roundtrip_simple(self):
+        import cPickle
+        values = [None, True, False, 0, 1, -1, 255, 256, 65535, 65536,
+                  2**31 - 1, -2**31, 2**31, 2**63 - 1, -2**63,
+                  0L, 1L, -1L, 255L, 256L, -128L, -129L, 2**100, -2**100,
+                  0.0, -1.5, 1e300, float('inf'),
+                  '', 'abc', 'x' * 300, '\x00\n\'"\\', u'', u'abc',
+                  u'\u1234\n\\', u'\U00012345', (), (1,), (1, 2), (1, 2, 3),
+                  (1, 2, 3, 4), [], [1, 2], {}, {'a': 1, 2: 'b'}]
+        for proto in range(3):
+            for value in values:
+                s = cPickle.dumps(value, proto)
+                result = cPickle.loads(s)
+                assert result == value
+                assert type(result) is type(value)
+
+    def test_same_output_as_pickle(self):
+        import cPickle, pickle
+        class CPicklePickler(pickle.Pickler):
+            # cPickle starts its memo indexes at one
+            def memoize(self, obj):
+                self.memo[id(None)] = None
+                return pickle.Pickler.memoize(self, obj)
+        def pydumps(obj, proto):
+            from StringIO import StringIO
+            f = StringIO()
+            CPicklePickler(f, proto).dump(obj)
+            return f.getvalue()
+        data = [1, 'two', u'three', 4.5, (6, 7L), {'eight': [9] * 10},
+                None, True, -2**40, ('abc',) * 5]
+        for proto in range(3):
+            assert cPickle.dumps(data, proto) == pydumps(data, proto)
+
+    def test_shared_and_recursive(self):
+        import cPickle
+        lst = [1, 2]
+        data = [lst, lst, (lst,)]
+        for proto in range(3):
+            result = cPickle.loads(cPickle.dumps(data, proto))
+            assert result[0] is result[1]
+            assert result[2][0] is result[0]
+        rec = []
+        rec.append(rec)
+        d = {}
+        d['self'] = d
+        for proto in range(3):
+            result = cPickle.loads(cPickle.dumps(rec, proto))
+            assert result[0] is result
+            result = cPickle.loads(cPickle.dumps(d, proto))
+            assert result['self'] is result
+
+    def test_list_strategies(self):
+        import cPickle
+        for lst in [range(2500), [1.5] * 1001, ['a', 'bb'] * 700,
+                    [1, 'a', None] * 500]:
+            for proto in range(3):
+                assert cPickle.loads(cPickle.dumps(lst, proto)) == lst
+
+    def test_list_shrinks_while_saving(self):
+        import cPickle
+        class Shrink(object):
+            def __init__(self, lst):
+                self.lst = lst
+            def __reduce__(self):
+                del self.lst[:]
+                return (int, (5,))
+        for proto in range(3):
+            lst = [1, 2]
+            lst.insert(0, Shrink(lst))
+            assert cPickle.loads(cPickle.dumps(lst, proto)) == [5, 1, 2]
+            assert lst == []
+
+    def test_big_dict(self):
+        import cPickle
+        d = dict([(str(i), i) for i in range(2500)])
+        for proto in range(3):
+            assert cPickle.loads(cPickle.dumps(d, proto)) == d
+
+    def test_globals_and_reduce(self):
+        import cPickle, collections
+        class_ = collections.OrderedDict
+        od = class_([('a', 1), ('b', 2)])
+        for proto in range(3):
+            assert cPickle.loads(cPickle.dumps(len, proto)) is len
+            assert cPickle.loads(cPickle.dumps(class_, proto)) is class_
+            result = cPickle.loads(cPickle.dumps(od, proto))
+            assert type(result) is class_
+            assert result == od
+
+    def test_new_style_instances(self):
+        import cPickle
+        from cpickle_test_helpers import Point
+        result = cPickle.loads(cPickle.dumps(Point(1, 2), 2))
+        assert type(result) is Point
+        assert (result.x, result.y) == (1, 2)
+        s = cPickle.dumps(Point(1, 2), 2)
+        assert '\x81' in s      # NEWOBJ
+
+    def test_old_style_instances(self):
+        import cPickle
+        from cpickle_test_helpers import OldStyle, WithInitArgs
+        for proto in range(3):
+            result = cPickle.loads(cPickle.dumps(OldStyle(5), proto))
+            assert isinstance(result, OldStyle)
+            assert result.value == 5
+            result = cPickle.loads(cPickle.dumps(WithInitArgs(3), proto))
+            assert result.value == 3
+
+    def test_unpicklable(self):
+        import cPickle
+        class Local(object):
+            pass
+        raises(cPickle.PicklingError, cPickle.dumps, Local)
+        raises(cPickle.PicklingError, cPickle.dumps, Local, 2)
+
+    def test_bad_protocol(self):
+        import cPickle
+        raises(ValueError, cPickle.dumps, 1, 3)
+        assert cPickle.dumps(1, -1) == cPickle.dumps(1, 2)
+
+    def test_errors(self):
+        import cPickle
+        exc = raises(cPickle.UnpicklingError, cPickle.loads, "a string")
+        assert str(exc.value) == "unpickling stack underflow"
+        exc = raises(cPickle.UnpicklingError, cPickle.loads, "v")
+        assert str(exc.value) == "invalid load key, 'v'."
+        raises(EOFError, cPickle.loads, "")
+        raises(EOFError, cPickle.loads, "(lp1\nI1\n")
+        raises(KeyError, cPickle.loads, "h\x05.")
+        raises(ValueError, cPickle.loads, "\x80\x05N.")
+        raises(ValueError, cPickle.loads, "Sabc\n.")
+
+    def test_pickler_file(self):
+        import cPickle, cStringIO
+        f = cStringIO.StringIO()
+        p = cPickle.Pickler(f, 2)
+        p.dump([1, 2])
+        p.dump('hello')
+        f.seek(0)
+        u = cPickle.Unpickler(f)
+        assert u.load() == [1, 2]
+        assert u.load() == 'hello'
+        raises(EOFError, u.load)
+
+    def test_generic_file(self):
+        import cPickle
+        class File(object):
+            def __init__(self):
+                self.data = ''
+                self.pos = 0
+            def write(self, s):
+                self.data += s
+            def read(self, n):
+                res = self.data[self.pos:self.pos + n]
+                self.pos += len(res)
+                return res
+            def readline(self):
+                i = self.data.index('\n', self.pos) + 1
+                res = self.data[self.pos:i]
+                self.pos = i
+                return res
+        f = File()
+        for proto in range(3):
+            cPickle.dump({'a': [1, u'x', 2.5]}, f, proto)
+        for proto in range(3):
+            assert cPickle.load(f) == {'a': [1, u'x', 2.5]}
+
+    def test_getvalue(self):
+        import cPickle
+        p = cPickle.Pickler(1)
+        p.dump(42)
+        assert cPickle.loads(p.getvalue()) == 42
+        assert p.proto == 1
+
+    def test_memo(self):
+        import cPickle, cStringIO
+        f = cStringIO.StringIO()
+        p = cPickle.Pickler(f, 2)
+        lst = [1]
+        p.dump(lst)
+        assert p.memo == {id(lst): (1, lst)}
+        p.dump(lst)
+        p.clear_memo()
+        assert p.memo == {}
+        p.dump(lst)
+        f.seek(0)
+        u = cPickle.Unpickler(f)
+        a = u.load()
+        b = u.load()
+        assert a is b
+        assert u.memo == {1: a}
+        c = u.load()
+        assert c == a and c is not a
+
+    def test_persistent_id(self):
+        import cPickle, cStringIO
+        for proto in range(3):
+            f = cStringIO.StringIO()
+            p = cPickle.Pickler(f, proto)
+            p.persistent_id = lambda obj: str(obj) if obj == 42 else None
+            p.dump([1, 42, 3])
+            f.seek(0)
+            u = cPickle.Unpickler(f)
+            u.persistent_load = lambda pid: 'pid:%s' % (pid,)
+            assert u.load() == [1, 'pid:42', 3]
+            f.seek(0)
+            u = cPickle.Unpickler(f)
+            raises(cPickle.UnpicklingError, u.load)
+
+    def test_subclasses(self):
+        import cPickle, cStringIO
+        class MyPickler(cPickle.Pickler):
+            def persistent_id(self, obj):
+                if obj == 'secret':
+                    return 'hidden'
+        class MyUnpickler(cPickle.Unpickler):
+            def persistent_load(self, pid):
+                return 'restored ' + pid
+            def find_class(self, module, name):
+                return (module, name)
+        f = cStringIO.StringIO()
+        MyPickler(f, 2).dump(['secret', len])
+        f.seek(0)
+        assert MyUnpickler(f).load() == ['restored hidden',
+                                         ('__builtin__', 'len')]
+
+    def test_find_global(self):
+        import cPickle, cStringIO, time
+        entry = time.strptime('Fri Mar 27 22:20:42 2017')
+        s = cPickle.dumps(entry)
+        assert cPickle.loads(s) == entry
+        u = cPickle.Unpickler(cStringIO.StringIO(s))
+        u.find_global = None
+        exc = raises(cPickle.UnpicklingError, u.load)
+        assert str(exc.value) == (
+            "Global and instance pickles are not supported.")
+        u = cPickle.Unpickler(cStringIO.StringIO(s))
+        u.find_global = lambda module, name: lambda a, b: (name, a, b)
+        assert u.load() == ('struct_time',
+                            (2017, 3, 27, 22, 20, 42, 4, 86, -1), {})
+
+    def test_extension_registry(self):
+        import cPickle, copy_reg
+        copy_reg.add_extension('collections', 'OrderedDict', 0x1234)
+        try:
+            import collections
+            s = cPickle.dumps(collections.OrderedDict, 2)
+            assert s == '\x80\x02\x83\x34\x12.'
+            assert cPickle.loads(s) is collections.OrderedDict
+        finally:
+            copy_reg.remove_extension('collections', 'OrderedDict', 0x1234)
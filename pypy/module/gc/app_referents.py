@@ -116,3 +116,67 @@ class GcStats(object):
 
 def get_stats(memory_pressure=False):
     return GcStats(gc._get_stats(memory_pressure=memory_pressure))
+
+
+class TypeSummary(object):
+    def __init__(self, type, count, size, retained, sites):
+        self.type = type
+        self.count = count
+        self.size = size
+        self.retained = retained
+        self.sites = sites
+
+    def get_name(self):
+        if self.type is None:
+            return '<internal>'
+        return '%s.%s' % (self.type.__module__, self.type.__name__)
+
+    def __repr__(self):
+        return '<TypeSummary %s: %d objects, %d bytes, %d retained>' % (
+            self.get_name(), self.count, self.size, self.retained)
+
+class HeapSummary(object):
+    def __init__(self, lst):
+        self.types = [TypeSummary(*item) for item in lst]
+        self.types.sort(key=lambda t: t.retained, reverse=True)
+        self.total_count = sum([t.count for t in self.types])
+        self.total_size = sum([t.retained for t in self.types])
+
+    def __getitem__(self, type):
+        for t in self.types:
+            if t.type is type:
+                return t
+        raise KeyError(type)
+
+    def format(self, limit=20, sites=3):
+        lines = ['%12s %12s %12s  %s' % ('count', 'size', 'retained',
+                                          'type')]
+        for t in self.types[:limit]:
+            lines.append('%12d %12d %12d  %s' % (t.count, t.size, t.retained,
+                                                 t.get_name()))
+            top = sorted(t.sites.items(), key=lambda item: item[1],
+                         reverse=True)
+            for site, count in top[:sites]:
+                lines.append('%12d %26s  %s' % (count, '', site))
+        lines.append('%12d %12s %12d  total' % (self.total_count, '',
+                                                 self.total_size))
+        return '\n'.join(lines)
+
+    def __repr__(self):
+        return self.format()
+
+
+def heap_summary():
+    """Walk the heap and return a HeapSummary of the live objects, grouped
+    by type and sorted by retained size.  For each type this gives the
+    number of instances, their size in bytes, and the retained size: the
+    instances plus the internal objects (list storage, dict tables,
+    string data...) that they own, but not the other app-level objects
+    they refer to.  The special type None collects the objects not
+    owned by any app-level object.
+
+    If gc.set_allocation_sampling(rate) was called, the 'sites'
+    attribute of each type maps 'filename:lineno' to the estimated
+    number of live instances that were created there.
+    """
+    return HeapSummary(gc._heap_summary())
@@ -0,0 +1,79 @@
+"""Measure the memory of the workers of a pre-fork server, with and
+without gc.freeze() in the master.  The master builds a heap of dicts,
+lists and strings, forks the workers, and each worker allocates a bit and
+runs a few full collections.  The PSS (proportional set size: the shared
+pages are divided among the processes sharing them) of every worker is
+then read from /proc while they are all still alive.  Linux only.
+
+Run with a translated pypy:
+
+    pypy bench_freeze.py [objects [workers [collections]]]
+"""
+
+import gc, os, sys, time
+
+def read_pss(pid):
+    # in kB; smaps_rollup needs Linux 4.14, older kernels only have smaps
+    try:
+        f = open('/proc/%d/smaps_rollup' % pid)
+    except IOError:
+        f = open('/proc/%d/smaps' % pid)
+    total = 0
+    for line in f:
+        if line.startswith('Pss:'):
+            total += int(line.split()[1])
+    f.close()
+    return total
+
+def build_heap(n):
+    heap = []
+    for i in xrange(n // 4):
+        heap.append({'id': i, 'name': 'item-%d' % i,
+                     'tags': ['t%d' % (i % 7), 't%d' % (i % 11)]})
+    return heap
+
+def worker(heap, collections, ready_fd, go_fd):
+    garbage = None
+    for i in range(collections):
+        garbage = [str(j) for j in xrange(10000)]
+        gc.collect()
+    os.write(ready_fd, 'x')
+    os.read(go_fd, 1)       # wait until the master has measured us
+    os._exit(0)
+
+def master(n, workers, collections, freeze):
+    heap = build_heap(n)
+    gc.collect()
+    t = time.time()
+    if freeze:
+        gc.freeze()
+    t = time.time() - t
+    ready_r, ready_w = os.pipe()
+    go_r, go_w = os.pipe()
+    pids = []
+    for i in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            worker(heap, collections, ready_w, go_r)
+        pids.append(pid)
+    for pid in pids:
+        os.read(ready_r, 1)
+    pss = [read_pss(pid) for pid in pids]
+    os.write(go_w, 'x' * workers)
+    for pid in pids:
+        os.waitpid(pid, 0)
+    print '%-9s freeze: %6.3f s   PSS per worker: %8d kB avg %8d kB max' % (
+        freeze and 'with' or 'without', t, sum(pss) // len(pss), max(pss))
+
+def main(n=1000000, workers=8, collections=3):
+    # run each mode in its own process, as gc.freeze() cannot be undone
+    for freeze in [False, True]:
+        pid = os.fork()
+        if pid == 0:
+            master(n, workers, collections, freeze)
+            sys.stdout.flush()
+            os._exit(0)
+        os.waitpid(pid, 0)
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
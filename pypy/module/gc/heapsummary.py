@@ -0,0 +1,162 @@
+"""
+A summary of the live heap, grouped by app-level type, and an optional
+sampler recording where the instances of app-level types are allocated.
+"""
+
+import weakref
+
+from rpython.rlib import rgc, jit
+from pypy.interpreter.error import oefmt
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.module.gc.referents import try_cast_gcref_to_w_root, missing_operation
+
+
+class TypeSummary(object):
+    """Statistics about the live instances of one app-level type.
+    'size' is the memory used by the instances themselves, and 'retained'
+    adds the internal RPython objects (list storage, dict tables, string
+    data...) that the GC found by walking from these instances first."""
+
+    def __init__(self, w_type):
+        self.w_type = w_type
+        self.count = 0
+        self.size = 0
+        self.retained = 0
+        self.sites = {}     # site -> estimated number of live instances
+
+
+def _walk_heap(space, roots):
+    # Walk the whole heap once, using the gcflag_extra to mark the
+    # visited objects.  Every object that is not an app-level object is
+    # charged to the app-level object from which it was reached, or to
+    # 'internal' if it is only reachable from the interpreter itself.
+    summaries = {}
+    internal = TypeSummary(None)
+    pending = roots[:]
+    owners = [internal] * len(pending)
+    while pending:
+        gcref = pending.pop()
+        owner = owners.pop()
+        if rgc.get_gcflag_extra(gcref):
+            continue
+        rgc.toggle_gcflag_extra(gcref)
+        size = rgc.get_rpy_memory_usage(gcref)
+        w_obj = try_cast_gcref_to_w_root(gcref)
+        if w_obj is not None:
+            w_type = space.type(w_obj)
+            owner = summaries.get(w_type, None)
+            if owner is None:
+                owner = TypeSummary(w_type)
+                summaries[w_type] = owner
+            owner.count += 1
+            owner.size += size
+        owner.retained += size
+        for gcref in rgc.get_rpy_referents(gcref):
+            pending.append(gcref)
+            owners.append(owner)
+    rgc.clear_gcflag_extra(roots)
+    rgc.assert_no_more_gcflags()
+    return summaries, internal
+
+def heap_summary(space):
+    """Return a list of tuples (type, count, size, retained, sites), one
+    for every app-level type with live instances.  The type None stands
+    for the internal objects not reachable from any app-level object.
+    'sites' maps 'filename:lineno' to the estimated number of live
+    instances allocated there, if allocation sampling is enabled."""
+    if not rgc.has_gcflag_extra():
+        raise missing_operation(space)
+    roots = rgc.get_rpy_roots()
+    if roots is None:
+        raise missing_operation(space)
+    roots = [gcref for gcref in roots if gcref]
+    summaries, internal = _walk_heap(space, roots)
+    space.fromcache(AllocationSampler).add_sites(space, summaries)
+    result_w = [_wrap_summary(space, internal)]
+    for summary in summaries.values():
+        result_w.append(_wrap_summary(space, summary))
+    return space.newlist(result_w)
+
+def _wrap_summary(space, summary):
+    w_sites = space.newdict()
+    for site, count in summary.sites.items():
+        space.setitem(w_sites, space.newtext(site), space.newint(count))
+    return space.newtuple([summary.w_type or space.w_None,
+                           space.newint(summary.count),
+                           space.newint(summary.size),
+                           space.newint(summary.retained),
+                           w_sites])
+
+# ____________________________________________________________
+
+
+class AllocationSample(object):
+    def __init__(self, w_obj, site, weight):
+        self.w_obj_ref = weakref.ref(w_obj)
+        self.site = site
+        self.weight = weight
+
+
+class AllocationSampler(object):
+    """Records the app-level code location of one in every 'rate'
+    instances created by calling an app-level type.  Only a weakref to
+    the sampled instances is kept, so the dead ones are forgotten."""
+    _immutable_fields_ = ['rate?']
+
+    MIN_PRUNE_LIMIT = 1024
+
+    def __init__(self, space):
+        self.rate = 0
+        self.countdown = 0
+        self.samples = []
+        self.prune_limit = self.MIN_PRUNE_LIMIT
+
+    def set_rate(self, rate):
+        self.rate = rate
+        self.countdown = rate
+
+    @jit.dont_look_inside
+    def sample(self, space, w_obj):
+        self.countdown -= 1
+        if self.countdown > 0:
+            return
+        self.countdown = self.rate
+        frame = space.getexecutioncontext().gettopframe_nohidden()
+        if frame is None:
+            site = '<unknown>'
+        else:
+            site = '%s:%d' % (frame.getcode().co_filename,
+                              frame.get_last_lineno())
+        if len(self.samples) >= self.prune_limit:
+            self.prune()
+        self.samples.append(AllocationSample(w_obj, site, self.rate))
+
+    def prune(self):
+        self.samples = [sample for sample in self.samples
+                               if sample.w_obj_ref() is not None]
+        self.prune_limit = max(self.MIN_PRUNE_LIMIT, 2 * len(self.samples))
+
+    def add_sites(self, space, summaries):
+        self.prune()
+        for sample in self.samples:
+            w_obj = sample.w_obj_ref()
+            if w_obj is None:
+                continue
+            summary = summaries.get(space.type(w_obj), None)
+            if summary is None:
+                continue    # unreachable, but not collected yet
+            summary.sites[sample.site] = (summary.sites.get(sample.site, 0) +
+                                          sample.weight)
+
+
+@unwrap_spec(rate=int)
+def set_allocation_sampling(space, rate):
+    """Record where one in every 'rate' instances of app-level types is
+    allocated, for heap_summary().  A rate of 0 disables sampling."""
+    if rate < 0:
+        raise oefmt(space.w_ValueError, "rate must be non-negative")
+    space.fromcache(AllocationSampler).set_rate(rate)
+
+def get_allocation_sampling(space):
+    """Return the current allocation sampling rate (0 if disabled)."""
+    return space.newint(space.fromcache(AllocationSampler).rate)
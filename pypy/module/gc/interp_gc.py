@@ -7,7 +7,12 @@ from pypy.module.gc.hook import W_GcCollectStepStats
 @unwrap_spec(generation=int)
 def collect(space, generation=0):
     "Run a full collection.  The optional argument is ignored."
-    # First clear the method and the map cache.
+    _clear_caches(space)
+    rgc.collect()
+    _run_finalizers(space)
+
+def _clear_caches(space):
+    # Clear the method and the map cache.
     # See test_gc for an example of why.
     from pypy.objspace.std.typeobject import MethodCache
     from pypy.objspace.std.mapdict import MapAttrCache
@@ -16,9 +21,24 @@ def collect(space, generation=0):
     cache = space.fromcache(MapAttrCache)
     cache.clear()
 
-    rgc.collect()
+def freeze(space):
+    """Run a full collection, then move all the objects that survive to a
+    permanent generation, ignored by the following collections.  Call it
+    in the parent process of a pre-fork server, just before forking the
+    workers: they keep sharing the memory pages of these objects.  The
+    frozen objects are never freed and their __del__ is never called."""
+    _clear_caches(space)
+    space.fromcache(FreezeCount).count += rgc.freeze()
     _run_finalizers(space)
 
+def get_freeze_count(space):
+    "Return the number of objects moved to the permanent generation."
+    return space.newint(space.fromcache(FreezeCount).count)
+
+class FreezeCount(object):
+    def __init__(self, space):
+        self.count = 0
+
 def _run_finalizers(space):
     # if we are running in gc.disable() mode but gc.collect() is called,
     # we should still call the finalizers now.  We do this as an attempt
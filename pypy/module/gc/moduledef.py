@@ -20,9 +20,12 @@ class Module(MixedModule):
             self.appleveldefs.update({
                 'dump_rpy_heap': 'app_referents.dump_rpy_heap',
                 'get_stats': 'app_referents.get_stats',
+                'heap_summary': 'app_referents.heap_summary',
                 })
             self.interpleveldefs.update({
                 'collect_step': 'interp_gc.collect_step',
+                'freeze': 'interp_gc.freeze',
+                'get_freeze_count': 'interp_gc.get_freeze_count',
                 'get_rpy_roots': 'referents.get_rpy_roots',
                 'get_rpy_referents': 'referents.get_rpy_referents',
                 'get_rpy_memory_usage': 'referents.get_rpy_memory_usage',
@@ -32,6 +35,11 @@ class Module(MixedModule):
                 'get_referrers': 'referents.get_referrers',
                 '_get_stats': 'referents.get_stats',
                 '_dump_rpy_heap': 'referents._dump_rpy_heap',
+                '_heap_summary': 'heapsummary.heap_summary',
+                'set_allocation_sampling':
+                    'heapsummary.set_allocation_sampling',
+                'get_allocation_sampling':
+                    'heapsummary.get_allocation_sampling',
                 'get_typeids_z': 'referents.get_typeids_z',
                 'get_typeids_list': 'referents.get_typeids_list',
                 'GcRef': 'referents.W_GcRef',
@@ -119,6 +119,21 @@ class AppTestGC(object):
         assert n >= 2 # at least one step + 1 finalizing
         assert X.deleted == 3
 
+    def test_freeze(self):
+        import gc
+        class X(object):
+            deleted = 0
+            def __del__(self):
+                X.deleted += 1
+        x = X()
+        count = gc.get_freeze_count()
+        gc.freeze()     # untranslated, the same as gc.collect()
+        assert gc.get_freeze_count() >= count
+        X()
+        gc.collect()
+        assert X.deleted == 1
+        del x
+
 class AppTestGcDumpHeap(object):
     pytestmark = py.test.mark.xfail(run=False)
 
@@ -117,6 +117,21 @@ class AppTestReferents(object):
         else:
             assert 0, "the tuple (7,) is not found as gc.get_referrers(7)"
 
+    def test_heap_summary(self):
+        import gc
+        summary = gc.heap_summary()
+        lists = summary[list]
+        if not self.runappdirect:
+            assert lists.count == 4
+            assert summary[tuple].count == 1
+        assert lists.count >= 4
+        assert 0 < lists.size <= lists.retained
+        assert lists.sites == {}
+        assert summary.total_size >= sum([t.size for t in summary.types])
+        assert summary.types[0].retained >= summary.types[-1].retained
+        raises(KeyError, "summary[frozenset]")
+        assert 'list' in repr(summary)
+
 
 class AppTestReferentsMore(object):
 
@@ -150,3 +165,24 @@ class AppTestReferentsMore(object):
         assert a in lst
         lst = gc.get_referrers(A)
         assert a in lst
+
+    def test_heap_summary_sites(self):
+        import gc
+        class B(object):
+            pass
+        raises(ValueError, gc.set_allocation_sampling, -1)
+        assert gc.get_allocation_sampling() == 0
+        gc.set_allocation_sampling(1)
+        try:
+            assert gc.get_allocation_sampling() == 1
+            b = B()
+        finally:
+            gc.set_allocation_sampling(0)
+        if not self.runappdirect:
+            self.ALL_ROOTS[0].append(b)   # add 'b' to the list in roots
+        summary = gc.heap_summary()
+        t = summary[B]
+        assert t.count == 1
+        [(site, count)] = t.sites.items()
+        assert count == 1
+        assert site.split(':')[-1].isdigit()
@@ -0,0 +1,60 @@
+"""Measure the import of many small modules with a long sys.path, where
+most sys.path entries don't contain the module: every import then probes
+each entry for each suffix.  The directories are made a minute old so
+that their listings can be cached.
+
+Run with a translated pypy:
+
+    pypy bench_import.py [modules [path_entries [repeat]]]
+"""
+
+import os, shutil, sys, tempfile, time
+
+def make_tree(root, n, path_entries):
+    dirs = []
+    old = time.time() - 60
+    for i in range(path_entries):
+        d = os.path.join(root, 'dir%d' % i)
+        os.mkdir(d)
+        # a few unrelated files, like in a real site-packages
+        for j in range(20):
+            open(os.path.join(d, 'other%d_%d.py' % (i, j)), 'w').close()
+        dirs.append(d)
+    for k in range(n):
+        f = open(os.path.join(dirs[-1], 'benchmod%d.py' % k), 'w')
+        f.write('x = %d\n' % k)
+        f.close()
+    for d in dirs:
+        os.utime(d, (old, old))
+    return dirs
+
+def import_all(n):
+    for k in range(n):
+        name = 'benchmod%d' % k
+        __import__(name)
+        del sys.modules[name]
+
+def main(n=500, path_entries=50, repeat=5):
+    root = tempfile.mkdtemp()
+    saved_path = sys.path[:]
+    try:
+        dirs = make_tree(root, n, path_entries)
+        sys.path[:0] = dirs
+        import_all(n)     # writes the .pyc files
+        for d in dirs:
+            os.utime(d, (time.time() - 60,) * 2)
+        best = None
+        for i in range(repeat):
+            t = time.time()
+            import_all(n)
+            t = time.time() - t
+            if best is None or t < best:
+                best = t
+        print '%d imports through %d sys.path entries: %.3f s, ' \
+              '%.1f us per import' % (n, path_entries, best, best / n * 1e6)
+    finally:
+        sys.path[:] = saved_path
+        shutil.rmtree(root)
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,53 @@
+"""Measure the startup time of a pypy, for 'pypy -c pass', 'pypy -S -c
+pass' and a command importing the modules of a typical command-line
+tool.  Compare a pypy translated with --frozen-modules=startup with one
+translated without it.  Also prints which of the imported modules are
+frozen.
+
+Run with a translated pypy:
+
+    pypy bench_startup.py [runs [executable]]
+"""
+
+import os, subprocess, sys, time
+
+TYPICAL_IMPORTS = ('import os, re, json, collections, subprocess, '
+                   'argparse, logging, tempfile')
+
+COMMANDS = [
+    ['-c', 'pass'],
+    ['-S', '-c', 'pass'],
+    ['-c', TYPICAL_IMPORTS],
+]
+
+def run(executable, args, runs):
+    devnull = open(os.devnull, 'w')
+    best = None
+    total = 0.0
+    for i in range(runs):
+        t = time.time()
+        subprocess.check_call([executable] + args, stdout=devnull)
+        t = time.time() - t
+        total += t
+        if best is None or t < best:
+            best = t
+    devnull.close()
+    return best, total / runs
+
+def frozen_modules(executable):
+    out = subprocess.check_output([executable, '-c',
+        TYPICAL_IMPORTS + '; import sys, imp; '
+        'print " ".join(sorted(k for k in sys.modules if imp.is_frozen(k)))'])
+    return out.split()
+
+def main(runs=20, executable=sys.executable):
+    runs = int(runs)
+    frozen = frozen_modules(executable)
+    print '%s: %d frozen modules imported' % (executable, len(frozen))
+    for args in COMMANDS:
+        best, mean = run(executable, args, runs)
+        print '%-40s best %7.1f ms   mean %7.1f ms' % (
+            ' '.join(args)[:40], best * 1000.0, mean * 1000.0)
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,77 @@
+"""
+App-level modules of the stdlib that are compiled while the object space
+is built, and imported from the executable instead of from their .py or
+.pyc file.  See the 'objspace.frozen_modules' option.
+"""
+
+import os
+from pypy import pypydir
+
+# the app-level modules imported by 'pypy -c pass', which is what
+# '--frozen-modules=startup' stands for
+STARTUP_MODULES = [
+    'UserDict', '_abcoll', '_structseq', '_sysconfigdata', '_weakrefset',
+    'abc', 'codecs', 'copy_reg', 'genericpath', 'linecache', 'os',
+    'posixpath', 're', 'site', 'sre_compile', 'sre_constants', 'sre_parse',
+    'stat', 'string', 'sysconfig', 'traceback', 'types', 'warnings',
+]
+
+
+def frozen_module_names(option):
+    """NOT_RPYTHON: the list of module names given by the option"""
+    names = []
+    if option:
+        for name in option.split(','):
+            name = name.strip()
+            if name == 'startup':
+                new_names = STARTUP_MODULES
+            elif name:
+                new_names = [name]
+            else:
+                new_names = []
+            for name in new_names:
+                if name not in names:
+                    names.append(name)
+    return names
+
+
+class FrozenModule(object):
+    def __init__(self, name, relpath, code_w):
+        self.name = name
+        self.relpath = relpath    # of the source file, from sys.prefix
+        self.code_w = code_w
+
+
+class FrozenModules(object):
+    """The table of frozen modules, built with space.fromcache() while
+    the space is set up (see the imp module)."""
+
+    def __init__(self, space):
+        "NOT_RPYTHON"
+        from pypy.module.sys.initpath import compute_stdlib_path
+        self.modules = {}
+        prefix = os.path.dirname(pypydir)
+        path = compute_stdlib_path(None, prefix)
+        for name in frozen_module_names(space.config.objspace.frozen_modules):
+            if '.' in name:
+                raise ValueError("cannot freeze %r: only top-level modules "
+                                 "are supported" % (name,))
+            for dirname in path:
+                filename = os.path.join(dirname, name + '.py')
+                if os.path.isfile(filename):
+                    break
+            else:
+                raise ValueError("cannot freeze %r: no %s.py in %s" % (
+                    name, name, ', '.join(path)))
+            with open(filename, 'rb') as f:
+                source = f.read()
+            # like CPython's frozen modules, the code objects say where
+            # they come from in co_filename; __file__ is still set to the
+            # .py file at import
+            code_w = space.createcompiler().compile(
+                source, '<frozen %s>' % (name,), 'exec', 0)
+            relpath = os.path.relpath(filename, prefix)
+            self.modules[name] = FrozenModule(name, relpath, code_w)
+
+    def get(self, name):
+        return self.modules.get(name, None)
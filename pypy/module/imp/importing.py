@@ -2,7 +2,7 @@
 Implementation of the interpreter-level default import logic.
 """
 
-import sys, os, stat
+import sys, os, stat, time
 
 from pypy.interpreter.module import Module
 from pypy.interpreter.gateway import interp2app, unwrap_spec
@@ -16,6 +16,7 @@ from rpython.rlib import streamio, jit
 from rpython.rlib.streamio import StreamErrors
 from rpython.rlib.objectmodel import we_are_translated, specialize
 from pypy.module.sys.version import PYPY_VERSION
+from pypy.module.imp.frozen import FrozenModules
 
 _WIN32 = sys.platform == 'win32'
 
@@ -60,13 +61,167 @@ def log_pyverbose(space, level, message):
         w_stderr = space.sys.get('stderr')
         space.call_method(w_stderr, "write", space.newtext(message))
 
-def file_exists(path):
-    "Test whether the given path is an existing regular file."
-    return os.path.isfile(path) and case_ok(path)
+def _rjust(s, width):
+    return ' ' * (width - len(s)) + s
+
+class ImportTimeEntry(object):
+    def __init__(self, modulename, start):
+        self.modulename = modulename
+        self.start = start
+        self.found = start
+        self.exec_time = 0.0
+        self.nested_time = 0.0
+
+class ImportTimer(object):
+    """Reports the time spent importing each module on stderr, when
+    enabled with 'pypy -X importtime' or PYTHONPROFILEIMPORTTIME.  For
+    each module it prints the time spent finding it, loading it (reading,
+    compiling or unmarshalling), executing its code (without the nested
+    imports) and the total, in microseconds.  Nested imports are printed
+    before, and indented under, the module that imports them.
+    """
 
-def path_exists(path):
+    def __init__(self, space):
+        self.stack = []
+        self.header_printed = False
+
+    def start(self, modulename):
+        entry = ImportTimeEntry(modulename, time.time())
+        self.stack.append(entry)
+        return entry
+
+    def add_exec_time(self, exec_time):
+        if self.stack:
+            self.stack[-1].exec_time += exec_time
+
+    def stop(self, space, entry, loaded):
+        end = time.time()
+        assert self.stack and self.stack[-1] is entry
+        self.stack.pop()
+        total = end - entry.start
+        if self.stack:
+            self.stack[-1].nested_time += total
+        if not loaded:
+            return
+        find_time = entry.found - entry.start
+        load_time = total - find_time - entry.exec_time
+        self_exec_time = entry.exec_time - entry.nested_time
+        w_stderr = space.sys.get('stderr')
+        if not self.header_printed:
+            self.header_printed = True
+            space.call_method(w_stderr, "write", space.newtext(
+                "import time: find [us] | load [us] | exec [us] | "
+                "cumulative | imported package\n"))
+        line = "import time: %s | %s | %s | %s | %s%s\n" % (
+            _rjust(str(int(find_time * 1000000.0)), 9),
+            _rjust(str(int(load_time * 1000000.0)), 9),
+            _rjust(str(int(self_exec_time * 1000000.0)), 9),
+            _rjust(str(int(total * 1000000.0)), 10),
+            "  " * len(self.stack), entry.modulename)
+        space.call_method(w_stderr, "write", space.newtext(line))
+
+def get_listing(space, path):
+    """Return the names in the directory of 'path', for the functions
+    below.  Probing several paths in the same directory with the same
+    listing costs a single stat() of the directory."""
+    directory, _ = _split_directory(path)
+    return space.fromcache(ImportListingCache).get_names(directory)
+
+def file_exists(names, path):
+    """Test whether the given path is an existing regular file.  'names'
+    is the listing of its directory, from get_listing()."""
+    return name_in_listing(names, path) and os.path.isfile(path)
+
+def path_exists(names, path):
     "Test whether the given path exists."
-    return os.path.exists(path) and case_ok(path)
+    return name_in_listing(names, path) and os.path.exists(path)
+
+def dir_exists(names, path):
+    "Test whether the given path is an existing directory."
+    return name_in_listing(names, path) and os.path.isdir(path)
+
+def _split_directory(path):
+    "Split 'path' into the directory (with its final separator) and the name."
+    index = path.rfind(os.sep)
+    if os.altsep is not None:
+        index2 = path.rfind(os.altsep)
+        index = max(index, index2)
+    if index < 0:
+        return os.curdir, path
+    return path[:index+1], path[index+1:]
+
+
+class DirectoryListing(object):
+    def __init__(self, st, names):
+        # st_dev and st_ino too, because relative directories like '.'
+        # can designate another directory after a chdir()
+        self.dev = st.st_dev
+        self.ino = st.st_ino
+        self.mtime = st.st_mtime
+        self.names = {}
+        for name in names:
+            self.names[name] = True
+
+    def is_up_to_date(self, st):
+        return (self.mtime == st.st_mtime and self.ino == st.st_ino and
+                self.dev == st.st_dev)
+
+_NO_NAMES = {}
+
+class ImportListingCache(object):
+    """Caches the listings of the directories where find_module() looks
+    for modules.  find_module() gets the listing of each sys.path entry
+    once, which costs one stat() of the directory, and checks all the
+    candidate names against it: a module that is not there costs no
+    other stat(), which matters with long sys.paths and slow filesystems.
+    A listing is reused as long as the mtime of its directory does not
+    change.
+    """
+
+    # a listing taken less than this many seconds after the last change
+    # to its directory is not kept: on filesystems with a coarse mtime
+    # another change could go unnoticed
+    RECENT_CHANGE = 2.0
+
+    def __init__(self, space):
+        self.listings = {}
+
+    def get_names(self, directory):
+        """Return a dict whose keys are the names in 'directory', or None
+        if the directory exists but cannot be listed."""
+        try:
+            st = os.stat(directory)
+        except OSError:
+            return _NO_NAMES
+        listing = self.listings.get(directory, None)
+        if listing is not None and listing.is_up_to_date(st):
+            return listing.names
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return None
+        listing = DirectoryListing(st, names)
+        if time.time() - listing.mtime > self.RECENT_CHANGE:
+            self.listings[directory] = listing
+        elif directory in self.listings:
+            del self.listings[directory]
+        return listing.names
+
+    def name_in_directory(self, path):
+        """Check that the last component of 'path' is listed in its
+        directory, with the exact same case.  If this returns False,
+        'path' does not exist."""
+        directory, _ = _split_directory(path)
+        return name_in_listing(self.get_names(directory), path)
+
+def name_in_listing(names, path):
+    """Check that the last component of 'path' is in 'names', the listing
+    of its directory, with the exact same case.  'names' is None if the
+    directory cannot be listed."""
+    if names is None:
+        return case_ok(path)
+    _, name = _split_directory(path)
+    return name in names
 
 def has_so_extension(space):
     return (space.config.objspace.usemodules.cpyext or
@@ -75,26 +230,28 @@ def has_so_extension(space):
 def has_init_module(space, filepart):
     "Return True if the directory filepart qualifies as a package."
     init = os.path.join(filepart, "__init__")
-    if path_exists(init + ".py"):
+    names = get_listing(space, init)
+    if path_exists(names, init + ".py"):
         return True
-    if space.config.objspace.lonepycfiles and path_exists(init + ".pyc"):
+    if space.config.objspace.lonepycfiles and path_exists(names, init + ".pyc"):
         return True
     return False
 
-def find_modtype(space, filepart):
+def find_modtype(space, filepart, names):
     """Check which kind of module to import for the given filepart,
-    which is a path without extension.  Returns PY_SOURCE, PY_COMPILED or
+    which is a path without extension.  'names' is the listing of its
+    directory, from get_listing().  Returns PY_SOURCE, PY_COMPILED or
     SEARCH_ERROR.
     """
     # check the .py file
     pyfile = filepart + ".py"
-    if file_exists(pyfile):
+    if file_exists(names, pyfile):
         return PY_SOURCE, ".py", "U"
 
     # on Windows, also check for a .pyw file
     if _WIN32:
         pyfile = filepart + ".pyw"
-        if file_exists(pyfile):
+        if file_exists(names, pyfile):
             return PY_SOURCE, ".pyw", "U"
 
     # The .py file does not exist.  By default on PyPy, lonepycfiles
@@ -105,14 +262,14 @@ def find_modtype(space, filepart):
     # check the .pyc file
     if space.config.objspace.lonepycfiles:
         pycfile = filepart + ".pyc"
-        if file_exists(pycfile):
+        if file_exists(names, pycfile):
             # existing .pyc file
             return PY_COMPILED, ".pyc", "rb"
 
     if has_so_extension(space):
         so_extension = get_so_extension(space)
         pydfile = filepart + so_extension
-        if file_exists(pydfile):
+        if file_exists(names, pydfile):
             return C_EXTENSION, so_extension, "rb"
 
     return SEARCH_ERROR, None, None
@@ -121,17 +278,10 @@ if sys.platform.startswith('linux') or 'freebsd' in sys.platform:
     def case_ok(filename):
         return True
 else:
-    # XXX that's slow
+    # XXX that's slow, but only used if the ImportListingCache
+    # cannot list the directory
     def case_ok(filename):
-        index = filename.rfind(os.sep)
-        if os.altsep is not None:
-            index2 = filename.rfind(os.altsep)
-            index = max(index, index2)
-        if index < 0:
-            directory = os.curdir
-        else:
-            directory = filename[:index+1]
-            filename = filename[index+1:]
+        directory, filename = _split_directory(filename)
         try:
             return filename in os.listdir(directory)
         except OSError:
@@ -542,9 +692,6 @@ def find_module(space, modulename, w_modulename, partname, w_path,
         if w_loader:
             return FindInfo.fromLoader(w_loader)
 
-    # XXX Check for frozen modules?
-    #     when w_path is a string
-
     delayed_builtin = None
     w_lib_extensions = None
 
@@ -559,11 +706,14 @@ def find_module(space, modulename, w_modulename, partname, w_path,
             if modulename in space.MODULES_THAT_ALWAYS_SHADOW:
                 return delayed_builtin
             w_lib_extensions = space.sys.get_state(space).w_lib_extensions
+        else:
+            # like in CPython, frozen modules shadow the files on sys.path
+            frozen = find_frozen_module(space, modulename)
+            if frozen is not None:
+                return FindInfo(PY_FROZEN,
+                                frozen_module_filename(space, frozen), None)
         w_path = space.sys.get('path')
 
-    # XXX check frozen modules?
-    #     when w_path is null
-
     if w_path is not None:
         for w_pathitem in space.unpackiterable(w_path):
             # sys.path_hooks import hook
@@ -578,14 +728,15 @@ def find_module(space, modulename, w_modulename, partname, w_path,
             path = space.fsencode_w(w_pathitem)
             filepart = os.path.join(path, partname)
             log_pyverbose(space, 2, "# trying %s\n" % (filepart,))
-            if os.path.isdir(filepart) and case_ok(filepart):
+            names = get_listing(space, filepart)
+            if dir_exists(names, filepart):
                 if has_init_module(space, filepart):
                     return FindInfo(PKG_DIRECTORY, filepart, None)
                 else:
                     msg = ("Not importing directory '%s' missing __init__.py" %
                            (filepart,))
                     space.warn(space.newtext(msg), space.w_ImportWarning)
-            modtype, suffix, filemode = find_modtype(space, filepart)
+            modtype, suffix, filemode = find_modtype(space, filepart, names)
             try:
                 if modtype in (PY_SOURCE, PY_COMPILED, C_EXTENSION):
                     assert suffix is not None
@@ -641,7 +792,8 @@ def load_module(space, w_modulename, find_info, reuse=False):
         return space.getbuiltinmodule(find_info.filename, force_init=True,
                                       reuse=reuse)
 
-    if find_info.modtype in (PY_SOURCE, PY_COMPILED, C_EXTENSION, PKG_DIRECTORY):
+    if find_info.modtype in (PY_SOURCE, PY_COMPILED, C_EXTENSION, PKG_DIRECTORY,
+                             PY_FROZEN):
         w_mod = None
         if reuse:
             try:
@@ -682,6 +834,8 @@ def load_module(space, w_modulename, find_info, reuse=False):
                 finally:
                     _close_ignore(find_info.stream)
                 return w_mod
+            elif find_info.modtype == PY_FROZEN:
+                return load_frozen_module(space, w_modulename, w_mod)
             elif find_info.modtype == C_EXTENSION and has_so_extension(space):
                 return load_c_extension(space, find_info.filename,
                                         space.text_w(w_modulename))
@@ -699,20 +853,32 @@ def load_part(space, w_path, prefix, partname, w_parent, tentative):
         if not space.is_w(w_mod, space.w_None):
             return w_mod
     elif not prefix or w_path is not None:
-        find_info = find_module(
-            space, modulename, w_modulename, partname, w_path)
-
+        timer = None
+        timer_entry = None
+        if space.sys.import_time:
+            timer = space.fromcache(ImportTimer)
+            timer_entry = timer.start(modulename)
+
+        find_info = None
+        loaded = False
         try:
+            find_info = find_module(
+                space, modulename, w_modulename, partname, w_path)
+            if timer is not None:
+                timer_entry.found = time.time()
             if find_info:
                 w_mod = load_module(space, w_modulename, find_info)
                 if w_parent is not None:
                     space.setattr(w_parent, space.newtext(partname), w_mod)
+                loaded = True
                 return w_mod
         finally:
             if find_info:
                 stream = find_info.stream
                 if stream:
                     _close_ignore(stream)
+            if timer is not None:
+                timer.stop(space, timer_entry, loaded)
 
     if tentative:
         return None
@@ -902,7 +1068,14 @@ def exec_code_module(space, w_mod, code_w, w_modulename, check_afterwards=True):
     space.call_method(w_dict, 'setdefault',
                       space.newtext('__builtins__'),
                       space.builtin)
-    code_w.exec_code(space, w_dict, w_dict)
+    if space.sys.import_time:
+        start = time.time()
+        try:
+            code_w.exec_code(space, w_dict, w_dict)
+        finally:
+            space.fromcache(ImportTimer).add_exec_time(time.time() - start)
+    else:
+        code_w.exec_code(space, w_dict, w_dict)
 
     if check_afterwards:
         w_mod = check_sys_modules(space, w_modulename)
@@ -960,6 +1133,43 @@ def load_source_module(space, w_modulename, w_mod, pathname, source, fd,
     return exec_code_module(space, w_mod, code_w, w_modulename,
                             check_afterwards=check_afterwards)
 
+def find_frozen_module(space, modulename):
+    """Return the FrozenModule called 'modulename', or None.  Frozen
+    modules are not used with -OO, which must remove the docstrings
+    from the code objects.
+    """
+    if not space.config.objspace.frozen_modules:
+        return None
+    try:
+        optimize = space.sys.get_flag('optimize')
+    except RuntimeError:
+        # during bootstrapping
+        optimize = 0
+    if optimize >= 2:
+        return None
+    return space.fromcache(FrozenModules).get(modulename)
+
+def frozen_module_filename(space, frozen):
+    """The path of the source file of a frozen module, from sys.prefix."""
+    w_prefix = space.sys.get('prefix')
+    if not space.isinstance_w(w_prefix, space.w_text):
+        return frozen.relpath
+    return os.path.join(space.fsencode_w(w_prefix), frozen.relpath)
+
+def load_frozen_module(space, w_modulename, w_mod, check_afterwards=True):
+    """
+    Execute the code of a frozen module, see frozen.py.  Returns
+    'sys.modules[modulename]', which must exist.
+    """
+    modulename = space.text_w(w_modulename)
+    frozen = find_frozen_module(space, modulename)
+    if frozen is None:
+        raise oefmt(space.w_ImportError, "No such frozen object named %s",
+                    modulename)
+    log_pyverbose(space, 1, "import %s # frozen\n" % (modulename,))
+    return exec_code_module(space, w_mod, frozen.code_w, w_modulename,
+                            check_afterwards=check_afterwards)
+
 def update_code_filenames(space, code_w, pathname, oldname=None):
     assert isinstance(code_w, PyCode)
     if oldname is None:
@@ -154,7 +154,14 @@ def init_builtin(space, w_name):
     return space.getbuiltinmodule(name)
 
 def init_frozen(space, w_name):
-    return None
+    name = space.text0_w(w_name)
+    frozen = importing.find_frozen_module(space, name)
+    if frozen is None:
+        return None
+    find_info = importing.FindInfo(
+        importing.PY_FROZEN, importing.frozen_module_filename(space, frozen),
+        None)
+    return importing.load_module(space, w_name, find_info, reuse=True)
 
 def is_builtin(space, w_name):
     name = space.text0_w(w_name)
@@ -165,7 +172,8 @@ def is_builtin(space, w_name):
     return space.newint(1)
 
 def is_frozen(space, w_name):
-    return space.w_False
+    name = space.text0_w(w_name)
+    return space.newbool(importing.find_frozen_module(space, name) is not None)
 
 #__________________________________________________________________
 
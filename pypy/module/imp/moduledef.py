@@ -50,3 +50,9 @@ class Module(MixedModule):
         add_fork_hook('parent', interp_imp.release_lock)
         add_fork_hook('child', interp_imp.reinit_lock)
 
+    def setup_after_space_initialization(self):
+        "NOT_RPYTHON"
+        if self.space.config.objspace.frozen_modules:
+            # compile the frozen modules now, before translation
+            from pypy.module.imp.frozen import FrozenModules
+            self.space.fromcache(FrozenModules)
@@ -8,7 +8,7 @@ from rpython.rlib import streamio
 from pypy.tool.option import make_config
 from pypy.tool.pytest.objspace import maketestobjspace
 import pytest
-import sys, os
+import sys, os, time
 import tempfile, marshal
 
 from pypy.module.imp import importing
@@ -100,6 +100,8 @@ def setup_directory_structure(space):
     setuppkg("verbose1pkg", verbosemod='a = 1729')
     setuppkg("verbose2pkg", verbosemod='a = 1729')
     setuppkg("verbose0pkg", verbosemod='a = 1729')
+    setuppkg("importtimepkg", outer='import importtimepkg.inner',
+             inner='a = 1729')
     setuppkg("test_bytecode",
              a = '',
              b = '',
@@ -843,6 +845,33 @@ class AppTestImport:
             reload(sys)
         assert not output
 
+    def test_import_time(self):
+        output = []
+        class StdErr(object):
+            def write(self, line):
+                output.append(line)
+
+        import sys
+        sys.stderr = StdErr()
+        sys.pypy_set_import_time(True)
+        try:
+            import importtimepkg.outer
+        finally:
+            sys.pypy_set_import_time(False)
+            reload(sys)
+        assert sys.pypy_get_import_time() is False
+        assert output[0].startswith('import time: find [us] | load [us] |')
+        lines = [line.split('|') for line in output[1:]]
+        assert [line[-1] for line in lines] == [' importtimepkg\n',
+                                                '   importtimepkg.inner\n',
+                                                ' importtimepkg.outer\n']
+        for line in lines:
+            find, load, exec_, cumulative = [int(x.split(':')[-1])
+                                             for x in line[:4]]
+            assert cumulative >= find + load + exec_ >= 0
+        # the time of the nested import is not in the exec time of outer
+        assert int(lines[2][3]) >= int(lines[1][3])
+
     def test_dir_with_only_pyw(self):
         def imp():
             import onlypyw
@@ -885,6 +914,95 @@ def _testfilesource(source="x=42"):
     f.close()
     return pathname
 
+class TestImportListingCache:
+    def setup_method(self, meth):
+        self.dir = udir.ensure('listingcache', meth.__name__, dir=1)
+        self.dir.join('a.py').write('')
+        self.cache = importing.ImportListingCache(None)
+
+    def make_old(self):
+        t = time.time() - 60
+        os.utime(str(self.dir), (t, t))
+
+    def count_listdir(self, monkeypatch):
+        calls = []
+        def listdir(path):
+            calls.append(path)
+            return orig_listdir(path)
+        orig_listdir = os.listdir
+        monkeypatch.setattr(os, 'listdir', listdir)
+        return calls
+
+    def test_cached(self, monkeypatch):
+        self.make_old()
+        calls = self.count_listdir(monkeypatch)
+        a_py = str(self.dir.join('a.py'))
+        assert self.cache.name_in_directory(a_py)
+        assert not self.cache.name_in_directory(str(self.dir.join('b.py')))
+        assert not self.cache.name_in_directory(str(self.dir.join('A.py')))
+        assert len(calls) == 1
+        # adding a file changes the mtime of the directory
+        self.dir.join('b.py').write('')
+        assert self.cache.name_in_directory(str(self.dir.join('b.py')))
+        assert len(calls) == 2
+
+    def test_recently_changed_not_cached(self, monkeypatch):
+        calls = self.count_listdir(monkeypatch)
+        a_py = str(self.dir.join('a.py'))
+        assert self.cache.name_in_directory(a_py)
+        assert self.cache.name_in_directory(a_py)
+        assert len(calls) == 2
+        assert str(self.dir) + os.sep not in self.cache.listings
+
+    def test_missing_directory(self, monkeypatch):
+        calls = self.count_listdir(monkeypatch)
+        missing = str(self.dir.join('missing', 'a.py'))
+        assert not self.cache.name_in_directory(missing)
+        assert calls == []
+
+    def test_chdir(self, monkeypatch):
+        self.make_old()
+        other = udir.ensure('listingcache', 'test_chdir_other', dir=1)
+        other.join('b.py').write('')
+        os.utime(str(other), (time.time() - 60,) * 2)
+        monkeypatch.chdir(self.dir)
+        assert self.cache.name_in_directory('a.py')
+        monkeypatch.chdir(other)
+        assert not self.cache.name_in_directory('a.py')
+        assert self.cache.name_in_directory('b.py')
+
+    def test_find_module_stats_each_directory_once(self, monkeypatch):
+        space = self.space
+        dirs = []
+        for i in range(30):
+            d = self.dir.ensure('d%d' % i, dir=1)
+            d.join('other.py').write('')
+            dirs.append(str(d))
+        w_path = space.newlist([space.newtext(d) for d in dirs])
+        w_name = space.newtext('missing_mod')
+        calls = []
+        def stat(path):
+            calls.append(path)
+            return orig_stat(path)
+        orig_stat = os.stat
+        monkeypatch.setattr(os, 'stat', stat)
+        for i in range(2):
+            del calls[:]
+            info = importing.find_module(space, 'missing_mod', w_name,
+                                         'missing_mod', w_path,
+                                         use_loader=False)
+            assert info is None
+            assert len(calls) == len(dirs)
+
+
+def test_frozen_module_names():
+    from pypy.module.imp.frozen import frozen_module_names, STARTUP_MODULES
+    assert frozen_module_names(None) == []
+    assert frozen_module_names('os, stat,,os') == ['os', 'stat']
+    names = frozen_module_names('json,startup')
+    assert names == ['json'] + STARTUP_MODULES
+
+
 class TestPycStuff:
     # ___________________ .pyc related stuff _________________
 
@@ -1557,6 +1675,46 @@ class AppTestLonePycFile(_AppTestLonePycFileBase):
     }
 
 
+class AppTestFrozenModules(object):
+    spaceconfig = {
+        "objspace.frozen_modules": "genericpath,stat",
+    }
+
+    def setup_class(cls):
+        p = udir.ensure('frozenshadow', dir=1)
+        p.join('genericpath.py').write('shadowed = True\n')
+        cls.w_shadow_dir = cls.space.wrap(str(p))
+
+    def test_import_frozen(self):
+        import sys, os
+        sys.modules.pop('genericpath', None)
+        sys.path.insert(0, self.shadow_dir)
+        try:
+            import genericpath
+        finally:
+            sys.path.pop(0)
+        assert not hasattr(genericpath, 'shadowed')
+        assert genericpath.exists.__code__.co_filename == '<frozen genericpath>'
+        assert genericpath.__file__.endswith('genericpath.py')
+        assert genericpath.__file__.startswith(sys.prefix)
+        assert genericpath.exists(genericpath.__file__)
+
+    def test_imp_functions(self):
+        import imp
+        assert imp.is_frozen('stat')
+        assert not imp.is_frozen('os')
+        assert not imp.is_frozen('sys')
+        f, filename, info = imp.find_module('stat')
+        assert f is None
+        assert filename.endswith('stat.py')
+        assert info == ('', '', imp.PY_FROZEN)
+        assert imp.init_frozen('os') is None
+        mod = imp.init_frozen('stat')
+        assert mod.S_ISDIR.__code__.co_filename == '<frozen stat>'
+        mod = imp.load_module('stat', f, filename, info)
+        assert mod.S_IFMT(0o40755) == mod.S_IFDIR
+
+
 class AppTestMultithreadedImp(object):
     spaceconfig = dict(usemodules=['thread', 'time'])
 
@@ -3,6 +3,7 @@ import sys
 
 from rpython.rlib import rposix, rposix_stat
 from rpython.rlib import objectmodel, rurandom
+from rpython.rlib.buffer import raw_address_buffers, copy_back_raw_buffers
 from rpython.rlib.objectmodel import specialize, not_rpython
 from rpython.rlib.rarithmetic import r_longlong, intmask, r_uint
 from rpython.rlib.unroll import unrolling_iterable
@@ -156,6 +157,79 @@ actually written, which may be smaller than len(data)."""
     else:
         return space.newint(res)
 
+@unwrap_spec(fd=c_int, buffersize=int, offset=r_longlong)
+def pread(space, fd, buffersize, offset):
+    """Read from a file descriptor at the given offset, without changing
+the current position of the file."""
+    try:
+        s = rposix.pread(fd, buffersize, offset)
+    except OSError as e:
+        raise wrap_oserror(space, e)
+    else:
+        return space.newbytes(s)
+
+@unwrap_spec(fd=c_int, offset=r_longlong)
+def pwrite(space, fd, w_data, offset):
+    """Write a string to a file descriptor at the given offset, without
+changing the current position of the file.  Return the number of bytes
+actually written."""
+    data = space.getarg_w('s*', w_data)
+    try:
+        res = rposix.pwrite(fd, data.as_str(), offset)
+    except OSError as e:
+        raise wrap_oserror(space, e)
+    else:
+        return space.newint(res)
+
+@unwrap_spec(fd=c_int)
+def readv(space, fd, w_buffers):
+    """Read from a file descriptor into the sequence of writable buffers
+'buffers', filling each one before going on to the next.  Return the total
+number of bytes read."""
+    buffers = [space.writebuf_w(w_buf)
+               for w_buf in space.unpackiterable(w_buffers)]
+    raw_buffers = raw_address_buffers(buffers)
+    try:
+        res = rposix.readv(fd, raw_buffers)
+    except OSError as e:
+        raise wrap_oserror(space, e)
+    copy_back_raw_buffers(buffers, raw_buffers, res)
+    return space.newint(res)
+
+@unwrap_spec(fd=c_int)
+def writev(space, fd, w_buffers):
+    """Write the contents of the sequence of buffers 'buffers' to a file
+descriptor, without copying them.  Return the total number of bytes
+actually written."""
+    buffers = [space.readbuf_w(w_buf)
+               for w_buf in space.unpackiterable(w_buffers)]
+    try:
+        res = rposix.writev(fd, raw_address_buffers(buffers))
+    except OSError as e:
+        raise wrap_oserror(space, e)
+    else:
+        return space.newint(res)
+
+_HAVE_SENDFILE_NO_OFFSET = hasattr(rposix, 'sendfile_no_offset')
+
+@unwrap_spec(out_fd=c_int, in_fd=c_int, count=int)
+def sendfile(space, out_fd, in_fd, w_offset, count):
+    """Copy 'count' bytes from the file descriptor 'in_fd', starting at
+'offset', to the file descriptor 'out_fd', without going through
+app-level strings.  If 'offset' is None (Linux only), read from the
+current position of 'in_fd' and update it.  Return the number of bytes
+sent."""
+    try:
+        if _HAVE_SENDFILE_NO_OFFSET and space.is_none(w_offset):
+            res = rposix.sendfile_no_offset(out_fd, in_fd, count)
+        else:
+            res = rposix.sendfile(out_fd, in_fd,
+                                  space.r_longlong_w(w_offset), count)
+    except OSError as e:
+        raise wrap_oserror(space, e)
+    else:
+        return space.newint(res)
+
 @unwrap_spec(fd=c_int)
 def close(space, fd):
     """Close a file descriptor (for low level IO)."""
@@ -171,6 +171,10 @@ corresponding Unix manual entries for more information on calls."""
         interpleveldefs['_getfullpathname'] = 'interp_posix._getfullpathname'
     if hasattr(os, 'chroot'):
         interpleveldefs['chroot'] = 'interp_posix.chroot'
+    # not in os on CPython 2.7
+    for name in ['pread', 'pwrite', 'readv', 'writev', 'sendfile']:
+        if hasattr(rposix, name):
+            interpleveldefs[name] = 'interp_posix.%s' % (name,)
 
     for name in rposix.WAIT_MACROS:
         if hasattr(os, name):
@@ -864,6 +864,54 @@ class AppTestPosix:
         assert data == 'X'
         os.close(fd)
 
+    if hasattr(rposix, 'pread'):
+        def test_pread_pwrite(self):
+            os = self.posix
+            fd = os.open(self.path2 + 'test_pread_pwrite',
+                         os.O_RDWR | os.O_CREAT, 0666)
+            os.write(fd, b'hello world')
+            assert os.pwrite(fd, buffer('HELLO'), 0) == 5
+            assert os.pread(fd, 5, 6) == b'world'
+            assert os.lseek(fd, 0, 1) == 11
+            assert os.pread(fd, 100, 0) == b'HELLO world'
+            os.close(fd)
+
+    if hasattr(rposix, 'writev'):
+        def test_readv_writev(self):
+            os = self.posix
+            fd = os.open(self.path2 + 'test_readv_writev',
+                         os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0666)
+            res = os.writev(fd, [b'hello', bytearray(b', '),
+                                 memoryview(b'world!\n')])
+            assert res == 14
+            assert os.writev(fd, []) == 0
+            os.lseek(fd, 0, 0)
+            buf1 = bytearray(3)
+            buf2 = bytearray(20)
+            assert os.readv(fd, [buf1, buf2]) == 14
+            assert buf1 == b'hel'
+            assert buf2[:11] == b'lo, world!\n'
+            assert buf2[11:] == bytearray(9)
+            raises(TypeError, os.readv, fd, [b'read-only'])
+            os.close(fd)
+            raises(OSError, os.writev, fd, [b'x'])
+
+    if sys.platform.startswith('linux'):
+        def test_sendfile(self):
+            os = self.posix
+            fd = os.open(self.path2 + 'test_sendfile',
+                         os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0666)
+            os.write(fd, b'abcdefghij')
+            r, w = os.pipe()
+            assert os.sendfile(w, fd, 3, 5) == 5
+            assert os.read(r, 10) == b'defgh'
+            os.lseek(fd, 6, 0)
+            assert os.sendfile(w, fd, None, 100) == 4
+            assert os.read(r, 10) == b'ghij'
+            assert os.lseek(fd, 0, 1) == 10
+            for fd1 in (fd, r, w):
+                os.close(fd1)
+
     if hasattr(__import__(os.name), "fork"):
         def test_abort(self):
             os = self.posix
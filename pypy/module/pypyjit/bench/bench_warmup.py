@@ -0,0 +1,87 @@
+"""Compare the warmup curve of a cold process with the one of a process
+that preloads a JIT warmup profile (see pypyjit.load_warmup_profile()).
+
+Run with a translated pypy:
+
+    pypy bench_warmup.py [batches]
+
+The workload runs in fresh subprocesses: once cold, once to record the
+profile into a temporary file, and once preloading it.  For each batch of
+work it prints the time taken by the cold and by the preloaded process;
+the preloaded one should reach its steady state after fewer batches.
+"""
+
+import os, subprocess, sys, tempfile, time
+
+
+def workload(batches):
+    # a few functions and loops of different shapes, each of them run for
+    # a short while in every batch
+    def fib(n):
+        a, b = 0, 1
+        for i in xrange(n):
+            a, b = b, (a + b) & 0xffffffff
+        return a
+
+    def parse(line):
+        return [int(x) for x in line.split(',') if x]
+
+    class Point(object):
+        def __init__(self, x, y):
+            self.x = x
+            self.y = y
+        def dist2(self, other):
+            dx = self.x - other.x
+            dy = self.y - other.y
+            return dx * dx + dy * dy
+
+    line = ','.join([str(i) for i in range(30)])
+    points = [Point(i, i * 2) for i in range(20)]
+    times = []
+    for batch in range(batches):
+        t = time.time()
+        for i in range(20):
+            fib(60)
+            parse(line)
+            total = 0
+            for p in points:
+                for q in points:
+                    total += p.dist2(q)
+            d = {}
+            for j in range(40):
+                d[j % 7] = d.get(j % 7, 0) + j
+        times.append(time.time() - t)
+    return times
+
+def run(batches, env):
+    out = subprocess.check_output(
+        [sys.executable, __file__, '--child', str(batches)], env=env)
+    return [float(x) for x in out.split()]
+
+def main(argv):
+    if len(argv) > 2 and argv[1] == '--child':
+        print ' '.join([repr(t) for t in workload(int(argv[2]))])
+        return
+    batches = int(argv[1]) if len(argv) > 1 else 30
+    fd, profile = tempfile.mkstemp(suffix='.prof')
+    os.close(fd)
+    os.unlink(profile)
+    try:
+        env = dict(os.environ)
+        env.pop('PYPY_JIT_WARMUP_PROFILE', None)
+        cold = run(batches, env)
+        env['PYPY_JIT_WARMUP_PROFILE'] = profile
+        run(batches, env)                  # records the profile
+        with open(profile) as f:
+            print 'profile: %d entries' % (len(f.read().splitlines()) - 1)
+        warm = run(batches, env)
+    finally:
+        if os.path.exists(profile):
+            os.unlink(profile)
+    print '%5s %12s %12s' % ('batch', 'cold', 'preloaded')
+    for i in range(batches):
+        print '%5d %12.6f %12.6f' % (i, cold[i], warm[i])
+    print '%5s %12.6f %12.6f' % ('total', sum(cold), sum(warm))
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -2,9 +2,15 @@
 from rpython.rlib import jit_hooks
 from rpython.rlib.jit import JitHookInterface, Counters
 
+from rpython.rtyper.annlowlevel import cast_base_ptr_to_instance
+from rpython.rtyper.lltypesystem import lltype
+from rpython.rtyper.rclass import OBJECT
+
 from pypy.interpreter.error import OperationError
+from pypy.interpreter.pycode import PyCode
 from pypy.module.pypyjit.interp_resop import (Cache, wrap_greenkey,
     WrappedOp, W_JitLoopInfo, wrap_oplist)
+from pypy.module.pypyjit.interp_warmup import WarmupProfile
 
 class PyPyJitIface(JitHookInterface):
     def are_hooks_enabled(self):
@@ -12,7 +18,8 @@ class PyPyJitIface(JitHookInterface):
         cache = space.fromcache(Cache)
         return (cache.w_compile_hook is not None or
                 cache.w_abort_hook is not None or
-                cache.w_trace_too_long_hook is not None)
+                cache.w_trace_too_long_hook is not None or
+                space.fromcache(WarmupProfile).recording)
 
 
     def on_abort(self, reason, jitdriver, greenkey, greenkey_repr, logops, operations):
@@ -67,6 +74,8 @@ class PyPyJitIface(JitHookInterface):
 
     def _compile_hook(self, debug_info, is_bridge):
         space = self.space
+        if not is_bridge:
+            self._record_warmup(debug_info)
         cache = space.fromcache(Cache)
         if cache.in_recursion:
             return
@@ -83,4 +92,16 @@ class PyPyJitIface(JitHookInterface):
             finally:
                 cache.in_recursion = False
 
+    def _record_warmup(self, debug_info):
+        profile = self.space.fromcache(WarmupProfile)
+        if not profile.recording:
+            return
+        if debug_info.get_jitdriver().name != 'pypyjit':
+            return
+        greenkey = debug_info.greenkey
+        ll_code = lltype.cast_opaque_ptr(lltype.Ptr(OBJECT),
+                                         greenkey[2].getref_base())
+        pycode = cast_base_ptr_to_instance(PyCode, ll_code)
+        profile.record(pycode, greenkey[0].getint(), greenkey[1].getint())
+
 pypy_hooks = PyPyJitIface()
@@ -397,6 +397,14 @@ def get_stats_asmmemmgr(space):
     m2 = jit_hooks.stats_asmmemmgr_used(None)
     return space.newtuple([space.newint(m1), space.newint(m2)])
 
+def get_stats_memmgr(space):
+    """Returns a pair (loop_memory_limit, memory_in_use): the limit set
+    with set_param(loop_memory_limit=...), or 0, and the size of the machine
+    code of the loops and bridges that are currently kept alive."""
+    m1 = jit_hooks.stats_memmgr_max_bytes(None)
+    m2 = jit_hooks.stats_memmgr_alive_bytes(None)
+    return space.newtuple([space.newint(m1), space.newint(m2)])
+
 def enable_debug(space):
     """ Set the jit debugging - completely necessary for some stats to work,
     most notably assembler counters.
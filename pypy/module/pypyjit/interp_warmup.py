@@ -0,0 +1,196 @@
+"""Warm-start profiles: remember which loops and functions got compiled
+by the JIT, and in a later process ask the JIT to trace them as soon as
+they run instead of waiting for their counters to reach the threshold.
+
+A profile is a text file.  After a header line, every line describes
+one greenkey of the 'pypyjit' driver:
+
+    filename <TAB> name <TAB> firstlineno <TAB> md5 of co_code
+             <TAB> next_instr <TAB> is_being_profiled
+
+Code objects are identified by everything but next_instr and
+is_being_profiled, so the profile stays valid across processes; a
+function whose bytecode changed no longer matches.
+"""
+
+import os
+
+from rpython.rlib import jit, jit_hooks, rmd5
+from rpython.rlib.rarithmetic import r_uint
+from rpython.rlib.rstring import StringBuilder
+from rpython.rtyper.annlowlevel import cast_instance_to_gcref
+
+from pypy.interpreter.error import oefmt, wrap_oserror
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.interpreter.pycode import CodeHookCache
+
+
+PROFILE_HEADER = 'pypyjit-warmup-profile 1\n'
+
+
+def code_key(pycode):
+    return '%s\t%s\t%d' % (pycode.co_filename, pycode.co_name,
+                           pycode.co_firstlineno)
+
+def code_hash(pycode):
+    return rmd5.RMD5(pycode.co_code).hexdigest()
+
+
+class WarmupProfile(object):
+    def __init__(self, space):
+        self.space = space
+        self.recording = False
+        self.recorded = {}     # profile line -> None
+        self.recorded_lines = []
+        # code_key() -> list of PendingEntry, filled by load()
+        self.pending = {}
+        self.save_filename = None
+
+    def record(self, pycode, next_instr, is_being_profiled):
+        line = '%s\t%s\t%d\t%d\n' % (code_key(pycode), code_hash(pycode),
+                                     next_instr, is_being_profiled)
+        if line not in self.recorded:
+            self.recorded[line] = None
+            self.recorded_lines.append(line)
+
+    def dump(self):
+        builder = StringBuilder()
+        builder.append(PROFILE_HEADER)
+        for line in self.recorded_lines:
+            builder.append(line)
+        return builder.build()
+
+    def load(self, data):
+        """Parse the content of a profile file and remember its entries
+        until the code objects they refer to are created.  Returns the
+        number of entries."""
+        if not data.startswith(PROFILE_HEADER):
+            raise oefmt(self.space.w_ValueError, "not a JIT warmup profile")
+        lines = data.split('\n')
+        count = 0
+        for i in range(1, len(lines)):
+            fields = lines[i].split('\t')
+            if len(fields) < 6:
+                continue    # empty or truncated line
+            # the file name is the only field that might contain a tab
+            n = len(fields) - 5
+            assert n > 0
+            try:
+                firstlineno = int(fields[n + 1])
+                next_instr = int(fields[n + 3])
+                is_being_profiled = int(fields[n + 4])
+            except ValueError:
+                continue
+            key = '%s\t%s\t%d' % ('\t'.join(fields[:n]), fields[n],
+                                  firstlineno)
+            entry = PendingEntry(fields[n + 2], next_instr,
+                                 is_being_profiled)
+            if key in self.pending:
+                self.pending[key].append(entry)
+            else:
+                self.pending[key] = [entry]
+            count += 1
+        if self.pending:
+            self.space.fromcache(CodeHookCache)._jit_warmup_profile = self
+        return count
+
+    def new_code(self, pycode):
+        # called by PyCode.new_code_hook() for every code object created
+        # while we have pending entries
+        key = code_key(pycode)
+        if key not in self.pending:
+            return
+        entries = self.pending[key]
+        hash = code_hash(pycode)
+        for entry in entries:
+            if entry.hash == hash:
+                self.trace_next_iteration(pycode, entry.next_instr,
+                                          entry.is_being_profiled)
+
+    @jit.dont_look_inside
+    def trace_next_iteration(self, pycode, next_instr, is_being_profiled):
+        ll_pycode = cast_instance_to_gcref(pycode)
+        jit_hooks.trace_next_iteration(
+            'pypyjit', r_uint(next_instr), is_being_profiled, ll_pycode)
+
+    def shutdown(self):
+        if self.save_filename is None:
+            return
+        try:
+            write_file(self.save_filename, self.dump())
+        except OSError as e:
+            wrap_oserror(self.space, e, self.save_filename).write_unraisable(
+                self.space, "saving the JIT warmup profile")
+
+
+class PendingEntry(object):
+    def __init__(self, hash, next_instr, is_being_profiled):
+        self.hash = hash
+        self.next_instr = next_instr
+        self.is_being_profiled = is_being_profiled
+
+
+def read_file(filename):
+    fd = os.open(filename, os.O_RDONLY, 0)
+    try:
+        builder = StringBuilder()
+        while True:
+            data = os.read(fd, 65536)
+            if not data:
+                break
+            builder.append(data)
+        return builder.build()
+    finally:
+        os.close(fd)
+
+def write_file(filename, data):
+    fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0666)
+    try:
+        while data:
+            n = os.write(fd, data)
+            assert n >= 0
+            data = data[n:]
+    finally:
+        os.close(fd)
+
+# ____________________________________________________________
+#
+# Public interface
+
+def enable_warmup_recording(space):
+    """Start remembering the loops and functions compiled by the JIT, for
+    save_warmup_profile()."""
+    space.fromcache(WarmupProfile).recording = True
+
+@unwrap_spec(filename='fsencode')
+def save_warmup_profile(space, filename):
+    """Write the loops and functions compiled by the JIT since
+    enable_warmup_recording() to the given file."""
+    profile = space.fromcache(WarmupProfile)
+    try:
+        write_file(filename, profile.dump())
+    except OSError as e:
+        raise wrap_oserror(space, e, filename)
+
+@unwrap_spec(filename='fsencode', save_at_exit=bool)
+def load_warmup_profile(space, filename, save_at_exit=False):
+    """Read a file written by save_warmup_profile().  The loops and functions
+    it lists are traced after a few iterations instead of after reaching
+    the JIT threshold, if their code object is created after this call.
+    Returns the number of entries read.
+
+    With save_at_exit=True, a missing file is not an error, recording
+    is enabled and the profile is written back to the same file when
+    the process exits.
+    """
+    profile = space.fromcache(WarmupProfile)
+    if save_at_exit:
+        profile.recording = True
+        profile.save_filename = filename
+    try:
+        data = read_file(filename)
+    except OSError as e:
+        if save_at_exit:
+            return space.newint(0)
+        raise wrap_oserror(space, e, filename)
+    return space.newint(profile.load(data))
@@ -0,0 +1,99 @@
+import py
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.pycode import PyCode
+from pypy.module.pypyjit.hooks import pypy_hooks
+from pypy.module.pypyjit.interp_jit import pypyjitdriver
+from pypy.module.pypyjit.interp_warmup import WarmupProfile
+from rpython.jit.metainterp.history import JitCellToken, ConstInt, ConstPtr
+from rpython.rlib.jit import JitDebugInfo
+from rpython.rtyper.annlowlevel import cast_instance_to_base_ptr
+from rpython.rtyper.lltypesystem import lltype, llmemory
+from rpython.tool.udir import udir
+
+
+class MockJitDriverSD(object):
+    jitdriver = pypyjitdriver
+
+
+class AppTestWarmupProfile(object):
+    spaceconfig = dict(usemodules=('pypyjit',))
+
+    def setup_class(cls):
+        if cls.runappdirect:
+            py.test.skip("Can't run this test with -A")
+        space = cls.space
+        traced = []
+
+        @unwrap_spec(next_instr=int, w_code=PyCode)
+        def interp_on_compile(space, w_code, next_instr):
+            ll_code = cast_instance_to_base_ptr(w_code)
+            code_gcref = lltype.cast_opaque_ptr(llmemory.GCREF, ll_code)
+            greenkey = [ConstInt(next_instr), ConstInt(0),
+                        ConstPtr(code_gcref)]
+            token = JitCellToken()
+            token.number = 0
+            debug_info = JitDebugInfo(MockJitDriverSD, None, token, [],
+                                      'loop', greenkey)
+            if pypy_hooks.are_hooks_enabled():
+                pypy_hooks.after_compile(debug_info)
+
+        def trace_next_iteration(self, pycode, next_instr, is_being_profiled):
+            traced.append((pycode, next_instr, is_being_profiled))
+
+        def interp_get_traced(space):
+            result = [space.newtuple([w_code, space.newint(next_instr),
+                                      space.newint(is_being_profiled)])
+                      for w_code, next_instr, is_being_profiled in traced]
+            del traced[:]
+            return space.newlist(result)
+
+        cls.orig_trace_next_iteration = WarmupProfile.trace_next_iteration
+        WarmupProfile.trace_next_iteration = trace_next_iteration
+        cls.w_on_compile = space.wrap(interp2app(interp_on_compile))
+        cls.w_get_traced = space.wrap(interp2app(interp_get_traced))
+        cls.w_tmpfilename = space.wrap(str(udir.join('test_warmup.prof')))
+
+    def teardown_class(cls):
+        WarmupProfile.trace_next_iteration = cls.orig_trace_next_iteration
+
+    def test_save_and_load(self):
+        import pypyjit
+        src = '''if 1:
+            def f(n):
+                while n > 0:
+                    n -= 1
+                return n
+            def g():
+                pass
+        '''
+        d = {}
+        exec src in d
+        pypyjit.enable_warmup_recording()
+        self.on_compile(d['f'].func_code, 9)
+        self.on_compile(d['f'].func_code, 9)    # recorded only once
+        self.on_compile(d['f'].func_code, 0)
+        pypyjit.save_warmup_profile(self.tmpfilename)
+        with open(self.tmpfilename) as f:
+            lines = f.read().splitlines()
+        assert lines[0] == 'pypyjit-warmup-profile 1'
+        assert len(lines) == 3
+        assert lines[1].split('\t')[1:3] == ['f', '2']
+        #
+        assert pypyjit.load_warmup_profile(self.tmpfilename) == 2
+        assert self.get_traced() == []
+        d = {}
+        exec src in d
+        code = d['f'].func_code
+        assert sorted(self.get_traced()) == [(code, 0, 0), (code, 9, 0)]
+        # a different function at the same place is not preloaded
+        exec src.replace('n -= 1', 'n -= n // 2') in d
+        assert self.get_traced() == []
+
+    def test_load_errors(self):
+        import pypyjit
+        with open(self.tmpfilename, 'w') as f:
+            f.write('garbage\n')
+        raises(ValueError, pypyjit.load_warmup_profile, self.tmpfilename)
+        missing = self.tmpfilename + '.missing'
+        raises(OSError, pypyjit.load_warmup_profile, missing)
+        assert pypyjit.load_warmup_profile(missing, save_at_exit=True) == 0
@@ -0,0 +1,83 @@
+"""Measure an epoll-based loopback echo server that has many idle
+connections and a few busy ones, comparing epoll.poll(), which allocates a
+list of tuples on every call, with epoll.poll_into() filling a preallocated
+array('i') or list.
+
+Run with a translated pypy:
+
+    pypy bench_epoll.py [idle_connections [messages]]
+
+The number of idle connections is limited by 'ulimit -n'.
+"""
+
+import array, gc, select, socket, sys, time
+
+BUSY = 16
+MESSAGE = b'x' * 64
+
+def connect_many(serv, count):
+    pairs = []
+    for i in range(count):
+        cli = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        cli.connect(serv.getsockname())
+        conn, addr = serv.accept()
+        conn.setblocking(False)
+        pairs.append((cli, conn))
+    return pairs
+
+def close_all(pairs):
+    for cli, conn in pairs:
+        cli.close()
+        conn.close()
+
+def run(mode, ep, busy, messages):
+    pairs = dict([(conn.fileno(), (cli, conn)) for cli, conn in busy])
+    if mode == 'array':
+        events = array.array('i', [0] * (2 * len(pairs)))
+    else:
+        events = [0] * (2 * len(pairs))
+    for cli, conn in busy:
+        cli.send(MESSAGE)
+    remaining = messages
+    t = time.time()
+    while remaining > 0:
+        if mode == 'poll':
+            for fd, ev in ep.poll(1.0):
+                echo(pairs[fd])
+                remaining -= 1
+        else:
+            n = ep.poll_into(events, 1000000000)
+            for i in range(0, 2 * n, 2):
+                echo(pairs[events[i]])
+                remaining -= 1
+    return time.time() - t
+
+def echo((cli, conn)):
+    # the server echoes the message, and the client sends it again
+    conn.send(conn.recv(4096))
+    cli.send(cli.recv(4096))
+
+def main(idle=10000, messages=200000):
+    serv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    serv.bind(('127.0.0.1', 0))
+    serv.listen(128)
+    idle_pairs = connect_many(serv, idle)
+    busy = connect_many(serv, BUSY)
+    ep = select.epoll()
+    for cli, conn in idle_pairs + busy:
+        ep.register(conn.fileno(), select.EPOLLIN)
+    print '%d idle and %d busy connections, %d messages' % (
+        idle, BUSY, messages)
+    modes = ['poll']
+    if hasattr(ep, 'poll_into'):
+        modes += ['array', 'list']
+    for mode in modes:
+        gc.collect()
+        t = run(mode, ep, busy, messages)
+        print '%-6s %8.0f messages/s' % (mode, messages / t)
+    ep.close()
+    close_all(idle_pairs + busy)
+    serv.close()
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
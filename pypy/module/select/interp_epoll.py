@@ -10,13 +10,15 @@ from pypy.interpreter.typedef import TypeDef, GetSetProperty
 from rpython.rtyper.lltypesystem import lltype, rffi
 from rpython.rtyper.tool import rffi_platform
 from rpython.rlib._rsocket_rffi import socketclose, FD_SETSIZE
+from rpython.rlib.buffer import raw_address_buffers, copy_back_raw_buffers
+from rpython.rlib.objectmodel import keepalive_until_here
 from rpython.rlib.rposix import get_saved_errno
-from rpython.rlib.rarithmetic import intmask
+from rpython.rlib.rarithmetic import intmask, r_longlong
 from rpython.translator.tool.cbuild import ExternalCompilationInfo
 
 
 eci = ExternalCompilationInfo(
-    includes = ['sys/epoll.h']
+    includes = ['sys/epoll.h', 'time.h']
 )
 
 class CConfig:
@@ -30,6 +32,11 @@ CConfig.epoll_event = rffi_platform.Struct("struct epoll_event", [
     ("events", rffi.UINT),
     ("data", CConfig.epoll_data)
 ])
+CConfig.timespec = rffi_platform.Struct("struct timespec", [
+    ("tv_sec", rffi.LONG),
+    ("tv_nsec", rffi.LONG),
+])
+CConfig.HAVE_EPOLL_PWAIT2 = rffi_platform.Has("epoll_pwait2")
 
 public_symbols = dict.fromkeys([
     "EPOLLIN", "EPOLLOUT", "EPOLLPRI", "EPOLLERR", "EPOLLHUP",
@@ -52,6 +59,8 @@ epoll_event = cconfig["epoll_event"]
 EPOLL_CTL_ADD = cconfig["EPOLL_CTL_ADD"]
 EPOLL_CTL_MOD = cconfig["EPOLL_CTL_MOD"]
 EPOLL_CTL_DEL = cconfig["EPOLL_CTL_DEL"]
+timespec = cconfig["timespec"]
+HAVE_EPOLL_PWAIT2 = cconfig["HAVE_EPOLL_PWAIT2"]
 
 DEF_REGISTER_EVENTMASK = (public_symbols["EPOLLIN"] |
                           public_symbols["EPOLLOUT"] |
@@ -76,6 +85,24 @@ epoll_wait = rffi.llexternal(
     save_err=rffi.RFFI_SAVE_ERRNO
 )
 
+if HAVE_EPOLL_PWAIT2:
+    epoll_pwait2 = rffi.llexternal(
+        "epoll_pwait2",
+        [rffi.INT, rffi.CArrayPtr(epoll_event), rffi.INT, lltype.Ptr(timespec),
+         rffi.VOIDP],
+        rffi.INT,
+        compilation_info=eci,
+        save_err=rffi.RFFI_SAVE_ERRNO
+    )
+
+class EpollState:
+    def __init__(self, space):
+        # cleared if the kernel turns out not to support epoll_pwait2()
+        self.use_pwait2 = HAVE_EPOLL_PWAIT2
+
+NS_PER_MS = 1000000
+INT_SIZE = rffi.sizeof(rffi.INT)
+
 
 class W_Epoll(W_Root):
     def __init__(self, space, epfd):
@@ -179,6 +206,78 @@ class W_Epoll(W_Root):
                 )
             return space.newlist(elist_w)
 
+    def wait_ns(self, space, evs, maxevents, timeout_ns):
+        """epoll_wait() with a timeout in nanoseconds, negative for none.
+        Without epoll_pwait2(), the timeout is rounded up to milliseconds."""
+        if HAVE_EPOLL_PWAIT2:
+            state = space.fromcache(EpollState)
+            if state.use_pwait2:
+                if timeout_ns < 0:
+                    nfds = epoll_pwait2(self.epfd, evs, maxevents,
+                                        lltype.nullptr(timespec), rffi.NULL)
+                else:
+                    with lltype.scoped_alloc(timespec) as ts:
+                        rffi.setintfield(ts, 'c_tv_sec',
+                                         timeout_ns // 1000000000)
+                        rffi.setintfield(ts, 'c_tv_nsec',
+                                         timeout_ns % 1000000000)
+                        nfds = epoll_pwait2(self.epfd, evs, maxevents, ts,
+                                            rffi.NULL)
+                if nfds >= 0 or get_saved_errno() != errno.ENOSYS:
+                    return nfds
+                state.use_pwait2 = False
+        if timeout_ns < 0:
+            timeout_ms = -1
+        else:
+            timeout_ms = (timeout_ns + (NS_PER_MS - 1)) // NS_PER_MS
+            if timeout_ms > 0x7fffffff:
+                timeout_ms = 0x7fffffff
+        return epoll_wait(self.epfd, evs, maxevents, intmask(timeout_ms))
+
+    @unwrap_spec(timeout_ns=r_longlong)
+    def descr_poll_into(self, space, w_events, timeout_ns=-1):
+        self.check_closed(space)
+        if space.isinstance_w(w_events, space.w_list):
+            maxevents = space.len_w(w_events) // 2
+            buf = None
+        else:
+            buf = space.writebuf_w(w_events)
+            maxevents = buf.getlength() // (2 * INT_SIZE)
+        if maxevents < 1:
+            raise oefmt(space.w_ValueError,
+                        "events must have room for at least one event")
+        if maxevents > FD_SETSIZE - 1:
+            maxevents = FD_SETSIZE - 1
+
+        with lltype.scoped_alloc(rffi.CArray(epoll_event), maxevents) as evs:
+            nfds = self.wait_ns(space, evs, maxevents, timeout_ns)
+            if nfds < 0:
+                raise exception_from_saved_errno(space, space.w_IOError)
+            if buf is not None:
+                self._fill_buffer(buf, evs, nfds)
+            else:
+                self._fill_list(space, w_events, evs, nfds)
+        return space.newint(nfds)
+
+    def _fill_buffer(self, buf, evs, nfds):
+        raw = raw_address_buffers([buf])
+        out = rffi.cast(rffi.INTP, raw[0].get_raw_address())
+        for i in range(nfds):
+            event = evs[i]
+            out[2 * i] = event.c_data.c_fd
+            out[2 * i + 1] = rffi.cast(rffi.INT, event.c_events)
+        keepalive_until_here(raw)
+        copy_back_raw_buffers([buf], raw, nfds * 2 * INT_SIZE)
+
+    def _fill_list(self, space, w_list, evs, nfds):
+        # on a list of ints, the JIT doesn't need to allocate the ints
+        for i in range(nfds):
+            event = evs[i]
+            space.setitem(w_list, space.newint(2 * i),
+                          space.newint(event.c_data.c_fd))
+            space.setitem(w_list, space.newint(2 * i + 1),
+                          space.newint(event.c_events))
+
 
 W_Epoll.typedef = TypeDef("select.epoll",
     __new__ = interp2app(W_Epoll.descr__new__.im_func),
@@ -191,5 +290,6 @@ W_Epoll.typedef = TypeDef("select.epoll",
     unregister = interp2app(W_Epoll.descr_unregister),
     modify = interp2app(W_Epoll.descr_modify),
     poll = interp2app(W_Epoll.descr_poll),
+    poll_into = interp2app(W_Epoll.descr_poll_into),
 )
 W_Epoll.typedef.acceptable_as_base_class = False
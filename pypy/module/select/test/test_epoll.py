@@ -7,7 +7,8 @@ import platform
 
 class AppTestEpoll(object):
     spaceconfig = {
-        "usemodules": ["select", "_socket", "posix", "time"],
+        "usemodules": ["select", "_socket", "posix", "time", "array",
+                       "struct"],
     }
 
     def setup_class(cls):
@@ -179,6 +180,66 @@ class AppTestEpoll(object):
         expected = [(server.fileno(), select.EPOLLOUT)]
         assert events == expected
 
+    def test_poll_into(self):
+        import select
+        import array
+        import struct
+
+        client, server = self.socket_pair()
+
+        ep = select.epoll(16)
+        ep.register(server.fileno(), select.EPOLLIN | select.EPOLLOUT)
+        ep.register(client.fileno(), select.EPOLLIN | select.EPOLLOUT)
+        client.send("Hello!")
+        server.send("world!!!")
+        expected = [
+            (client.fileno(), select.EPOLLIN | select.EPOLLOUT),
+            (server.fileno(), select.EPOLLIN | select.EPOLLOUT)
+        ]
+        expected.sort()
+
+        events = array.array('i', [-1] * 10)
+        assert ep.poll_into(events, 1000000000) == 2
+        assert sorted([(events[0], events[1]), (events[2], events[3])]) == expected
+        assert events[4:] == array.array('i', [-1] * 6)
+
+        events = bytearray(4 * struct.calcsize('i'))
+        assert ep.poll_into(events) == 2
+        got = struct.unpack('4i', bytes(events))
+        assert sorted([got[0:2], got[2:4]]) == expected
+
+        for events in [[0] * 5, [None] * 4]:
+            assert ep.poll_into(events, 0) == 2
+            got = sorted([tuple(events[0:2]), tuple(events[2:4])])
+            assert got == expected
+
+        events = [0, 0, 0]
+        assert ep.poll_into(events, 0) == 1
+        assert tuple(events[:2]) in expected
+        assert events[2] == 0
+
+        raises(ValueError, ep.poll_into, [0])
+        raises(ValueError, ep.poll_into, bytearray(7))
+        raises(TypeError, ep.poll_into, b'x' * 100)
+
+    def test_poll_into_timeout_ns(self):
+        import select
+        import time
+
+        client, server = self.socket_pair()
+
+        ep = select.epoll(16)
+        ep.register(server.fileno(), select.EPOLLIN)
+        events = [0, 0]
+        now = time.time()
+        assert ep.poll_into(events, 50000000) == 0
+        then = time.time()
+        assert then - now >= 0.045
+        assert ep.poll_into(events, 0) == 0
+        client.send("Hello!")
+        assert ep.poll_into(events, -1) == 1
+        assert events == [server.fileno(), select.EPOLLIN]
+
     def test_errors(self):
         import select
 
@@ -21,6 +21,7 @@ class Module(MixedModule):
         self.filesystemencoding = None
         self.debug = True
         self.track_resources = False
+        self.import_time = False
         self.dlopenflags = rdynload._dlopen_default_mode()
 
     interpleveldefs = {
@@ -58,8 +59,12 @@ class Module(MixedModule):
         'getrecursionlimit'     : 'vm.getrecursionlimit',
         'pypy_set_track_resources' : 'vm.set_track_resources',
         'pypy_get_track_resources' : 'vm.get_track_resources',
+        'pypy_set_import_time'  : 'vm.set_import_time',
+        'pypy_get_import_time'  : 'vm.get_import_time',
         'setcheckinterval'      : 'vm.setcheckinterval',
         'getcheckinterval'      : 'vm.getcheckinterval',
+        'setswitchinterval'     : 'vm.setswitchinterval',
+        'getswitchinterval'     : 'vm.getswitchinterval',
         'exc_info'              : 'vm.exc_info',
         'exc_clear'             : 'vm.exc_clear',
         'settrace'              : 'vm.settrace',
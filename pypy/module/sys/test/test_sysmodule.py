@@ -419,6 +419,24 @@ class AppTestSysModulePortedFromCPython:
             sys.setcheckinterval(n)
             assert sys.getcheckinterval() == n
 
+    def test_setswitchinterval(self):
+        import sys
+        raises(TypeError, sys.setswitchinterval)
+        raises(ValueError, sys.setswitchinterval, 0.0)
+        raises(ValueError, sys.setswitchinterval, -1.0)
+        orig = sys.getswitchinterval()
+        assert orig == 0.005
+        try:
+            for n in 0.5, 0.0001, 1e-6:
+                sys.setswitchinterval(n)
+                assert abs(sys.getswitchinterval() - n) < 1e-9
+            sys.setswitchinterval(1e-9)
+            assert sys.getswitchinterval() == 1e-6
+            sys.setswitchinterval(1e100)
+            assert sys.getswitchinterval() > 1e6
+        finally:
+            sys.setswitchinterval(orig)
+
     def test_recursionlimit(self):
         import sys
         raises(TypeError, sys.getrecursionlimit, 42)
@@ -2,7 +2,10 @@
 Implementation of interpreter-level 'sys' routines.
 """
 
+import sys
+
 from rpython.rlib import jit
+from rpython.rlib.rarithmetic import ovfcheck_float_to_int
 from rpython.rlib.rutf8 import MAXUNICODE
 
 from pypy.interpreter import gateway
@@ -81,6 +84,15 @@ def set_track_resources(space, flag):
 def get_track_resources(space):
     return space.newbool(space.sys.track_resources)
 
+@unwrap_spec(flag=bool)
+def set_import_time(space, flag):
+    """Enable or disable the report of the time spent in each import
+    on stderr, like 'pypy -X importtime'."""
+    space.sys.import_time = flag
+
+def get_import_time(space):
+    return space.newbool(space.sys.import_time)
+
 @unwrap_spec(interval=int)
 def setcheckinterval(space, interval):
     """Tell the Python interpreter to check for asynchronous events every
@@ -99,6 +111,25 @@ def getcheckinterval(space):
         result = 0
     return space.newint(result)
 
+@unwrap_spec(interval=float)
+def setswitchinterval(space, interval):
+    """Set the ideal thread switching delay inside the Python interpreter.
+A thread waiting for the GIL for longer than this delay asks the thread
+holding it to give it away.  The parameter is in seconds; the default is
+0.005 (5 milliseconds)."""
+    if not interval > 0.0:
+        raise oefmt(space.w_ValueError,
+                    "switch interval must be strictly positive")
+    try:
+        microseconds = ovfcheck_float_to_int(interval * 1000000.0)
+    except OverflowError:
+        microseconds = sys.maxint
+    space.threadlocals.setswitchinterval(max(microseconds, 1))
+
+def getswitchinterval(space):
+    """Return the current thread switch interval; see setswitchinterval()."""
+    return space.newfloat(space.threadlocals.getswitchinterval() * 1e-6)
+
 def exc_info(space):
     """Return the (type, value, traceback) of the most recent exception
 caught by an except clause in the current stack frame or in an older stack
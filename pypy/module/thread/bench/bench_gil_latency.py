@@ -0,0 +1,66 @@
+"""Measure how long I/O-bound threads wait for the GIL while other
+threads run CPU-bound loops, for a few values of sys.setswitchinterval().
+The I/O threads repeatedly sleep for 1 ms and record how late they wake
+up; the CPU threads count loop iterations.  The GIL statistics come from
+__pypy__.thread.gil_stats().
+
+Run with a translated pypy:
+
+    pypy bench_gil_latency.py [cpu_threads [io_threads [seconds]]]
+"""
+
+import sys, thread, time
+from __pypy__.thread import gil_stats, reset_gil_stats
+
+INTERVALS = [0.0005, 0.005, 0.05]
+
+def cpu_worker(state, done):
+    count = 0
+    while not state['stop']:
+        for i in xrange(1000):
+            count += i & 1
+    done.append(count)
+
+def io_worker(state, done):
+    latencies = []
+    while not state['stop']:
+        t = time.time()
+        time.sleep(0.001)
+        latencies.append(time.time() - t - 0.001)
+    done.append(latencies)
+
+def run(interval, cpu_threads, io_threads, seconds):
+    sys.setswitchinterval(interval)
+    state = {'stop': False}
+    cpu_done = []
+    io_done = []
+    reset_gil_stats()
+    for i in range(cpu_threads):
+        thread.start_new_thread(cpu_worker, (state, cpu_done))
+    for i in range(io_threads):
+        thread.start_new_thread(io_worker, (state, io_done))
+    time.sleep(seconds)
+    state['stop'] = True
+    while len(cpu_done) < cpu_threads or len(io_done) < io_threads:
+        time.sleep(0.01)
+    stats = gil_stats()
+    latencies = sorted([x for lst in io_done for x in lst])
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print '%-8s  wakeup late: %7.3f ms avg %7.3f ms p99 %8.3f ms max' % (
+        '%gs' % interval, sum(latencies) / len(latencies) * 1000.0,
+        p99 * 1000.0, latencies[-1] * 1000.0)
+    print '          %d CPU loops, %d waits (%.3f s), %d drop requests, ' \
+          '%d handoffs' % (sum(cpu_done), stats['contended'],
+                           stats['wait_time'], stats['drop_requests'],
+                           stats['handoffs'])
+
+def main(cpu_threads=2, io_threads=2, seconds=3):
+    orig = sys.getswitchinterval()
+    try:
+        for interval in INTERVALS:
+            run(interval, cpu_threads, io_threads, seconds)
+    finally:
+        sys.setswitchinterval(orig)
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -7,9 +7,10 @@ Global Interpreter Lock.
 # all but one will be blocked.  The other threads get a chance to run
 # from time to time, using the periodic action GILReleaseAction.
 
-from rpython.rlib import rthread, rgil
+from rpython.rlib import rthread, rgil, rsignal
 from pypy.module.thread.error import wrap_thread_error
-from pypy.interpreter.executioncontext import PeriodicAsyncAction
+from pypy.interpreter.executioncontext import PeriodicAsyncAction, ActionFlag
+from pypy.module.signal.interp_signal import SignalActionFlag
 from pypy.module.thread.threadlocals import OSThreadLocals
 
 class GILThreadLocals(OSThreadLocals):
@@ -21,6 +22,11 @@ class GILThreadLocals(OSThreadLocals):
         # add the GIL-releasing callback as an action on the space
         space.actionflag.register_periodic_action(GILReleaseAction(space),
                                                   use_bytecode_counter=True)
+        # the switch interval needs a ticker at a fixed C address, which
+        # waiting threads can set to -1.  The signal module uses one; if
+        # it is disabled, use the same ticker anyway.
+        if type(space.actionflag) is ActionFlag:
+            space.actionflag.__class__ = SignalActionFlag
 
     def setup_threads(self, space):
         """Enable threads in the object space, if they haven't already been."""
@@ -28,6 +34,12 @@ class GILThreadLocals(OSThreadLocals):
             # Note: this is a quasi-immutable read by module/pypyjit/interp_jit
             # It must be changed (to True) only if it was really False before
             rgil.allocate()
+            if type(space.actionflag) is SignalActionFlag:
+                # a thread that waited for the GIL for longer than the
+                # switch interval sets this ticker to -1, which makes the
+                # holder call GILReleaseAction.perform() at the next
+                # bytecode
+                rgil.set_drop_ticker(rsignal.pypysig_getaddr_occurred())
             self.gil_ready = True
             result = True
         else:
@@ -37,14 +49,29 @@ class GILThreadLocals(OSThreadLocals):
     def threads_initialized(self):
         return self.gil_ready
 
+    def setswitchinterval(self, microseconds):
+        rgil.set_switch_interval(microseconds)
+
+    def getswitchinterval(self):
+        return rgil.get_switch_interval()
+
+    def get_gil_stats(self):
+        return [rgil.get_stat(i) for i in range(rgil.STATS)]
+
+    def reset_gil_stats(self):
+        rgil.reset_stats()
+
     ## def reinit_threads(self, space):
     ##     "Called in the child process after a fork()"
     ##     OSThreadLocals.reinit_threads(self, space)
 
 
 class GILReleaseAction(PeriodicAsyncAction):
-    """An action called every sys.checkinterval bytecodes.  It releases
-    the GIL to give some other thread a chance to run.
+    """An action called every sys.checkinterval bytecodes, or sooner if
+    a thread has been waiting for the GIL for longer than the switch
+    interval (see GILThreadLocals.setup_threads(), which lets it force
+    the ticker).
+    It releases the GIL to give some other thread a chance to run.
     """
 
     def perform(self, executioncontext, frame):
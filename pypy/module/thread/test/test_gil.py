@@ -119,3 +119,12 @@ class TestRunDirectly(GILTests):
 class TestUsingFramework(GILTests):
     gcpolicy = 'generation'
     bigtest = True
+
+
+def test_drop_ticker_without_signal_module():
+    # the switch interval needs the C-level ticker even without the
+    # signal module
+    from pypy.tool.pytest.objspace import gettestobjspace
+    from pypy.module.signal.interp_signal import SignalActionFlag
+    space = gettestobjspace(usemodules=['thread'])
+    assert type(space.actionflag) is SignalActionFlag
@@ -12,7 +12,8 @@ from pypy.interpreter.gateway import (
 from pypy.interpreter.mixedmodule import MixedModule
 from pypy.interpreter.signature import Signature
 from pypy.interpreter.typedef import TypeDef
-from pypy.objspace.std.util import negate
+from pypy.objspace.std.util import (
+    negate, float_key_kind, FLOAT_KEY_FLOAT, FLOAT_KEY_INT, FLOAT_KEY_NAN)
 
 
 UNROLL_CUTOFF = 5
@@ -412,7 +413,7 @@ def _add_indirections():
                     length w_keys values items \
                     iterkeys itervalues iteritems \
                     listview_bytes listview_ascii listview_int \
-                    view_as_kwargs".split()
+                    listview_float view_as_kwargs".split()
 
     def make_method(method):
         def f(self, *args):
@@ -587,6 +588,9 @@ class DictStrategy(object):
     def listview_int(self, w_dict):
         return None
 
+    def listview_float(self, w_dict):
+        return None
+
     def view_as_kwargs(self, w_dict):
         return (None, None)
 
@@ -675,6 +679,8 @@ class EmptyDictStrategy(DictStrategy):
         w_type = self.space.type(w_key)
         if self.space.is_w(w_type, self.space.w_int):
             self.switch_to_int_strategy(w_dict)
+        elif float_key_kind(self.space, w_key) == FLOAT_KEY_FLOAT:
+            self.switch_to_float_strategy(w_dict)
         elif w_type.compares_by_identity():
             self.switch_to_identity_strategy(w_dict)
         else:
@@ -698,6 +704,12 @@ class EmptyDictStrategy(DictStrategy):
         w_dict.set_strategy(strategy)
         w_dict.dstorage = storage
 
+    def switch_to_float_strategy(self, w_dict):
+        strategy = self.space.fromcache(FloatDictStrategy)
+        storage = strategy.get_empty_storage()
+        w_dict.set_strategy(strategy)
+        w_dict.dstorage = storage
+
     def switch_to_identity_strategy(self, w_dict):
         from pypy.objspace.std.identitydict import IdentityDictStrategy
         strategy = self.space.fromcache(IdentityDictStrategy)
@@ -1334,6 +1346,110 @@ class IntDictStrategy(AbstractTypedStrategy, DictStrategy):
 create_iterator_classes(IntDictStrategy)
 
 
+class FloatDictStrategy(AbstractTypedStrategy, DictStrategy):
+    """Keys are floats that are not NaN.  A NaN is not equal to itself, so
+    such keys are found by identity, which needs the boxed float: they
+    switch the dict to the object strategy.  Ints and bools equal to a float
+    (1 == 1.0) find it without switching.
+    """
+    erase, unerase = rerased.new_erasing_pair("float")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def wrap(self, unwrapped):
+        return self.space.newfloat(unwrapped)
+
+    def unwrap(self, wrapped):
+        return self.space.float_w(wrapped)
+
+    def get_empty_storage(self):
+        return self.erase({})
+
+    def is_correct_type(self, w_obj):
+        return float_key_kind(self.space, w_obj) == FLOAT_KEY_FLOAT
+
+    def _never_equal_to(self, w_lookup_type):
+        space = self.space
+        # XXX there are many more types
+        return (space.is_w(w_lookup_type, space.w_NoneType) or
+                space.is_w(w_lookup_type, space.w_bytes) or
+                space.is_w(w_lookup_type, space.w_unicode)
+                )
+
+    def setitem(self, w_dict, w_key, w_value):
+        kind = float_key_kind(self.space, w_key)
+        if kind == FLOAT_KEY_FLOAT or kind == FLOAT_KEY_INT:
+            d = self.unerase(w_dict.dstorage)
+            key = self.space.float_w(w_key)
+            # an int key that is not there yet must keep its type
+            if kind == FLOAT_KEY_FLOAT or key in d:
+                d[key] = w_value
+                return
+        self.switch_to_object_strategy(w_dict)
+        w_dict.setitem(w_key, w_value)
+
+    def setdefault(self, w_dict, w_key, w_default):
+        kind = float_key_kind(self.space, w_key)
+        if kind == FLOAT_KEY_FLOAT or kind == FLOAT_KEY_INT:
+            d = self.unerase(w_dict.dstorage)
+            key = self.space.float_w(w_key)
+            if kind == FLOAT_KEY_FLOAT or key in d:
+                return d.setdefault(key, w_default)
+        self.switch_to_object_strategy(w_dict)
+        return w_dict.setdefault(w_key, w_default)
+
+    def delitem(self, w_dict, w_key):
+        kind = float_key_kind(self.space, w_key)
+        if kind == FLOAT_KEY_FLOAT or kind == FLOAT_KEY_INT:
+            del self.unerase(w_dict.dstorage)[self.space.float_w(w_key)]
+        elif kind == FLOAT_KEY_NAN:
+            raise KeyError
+        else:
+            self.switch_to_object_strategy(w_dict)
+            w_dict.delitem(w_key)
+
+    def getitem(self, w_dict, w_key):
+        space = self.space
+        kind = float_key_kind(space, w_key)
+        if kind == FLOAT_KEY_FLOAT or kind == FLOAT_KEY_INT:
+            return self.unerase(w_dict.dstorage).get(space.float_w(w_key),
+                                                     None)
+        elif kind == FLOAT_KEY_NAN or self._never_equal_to(space.type(w_key)):
+            return None
+        else:
+            self.switch_to_object_strategy(w_dict)
+            return w_dict.getitem(w_key)
+
+    def pop(self, w_dict, w_key, w_default):
+        space = self.space
+        kind = float_key_kind(space, w_key)
+        if kind == FLOAT_KEY_FLOAT or kind == FLOAT_KEY_INT:
+            key = space.float_w(w_key)
+            d = self.unerase(w_dict.dstorage)
+            if w_default is None:
+                return d.pop(key)
+            else:
+                return d.pop(key, w_default)
+        elif kind == FLOAT_KEY_NAN or self._never_equal_to(space.type(w_key)):
+            if w_default is not None:
+                return w_default
+            raise KeyError
+        else:
+            self.switch_to_object_strategy(w_dict)
+            return w_dict.get_strategy().pop(w_dict, w_key, w_default)
+
+    def listview_float(self, w_dict):
+        return self.unerase(w_dict.dstorage).keys()
+
+    def wrapkey(space, key):
+        return space.newfloat(key)
+
+    def w_keys(self, w_dict):
+        return self.space.newlist_float(self.listview_float(w_dict))
+
+create_iterator_classes(FloatDictStrategy)
+
+
 def update1(space, w_dict, w_data):
     if isinstance(w_data, W_DictMultiObject):    # optimization case only
         update1_dict_dict(space, w_dict, w_data)
@@ -1170,6 +1170,45 @@ class AppTestStrategies(object):
         assert "IntDictStrategy" in self.get_strategy(d)
         assert d[1L] == "hi"
 
+    def test_empty_to_float(self):
+        d = {}
+        d[1.5] = "hi"
+        assert "FloatDictStrategy" in self.get_strategy(d)
+        assert d[1.5] == "hi"
+        assert d.keys() == [1.5]
+
+    def test_float_dict_int_keys(self):
+        d = {1.0: "a", 2.5: "b"}
+        assert "FloatDictStrategy" in self.get_strategy(d)
+        assert d[1] == "a"
+        assert d[True] == "a"
+        assert 3 not in d
+        d[1] = "c"
+        assert type(d.keys()[0]) is float
+        assert d == {1.0: "c", 2.5: "b"}
+        assert d.pop(1) == "c"
+        d[0.0] = "zero"
+        d[-0.0] = "negative zero"
+        assert d == {0.0: "negative zero", 2.5: "b"}
+        assert "FloatDictStrategy" in self.get_strategy(d)
+        del d[0]
+        assert d == {2.5: "b"}
+        assert "FloatDictStrategy" in self.get_strategy(d)
+        # an int that is not there yet keeps its type
+        d[3] = "d"
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+        assert type([k for k in d if k == 3][0]) is int
+
+    def test_float_dict_nan(self):
+        nan = float("nan")
+        d = {1.5: "a"}
+        assert d.get(nan) is None
+        raises(KeyError, "del d[nan]")
+        assert "FloatDictStrategy" in self.get_strategy(d)
+        d[nan] = "b"
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+        assert d[nan] == "b"
+
     def test_iter_dict_length_change(self):
         d = {1: 2, 3: 4, 5: 6}
         it = d.iteritems()
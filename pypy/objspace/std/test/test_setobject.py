@@ -81,6 +81,7 @@ class TestW_SetObject:
     def test_create_set_from_list(self):
         from pypy.interpreter.baseobjspace import W_Root
         from pypy.objspace.std.setobject import BytesSetStrategy, ObjectSetStrategy
+        from pypy.objspace.std.setobject import FloatSetStrategy
         from pypy.objspace.std.floatobject import W_FloatObject
 
         w = self.space.wrap
@@ -116,6 +117,12 @@ class TestW_SetObject:
         w_list = W_ListObject(self.space, [w(1.0), w(2.0), w(3.0)])
         w_set = W_SetObject(self.space)
         _initialize_set(self.space, w_set, w_list)
+        assert w_set.strategy is self.space.fromcache(FloatSetStrategy)
+        assert w_set.strategy.unerase(w_set.sstorage) == {1.0:None, 2.0:None, 3.0:None}
+
+        w_list = W_ListObject(self.space, [w(1.0), w(float("nan"))])
+        w_set = W_SetObject(self.space)
+        _initialize_set(self.space, w_set, w_list)
         assert w_set.strategy is self.space.fromcache(ObjectSetStrategy)
         for item in w_set.strategy.unerase(w_set.sstorage):
             assert isinstance(item, W_FloatObject)
@@ -1064,6 +1071,47 @@ class AppTestAppSetTest:
         s.intersection_update(set())
         assert strategy(s) == "EmptySetStrategy"
 
+    def test_float_strategy(self):
+        from __pypy__ import strategy
+        s = set([1.5, 2.0, 2.0])
+        assert strategy(s) == "FloatSetStrategy"
+        assert len(s) == 2
+        assert 2 in s
+        assert True not in s
+        assert 2.5 not in s
+        s.add(2)
+        assert strategy(s) == "FloatSetStrategy"
+        assert type([x for x in s if x == 2][0]) is float
+        s.discard(2)
+        assert s == set([1.5])
+        assert strategy(s) == "FloatSetStrategy"
+        s = set()
+        s.add(0.5)
+        assert strategy(s) == "FloatSetStrategy"
+        assert set([1.0, 2.0]) == set([1, 2])
+        assert set([1.0, 2.0]) & set([2, 3]) == set([2])
+        assert set([1.0, 2.0]) - set([2, 3]) == set([1])
+        assert not set([1.0, 2.0]).isdisjoint(set([2]))
+        assert set([1.0]).isdisjoint(set(["1"]))
+        s = set([1.5])
+        s.add(3)
+        assert strategy(s) == "ObjectSetStrategy"
+
+    def test_float_strategy_nan(self):
+        from __pypy__ import strategy
+        nan = float("nan")
+        s = set([1.5, nan])
+        assert strategy(s) == "ObjectSetStrategy"
+        assert nan in s
+        s = set([1.5])
+        assert nan not in s
+        s.discard(nan)
+        s.add(nan)
+        assert strategy(s) == "ObjectSetStrategy"
+        assert nan in s
+        s = set([float("nan")])
+        assert strategy(s) == "ObjectSetStrategy"
+
     def test_weird_exception_from_iterable(self):
         def f():
            raise ValueError
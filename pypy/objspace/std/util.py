@@ -1,3 +1,6 @@
+import math
+import sys
+
 from rpython.rlib.rstring import InvalidBaseError
 
 from pypy.interpreter.error import OperationError, oefmt
@@ -39,6 +42,31 @@ def negate(f):
     _negator.func_name = 'negate-%s' % f.func_name
     return _negator
 
+# how float_key_kind() classifies a key
+FLOAT_KEY_FLOAT = 0      # a float that is not NaN
+FLOAT_KEY_INT   = 1      # an int or bool equal to a float
+FLOAT_KEY_NAN   = 2      # a NaN, never equal to a float that is not itself
+FLOAT_KEY_OTHER = 3      # anything else
+
+# ints up to this size are converted to a float exactly
+MAX_EXACT_INT_IN_FLOAT = min(2 ** 53, sys.maxint)
+
+def float_key_kind(space, w_key):
+    """Classify a key looked up in a dict or set that only contains floats
+    that are not NaN.  For FLOAT_KEY_FLOAT and FLOAT_KEY_INT, the key is
+    equal to, and hashes like, space.float_w(w_key).
+    """
+    w_type = space.type(w_key)
+    if space.is_w(w_type, space.w_float):
+        if math.isnan(space.float_w(w_key)):
+            return FLOAT_KEY_NAN
+        return FLOAT_KEY_FLOAT
+    if space.is_w(w_type, space.w_int) or space.is_w(w_type, space.w_bool):
+        x = space.int_w(w_key)
+        if -MAX_EXACT_INT_IN_FLOAT <= x <= MAX_EXACT_INT_IN_FLOAT:
+            return FLOAT_KEY_INT
+    return FLOAT_KEY_OTHER
+
 def get_positive_index(where, length):
     if where < 0:
         where += length
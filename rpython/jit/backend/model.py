@@ -313,6 +313,14 @@ class CompiledLoopToken(object):
         debug_print("allocating Bridge #", self.bridges_count, "of Loop #", self.number)
         debug_stop("jit-mem-looptoken-alloc")
 
+    def get_asm_size(self):
+        # the machine code of this loop and its bridges, in bytes
+        size = 0
+        if self.asmmemmgr_blocks is not None:
+            for start, stop in self.asmmemmgr_blocks:
+                size += stop - start
+        return size
+
     def update_frame_info(self, oldlooptoken, baseofs):
         new_fi = self.frame_info
         new_loop_tokens = []
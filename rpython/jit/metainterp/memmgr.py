@@ -1,4 +1,5 @@
 import math
+from collections import OrderedDict
 from rpython.rlib.rarithmetic import r_int64
 from rpython.rlib.debug import debug_start, debug_print, debug_stop
 from rpython.rlib.objectmodel import we_are_translated
@@ -19,6 +20,13 @@ from rpython.rlib.objectmodel import we_are_translated
 # 'generation' field is much smaller than the current generation, and
 # removed from the set.
 #
+# Additionally, if 'max_bytes' is set, the machine code of the loops in
+# 'alive_loops' (together with their bridges) must not exceed that many
+# bytes.  'alive_loops' is then kept in the order in which the loops
+# were last entered, and when the limit is exceeded after compiling a
+# loop or a bridge, the least recently entered loops are removed until
+# we are below the limit again.
+#
 
 class MemoryManager(object):
 
@@ -37,7 +45,9 @@ class MemoryManager(object):
         # per second
         self.current_generation = r_int64(1)
         self.next_check = r_int64(-1)
-        self.alive_loops = {}
+        self.alive_loops = OrderedDict()
+        self.max_bytes = 0
+        self.alive_bytes = 0    # sum of the asm_size of the alive_loops
 
     def set_max_age(self, max_age, check_frequency=0):
         if max_age <= 0:
@@ -49,6 +59,13 @@ class MemoryManager(object):
             self.check_frequency = check_frequency
             self.next_check = self.current_generation + 1
 
+    def set_max_bytes(self, max_bytes):
+        if max_bytes < 0:
+            max_bytes = 0
+        self.max_bytes = max_bytes
+        if max_bytes > 0 and self.alive_bytes > max_bytes:
+            self._free_loops_over_budget()
+
     def next_generation(self):
         self.current_generation += 1
         if self.current_generation == self.next_check:
@@ -58,8 +75,42 @@ class MemoryManager(object):
     def keep_loop_alive(self, looptoken):
         if looptoken.generation != self.current_generation:
             looptoken.generation = self.current_generation
+            if looptoken not in self.alive_loops:
+                self.alive_bytes += looptoken.asm_size
+            elif self.max_bytes > 0:
+                # move it to the end, to keep alive_loops in LRU order
+                del self.alive_loops[looptoken]
             self.alive_loops[looptoken] = None
 
+    def record_compiled(self, looptoken):
+        # called after a loop or a bridge was compiled for 'looptoken'
+        clt = looptoken.compiled_loop_token
+        if clt is None:
+            return
+        size = clt.get_asm_size()
+        if looptoken in self.alive_loops:
+            self.alive_bytes += size - looptoken.asm_size
+        looptoken.asm_size = size
+        if self.max_bytes > 0 and self.alive_bytes > self.max_bytes:
+            self._free_loops_over_budget()
+
+    def _free_loops_over_budget(self):
+        debug_start("jit-mem-budget")
+        oldtotal = len(self.alive_loops)
+        debug_print("Machine code limit:", self.max_bytes)
+        debug_print("Machine code before:", self.alive_bytes)
+        for looptoken in self.alive_loops.keys():
+            if self.alive_bytes <= self.max_bytes:
+                break
+            if looptoken.generation == self.current_generation:
+                break     # just compiled or entered: keep it
+            del self.alive_loops[looptoken]
+            self.alive_bytes -= looptoken.asm_size
+        newtotal = len(self.alive_loops)
+        debug_print("Loop tokens freed: ", oldtotal - newtotal)
+        debug_print("Machine code left: ", self.alive_bytes)
+        debug_stop("jit-mem-budget")
+
     def _kill_old_loops_now(self):
         debug_start("jit-mem-collect")
         oldtotal = len(self.alive_loops)
@@ -71,6 +122,7 @@ class MemoryManager(object):
             if (0 <= looptoken.generation < max_generation or
                 looptoken.invalidated):
                 del self.alive_loops[looptoken]
+                self.alive_bytes -= looptoken.asm_size
         newtotal = len(self.alive_loops)
         debug_print("Loop tokens freed: ", oldtotal - newtotal)
         debug_print("Loop tokens left:  ", newtotal)
@@ -86,4 +138,5 @@ class MemoryManager(object):
         debug_start("jit-mem-releaseall")
         debug_print("Loop tokens cleared:", len(self.alive_loops))
         self.alive_loops.clear()
+        self.alive_bytes = 0
         debug_stop("jit-mem-releaseall")
@@ -21,6 +21,19 @@ from rpython.rlib import rgc
 class FakeLoopToken:
     generation = 0
     invalidated = False
+    asm_size = 0
+    compiled_loop_token = None
+
+class FakeCompiledLoopToken:
+    def __init__(self, size):
+        self.size = size
+    def get_asm_size(self):
+        return self.size
+
+def make_sized_token(size):
+    token = FakeLoopToken()
+    token.compiled_loop_token = FakeCompiledLoopToken(size)
+    return token
 
 
 class _TestMemoryManager:
@@ -78,6 +91,63 @@ class _TestMemoryManager:
             else:
                 assert tokens[i] in memmgr.alive_loops
 
+    def compile(self, memmgr, token):
+        memmgr.next_generation()
+        memmgr.keep_loop_alive(token)
+        memmgr.record_compiled(token)
+
+    def test_max_bytes(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_bytes(1000)
+        tokens = [make_sized_token(300) for i in range(5)]
+        for token in tokens[:3]:
+            self.compile(memmgr, token)
+        assert memmgr.alive_bytes == 900
+        assert memmgr.alive_loops.keys() == tokens[:3]
+        # entering tokens[0] makes tokens[1] the least recently used
+        memmgr.next_generation()
+        memmgr.keep_loop_alive(tokens[0])
+        self.compile(memmgr, tokens[3])
+        assert memmgr.alive_loops.keys() == [tokens[2], tokens[0], tokens[3]]
+        assert memmgr.alive_bytes == 900
+        # a bridge attached to tokens[2] makes it bigger
+        tokens[2].compiled_loop_token.size = 500
+        memmgr.next_generation()
+        memmgr.record_compiled(tokens[2])
+        assert memmgr.alive_loops.keys() == [tokens[0], tokens[3]]
+        assert memmgr.alive_bytes == 600
+        # lowering the limit frees loops immediately
+        memmgr.next_generation()
+        memmgr.set_max_bytes(400)
+        assert memmgr.alive_loops.keys() == [tokens[3]]
+        assert memmgr.alive_bytes == 300
+
+    def test_max_bytes_keeps_current_loop(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_bytes(100)
+        tokens = [make_sized_token(300) for i in range(3)]
+        for token in tokens:
+            self.compile(memmgr, token)
+            assert memmgr.alive_loops.keys() == [token]
+            assert memmgr.alive_bytes == 300
+        memmgr.set_max_bytes(0)
+        memmgr.keep_loop_alive(tokens[0])
+        memmgr.record_compiled(tokens[0])
+        assert memmgr.alive_bytes == 600
+
+    def test_max_bytes_and_max_age(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_age(4, 1)
+        tokens = [make_sized_token(10) for i in range(10)]
+        for token in tokens:
+            memmgr.keep_loop_alive(token)
+            memmgr.record_compiled(token)
+            memmgr.next_generation()
+        assert memmgr.alive_loops == dict.fromkeys(tokens[7:])
+        assert memmgr.alive_bytes == 30
+        memmgr.release_all_loops()
+        assert memmgr.alive_bytes == 0
+
 
 class _TestIntegration(LLJitMixin):
     # See comments in TestMemoryManager.  To get temporarily the normal
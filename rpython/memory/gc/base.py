@@ -164,6 +164,14 @@ class GCBase(object):
         self.collect()
         return True
 
+    def freeze(self):
+        self.collect()
+        return 0
+
+    def wait_background_sweep(self):
+        # for GCs that sweep in another thread: wait until it is done
+        pass
+
     def malloc(self, typeid, length=0, zero=False):
         """NOT_RPYTHON
         For testing.  The interface used by the gctransformer is
@@ -21,9 +21,18 @@ class GcHooks(object):
     def is_gc_collect_enabled(self):
         return False
 
-    def on_gc_minor(self, duration, total_memory_used, pinned_objects):
+    def get_gc_alloc_sample_interval(self):
         """
-        Called after a minor collection
+        Return a number of bytes N > 0 to call on_gc_alloc_sample() for the
+        allocations that cross every multiple of N bytes allocated, or 0
+        """
+        return 0
+
+    def on_gc_minor(self, duration, total_memory_used, pinned_objects,
+                    nursery_size):
+        """
+        Called after a minor collection.  ``nursery_size`` is the size of
+        the nursery from now on, which can change if the GC adapts it
         """
 
     def on_gc_collect_step(self, duration, oldstate, newstate):
@@ -45,13 +54,23 @@ class GcHooks(object):
         Called after a major collection is fully done
         """
 
+    def on_gc_alloc_sample(self, size, sampled_bytes):
+        """
+        Called before allocating an object of ``size`` bytes which crossed
+        one or more sampling points, see get_gc_alloc_sample_interval().
+        ``sampled_bytes`` is the number of allocated bytes that this sample
+        stands for: the interval times the number of sampling points crossed
+        """
+
     # the fire_* methods are meant to be called from the GC are should NOT be
     # overridden
 
     @rgc.no_collect
-    def fire_gc_minor(self, duration, total_memory_used, pinned_objects):
+    def fire_gc_minor(self, duration, total_memory_used, pinned_objects,
+                      nursery_size):
         if self.is_gc_minor_enabled():
-            self.on_gc_minor(duration, total_memory_used, pinned_objects)
+            self.on_gc_minor(duration, total_memory_used, pinned_objects,
+                             nursery_size)
 
     @rgc.no_collect
     def fire_gc_collect_step(self, duration, oldstate, newstate):
@@ -68,3 +87,7 @@ class GcHooks(object):
                                arenas_count_before, arenas_count_after,
                                arenas_bytes, rawmalloc_bytes_before,
                                rawmalloc_bytes_after)
+
+    @rgc.no_collect
+    def fire_gc_alloc_sample(self, size, sampled_bytes):
+        self.on_gc_alloc_sample(size, sampled_bytes)
@@ -9,6 +9,18 @@ Environment variables can be used to fine-tune the following parameters:
  PYPY_GC_NURSERY_DEBUG   If set to non-zero, will fill nursery with garbage,
                          to help debugging.
 
+ PYPY_GC_NURSERY_ADAPTIVE  If set to non-zero, the nursery size is adjusted
+                         after the minor collections: it shrinks when they
+                         take longer than PYPY_GC_NURSERY_PAUSE, and it
+                         grows when they are short and few objects survive.
+
+ PYPY_GC_NURSERY_MIN     The bounds of the adaptive nursery size.  Default
+ PYPY_GC_NURSERY_MAX     to 1/4 and 4 times the initial nursery size.
+
+ PYPY_GC_NURSERY_PAUSE   The target duration of a minor collection for the
+                         adaptive nursery size, in milliseconds.  Default
+                         is '2'.
+
  PYPY_GC_INCREMENT_STEP  The size of memory marked during the marking step.
                          Default is size of nursery * 2. If you mark it too high
                          your GC is not incremental at all. The minimum is set
@@ -52,6 +64,17 @@ Environment variables can be used to fine-tune the following parameters:
                          in time.  Defaults to a conservative value depending
                          on nursery size and maximum object size inside the
                          nursery.  Useful for debugging by setting it to 0.
+
+ PYPY_GC_MARK_THREADS    The number of threads that mark objects in parallel
+                         during the marking steps of major collections,
+                         including the thread running the collection.
+                         Defaults to 1 (no helper threads); at most 32.
+                         Useful on large heaps with many cores.
+
+ PYPY_GC_BACKGROUND_SWEEP  If set to non-zero, the sweeping phase of major
+                         collections runs in a separate thread, while the
+                         program continues.  Allocations are then served
+                         from the pages already swept.
 """
 # XXX Should find a way to bound the major collection threshold by the
 # XXX total addressable size.  Maybe by keeping some minimarkpage arenas
@@ -63,7 +86,7 @@ Environment variables can be used to fine-tune the following parameters:
 import sys
 import os
 import time
-from rpython.rtyper.lltypesystem import lltype, llmemory, llarena, llgroup
+from rpython.rtyper.lltypesystem import lltype, llmemory, llarena, llgroup, rffi
 from rpython.rtyper.lltypesystem.lloperation import llop
 from rpython.rtyper.lltypesystem.llmemory import raw_malloc_usage
 from rpython.memory.gc.base import GCBase, MovingGCBase
@@ -72,8 +95,10 @@ from rpython.memory.support import mangle_hash
 from rpython.rlib.rarithmetic import ovfcheck, LONG_BIT, intmask, r_uint
 from rpython.rlib.rarithmetic import LONG_BIT_SHIFT
 from rpython.rlib.debug import ll_assert, debug_print, debug_start, debug_stop
-from rpython.rlib.objectmodel import specialize
-from rpython.rlib import rgc
+from rpython.rlib.objectmodel import specialize, we_are_translated
+from rpython.rlib import rgc, rthread
+from rpython.rtyper.annlowlevel import llhelper
+from rpython.translator.tool.cbuild import ExternalCompilationInfo
 from rpython.memory.gc.minimarkpage import out_of_memory
 
 #
@@ -189,6 +214,102 @@ STATE_FINALIZING = 3
 GC_STATES = ['SCANNING', 'MARKING', 'SWEEPING', 'FINALIZING']
 
 
+# Parallel marking (PYPY_GC_MARK_THREADS): the helper threads get at most
+# PARALLEL_MARK_BATCH objects each from 'objects_to_trace' at a time, and
+# only if there are at least PARALLEL_MARK_MIN objects per thread to give.
+MAX_MARK_THREADS = 32
+PARALLEL_MARK_BATCH = 8192
+PARALLEL_MARK_MIN = 64
+
+# the GC's helper threads must not try to acquire the GIL, so they are
+# started without the wrapper of rthread.c_thread_start()
+c_gc_thread_start = rffi.llexternal('RPyThreadStart', [rthread.CALLBACK],
+                                    rffi.LONG,
+                                    compilation_info=rthread.eci,
+                                    _nowrapper=True, sandboxsafe=True)
+c_getpid = rffi.llexternal('getpid', [], rffi.INT,
+                           compilation_info=ExternalCompilationInfo(
+                               includes=['unistd.h']),
+                           _nowrapper=True, sandboxsafe=True)
+
+
+# Background sweeping (PYPY_GC_BACKGROUND_SWEEP): the number of pages
+# swept by the sweeper thread between two points where it can be paused.
+BACKGROUND_SWEEP_BATCH = 16
+
+# While the sweeper thread runs, it clears GCFLAG_VISITED from the 'tid'
+# of the surviving objects, so the other updates of the 'tid' of these
+# objects must be atomic too.
+_atomic_tid_eci = ExternalCompilationInfo(
+    post_include_bits=["""
+RPY_EXTERN void pypy_gc_tid_and(Signed *, Signed);
+RPY_EXTERN void pypy_gc_tid_or(Signed *, Signed);
+"""],
+    separate_module_sources=["""
+#ifdef _MSC_VER
+#include <windows.h>
+#  ifdef _WIN64
+#    define PYPY_GC_ATOMIC_AND(p, x)  InterlockedAnd64((LONG64 *)(p), (x))
+#    define PYPY_GC_ATOMIC_OR(p, x)   InterlockedOr64((LONG64 *)(p), (x))
+#  else
+#    define PYPY_GC_ATOMIC_AND(p, x)  InterlockedAnd((LONG *)(p), (x))
+#    define PYPY_GC_ATOMIC_OR(p, x)   InterlockedOr((LONG *)(p), (x))
+#  endif
+#else
+#  define PYPY_GC_ATOMIC_AND(p, x)    __sync_fetch_and_and(p, x)
+#  define PYPY_GC_ATOMIC_OR(p, x)     __sync_fetch_and_or(p, x)
+#endif
+
+RPY_EXTERN void pypy_gc_tid_and(Signed *p, Signed mask)
+{
+    PYPY_GC_ATOMIC_AND(p, mask);
+}
+
+RPY_EXTERN void pypy_gc_tid_or(Signed *p, Signed mask)
+{
+    PYPY_GC_ATOMIC_OR(p, mask);
+}
+"""])
+c_tid_and = rffi.llexternal('pypy_gc_tid_and', [rffi.SIGNEDP, lltype.Signed],
+                            lltype.Void, compilation_info=_atomic_tid_eci,
+                            _nowrapper=True, sandboxsafe=True)
+c_tid_or = rffi.llexternal('pypy_gc_tid_or', [rffi.SIGNEDP, lltype.Signed],
+                           lltype.Void, compilation_info=_atomic_tid_eci,
+                           _nowrapper=True, sandboxsafe=True)
+
+def _tid_address(hdr):
+    return rffi.cast(rffi.SIGNEDP, lltype.direct_fieldptr(hdr, 'tid'))
+
+
+# Adaptive nursery size (PYPY_GC_NURSERY_ADAPTIVE): the weight of the last
+# minor collection in the running averages, and the rate of survival of
+# the young objects above which a larger nursery is not expected to help.
+NURSERY_ADAPT_WEIGHT = 0.3
+NURSERY_GROW_MAX_SURVIVAL = 0.1
+
+
+class MarkWorker(object):
+    """A helper thread for parallel marking, and its objects to trace."""
+    _alloc_flavor_ = "raw"
+
+    def __init__(self, stack, next):
+        self.stack = stack
+        self.next = next
+        self.size_to_track = 0
+        self.start_lock = rthread.null_ll_lock
+        self.done_lock = rthread.null_ll_lock
+
+def _allocate_gc_lock():
+    # returns an acquired lock, or NULL.  Used by the GC's helper threads.
+    ll_lock = lltype.malloc(rthread.TLOCKP.TO, flavor='raw',
+                            track_allocation=False)
+    if rffi.cast(lltype.Signed, rthread.c_thread_lock_init(ll_lock)) <= 0:
+        lltype.free(ll_lock, flavor='raw', track_allocation=False)
+        return rthread.null_ll_lock
+    rthread.acquire_NOAUTO(ll_lock, True)
+    return ll_lock
+
+
 FORWARDSTUB = lltype.GcStruct('forwarding_stub',
                               ('forw', llmemory.Address))
 FORWARDSTUBPTR = lltype.Ptr(FORWARDSTUB)
@@ -290,12 +411,29 @@ class IncrementalMiniMarkGC(MovingGCBase):
                  card_page_indices=0,
                  large_object=8*WORD,
                  ArenaCollectionClass=None,
+                 mark_threads=1,
+                 background_sweep=False,
+                 adaptive_nursery=False,
+                 nursery_size_min=0,
+                 nursery_size_max=0,
+                 nursery_target_pause=0.002,
                  **kwds):
         "NOT_RPYTHON"
         MovingGCBase.__init__(self, config, **kwds)
         assert small_request_threshold % WORD == 0
         self.read_from_env = read_from_env
         self.nursery_size = nursery_size
+        #
+        # With 'adaptive_nursery', the nursery is allocated with the size
+        # 'nursery_size_max', but only its first 'nursery_size' bytes are
+        # used; see _adapt_nursery_size().
+        self.adaptive_nursery = adaptive_nursery
+        self.nursery_size_min = nursery_size_min
+        self.nursery_size_max = nursery_size_max
+        self.nursery_target_pause = nursery_target_pause
+        self.nursery_used_size = 0
+        self.minor_duration_avg = -1.0     # no minor collection yet
+        self.nursery_survival_avg = 0.0
 
         self.small_request_threshold = small_request_threshold
         self.major_collection_threshold = major_collection_threshold
@@ -321,6 +459,11 @@ class IncrementalMiniMarkGC(MovingGCBase):
         self.nursery_free = llmemory.NULL
         self.nursery_top  = llmemory.NULL
         self.debug_tiny_nursery = -1
+        #
+        # Allocation sampling, see _alloc_sample_start().
+        self.nursery_real_top = llmemory.NULL
+        self.alloc_sample_start = llmemory.NULL
+        self.alloc_sample_countdown = 0
         self.debug_rotating_nurseries = lltype.nullptr(NURSARRAY)
         self.extra_threshold = 0
         #
@@ -366,6 +509,28 @@ class IncrementalMiniMarkGC(MovingGCBase):
         # for more details.
         self.size_objects_made_old = r_uint(0)
         self.threshold_objects_made_old = r_uint(0)
+        #
+        # Parallel marking: the total number of marking threads, and the
+        # function run by the helper threads.
+        self.mark_threads = mark_threads
+        self.mark_workers = None
+        self.mark_worker_starting = None
+        self.AddressStackFreeList = self.AddressStack.FreeList
+        def mark_thread_main():
+            self._mark_thread_main()
+        self.mark_thread_main = mark_thread_main
+        #
+        # Background sweeping: 'sweeping_in_background' is True from the
+        # end of the marking until the mutator thread merges the results
+        # of the sweeper thread, in _finish_background_sweep().
+        self.background_sweep = background_sweep
+        self.sweeping_in_background = False
+        self.background_sweep_done = False
+        self.sweeper_free_list = None
+        self.swept_rawmalloced_objects = None
+        def sweeper_thread_main():
+            self._sweeper_thread_main()
+        self.sweeper_thread_main = sweeper_thread_main
 
 
     def setup(self):
@@ -441,9 +606,10 @@ class IncrementalMiniMarkGC(MovingGCBase):
         # up the env var, which requires the GC; and then really
         # allocate the nursery of the final size.
         if not self.read_from_env:
+            self.gc_nursery_debug = False
+            self._init_nursery_bounds(2 * (self.nonlarge_max + 1))
             self.allocate_nursery()
             self.gc_increment_step = self.nursery_size * 4
-            self.gc_nursery_debug = False
         else:
             #
             defaultsize = self.nursery_size
@@ -505,9 +671,34 @@ class IncrementalMiniMarkGC(MovingGCBase):
                 self.gc_nursery_debug = True
             else:
                 self.gc_nursery_debug = False
+            #
+            adaptive_nursery = env.read_uint_from_env(
+                'PYPY_GC_NURSERY_ADAPTIVE')
+            nursery_size_min = env.read_from_env('PYPY_GC_NURSERY_MIN')
+            if nursery_size_min > 0:
+                self.nursery_size_min = nursery_size_min
+            nursery_size_max = env.read_from_env('PYPY_GC_NURSERY_MAX')
+            if nursery_size_max > 0:
+                self.nursery_size_max = nursery_size_max
+            nursery_pause = env.read_float_from_env('PYPY_GC_NURSERY_PAUSE')
+            if nursery_pause > 0.0:
+                self.nursery_target_pause = nursery_pause / 1000.0
+            #
+            mark_threads = env.read_uint_from_env('PYPY_GC_MARK_THREADS')
+            if mark_threads > 0:
+                self.mark_threads = intmask(min(mark_threads,
+                                                r_uint(MAX_MARK_THREADS)))
+            #
+            background_sweep = env.read_uint_from_env(
+                'PYPY_GC_BACKGROUND_SWEEP')
+            if background_sweep > 0:
+                self.background_sweep = True
             self._minor_collection()    # to empty the nursery
             llarena.arena_free(self.nursery)
             self.nursery_size = newsize
+            if adaptive_nursery > 0:
+                self.adaptive_nursery = True
+            self._init_nursery_bounds(minsize)
             self.allocate_nursery()
         #
         env_max_number_of_pinned_objects = os.environ.get('PYPY_GC_MAX_PINNED')
@@ -523,6 +714,31 @@ class IncrementalMiniMarkGC(MovingGCBase):
             # Estimate this number conservatively
             bigobj = self.nonlarge_max + 1
             self.max_number_of_pinned_objects = self.nursery_size / (bigobj * 2)
+        #
+        # The helper threads for parallel marking, each with its own
+        # stack of objects to trace.  The threads themselves are only
+        # started by the first marking step that uses them.
+        self.mark_workers = None
+        self.mark_threads_pid = -1
+        i = self.mark_threads - 1
+        while i > 0:
+            stack = self.AddressStack(self.AddressStackFreeList())
+            self.mark_workers = MarkWorker(stack, self.mark_workers)
+            i -= 1
+        #
+        # The sweeper thread, started by the first major collection that
+        # uses it.  It puts the surviving raw-malloced objects in its own
+        # stack, merged into 'old_rawmalloced_objects' at the end.
+        self.sweeper_pid = -1
+        self.sweeper_start_lock = rthread.null_ll_lock
+        self.sweeper_done_lock = rthread.null_ll_lock
+        self.sweeper_gate_lock = rthread.null_ll_lock
+        self.sweeper_busy_lock = rthread.null_ll_lock
+        self.swept_rawmalloced_size = r_uint(0)
+        if self.background_sweep:
+            self.sweeper_free_list = self.AddressStackFreeList()
+            self.swept_rawmalloced_objects = self.AddressStack(
+                self.sweeper_free_list)
 
     def enable(self):
         self.enabled = True
@@ -535,7 +751,28 @@ class IncrementalMiniMarkGC(MovingGCBase):
 
     def _nursery_memory_size(self):
         extra = self.nonlarge_max + 1
-        return self.nursery_size + extra
+        return max(self.nursery_size, self.nursery_size_max) + extra
+
+    def _init_nursery_bounds(self, minsize):
+        # Called before the final allocate_nursery().  Checks the bounds
+        # of the adaptive nursery size, and puts 'nursery_size' between
+        # them.  The debugging options that hack at the nursery disable it.
+        if (not self.adaptive_nursery or self.debug_tiny_nursery >= 0 or
+                self.gc_nursery_debug):
+            self.adaptive_nursery = False
+            self.nursery_size_max = 0
+            return
+        if self.nursery_size_min <= 0:
+            self.nursery_size_min = self.nursery_size // 4
+        if self.nursery_size_max <= 0:
+            self.nursery_size_max = self.nursery_size * 4
+        self.nursery_size_min = max(self.nursery_size_min,
+                                    minsize) & ~(WORD-1)
+        self.nursery_size_max = max(self.nursery_size_max,
+                                    self.nursery_size_min) & ~(WORD-1)
+        self.nursery_size = min(max(self.nursery_size,
+                                    self.nursery_size_min),
+                                self.nursery_size_max)
 
     def _alloc_nursery(self):
         # the start of the nursery: we actually allocate a bit more for
@@ -806,6 +1043,74 @@ class IncrementalMiniMarkGC(MovingGCBase):
         self.rrc_invoke_callback()
         return rgc._encode_states(old_state, self.gc_state)
 
+    def freeze(self):
+        """Do a full collection, then move all the surviving objects to a
+        permanent generation.  The following major collections don't mark
+        these objects, and don't sweep their pages, so they never write
+        to them; after a fork(), the pages stay shared with the parent.
+        The objects are immortal: their finalizers and destructors are
+        never called.  Returns the number of objects frozen.
+
+        This reuses the logic of the prebuilt objects: a frozen object
+        gets GCFLAG_NO_HEAP_PTRS, which is only valid because all the
+        objects it points to are frozen too.  The first write into it
+        removes the flag and adds it to 'prebuilt_root_objects'.
+        """
+        self.minor_and_major_collection()
+        self.rrc_invoke_callback()
+        # the finalizers above may have allocated young objects
+        self._minor_collection()
+        ll_assert(self.gc_state == STATE_SCANNING,
+                  "freeze() outside STATE_SCANNING")
+        debug_start("gc-freeze")
+        count = self.ac.freeze(self._freeze_small_object)
+        while self.old_rawmalloced_objects.non_empty():
+            obj = self.old_rawmalloced_objects.pop()
+            self._freeze_object(obj)
+            count += 1
+        #
+        # No weakref needs to be checked if it points to a frozen object,
+        # and the frozen objects with finalizers or destructors never die.
+        # After the full collection, this includes all the objects in
+        # these lists.
+        if self.old_objects_with_weakrefs.non_empty():
+            new_with_weakref = self.AddressStack()
+            self.old_objects_with_weakrefs.foreach(
+                self._keep_weakref_to_unfrozen, new_with_weakref)
+            self.old_objects_with_weakrefs.delete()
+            self.old_objects_with_weakrefs = new_with_weakref
+        self.old_objects_with_destructors.delete()
+        self.old_objects_with_destructors = self.AddressStack()
+        self.old_objects_with_finalizers.delete()
+        self.old_objects_with_finalizers = self.AddressDeque()
+        #
+        debug_print("frozen objects:", count)
+        debug_print("bytes frozen in arenas:", self.ac.frozen_memory_used)
+        debug_stop("gc-freeze")
+        return count
+
+    def _freeze_small_object(self, hdr):
+        size_gc_header = self.gcheaderbuilder.size_gc_header
+        self._freeze_object(hdr + size_gc_header)
+
+    def _freeze_object(self, obj):
+        hdr = self.header(obj)
+        if hdr.tid & (GCFLAG_HAS_CARDS | GCFLAG_PINNED_OBJECT_PARENT_KNOWN):
+            # The card marking write barrier doesn't support
+            # GCFLAG_NO_HEAP_PTRS, and the objects pointing to pinned
+            # objects are updated when these move out of the nursery.
+            # Make them roots directly; they are marked at every major
+            # collection, like the prebuilt objects that were written to.
+            self.prebuilt_root_objects.append(obj)
+        else:
+            hdr.tid |= GCFLAG_NO_HEAP_PTRS
+
+    def _keep_weakref_to_unfrozen(self, obj, new_with_weakref):
+        offset = self.weakpointer_offset(self.get_type_id(obj))
+        pointing_to = (obj + offset).address[0]
+        if self.header(pointing_to).tid & GCFLAG_NO_HEAP_PTRS == 0:
+            new_with_weakref.append(obj)
+
     def minor_collection_with_major_progress(self, extrasize=0,
                                              force_enabled=False):
         """Do a minor collection.  Then, if the GC is enabled and there
@@ -842,6 +1147,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
                     # test_gc_set_max_heap_size in translator/c, test_newgc.py
 
                 self._minor_collection()
+                self.wait_background_sweep()
                 self.major_collection_step(extrasize)
 
         self.rrc_invoke_callback()
@@ -855,6 +1161,15 @@ class IncrementalMiniMarkGC(MovingGCBase):
         major collection, and finally reserve totalsize bytes.
         """
 
+        if self.alloc_sample_start:
+            result = self.nursery_free - totalsize
+            self._alloc_sample_stop(result)
+            self._alloc_sample_count(raw_malloc_usage(totalsize))
+            if self.nursery_free <= self.nursery_top:
+                # we only reached the next allocation sampling point
+                self._alloc_sample_start()
+                return result
+        #
         minor_collection_count = 0
         while True:
             self.nursery_free = llmemory.NULL      # debug: don't use me
@@ -920,6 +1235,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
             # Tried to do something about nursery_free overflowing
             # nursery_top before this point. Try to reserve totalsize now.
             # If this succeeds break out of loop.
+            self._alloc_sample_stop(self.nursery_free)
             result = self.nursery_free
             if self.nursery_free + totalsize <= self.nursery_top:
                 self.nursery_free = result + totalsize
@@ -931,9 +1247,55 @@ class IncrementalMiniMarkGC(MovingGCBase):
             if self.nursery_top - self.nursery_free > self.debug_tiny_nursery:
                 self.nursery_free = self.nursery_top - self.debug_tiny_nursery
         #
+        self._alloc_sample_start()
         return result
     collect_and_reserve._dont_inline_ = True
 
+    # ----------
+    # Allocation sampling: if self.hooks.get_gc_alloc_sample_interval()
+    # returns N > 0, we call self.hooks.fire_gc_alloc_sample() for the
+    # allocations that cross a multiple of N bytes allocated.  To do that
+    # without slowing down the fast path of malloc, 'nursery_top' is
+    # lowered to the next sampling point, which makes the next allocation
+    # that crosses it go to collect_and_reserve().
+
+    def _alloc_sample_start(self):
+        interval = self.hooks.get_gc_alloc_sample_interval()
+        if interval <= 0:
+            return
+        if not (0 < self.alloc_sample_countdown <= interval):
+            self.alloc_sample_countdown = interval
+        self.alloc_sample_start = self.nursery_free
+        sample_top = self.nursery_free + self.alloc_sample_countdown
+        if sample_top < self.nursery_top:
+            self.nursery_real_top = self.nursery_top
+            self.nursery_top = sample_top
+
+    def _alloc_sample_stop(self, free):
+        # Count the bytes allocated in the nursery between
+        # 'alloc_sample_start' and 'free', and undo _alloc_sample_start().
+        if self.alloc_sample_start:
+            self.alloc_sample_countdown -= (
+                llarena.getfakearenaaddress(free) -
+                llarena.getfakearenaaddress(self.alloc_sample_start))
+            self.alloc_sample_start = llmemory.NULL
+        if self.nursery_real_top:
+            self.nursery_top = self.nursery_real_top
+            self.nursery_real_top = llmemory.NULL
+
+    def _alloc_sample_count(self, size):
+        # Count an allocation of 'size' bytes, and report it if it
+        # crosses one or more sampling points.
+        self.alloc_sample_countdown -= size
+        if self.alloc_sample_countdown <= 0:
+            interval = self.hooks.get_gc_alloc_sample_interval()
+            if interval <= 0:
+                self.alloc_sample_countdown = 0
+                return
+            count = (-self.alloc_sample_countdown) // interval + 1
+            self.alloc_sample_countdown += count * interval
+            self.hooks.fire_gc_alloc_sample(size, count * interval)
+
 
     # XXX kill alloc_young and make it always True
     def external_malloc(self, typeid, length, alloc_young):
@@ -1069,6 +1431,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
         if self.is_varsize(typeid):
             offset_to_length = self.varsize_offset_to_length(typeid)
             (result + size_gc_header + offset_to_length).signed[0] = length
+        self._alloc_sample_count(raw_malloc_usage(totalsize))
         return result + size_gc_header
 
 
@@ -1091,6 +1454,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
         if self.next_major_collection_threshold < 0:
             # cannot trigger a full collection now, but we can ensure
             # that one will occur very soon
+            self._alloc_sample_stop(self.nursery_free)
             self.nursery_free = self.nursery_top
 
     def can_optimize_clean_setarrayitems(self):
@@ -1499,7 +1863,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
             # GC nowadays relies on this fact.
             self.old_objects_pointing_to_young.append(addr_struct)
             objhdr = self.header(addr_struct)
-            objhdr.tid &= ~GCFLAG_TRACK_YOUNG_PTRS
+            self._tid_clear_flag(objhdr, GCFLAG_TRACK_YOUNG_PTRS)
             #
             # Second part: if 'addr_struct' is actually a prebuilt GC
             # object and it's the first time we see a write to it, we
@@ -1532,7 +1896,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
                 #
                 # no cards, use default logic.  Mostly copied from above.
                 self.old_objects_pointing_to_young.append(addr_array)
-                objhdr.tid &= ~GCFLAG_TRACK_YOUNG_PTRS
+                self._tid_clear_flag(objhdr, GCFLAG_TRACK_YOUNG_PTRS)
                 if objhdr.tid & GCFLAG_NO_HEAP_PTRS:
                     objhdr.tid &= ~GCFLAG_NO_HEAP_PTRS
                     self.prebuilt_root_objects.append(addr_array)
@@ -1558,7 +1922,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
             #
             if objhdr.tid & GCFLAG_CARDS_SET == 0:
                 self.old_objects_with_cards_set.append(addr_array)
-                objhdr.tid |= GCFLAG_CARDS_SET
+                self._tid_set_flag(objhdr, GCFLAG_CARDS_SET)
 
         remember_young_pointer_from_array2._dont_inline_ = True
         ll_assert(self.card_page_indices > 0,
@@ -1575,13 +1939,32 @@ class IncrementalMiniMarkGC(MovingGCBase):
             objhdr = self.header(addr_array)
             if objhdr.tid & GCFLAG_HAS_CARDS:
                 self.old_objects_with_cards_set.append(addr_array)
-                objhdr.tid |= GCFLAG_CARDS_SET
+                self._tid_set_flag(objhdr, GCFLAG_CARDS_SET)
             else:
                 self.remember_young_pointer(addr_array)
 
         self.jit_remember_young_pointer_from_array = (
             jit_remember_young_pointer_from_array)
 
+    def _tid_clear_flag(self, hdr, flag):
+        # For the flags of old objects changed outside collections.  While
+        # the sweeper thread runs, it can clear GCFLAG_VISITED in the same
+        # 'tid' concurrently, so the update must be atomic.  This doesn't
+        # apply to prebuilt objects, which are not swept.
+        if (self.sweeping_in_background and
+                self.translated_to_c and we_are_translated()):
+            c_tid_and(_tid_address(hdr), ~flag)
+        else:
+            hdr.tid &= ~flag
+
+    def _tid_set_flag(self, hdr, flag):
+        # see _tid_clear_flag()
+        if (self.sweeping_in_background and
+                self.translated_to_c and we_are_translated()):
+            c_tid_or(_tid_address(hdr), flag)
+        else:
+            hdr.tid |= flag
+
     def get_card(self, obj, byteindex):
         size_gc_header = self.gcheaderbuilder.size_gc_header
         addr_byte = obj - size_gc_header
@@ -1638,7 +2021,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
         if source_hdr.tid & GCFLAG_TRACK_YOUNG_PTRS == 0:
             # there might be in source a pointer to a young object
             self.old_objects_pointing_to_young.append(dest_addr)
-            dest_hdr.tid &= ~GCFLAG_TRACK_YOUNG_PTRS
+            self._tid_clear_flag(dest_hdr, GCFLAG_TRACK_YOUNG_PTRS)
         #
         if dest_hdr.tid & GCFLAG_NO_HEAP_PTRS:
             if source_hdr.tid & GCFLAG_NO_HEAP_PTRS == 0:
@@ -1678,7 +2061,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
             dest_hdr = self.header(dest_addr)
             if dest_hdr.tid & GCFLAG_CARDS_SET == 0:
                 self.old_objects_with_cards_set.append(dest_addr)
-                dest_hdr.tid |= GCFLAG_CARDS_SET
+                self._tid_set_flag(dest_hdr, GCFLAG_CARDS_SET)
 
     def _wb_old_object_pointing_to_pinned(self, obj, ignore):
         self.write_barrier(obj)
@@ -1712,6 +2095,22 @@ class IncrementalMiniMarkGC(MovingGCBase):
         start = time.time()
         debug_start("gc-minor")
         #
+        # The sweeper thread, if it is running, must wait: we are going
+        # to change the flags of old objects and malloc() from the arenas.
+        sweeper_paused = self._pause_sweeper()
+        #
+        # 'nursery_free' is NULL if we come from collect_and_reserve(),
+        # which already did this.
+        if self.nursery_free:
+            self._alloc_sample_stop(self.nursery_free)
+        #
+        # For _adapt_nursery_size(): how much of the nursery was used.
+        if self.nursery_free:
+            self.nursery_used_size = (
+                llarena.getfakearenaaddress(self.nursery_free) - self.nursery)
+        else:
+            self.nursery_used_size = self.nursery_size
+        #
         # All nursery barriers are invalid from this point on.  They
         # are evaluated anew as part of the minor collection.
         self.nursery_barriers.delete()
@@ -1905,15 +2304,82 @@ class IncrementalMiniMarkGC(MovingGCBase):
         if self.DEBUG >= 2:
             self.debug_check_consistency()     # expensive!
         #
+        if sweeper_paused:
+            self._resume_sweeper()
         self.root_walker.finished_minor_collection()
         #
         debug_stop("gc-minor")
         duration = time.time() - start
         self.total_gc_time += duration
+        if self.adaptive_nursery:
+            self._adapt_nursery_size(duration)
         self.hooks.fire_gc_minor(
             duration=duration,
             total_memory_used=total_memory_used,
-            pinned_objects=self.pinned_objects_in_nursery)
+            pinned_objects=self.pinned_objects_in_nursery,
+            nursery_size=self.nursery_size)
+        self._alloc_sample_start()
+
+    def _adapt_nursery_size(self, duration):
+        # Called after the minor collections if 'adaptive_nursery' is set.
+        # A minor collection spends most of its time copying the surviving
+        # objects out of the nursery.  If it takes longer than the target
+        # pause, we make the nursery smaller.  If it is much shorter and few
+        # objects survive, we make it larger: the young objects have more
+        # time to die and there are fewer minor collections.  The decision
+        # uses running averages, to avoid reacting to a single collection.
+        used = self.nursery_used_size
+        if used < self.nursery_size // 2:
+            return     # not a full nursery, e.g. an explicit collection
+        survival = float(self.nursery_surviving_size) / used
+        weight = NURSERY_ADAPT_WEIGHT
+        if self.minor_duration_avg < 0.0:
+            self.minor_duration_avg = duration
+            self.nursery_survival_avg = survival
+        else:
+            self.minor_duration_avg = ((1.0 - weight) *
+                                       self.minor_duration_avg +
+                                       weight * duration)
+            self.nursery_survival_avg = ((1.0 - weight) *
+                                         self.nursery_survival_avg +
+                                         weight * survival)
+        if self.nursery_barriers.non_empty():
+            return     # there are pinned objects in the nursery
+        #
+        target = self.nursery_target_pause
+        average = self.minor_duration_avg
+        newsize = self.nursery_size
+        if average > target:
+            newsize = int(newsize * max(target / average, 0.5))
+        elif (average < target * 0.4 and
+                  self.nursery_survival_avg < NURSERY_GROW_MAX_SURVIVAL):
+            if average > 0.0:
+                newsize = int(newsize * min(0.5 * target / average, 2.0))
+            else:
+                newsize *= 2
+        newsize = min(max(newsize, self.nursery_size_min),
+                      self.nursery_size_max) & ~(WORD-1)
+        if newsize != self.nursery_size:
+            self._set_nursery_size(newsize)
+
+    def _set_nursery_size(self, newsize):
+        # Only when the nursery is empty.  It was allocated with the size
+        # 'nursery_size_max'; the rest is not used.
+        ll_assert(self.nursery_free == self.nursery, "nursery not empty")
+        ll_assert(not self.nursery_barriers.non_empty(),
+                  "pinned objects in the nursery")
+        debug_start("gc-set-nursery-size")
+        debug_print("nursery size:", self.nursery_size, "->", newsize)
+        debug_print("average minor collection:",
+                    self.minor_duration_avg, "seconds, survival rate:",
+                    self.nursery_survival_avg)
+        oldsize = self.nursery_size
+        if newsize < oldsize:
+            # give the unused part of the nursery back to the OS
+            llarena.arena_reset(self.nursery + newsize, oldsize - newsize, 4)
+        self.nursery_size = newsize
+        self.nursery_top = self.nursery + newsize
+        debug_stop("gc-set-nursery-size")
 
     def _reset_flag_old_objects_pointing_to_pinned(self, obj, ignore):
         ll_assert(self.header(obj).tid & GCFLAG_PINNED_OBJECT_PARENT_KNOWN != 0,
@@ -2302,6 +2768,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
     def gc_step_until(self, state):
         while self.gc_state != state:
             self._minor_collection()
+            self.wait_background_sweep()
             self.major_collection_step()
 
     debug_gc_step_until = gc_step_until   # xxx
@@ -2437,7 +2904,9 @@ class IncrementalMiniMarkGC(MovingGCBase):
                 if self.old_objects_with_destructors.non_empty():
                     self.deal_with_old_objects_with_destructors()
                 # objects_to_trace processed fully, can move on to sweeping
-                self.ac.mass_free_prepare()
+                background = (self.background_sweep and
+                              self._start_sweeper_thread())
+                self.ac.mass_free_prepare(background)
                 self.start_free_rawmalloc_objects()
                 #
                 # get rid of objects pointing to pinned objects that were not
@@ -2457,11 +2926,30 @@ class IncrementalMiniMarkGC(MovingGCBase):
                 #
                 self.stat_ac_arenas_count = self.ac.arenas_count
                 self.stat_rawmalloced_total_size = self.rawmalloced_total_size
+                if background:
+                    self._start_background_sweep()
                 self.gc_state = STATE_SWEEPING
             #END MARKING
         elif self.gc_state == STATE_SWEEPING:
             #
-            if self.raw_malloc_might_sweep.non_empty():
+            if self.sweeping_in_background:
+                # The sweeper thread frees the objects.  Check if it is
+                # done, without waiting for it.
+                if not self.background_sweep_done:
+                    if self.translated_to_c and we_are_translated():
+                        self.background_sweep_done = rthread.acquire_NOAUTO(
+                            self.sweeper_done_lock, False)
+                    else:
+                        # no real thread here: do a batch of its work now
+                        limit = 3 * self.nursery_size // self.ac.page_size
+                        self.background_sweep_done = (
+                            self._background_sweep_batch(limit))
+                done = self.background_sweep_done
+                if done:
+                    self._finish_background_sweep()
+                status = done and "done." or "in progress."
+                debug_print("background sweeping", status)
+            elif self.raw_malloc_might_sweep.non_empty():
                 # Walk all rawmalloced objects and free the ones that don't
                 # have the GCFLAG_VISITED flag.  Visit at most 'limit' objects.
                 # This limit is conservatively high enough to guarantee that
@@ -2573,10 +3061,11 @@ class IncrementalMiniMarkGC(MovingGCBase):
             new_list.append(obj)
 
     def _free_if_unvisited(self, hdr):
+        # also called by the sweeper thread
         size_gc_header = self.gcheaderbuilder.size_gc_header
         obj = hdr + size_gc_header
         if self.header(obj).tid & GCFLAG_VISITED:
-            self.header(obj).tid &= ~GCFLAG_VISITED
+            self._tid_clear_flag(self.header(obj), GCFLAG_VISITED)
             return False     # survives
         return True      # dies
 
@@ -2588,28 +3077,33 @@ class IncrementalMiniMarkGC(MovingGCBase):
             self.header(obj).tid &= ~check_flag   # survives
             self.old_rawmalloced_objects.append(obj)
         else:
-            size_gc_header = self.gcheaderbuilder.size_gc_header
-            totalsize = size_gc_header + self.get_size(obj)
-            allocsize = raw_malloc_usage(totalsize)
-            arena = llarena.getfakearenaaddress(obj - size_gc_header)
-            #
-            # Must also include the card marker area, if any
-            if (self.card_page_indices > 0    # <- this is constant-folded
-                and self.header(obj).tid & GCFLAG_HAS_CARDS):
-                #
-                # Get the length and compute the number of extra bytes
-                typeid = self.get_type_id(obj)
-                ll_assert(self.has_gcptr_in_varsize(typeid),
-                          "GCFLAG_HAS_CARDS but not has_gcptr_in_varsize")
-                offset_to_length = self.varsize_offset_to_length(typeid)
-                length = (obj + offset_to_length).signed[0]
-                extra_words = self.card_marking_words_for_length(length)
-                arena -= extra_words * WORD
-                allocsize += extra_words * WORD
-            #
-            llarena.arena_free(arena)
+            allocsize = self._free_rawmalloced_object(obj)
             self.rawmalloced_total_size -= r_uint(allocsize)
 
+    def _free_rawmalloced_object(self, obj):
+        # returns the number of bytes freed
+        size_gc_header = self.gcheaderbuilder.size_gc_header
+        totalsize = size_gc_header + self.get_size(obj)
+        allocsize = raw_malloc_usage(totalsize)
+        arena = llarena.getfakearenaaddress(obj - size_gc_header)
+        #
+        # Must also include the card marker area, if any
+        if (self.card_page_indices > 0    # <- this is constant-folded
+            and self.header(obj).tid & GCFLAG_HAS_CARDS):
+            #
+            # Get the length and compute the number of extra bytes
+            typeid = self.get_type_id(obj)
+            ll_assert(self.has_gcptr_in_varsize(typeid),
+                      "GCFLAG_HAS_CARDS but not has_gcptr_in_varsize")
+            offset_to_length = self.varsize_offset_to_length(typeid)
+            length = (obj + offset_to_length).signed[0]
+            extra_words = self.card_marking_words_for_length(length)
+            arena -= extra_words * WORD
+            allocsize += extra_words * WORD
+        #
+        llarena.arena_free(arena)
+        return allocsize
+
     def start_free_rawmalloc_objects(self):
         ll_assert(not self.raw_malloc_might_sweep.non_empty(),
                   "raw_malloc_might_sweep must be empty")
@@ -2626,6 +3120,141 @@ class IncrementalMiniMarkGC(MovingGCBase):
 
         return nobjects
 
+    # ----------
+    # Background sweeping
+
+    def _start_sweeper_thread(self):
+        # Start the sweeper thread, at the first major collection that
+        # uses it and again in the child process after a fork().  Returns
+        # False if it cannot be started; then the sweeping is done by the
+        # major collection steps, as usual.
+        if not (self.translated_to_c and we_are_translated()):
+            return True     # emulated by major_collection_step()
+        pid = rffi.cast(lltype.Signed, c_getpid())
+        if pid == self.sweeper_pid:
+            return True
+        self.sweeper_pid = pid
+        if not self.sweeper_start_lock:
+            # 'start_lock' and 'done_lock' start acquired, the others not
+            self.sweeper_start_lock = _allocate_gc_lock()
+            self.sweeper_done_lock = _allocate_gc_lock()
+            self.sweeper_gate_lock = _allocate_gc_lock()
+            self.sweeper_busy_lock = _allocate_gc_lock()
+            self.ac.swept_lock = _allocate_gc_lock()
+            if (self.sweeper_gate_lock and self.sweeper_busy_lock and
+                    self.ac.swept_lock):
+                rthread.release_NOAUTO(self.sweeper_gate_lock)
+                rthread.release_NOAUTO(self.sweeper_busy_lock)
+                rthread.release_NOAUTO(self.ac.swept_lock)
+        if (self.sweeper_start_lock and self.sweeper_done_lock and
+                self.sweeper_gate_lock and self.sweeper_busy_lock and
+                self.ac.swept_lock):
+            callback = llhelper(rthread.CALLBACK, self.sweeper_thread_main)
+            if rffi.cast(lltype.Signed, c_gc_thread_start(callback)) != -1:
+                rthread.acquire_NOAUTO(self.sweeper_done_lock, True)
+                return True
+        debug_start("gc-sweeper-thread")
+        debug_print("cannot start the background sweeping thread")
+        debug_stop("gc-sweeper-thread")
+        self.background_sweep = False
+        return False
+
+    def _start_background_sweep(self):
+        # At the end of the marking: let the sweeper thread free the
+        # unvisited objects in the arenas and in 'raw_malloc_might_sweep'.
+        # That stack needs its own FreeList from now on.
+        self.raw_malloc_might_sweep.free_list = self.sweeper_free_list
+        self.swept_rawmalloced_size = r_uint(0)
+        self.sweeping_in_background = True
+        self.background_sweep_done = False
+        if self.translated_to_c and we_are_translated():
+            rthread.release_NOAUTO(self.sweeper_start_lock)
+
+    def _sweeper_thread_main(self):
+        # The main function of the sweeper thread.  It runs a batch of
+        # _background_sweep_batch() only while holding 'sweeper_busy_lock',
+        # and passes through 'sweeper_gate_lock' before taking it again:
+        # the mutator thread takes both locks to pause the sweeper.
+        rthread.release_NOAUTO(self.sweeper_done_lock)
+        while True:
+            rthread.acquire_NOAUTO(self.sweeper_start_lock, True)
+            done = False
+            while not done:
+                rthread.acquire_NOAUTO(self.sweeper_gate_lock, True)
+                rthread.release_NOAUTO(self.sweeper_gate_lock)
+                rthread.acquire_NOAUTO(self.sweeper_busy_lock, True)
+                done = self._background_sweep_batch(BACKGROUND_SWEEP_BATCH)
+                rthread.release_NOAUTO(self.sweeper_busy_lock)
+            rthread.release_NOAUTO(self.sweeper_done_lock)
+
+    def _background_sweep_batch(self, max_pages):
+        # A batch of the sweeper thread's work.  It sweeps the arenas
+        # first, because malloc() can reuse the pages already swept, and
+        # then the raw-malloced objects.  Returns True when all is done.
+        # Must not touch anything that the mutator thread uses, apart
+        # from the 'tid' of the surviving objects.
+        if not self.ac.mass_free_incremental(self._free_if_unvisited,
+                                             max_pages):
+            return False
+        nobjects = max_pages * self.ac.page_size // self.small_request_threshold
+        pending = self.raw_malloc_might_sweep
+        while pending.non_empty() and nobjects > 0:
+            obj = pending.pop()
+            hdr = self.header(obj)
+            if hdr.tid & GCFLAG_VISITED:
+                self._tid_clear_flag(hdr, GCFLAG_VISITED)   # survives
+                self.swept_rawmalloced_objects.append(obj)
+            else:
+                allocsize = self._free_rawmalloced_object(obj)
+                self.swept_rawmalloced_size += r_uint(allocsize)
+            nobjects -= 1
+        return not pending.non_empty()
+
+    def _finish_background_sweep(self):
+        # Called when the sweeper thread is done: merge its results.
+        self.sweeping_in_background = False
+        self.ac.finish_background_sweep()
+        #
+        # The surviving raw-malloced objects and the ones allocated in the
+        # meantime make the new 'old_rawmalloced_objects', and the stacks
+        # go back to their FreeList.
+        survivors = self.swept_rawmalloced_objects
+        allocated = self.old_rawmalloced_objects
+        while allocated.non_empty():
+            survivors.append(allocated.pop())
+        survivors.free_list = allocated.free_list
+        allocated.free_list = self.sweeper_free_list
+        self.raw_malloc_might_sweep.free_list = survivors.free_list
+        self.old_rawmalloced_objects = survivors
+        self.swept_rawmalloced_objects = allocated
+        self.rawmalloced_total_size -= self.swept_rawmalloced_size
+
+    def wait_background_sweep(self):
+        """Wait until the sweeper thread is done with the current major
+        collection, if it is running.  The rest of the sweeping phase
+        occurs in the next major_collection_step()."""
+        if self.sweeping_in_background and not self.background_sweep_done:
+            if self.translated_to_c and we_are_translated():
+                rthread.acquire_NOAUTO(self.sweeper_done_lock, True)
+            else:
+                while not self._background_sweep_batch(BACKGROUND_SWEEP_BATCH):
+                    pass
+            self.background_sweep_done = True
+
+    def _pause_sweeper(self):
+        # Called at the start of minor collections.  Returns True if the
+        # sweeper thread was paused.
+        if (self.sweeping_in_background and
+                self.translated_to_c and we_are_translated()):
+            rthread.acquire_NOAUTO(self.sweeper_gate_lock, True)
+            rthread.acquire_NOAUTO(self.sweeper_busy_lock, True)
+            return True
+        return False
+
+    def _resume_sweeper(self):
+        rthread.release_NOAUTO(self.sweeper_busy_lock)
+        rthread.release_NOAUTO(self.sweeper_gate_lock)
+
 
     def collect_nonstack_roots(self):
         # Non-stack roots: first, the objects from 'prebuilt_root_objects'
@@ -2662,12 +3291,16 @@ class IncrementalMiniMarkGC(MovingGCBase):
     enum_live_with_finalizers._annspecialcase_ = 'specialize:arg(1)'
 
     def _collect_obj(self, obj, ignored):
+        self._collect_obj_into(obj, self.objects_to_trace)
+    _collect_obj._always_inline_ = True
+
+    def _collect_obj_into(self, obj, pending):
         # Ignore pinned objects, which are the ones still in the nursery here.
         # Cache effects: don't read any flag out of 'obj' at this point.
         # But only checking if it is in the nursery or not is fine.
         llop.debug_nonnull_pointer(lltype.Void, obj)
         if not self.is_in_nursery(obj):
-            self.objects_to_trace.append(obj)
+            pending.append(obj)
         else:
             # A pinned object can be found here. Such an object is handled
             # by minor collections and shouldn't be specially handled by
@@ -2675,13 +3308,13 @@ class IncrementalMiniMarkGC(MovingGCBase):
             # to the 'objects_to_trace' list.
             ll_assert(self._is_pinned(obj),
                       "non-pinned nursery obj in _collect_obj")
-    _collect_obj._always_inline_ = True
+    _collect_obj_into._always_inline_ = True
 
     def _collect_ref_stk(self, root):
         self._collect_obj(root.address[0], None)
 
-    def _collect_ref_rec(self, root, ignored):
-        self._collect_obj(root.address[0], None)
+    def _collect_ref_rec(self, root, pending):
+        self._collect_obj_into(root.address[0], pending)
 
     def visit_all_objects(self):
         while self.objects_to_trace.non_empty():
@@ -2690,16 +3323,144 @@ class IncrementalMiniMarkGC(MovingGCBase):
     TEST_VISIT_SINGLE_STEP = False    # for tests
 
     def visit_all_objects_step(self, size_to_track):
+        if self.mark_workers is not None and not self.TEST_VISIT_SINGLE_STEP:
+            return self.parallel_visit_objects_step(size_to_track)
+        return self.visit_objects(self.objects_to_trace, size_to_track)
+
+    def visit_objects(self, pending, size_to_track):
         # Objects can be added to pending by visit
-        pending = self.objects_to_trace
         while pending.non_empty():
             obj = pending.pop()
-            size_to_track -= self.visit(obj)
+            size_to_track -= self.visit(obj, pending)
             if size_to_track < 0 or self.TEST_VISIT_SINGLE_STEP:
                 return 0
         return size_to_track
 
-    def visit(self, obj):
+    def parallel_visit_objects_step(self, size_to_track):
+        # Like visit_objects(self.objects_to_trace, size_to_track), but
+        # with the help of the mark_workers.  Every round gives a batch
+        # of objects and an equal share of 'size_to_track' to each
+        # helper thread, while this thread continues with the rest of
+        # 'objects_to_trace'.  What the helpers did not finish goes back
+        # into 'objects_to_trace' at the end of the round.  Objects seen
+        # by several threads at once are just traced more than once:
+        # GCFLAG_VISITED is only ever set during marking, and the mutator
+        # (hence the write barrier) does not run during a step.
+        pending = self.objects_to_trace
+        while pending.non_empty():
+            share = size_to_track // self.mark_threads
+            if share <= 0 or not self._give_mark_work(pending):
+                # not enough objects to trace for the helper threads
+                # yet: visit a batch here and try again
+                i = PARALLEL_MARK_BATCH
+                while i > 0 and pending.non_empty():
+                    size_to_track -= self.visit(pending.pop(), pending)
+                    if size_to_track < 0:
+                        return 0
+                    i -= 1
+                continue
+            remaining = self._run_mark_workers(pending, share)
+            worker = self.mark_workers
+            while worker is not None:
+                remaining += worker.size_to_track
+                stack = worker.stack
+                while stack.non_empty():
+                    pending.append(stack.pop())
+                worker = worker.next
+            if remaining == 0:
+                return 0       # all threads consumed their share
+            size_to_track -= share * self.mark_threads - remaining
+        return size_to_track
+
+    def _give_mark_work(self, pending):
+        count = pending.length() // self.mark_threads
+        if count < PARALLEL_MARK_MIN or not self._start_mark_threads():
+            return False
+        if count > PARALLEL_MARK_BATCH:
+            count = PARALLEL_MARK_BATCH
+        worker = self.mark_workers
+        while worker is not None:
+            stack = worker.stack
+            i = count
+            while i > 0:
+                stack.append(pending.pop())
+                i -= 1
+            worker = worker.next
+        return True
+
+    def _start_mark_threads(self):
+        # Start the helper threads, at the first parallel marking step
+        # and again in the child process after a fork().  Returns False
+        # if they cannot be started; then parallel marking is disabled.
+        if not (self.translated_to_c and we_are_translated()):
+            return True     # emulated by _run_mark_workers()
+        pid = rffi.cast(lltype.Signed, c_getpid())
+        if pid == self.mark_threads_pid:
+            return True
+        self.mark_threads_pid = pid
+        worker = self.mark_workers
+        while worker is not None:
+            if not worker.start_lock:
+                worker.start_lock = _allocate_gc_lock()
+                worker.done_lock = _allocate_gc_lock()
+                if not worker.start_lock or not worker.done_lock:
+                    break
+            # the locks are acquired (idle threads wait on 'start_lock')
+            # both when we allocate them and after a fork()
+            self.mark_worker_starting = worker
+            callback = llhelper(rthread.CALLBACK, self.mark_thread_main)
+            if rffi.cast(lltype.Signed, c_gc_thread_start(callback)) == -1:
+                break
+            rthread.acquire_NOAUTO(worker.done_lock, True)
+            worker = worker.next
+        if worker is None:
+            return True
+        debug_start("gc-mark-threads")
+        debug_print("cannot start the parallel marking threads")
+        debug_stop("gc-mark-threads")
+        self.mark_workers = None
+        self.mark_threads = 1
+        return False
+
+    def _mark_thread_main(self):
+        # The main function of the helper threads.  Must not touch any
+        # GC object or anything shared with the other marking threads,
+        # apart from the objects' GCFLAG_VISITED.
+        worker = self.mark_worker_starting
+        rthread.release_NOAUTO(worker.done_lock)
+        while True:
+            rthread.acquire_NOAUTO(worker.start_lock, True)
+            worker.size_to_track = self.visit_objects(worker.stack,
+                                                      worker.size_to_track)
+            rthread.release_NOAUTO(worker.done_lock)
+
+    def _run_mark_workers(self, pending, share):
+        # Make the helper threads visit the objects in their own stack,
+        # and this thread those in 'pending', each up to 'share' bytes.
+        # Returns what is left of this thread's share.
+        worker = self.mark_workers
+        while worker is not None:
+            worker.size_to_track = share
+            worker = worker.next
+        if not (self.translated_to_c and we_are_translated()):
+            # no real threads here: run the helpers' work sequentially
+            worker = self.mark_workers
+            while worker is not None:
+                worker.size_to_track = self.visit_objects(worker.stack, share)
+                worker = worker.next
+            return self.visit_objects(pending, share)
+        worker = self.mark_workers
+        while worker is not None:
+            rthread.release_NOAUTO(worker.start_lock)
+            worker = worker.next
+        remaining = self.visit_objects(pending, share)
+        worker = self.mark_workers
+        while worker is not None:
+            rthread.acquire_NOAUTO(worker.done_lock, True)
+            worker = worker.next
+        return remaining
+
+    def visit(self, obj, pending):
         #
         # 'obj' is a live object.  Check GCFLAG_VISITED to know if we
         # have already seen it before.
@@ -2730,8 +3491,9 @@ class IncrementalMiniMarkGC(MovingGCBase):
         if self.has_gcptr(llop.extract_ushort(llgroup.HALFWORD, hdr.tid)):
             #
             # Trace the content of the object and put all objects it references
-            # into the 'objects_to_trace' list.
-            self.trace(obj, self._collect_ref_rec, None)
+            # into the 'pending' list ('objects_to_trace' or the stack of a
+            # parallel marking thread).
+            self.trace(obj, self._collect_ref_rec, pending)
 
         size_gc_header = self.gcheaderbuilder.size_gc_header
         totalsize = size_gc_header + self.get_size(obj)
@@ -2961,7 +3723,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
         self.visit_all_objects()
 
     def ignore_finalizer(self, obj):
-        self.header(obj).tid |= GCFLAG_IGNORE_FINALIZER
+        self._tid_set_flag(self.header(obj), GCFLAG_IGNORE_FINALIZER)
 
 
     # ----------
@@ -101,6 +101,9 @@ class BaseWalker(object):
         self.gcflag = gc.gcflag_extra
         if self.gcflag == 0:
             self.seen = AddressDict()
+        else:
+            # no other thread must change the objects' flags meanwhile
+            gc.wait_background_sweep()
         self.pending = AddressStack()
 
     def delete(self):
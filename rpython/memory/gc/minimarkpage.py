@@ -3,6 +3,7 @@ from rpython.rtyper.lltypesystem import lltype, llmemory, llarena, rffi
 from rpython.rlib.rarithmetic import LONG_BIT, r_uint
 from rpython.rlib.objectmodel import we_are_translated
 from rpython.rlib.debug import ll_assert, fatalerror
+from rpython.rlib import rthread
 
 WORD = LONG_BIT // 8
 NULL = llmemory.NULL
@@ -143,6 +144,24 @@ class ArenaCollection(object):
         self.peak_memory_used = r_uint(0)
         self.total_memory_alloced = r_uint(0)
         self.peak_memory_alloced = r_uint(0)
+        #
+        # Background sweeping: see mass_free_prepare(background=True).
+        # The pages swept so far are put in these lists until the end of
+        # the sweeping.  'swept_page_for_size' and 'swept_empty_pages'
+        # (chained via 'nextpage') are shared between the two threads and
+        # protected by 'swept_lock', if not NULL.
+        self.size_class_with_old_pages = -1     # not sweeping
+        self.sweeping_in_background = False
+        self.swept_page_for_size      = self._new_page_ptr_list(length)
+        self.swept_full_page_for_size = self._new_page_ptr_list(length)
+        self.swept_empty_pages = PAGE_NULL
+        self.swept_memory_used = r_uint(0)
+        self.swept_lock = rthread.null_ll_lock
+        #
+        # The pages moved out of the lists above by freeze(), chained via
+        # 'nextpage'.  They are never swept nor allocated from again.
+        self.frozen_pages = PAGE_NULL
+        self.frozen_memory_used = r_uint(0)
 
 
     def _new_page_ptr_list(self, length):
@@ -163,7 +182,10 @@ class ArenaCollection(object):
         size_class = nsize >> WORD_POWER_2
         page = self.page_for_size[size_class]
         if page == PAGE_NULL:
-            page = self.allocate_new_page(size_class)
+            if self.sweeping_in_background:
+                page = self.take_swept_page(size_class)
+            if page == PAGE_NULL:
+                page = self.allocate_new_page(size_class)
         #
         # The result is simply 'page.freeblock'
         result = page.freeblock
@@ -323,13 +345,19 @@ class ArenaCollection(object):
     allocate_new_arena._dont_inline_ = True
 
 
-    def mass_free_prepare(self):
+    def mass_free_prepare(self, background=False):
         """Prepare calls to mass_free_incremental(): moves the chained lists
         into 'self.old_xxx'.
+
+        With background=True, mass_free_incremental() may then be called
+        by another thread, concurrently with malloc(): it does not touch
+        the arenas nor the lists used by malloc(), and malloc() takes the
+        pages already swept with take_swept_page().  Call
+        finish_background_sweep() when mass_free_incremental() is done.
         """
         self.peak_memory_used = max(self.peak_memory_used,
                                     self.total_memory_used)
-        self.total_memory_used = r_uint(0)
+        self.total_memory_used = self.frozen_memory_used
         #
         size_class = self.small_request_threshold >> WORD_POWER_2
         self.size_class_with_old_pages = size_class
@@ -342,6 +370,8 @@ class ArenaCollection(object):
             self.page_for_size[size_class]      = PAGE_NULL
             self.full_page_for_size[size_class] = PAGE_NULL
             size_class -= 1
+        #
+        self.sweeping_in_background = background
 
 
     def mass_free_incremental(self, ok_to_free_func, max_pages):
@@ -368,7 +398,8 @@ class ArenaCollection(object):
             size_class -= 1
         #
         if size_class >= 0:
-            self._rehash_arenas_lists()
+            if not self.sweeping_in_background:
+                self._rehash_arenas_lists()
             self.size_class_with_old_pages = -1
         #
         return True
@@ -384,6 +415,64 @@ class ArenaCollection(object):
         ll_assert(res, "non-incremental mass_free_in_pages() returned False")
 
 
+    def freeze(self, freeze_func):
+        """Call freeze_func() on every object, and move all the pages in
+        use to 'frozen_pages'.  These pages are not swept by the following
+        mass_free() and malloc() no longer allocates in them, even in
+        their free blocks, so that they are not written to any more.
+        Returns the number of objects.  Must not be called between
+        mass_free_prepare() and the end of the sweeping.
+        """
+        ll_assert(self.size_class_with_old_pages < 0 and
+                  not self.sweeping_in_background,
+                  "freeze() called during sweeping")
+        count = 0
+        size_class = self.small_request_threshold >> WORD_POWER_2
+        while size_class >= 1:
+            block_size = size_class * WORD
+            page = self.page_for_size[size_class]
+            count += self._freeze_pages(page, block_size, freeze_func)
+            page = self.full_page_for_size[size_class]
+            count += self._freeze_pages(page, block_size, freeze_func)
+            self.page_for_size[size_class] = PAGE_NULL
+            self.full_page_for_size[size_class] = PAGE_NULL
+            size_class -= 1
+        return count
+
+    def _freeze_pages(self, page, block_size, freeze_func):
+        count = 0
+        while page != PAGE_NULL:
+            nextpage = page.nextpage
+            surviving = self.walk_page_readonly(page, block_size, freeze_func)
+            self.frozen_memory_used += r_uint(surviving * block_size)
+            count += surviving
+            page.nextpage = self.frozen_pages
+            self.frozen_pages = page
+            page = nextpage
+        return count
+
+    def walk_page_readonly(self, page, block_size, callback):
+        """Call callback() on all objects in a page, without changing
+        the page.  Returns the number of objects."""
+        freeblock = page.freeblock
+        obj = llarena.getfakearenaaddress(llmemory.cast_ptr_to_adr(page))
+        obj += self.hdrsize
+        count = 0
+        skip_free_blocks = page.nfree
+        #
+        while True:
+            if obj == freeblock:
+                if skip_free_blocks == 0:
+                    break     # the first uninitialized block, or the end
+                skip_free_blocks -= 1
+                freeblock = obj.address[0]
+            else:
+                callback(obj)
+                count += 1
+            obj += block_size
+        return count
+
+
     def _rehash_arenas_lists(self):
         #
         # Rehash arenas into the correct arenas_lists[i].  If
@@ -428,8 +517,13 @@ class ArenaCollection(object):
     def mass_free_in_pages(self, size_class, ok_to_free_func, max_pages):
         nblocks = self.nblocks_for_size[size_class]
         block_size = size_class * WORD
-        remaining_partial_pages = self.page_for_size[size_class]
-        remaining_full_pages = self.full_page_for_size[size_class]
+        background = self.sweeping_in_background
+        if background:
+            remaining_partial_pages = PAGE_NULL    # not used
+            remaining_full_pages = PAGE_NULL
+        else:
+            remaining_partial_pages = self.page_for_size[size_class]
+            remaining_full_pages = self.full_page_for_size[size_class]
         #
         step = 0
         while step < 2:
@@ -446,7 +540,12 @@ class ArenaCollection(object):
                 surviving = self.walk_page(page, block_size, ok_to_free_func)
                 nextpage = page.nextpage
                 #
-                if surviving == nblocks:
+                if background:
+                    #
+                    # Hand the page over to the thread running malloc().
+                    self._add_swept_page(page, size_class, surviving, nblocks)
+                    #
+                elif surviving == nblocks:
                     #
                     # The page is still full.  Re-insert it in the
                     # 'remaining_full_pages' chained list.
@@ -483,11 +582,113 @@ class ArenaCollection(object):
             else:
                 step += 1
         #
-        self.page_for_size[size_class] = remaining_partial_pages
-        self.full_page_for_size[size_class] = remaining_full_pages
+        if not background:
+            self.page_for_size[size_class] = remaining_partial_pages
+            self.full_page_for_size[size_class] = remaining_full_pages
         return max_pages
 
 
+    def _add_swept_page(self, page, size_class, surviving, nblocks):
+        # Background sweeping: put the swept 'page' in the 'swept_xxx'
+        # lists.  Completely freed pages are not given back to their arena
+        # here, because the arenas belong to the thread running malloc().
+        if surviving == nblocks:
+            # only used by finish_background_sweep(): no lock needed
+            page.nextpage = self.swept_full_page_for_size[size_class]
+            self.swept_full_page_for_size[size_class] = page
+            return
+        self._acquire_swept_lock()
+        if surviving > 0:
+            page.nextpage = self.swept_page_for_size[size_class]
+            self.swept_page_for_size[size_class] = page
+        else:
+            page.nextpage = self.swept_empty_pages
+            self.swept_empty_pages = page
+        self._release_swept_lock()
+
+
+    def take_swept_page(self, size_class):
+        """Background sweeping: return a page for 'size_class' among the
+        ones that have already been swept, or PAGE_NULL.  The page is
+        installed in 'page_for_size[size_class]', like allocate_new_page()
+        does.
+        """
+        self._acquire_swept_lock()
+        page = self.swept_page_for_size[size_class]
+        if page != PAGE_NULL:
+            self.swept_page_for_size[size_class] = page.nextpage
+            self._release_swept_lock()
+        else:
+            page = self.swept_empty_pages
+            if page != PAGE_NULL:
+                self.swept_empty_pages = page.nextpage
+            self._release_swept_lock()
+            if page == PAGE_NULL:
+                return PAGE_NULL
+            #
+            # Reuse the empty page for 'size_class'.
+            arena = page.arena
+            pageaddr = llmemory.cast_ptr_to_adr(page)
+            pageaddr = llarena.getfakearenaaddress(pageaddr)
+            llarena.arena_reset(pageaddr, self.page_size, 0)
+            llarena.arena_reserve(pageaddr, llmemory.sizeof(PAGE_HEADER))
+            page = llmemory.cast_adr_to_ptr(pageaddr, PAGE_PTR)
+            page.arena = arena
+            page.nfree = 0
+            page.freeblock = pageaddr + self.hdrsize
+        page.nextpage = PAGE_NULL
+        ll_assert(self.page_for_size[size_class] == PAGE_NULL,
+                  "take_swept_page() called but a page is already waiting")
+        self.page_for_size[size_class] = page
+        return page
+
+
+    def finish_background_sweep(self):
+        """Called when mass_free_incremental() is done, after
+        mass_free_prepare(background=True): gives the swept pages back
+        to malloc() and the free pages back to their arena.
+        """
+        size_class = self.small_request_threshold >> WORD_POWER_2
+        while size_class >= 1:
+            page = self.swept_page_for_size[size_class]
+            self.swept_page_for_size[size_class] = PAGE_NULL
+            while page != PAGE_NULL:
+                nextpage = page.nextpage
+                page.nextpage = self.page_for_size[size_class]
+                self.page_for_size[size_class] = page
+                page = nextpage
+            #
+            page = self.swept_full_page_for_size[size_class]
+            self.swept_full_page_for_size[size_class] = PAGE_NULL
+            while page != PAGE_NULL:
+                nextpage = page.nextpage
+                page.nextpage = self.full_page_for_size[size_class]
+                self.full_page_for_size[size_class] = page
+                page = nextpage
+            size_class -= 1
+        #
+        page = self.swept_empty_pages
+        self.swept_empty_pages = PAGE_NULL
+        while page != PAGE_NULL:
+            nextpage = page.nextpage
+            self.free_page(page)
+            page = nextpage
+        #
+        self._rehash_arenas_lists()
+        self.total_memory_used += self.swept_memory_used
+        self.swept_memory_used = r_uint(0)
+        self.sweeping_in_background = False
+
+
+    def _acquire_swept_lock(self):
+        if self.swept_lock:
+            rthread.acquire_NOAUTO(self.swept_lock, True)
+
+    def _release_swept_lock(self):
+        if self.swept_lock:
+            rthread.release_NOAUTO(self.swept_lock)
+
+
     def free_page(self, page):
         """Free a whole page."""
         #
@@ -562,7 +763,10 @@ class ArenaCollection(object):
             obj += block_size
         #
         # Update the global total size of objects.
-        self.total_memory_used += r_uint(surviving * block_size)
+        if self.sweeping_in_background:
+            self.swept_memory_used += r_uint(surviving * block_size)
+        else:
+            self.total_memory_used += r_uint(surviving * block_size)
         #
         # Return the number of surviving objects.
         return surviving
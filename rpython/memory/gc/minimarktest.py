@@ -21,6 +21,8 @@ class SimpleArenaCollection(object):
         self.all_objects = []
         self.total_memory_used = 0
         self.arenas_count = 0
+        self.frozen_objects = []
+        self.frozen_memory_used = 0
 
     def malloc(self, size):
         nsize = raw_malloc_usage(size)
@@ -34,10 +36,12 @@ class SimpleArenaCollection(object):
         self.total_memory_used += nsize
         return result
 
-    def mass_free_prepare(self):
+    def mass_free_prepare(self, background=False):
+        # 'background' makes no difference here: the objects that survive
+        # are immediately available again
         self.old_all_objects = self.all_objects
         self.all_objects = []
-        self.total_memory_used = 0
+        self.total_memory_used = self.frozen_memory_used
 
     def mass_free_incremental(self, ok_to_free_func, max_pages):
         old = self.old_all_objects
@@ -53,6 +57,18 @@ class SimpleArenaCollection(object):
                 return False
         return True
 
+    def finish_background_sweep(self):
+        pass
+
+    def freeze(self, freeze_func):
+        for rawobj, nsize in self.all_objects:
+            freeze_func(rawobj)
+            self.frozen_memory_used += nsize
+        count = len(self.all_objects)
+        self.frozen_objects.extend(self.all_objects)
+        self.all_objects = []
+        return count
+
     def mass_free(self, ok_to_free_func):
         self.mass_free_prepare()
         res = self.mass_free_incremental(ok_to_free_func, sys.maxint)
@@ -13,6 +13,7 @@ from rpython.rlib.rarithmetic import LONG_BIT, is_valid_int
 from rpython.memory.gc import minimark, incminimark
 from rpython.memory.gctypelayout import zero_gc_pointers_inside, zero_gc_pointers
 from rpython.rlib.debug import debug_print
+from rpython.rlib import rgc
 from rpython.rlib.test.test_debug import debuglog
 import pdb
 WORD = LONG_BIT // 8
@@ -844,3 +845,333 @@ class TestIncrementalMiniMarkGCFull(DirectGCTest):
             (incminimark.STATE_SWEEPING, incminimark.STATE_FINALIZING),
             (incminimark.STATE_FINALIZING, incminimark.STATE_SCANNING)
             ]
+
+
+    def test_freeze(self):
+        self.make_lists(3, 10)
+        large = self.malloc(VAR, 1000)      # raw-malloced
+        self.stackroots.append(large)
+        count = self.gc.freeze()
+        assert count >= 3 * 10 + 2
+        assert self.gc.freeze() == 0
+        array = self.stackroots[0]
+        p = array[0]
+        tids = []
+        for obj in [array, p, p.next, self.stackroots[1]]:
+            hdr = self.gc.header(llmemory.cast_ptr_to_adr(obj))
+            assert hdr.tid & incminimark.GCFLAG_NO_HEAP_PTRS
+            tids.append((hdr, hdr.tid))
+        #
+        # the following collections don't mark or sweep the frozen objects
+        # and don't modify their header, even if they are no longer
+        # reachable
+        del self.stackroots[:]
+        for i in range(3):
+            self.malloc(S)
+            self.gc.collect()
+        for hdr, tid in tids:
+            assert hdr.tid == tid
+        assert p.next.x == 8
+        assert len(large) == 1000
+
+    def test_freeze_pages(self):
+        self.make_lists(2, 10)
+        ac = self.gc.ac
+        self.gc.freeze()
+        assert ac.frozen_pages
+        assert ac.frozen_memory_used > 0
+        nsizes = ac.small_request_threshold // WORD + 1
+        for size_class in range(1, nsizes):
+            assert not ac.page_for_size[size_class]
+            assert not ac.full_page_for_size[size_class]
+        memory = self.gc.get_total_memory_used()
+        self.gc.collect()
+        assert self.gc.get_total_memory_used() == memory
+        # new objects don't go into the frozen pages
+        self.push_item(0, 100)
+        self.gc.collect()
+        assert any([ac.page_for_size[i] or ac.full_page_for_size[i]
+                    for i in range(1, nsizes)])
+        assert self.gc.get_total_memory_used() > memory
+
+    def test_freeze_then_write(self):
+        self.make_lists(3, 10)
+        self.gc.freeze()
+        # writing a young object into a frozen object makes it a root
+        for i in range(3):
+            for x in range(10, 20):
+                self.push_item(i, i * 20 + x)
+        array = self.stackroots[0]
+        hdr = self.gc.header(llmemory.cast_ptr_to_adr(array))
+        assert hdr.tid & incminimark.GCFLAG_NO_HEAP_PTRS == 0
+        assert self.gc.prebuilt_root_objects.tolist().count(
+            llmemory.cast_ptr_to_adr(array)) == 1
+        del self.stackroots[:]
+        self.gc.collect()
+        self.gc.collect()
+        self.stackroots.append(array)
+        for i in range(3):
+            p = array[i]
+            for x in range(19, 9, -1):
+                assert p.x == i * 20 + x
+                p = p.next
+            for j in range(9, -1, -1):
+                assert p.x == i * 10 + j
+                p = p.next
+            assert not p
+
+    def test_freeze_write_during_marking(self):
+        self.make_lists(1, 2)
+        self.gc.freeze()
+        q = self.malloc(S)
+        q.next = self.malloc(S)
+        q.next.x = 42
+        self.stackroots.append(q)
+        self.gc.collect()
+        self.gc.debug_gc_step_until(incminimark.STATE_MARKING)
+        # the roots are scanned, but 'q' is not traced yet.  Move the only
+        # reference to 'q.next' into the frozen 'array'
+        q = self.stackroots.pop()
+        array = self.stackroots[0]
+        self.writearray(array, 0, q.next)
+        self.write(q, 'next', lltype.nullptr(S))
+        del q
+        self.gc.debug_gc_step_until(incminimark.STATE_SCANNING)
+        self.gc.collect()
+        assert array[0].x == 42
+
+    def make_lists(self, n, length):
+        # an array of 'n' linked lists of 'length' objects each
+        array = self.malloc(VAR, n)
+        self.stackroots.append(array)
+        for i in range(n):
+            for j in range(length):
+                self.push_item(i, i * length + j)
+
+    def push_item(self, i, x):
+        q = self.malloc(S)
+        q.x = x
+        array = self.stackroots[-1]
+        q.next = array[i]
+        self.writearray(array, i, q)
+
+    def check_lists(self, n, length):
+        array = self.stackroots[-1]
+        for i in range(n):
+            p = array[i]
+            for j in range(length - 1, -1, -1):
+                assert p.x == i * length + j
+                p = p.next
+            assert not p
+
+
+class TestIncrementalMiniMarkGCParallelMark(TestIncrementalMiniMarkGCFull):
+    GC_PARAMS = {'mark_threads': 4}
+
+    def setup_method(self, meth):
+        TestIncrementalMiniMarkGCFull.setup_method(self, meth)
+        # the threads are emulated here; count the rounds of parallel
+        # marking and make them happen with small heaps too
+        self.mark_rounds = 0
+        run_mark_workers = self.gc._run_mark_workers
+        def counting_run_mark_workers(pending, share):
+            self.mark_rounds += 1
+            return run_mark_workers(pending, share)
+        self.gc._run_mark_workers = counting_run_mark_workers
+        self.orig_parallel_mark_min = incminimark.PARALLEL_MARK_MIN
+        incminimark.PARALLEL_MARK_MIN = 2
+
+    def teardown_method(self, meth):
+        incminimark.PARALLEL_MARK_MIN = self.orig_parallel_mark_min
+
+    def test_parallel_mark_full_collect(self):
+        assert self.gc.mark_threads == 4
+        self.make_lists(20, 8)
+        self.gc.collect()
+        assert self.mark_rounds > 0
+        self.check_lists(20, 8)
+        self.gc.collect()
+        self.check_lists(20, 8)
+
+    def test_parallel_mark_steps(self):
+        # the last list is changed by the mutator between the steps
+        self.make_lists(21, 8)
+        self.gc.collect()
+        self.gc.gc_increment_step = 200
+        self.mark_rounds = 0
+        count = 0
+        while True:
+            val = self.gc.collect_step()
+            self.push_item(20, 1000 + count)
+            count += 1
+            if rgc.is_done(val):
+                break
+        assert self.mark_rounds > 1
+        self.check_lists(20, 8)
+        p = self.stackroots[-1][20]
+        for i in range(count - 1, -1, -1):
+            assert p.x == 1000 + i
+            p = p.next
+        assert p.x == 167
+
+    def test_no_helper_threads(self):
+        self.gc.mark_threads = 1
+        self.gc.setup()
+        assert self.gc.mark_workers is None
+
+
+class TestIncrementalMiniMarkGCBackgroundSweep(TestIncrementalMiniMarkGCFull):
+    # the sweeper thread is emulated here: every major collection step
+    # in STATE_SWEEPING runs one batch of its work
+    GC_PARAMS = {'background_sweep': True}
+
+    def test_background_sweep_steps(self):
+        self.make_lists(20, 8)
+        self.gc.collect()
+        array = self.stackroots[-1]
+        for i in range(0, 20, 2):
+            self.writearray(array, i, lltype.nullptr(S))
+        #
+        swept_pages_taken = []
+        take_swept_page = self.gc.ac.take_swept_page
+        def counting_take_swept_page(size_class):
+            page = take_swept_page(size_class)
+            swept_pages_taken.append(bool(page))
+            return page
+        self.gc.ac.take_swept_page = counting_take_swept_page
+        sweeping_steps = 0
+        count = 0
+        while True:
+            val = self.gc.collect_step()
+            if self.gc.gc_state == incminimark.STATE_SWEEPING:
+                assert self.gc.sweeping_in_background
+                assert self.gc.ac.sweeping_in_background
+                sweeping_steps += 1
+            self.push_item(1, 1000 + count)
+            count += 1
+            if rgc.is_done(val):
+                break
+        assert sweeping_steps > 1
+        assert True in swept_pages_taken
+        assert not self.gc.sweeping_in_background
+        assert not self.gc.ac.sweeping_in_background
+        #
+        array = self.stackroots[-1]
+        for i in range(1, 20, 2):
+            p = array[i]
+            if i == 1:
+                for j in range(count - 1, -1, -1):
+                    assert p.x == 1000 + j
+                    p = p.next
+            for j in range(7, -1, -1):
+                assert p.x == i * 8 + j
+                p = p.next
+            assert not p
+        #
+        # the sizes computed by the sweeper are merged at the end
+        self.gc.collect()
+        size_of_s = (self.gc.gcheaderbuilder.size_gc_header +
+                     llmemory.sizeof(S))
+        size_of_s = llmemory.raw_malloc_usage(size_of_s)
+        assert self.gc.ac.total_memory_used == (80 + count) * size_of_s
+
+    def test_background_sweep_rawmalloced(self):
+        VARS = lltype.GcArray(lltype.Ptr(VAR))
+        self.stackroots.append(self.malloc(VARS, 10))
+        for i in range(10):
+            self.writearray(self.stackroots[-1], i, self.malloc(VAR, 10))
+        self.gc.collect()
+        assert self.gc.old_rawmalloced_objects.length() == 11
+        size_before = self.gc.rawmalloced_total_size
+        for i in range(0, 10, 2):
+            self.writearray(self.stackroots[-1], i, lltype.nullptr(VAR))
+        while True:
+            val = self.gc.collect_step()
+            if self.gc.gc_state == incminimark.STATE_SWEEPING:
+                # freed by the sweeper thread, but not accounted for yet
+                assert self.gc.rawmalloced_total_size == size_before
+            if rgc.is_done(val):
+                break
+        assert self.gc.rawmalloced_total_size == size_before * 6 // 11
+        assert self.gc.old_rawmalloced_objects.length() == 6
+        for i in range(1, 10, 2):
+            assert len(self.stackroots[-1][i]) == 10
+        # the stacks are back with their own FreeList
+        shared_free_list = self.gc.old_rawmalloced_objects.free_list
+        assert self.gc.raw_malloc_might_sweep.free_list is shared_free_list
+        assert (self.gc.swept_rawmalloced_objects.free_list is
+                self.gc.sweeper_free_list)
+        assert shared_free_list is not self.gc.sweeper_free_list
+
+    def test_wait_background_sweep(self):
+        self.make_lists(20, 8)
+        self.gc.collect()
+        self.gc.gc_step_until(incminimark.STATE_SWEEPING)
+        assert self.gc.sweeping_in_background
+        assert not self.gc.background_sweep_done
+        self.gc.wait_background_sweep()
+        assert self.gc.background_sweep_done
+        assert self.gc.gc_state == incminimark.STATE_SWEEPING
+        self.gc.debug_gc_step()
+        assert self.gc.gc_state == incminimark.STATE_FINALIZING
+        assert not self.gc.sweeping_in_background
+        self.check_lists(20, 8)
+
+
+class TestIncrementalMiniMarkGCAdaptiveNursery(TestIncrementalMiniMarkGCFull):
+    GC_PARAMS = {'adaptive_nursery': True,
+                 'nursery_size_min': 16*WORD,
+                 'nursery_size_max': 128*WORD}
+
+    def fill_nursery(self, keep_alive):
+        start = self.gc.nursery_size // 2
+        while self.gc.nursery_free - self.gc.nursery < start:
+            p = self.malloc(S)
+            if keep_alive:
+                self.stackroots.append(p)
+        self.gc._minor_collection()
+
+    def test_nursery_grows(self):
+        self.gc.nursery_target_pause = 1000.0
+        for i in range(10):
+            self.fill_nursery(keep_alive=False)
+        assert self.gc.nursery_size == 128*WORD
+        assert self.gc.nursery_top == self.gc.nursery + 128*WORD
+        # more than the initial 32*WORD are usable before the next minor
+        # collection
+        size_of_s = llmemory.raw_malloc_usage(
+            self.gc.gcheaderbuilder.size_gc_header + llmemory.sizeof(S))
+        for i in range(20):
+            self.stackroots.append(self.malloc(S))
+            self.stackroots[-1].x = i
+        assert self.gc.nursery_free - self.gc.nursery == 20 * size_of_s
+        self.gc.collect()
+        for i in range(20):
+            assert self.stackroots[i].x == i
+
+    def test_nursery_shrinks(self):
+        self.make_lists(10, 8)
+        self.gc.nursery_target_pause = 1e-9
+        for i in range(10):
+            self.fill_nursery(keep_alive=True)
+        assert self.gc.nursery_size == 16*WORD
+        assert self.gc.nursery_top == self.gc.nursery + 16*WORD
+        del self.stackroots[1:]
+        self.check_lists(10, 8)
+
+    def test_nursery_does_not_grow_if_objects_survive(self):
+        self.gc.nursery_target_pause = 1000.0
+        size = self.gc.nursery_size
+        for i in range(10):
+            self.fill_nursery(keep_alive=True)
+        assert self.gc.nursery_size == size
+        assert self.gc.nursery_survival_avg > 0.5
+
+    def test_explicit_minor_collections_are_ignored(self):
+        self.gc.nursery_target_pause = 1000.0
+        size = self.gc.nursery_size
+        for i in range(10):
+            self.malloc(S)
+            self.gc._minor_collection()
+        assert self.gc.nursery_size == size
+        assert self.gc.minor_duration_avg < 0.0
@@ -1,6 +1,6 @@
 from rpython.rtyper.lltypesystem import lltype, llmemory
 from rpython.memory.gc.hook import GcHooks
-from rpython.memory.gc.test.test_direct import BaseDirectGCTest, S
+from rpython.memory.gc.test.test_direct import BaseDirectGCTest, S, VAR
 
 
 class MyGcHooks(GcHooks):
@@ -10,6 +10,7 @@ class MyGcHooks(GcHooks):
         self._gc_minor_enabled = False
         self._gc_collect_step_enabled = False
         self._gc_collect_enabled = False
+        self._gc_alloc_sample_interval = 0
         self.reset()
 
     def is_gc_minor_enabled(self):
@@ -21,17 +22,23 @@ class MyGcHooks(GcHooks):
     def is_gc_collect_enabled(self):
         return self._gc_collect_enabled
 
+    def get_gc_alloc_sample_interval(self):
+        return self._gc_alloc_sample_interval
+
     def reset(self):
         self.minors = []
         self.steps = []
         self.collects = []
+        self.alloc_samples = []
         self.durations = []
 
-    def on_gc_minor(self, duration, total_memory_used, pinned_objects):
+    def on_gc_minor(self, duration, total_memory_used, pinned_objects,
+                    nursery_size):
         self.durations.append(duration)
         self.minors.append({
             'total_memory_used': total_memory_used,
-            'pinned_objects': pinned_objects})
+            'pinned_objects': pinned_objects,
+            'nursery_size': nursery_size})
 
     def on_gc_collect_step(self, duration, oldstate, newstate):
         self.durations.append(duration)
@@ -51,6 +58,9 @@ class MyGcHooks(GcHooks):
             'rawmalloc_bytes_before': rawmalloc_bytes_before,
             'rawmalloc_bytes_after': rawmalloc_bytes_after})
 
+    def on_gc_alloc_sample(self, size, sampled_bytes):
+        self.alloc_samples.append((size, sampled_bytes))
+
 
 class TestIncMiniMarkHooks(BaseDirectGCTest):
     from rpython.memory.gc.incminimark import IncrementalMiniMarkGC as GCClass
@@ -68,7 +78,8 @@ class TestIncMiniMarkHooks(BaseDirectGCTest):
         self.malloc(S)
         self.gc._minor_collection()
         assert self.gc.hooks.minors == [
-            {'total_memory_used': 0, 'pinned_objects': 0}
+            {'total_memory_used': 0, 'pinned_objects': 0,
+             'nursery_size': self.gc.nursery_size}
             ]
         assert self.gc.hooks.durations[0] > 0.
         self.gc.hooks.reset()
@@ -78,9 +89,23 @@ class TestIncMiniMarkHooks(BaseDirectGCTest):
         self.stackroots.append(self.malloc(S))
         self.gc._minor_collection()
         assert self.gc.hooks.minors == [
-            {'total_memory_used': self.size_of_S*2, 'pinned_objects': 0}
+            {'total_memory_used': self.size_of_S*2, 'pinned_objects': 0,
+             'nursery_size': self.gc.nursery_size}
             ]
 
+    def test_on_gc_minor_nursery_size(self):
+        # the hook reports the nursery size chosen by the adaptive policy
+        self.gc.hooks._gc_minor_enabled = True
+        self.gc.adaptive_nursery = True
+        self.gc.nursery_size_min = self.gc.nursery_size // 2
+        self.gc.nursery_size_max = self.gc.nursery_size
+        self.gc.nursery_target_pause = 1e-9    # always too long
+        while self.gc.nursery_free - self.gc.nursery < self.gc.nursery_size // 2:
+            self.malloc(S)
+        self.gc._minor_collection()
+        assert self.gc.nursery_size == self.gc.nursery_size_min
+        assert self.gc.hooks.minors[-1]['nursery_size'] == self.gc.nursery_size
+
     def test_on_gc_collect(self):
         from rpython.memory.gc import incminimark as m
         self.gc.hooks._gc_collect_step_enabled = True
@@ -117,9 +142,44 @@ class TestIncMiniMarkHooks(BaseDirectGCTest):
              'rawmalloc_bytes_before': 0}
             ]
 
+    def test_on_gc_alloc_sample(self):
+        interval = 3 * self.size_of_S
+        self.gc.hooks._gc_alloc_sample_interval = interval
+        self.gc._minor_collection()
+        assert self.gc.nursery_top == self.gc.nursery_free + interval
+        # this does a few minor collections too
+        for i in range(100):
+            self.malloc(S)
+        # the 4th, 7th, ... 100th objects cross the sampling points
+        assert self.gc.hooks.alloc_samples == [(self.size_of_S, interval)] * 33
+        assert self.gc.nursery_real_top == self.gc.nursery + self.gc.nursery_size
+        #
+        self.gc.hooks._gc_alloc_sample_interval = 0
+        self.gc._minor_collection()
+        assert not self.gc.nursery_real_top
+        assert self.gc.nursery_top == self.gc.nursery + self.gc.nursery_size
+        for i in range(100):
+            self.malloc(S)
+        assert len(self.gc.hooks.alloc_samples) == 33
+
+    def test_on_gc_alloc_sample_external(self):
+        interval = 3 * self.size_of_S
+        self.gc.hooks._gc_alloc_sample_interval = interval
+        self.gc._minor_collection()
+        n = self.gc.nonlarge_max + 1
+        self.malloc(VAR, n)      # too big for the nursery
+        [(size, sampled_bytes)] = self.gc.hooks.alloc_samples
+        assert size > n
+        assert sampled_bytes == interval * ((size - interval) // interval + 1)
+        assert 0 < self.gc.alloc_sample_countdown <= interval
+
     def test_hook_disabled(self):
         self.gc._minor_collection()
         self.gc.collect()
+        for i in range(100):
+            self.malloc(S)
         assert self.gc.hooks.minors == []
         assert self.gc.hooks.steps == []
         assert self.gc.hooks.collects == []
+        assert self.gc.hooks.alloc_samples == []
+        assert not self.gc.nursery_real_top
@@ -368,6 +368,34 @@ def test_mass_free_half_page_remains():
     assert freepages(ac) == NULL
     assert ac.full_page_for_size[2] == PAGE_NULL
 
+def test_freeze():
+    pagesize = hdrsize + 24*WORD
+    ac = arena_collection_for_test(pagesize, "/# ", fill_with_objects=2)
+    page0 = getpage(ac, 0)
+    page1 = getpage(ac, 1)
+    assert page0.nfree == 4
+    #
+    frozen = OkToFree(ac, False)
+    assert ac.freeze(frozen) == 4 + 12
+    assert sorted(frozen.seen) == ([hdrsize + i*WORD for i in range(0, 16, 4)]
+                                   + [pagesize + hdrsize + i*WORD
+                                      for i in range(0, 24, 2)])
+    assert ac.page_for_size[2] == PAGE_NULL
+    assert ac.full_page_for_size[2] == PAGE_NULL
+    assert sorted([ac.frozen_pages, ac.frozen_pages.nextpage]) == (
+        sorted([page0, page1]))
+    assert ac.frozen_memory_used == 16 * 2*WORD
+    # the pages are unchanged, and not swept any more
+    assert page0.nfree == 4
+    ok_to_free = OkToFree(ac, True)
+    ac.mass_free(ok_to_free)
+    assert ok_to_free.seen == {}
+    assert page0.nfree == 4
+    assert ac.total_memory_used == 16 * 2*WORD
+    # malloc() does not reuse the free blocks of the frozen pages
+    obj = ac.malloc(2*WORD)
+    assert obj == pagenum(ac, 2) + hdrsize
+
 def test_mass_free_half_page_becomes_more_free():
     pagesize = hdrsize + 24*WORD
     ac = arena_collection_for_test(pagesize, "/", fill_with_objects=2)
@@ -400,9 +428,64 @@ def test_mass_free_half_page_becomes_more_free():
     assert freepages(ac) == NULL
     assert ac.full_page_for_size[2] == PAGE_NULL
 
+def test_mass_free_background():
+    pagesize = hdrsize + 7*WORD
+    ac = arena_collection_for_test(pagesize, "22", fill_with_objects=2)
+    page0 = getpage(ac, 0)
+    page1 = getpage(ac, 1)
+    ok_to_free = OkToFree(ac, lambda addr: addr - ac._startpageaddr < pagesize)
+    ac.mass_free_prepare(background=True)
+    assert ac.sweeping_in_background
+    assert ac.page_for_size[2] == PAGE_NULL
+    assert not ac.mass_free_incremental(ok_to_free, 1)
+    assert ok_to_free.seen == {hdrsize + 0*WORD: True,
+                               hdrsize + 2*WORD: True}
+    # the emptied page is not given back to the arena yet...
+    assert ac.swept_empty_pages == page0
+    assert freepages(ac) == NULL
+    # ...but malloc() can reuse it
+    obj = ac.malloc(2*WORD)
+    assert obj == pagenum(ac, 0) + hdrsize
+    page0 = getpage(ac, 0)     # a new PAGE_HEADER
+    assert ac.page_for_size[2] == page0
+    assert ac.swept_empty_pages == PAGE_NULL
+    assert ac.total_memory_used == 2*WORD
+    #
+    assert ac.mass_free_incremental(ok_to_free, 10)
+    assert ac.swept_page_for_size[2] == page1
+    assert ac.page_for_size[2] == page0
+    assert ac.total_memory_used == 2*WORD
+    assert ac.swept_memory_used == 4*WORD
+    #
+    ac.finish_background_sweep()
+    assert not ac.sweeping_in_background
+    assert ac.page_for_size[2] == page1
+    assert page1.nextpage == page0
+    assert page0.nextpage == PAGE_NULL
+    assert ac.swept_page_for_size[2] == PAGE_NULL
+    assert ac.total_memory_used == 6*WORD
+
+def test_mass_free_background_frees_pages_at_the_end():
+    pagesize = hdrsize + 7*WORD
+    ac = arena_collection_for_test(pagesize, "#2", fill_with_objects=2)
+    ok_to_free = OkToFree(ac, lambda addr: addr - ac._startpageaddr >= pagesize)
+    ac.mass_free_prepare(background=True)
+    assert ac.mass_free_incremental(ok_to_free, 10)
+    assert ac.swept_full_page_for_size[2] == getpage(ac, 0)
+    assert ac.swept_empty_pages == getpage(ac, 1)
+    assert ac.full_page_for_size[2] == PAGE_NULL
+    assert freepages(ac) == NULL
+    #
+    ac.finish_background_sweep()
+    assert ac.full_page_for_size[2] == getpage(ac, 0)
+    assert ac.swept_full_page_for_size[2] == PAGE_NULL
+    assert ac.swept_empty_pages == PAGE_NULL
+    assert freepages(ac) == pagenum(ac, 1)
+    assert ac.total_memory_used == 6*WORD
+
 # ____________________________________________________________
 
-def test_random(incremental=False):
+def test_random(incremental=False, background=False):
     import random
     pagesize = hdrsize + 24*WORD
     num_pages = 3
@@ -451,13 +534,15 @@ def test_random(incremental=False):
             if not incremental:
                 ac.mass_free(ok_to_free)
             else:
-                ac.mass_free_prepare()
+                ac.mass_free_prepare(background=background)
                 while not ac.mass_free_incremental(ok_to_free,
                                                    random.randrange(1, 3)):
                     print '[]'
                     prev = ac.total_memory_used
                     allocate_object(live_objects_extra)
                     fresh_extra += ac.total_memory_used - prev
+                if background:
+                    ac.finish_background_sweep()
             #
             # Check that we have seen all objects
             assert sorted(ok_to_free.seen) == sorted(live_objects)
@@ -477,3 +562,6 @@ def test_random(incremental=False):
 
 def test_random_incremental():
     test_random(incremental=True)
+
+def test_random_background():
+    test_random(incremental=True, background=True)
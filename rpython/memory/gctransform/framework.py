@@ -311,6 +311,10 @@ class BaseFrameworkGCTransformer(GCTransformer):
             [s_gc, annmodel.SomeInteger()], annmodel.s_None)
         self.collect_step_ptr = getfn(GCClass.collect_step.im_func, [s_gc],
                                       annmodel.SomeInteger())
+        self.freeze_ptr = getfn(GCClass.freeze.im_func, [s_gc],
+                                annmodel.SomeInteger(nonneg=True))
+        self.wait_background_sweep_ptr = getfn(
+            GCClass.wait_background_sweep.im_func, [s_gc], annmodel.s_None)
         self.enable_ptr = getfn(GCClass.enable.im_func, [s_gc], annmodel.s_None)
         self.disable_ptr = getfn(GCClass.disable.im_func, [s_gc], annmodel.s_None)
         self.isenabled_ptr = getfn(GCClass.isenabled.im_func, [s_gc],
@@ -906,6 +910,13 @@ class BaseFrameworkGCTransformer(GCTransformer):
                   resultvar=op.result)
         self.pop_roots(hop, livevars)
 
+    def gct_gc__freeze(self, hop):
+        op = hop.spaceop
+        livevars = self.push_roots(hop)
+        hop.genop("direct_call", [self.freeze_ptr, self.c_const_gc],
+                  resultvar=op.result)
+        self.pop_roots(hop, livevars)
+
     def gct_gc__enable(self, hop):
         op = hop.spaceop
         hop.genop("direct_call", [self.enable_ptr, self.c_const_gc],
@@ -1264,6 +1275,9 @@ class BaseFrameworkGCTransformer(GCTransformer):
         hop.rename("gc_thread_die")     # keep it around for c/gc.py
 
     def gct_gc_thread_before_fork(self, hop):
+        # the GC's own threads must not be in the middle of some work
+        hop.genop("direct_call", [self.wait_background_sweep_ptr,
+                                  self.c_const_gc])
         if (self.translator.config.translation.thread
             and hasattr(self.root_walker, 'thread_before_fork_ptr')):
             hop.genop("direct_call", [self.root_walker.thread_before_fork_ptr],
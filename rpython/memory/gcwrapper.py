@@ -135,6 +135,9 @@ class GCManagedHeap(object):
     def collect(self, *gen):
         self.gc.collect(*gen)
 
+    def freeze(self):
+        return self.gc.freeze()
+
     def can_move(self, addr):
         return self.gc.can_move(addr)
 
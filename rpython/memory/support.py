@@ -98,15 +98,19 @@ def get_address_stack(chunk_size=DEFAULT_CHUNK_SIZE, cache={}):
     class AddressStack(object):
         _alloc_flavor_ = "raw"
         
-        def __init__(self):
-            self.chunk = unused_chunks.get()
+        def __init__(self, free_list=unused_chunks):
+            # 'free_list' is shared by default by all AddressStacks of
+            # the same chunk_size, which is not thread-safe; a stack used
+            # by another thread needs its own FreeList instance.
+            self.free_list = free_list
+            self.chunk = free_list.get()
             self.chunk.next = null_chunk
             self.used_in_last_chunk = 0
             # invariant: self.used_in_last_chunk == 0 if and only if
             # the AddressStack is empty
 
         def enlarge(self):
-            new = unused_chunks.get()
+            new = self.free_list.get()
             new.next = self.chunk
             self.chunk = new
             self.used_in_last_chunk = 0
@@ -115,7 +119,7 @@ def get_address_stack(chunk_size=DEFAULT_CHUNK_SIZE, cache={}):
         def shrink(self):
             old = self.chunk
             self.chunk = old.next
-            unused_chunks.put(old)
+            self.free_list.put(old)
             self.used_in_last_chunk = chunk_size
         shrink._dont_inline_ = True
 
@@ -143,7 +147,7 @@ def get_address_stack(chunk_size=DEFAULT_CHUNK_SIZE, cache={}):
             cur = self.chunk
             while cur:
                 next = cur.next
-                unused_chunks.put(cur)
+                self.free_list.put(cur)
                 cur = next
             free_non_gc_object(self)
 
@@ -207,6 +211,7 @@ def get_address_stack(chunk_size=DEFAULT_CHUNK_SIZE, cache={}):
             ll_assert(self.chunk.next == null_chunk, "too big for sorting")
             sort_chunk(self.chunk, self.used_in_last_chunk)
 
+    AddressStack.FreeList = unused_chunks.__class__
     cache[chunk_size] = AddressStack
     return AddressStack
 
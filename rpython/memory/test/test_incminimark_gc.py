@@ -91,3 +91,63 @@ class TestIncrementalMiniMarkGC(test_minimark_gc.TestMiniMarkGC):
             return ref() is b
         res = self.interpret(f, [])
         assert res == True
+
+    def test_freeze(self):
+        import weakref
+        class Counter(object):
+            dels = 0
+        counter = Counter()
+        class A(object):
+            def __del__(self):
+                counter.dels += 1
+        class Holder(object):
+            pass
+        def g(holder, x):
+            a = A()
+            a.x = x
+            holder.a = a
+            return weakref.ref(a)
+        def f():
+            holder = Holder()
+            ref1 = g(holder, 1)
+            frozen = rgc.freeze()
+            ref2 = g(holder, 2)     # forgets about the frozen A
+            holder.a = None
+            a1 = ref1()
+            assert a1 is not None
+            ref3 = weakref.ref(a1)     # a new weakref to a frozen object
+            a1 = None
+            llop.gc__collect(lltype.Void)
+            llop.gc__collect(lltype.Void)
+            # the frozen object is immortal, the other one is freed
+            assert ref1() is not None and ref1() is ref3()
+            assert ref1().x == 1
+            assert ref2() is None
+            return frozen * 10 + counter.dels
+        res = self.interpret(f, [])
+        assert res % 10 == 1
+        assert res // 10 > 0
+
+    def test_freeze_then_write(self):
+        class A(object):
+            pass
+        class Node(object):
+            def __init__(self, x, next):
+                self.x = x
+                self.next = next
+        def f(n):
+            a = A()
+            a.node = None
+            rgc.freeze()
+            for i in range(n):
+                a.node = Node(i, a.node)
+                llop.gc__collect(lltype.Void, 1)
+            llop.gc__collect(lltype.Void)
+            total = 0
+            node = a.node
+            while node is not None:
+                total += node.x
+                node = node.next
+            return total
+        res = self.interpret(f, [10])
+        assert res == 45
@@ -124,6 +124,23 @@ class TestAddressStack(object):
                 a = ll.pop()
                 assert a == addrs[i]
 
+    def test_private_free_list(self):
+        AddressStack = get_address_stack(chunk_size=5)
+        addrs = [raw_malloc(llmemory.sizeof(lltype.Signed))
+                 for i in range(12)]
+        free_list = AddressStack.FreeList()
+        ll = AddressStack(free_list)
+        assert ll.free_list is free_list
+        for addr in addrs:
+            ll.append(addr)
+        assert ll.length() == 12
+        for addr in addrs[::-1]:
+            assert ll.pop() == addr
+        assert not ll.non_empty()
+        ll.delete()
+        for addr in addrs:
+            raw_free(addr)
+
 
 
 class TestAddressDeque:
@@ -204,6 +221,15 @@ def test_stack_annotate():
         ll.append(addr + INT_SIZE*1)
         ll.append(addr + INT_SIZE*2)
         ll.delete()
+        free_list = AddressStack.FreeList()
+        ll = AddressStack(free_list)
+        for i in range(300):
+            ll.append(addr + INT_SIZE*i)
+        for i in range(299, -1, -1):
+            a = ll.pop()
+            res = res and (a - INT_SIZE*i == addr)
+        ll.delete()
+        free_non_gc_object(free_list)
         raw_free(addr)
         return res
 
@@ -1421,7 +1421,8 @@ class MyGcHooks(GcHooks):
     def is_gc_collect_enabled(self):
         return True
 
-    def on_gc_minor(self, duration, total_memory_used, pinned_objects):
+    def on_gc_minor(self, duration, total_memory_used, pinned_objects,
+                    nursery_size):
         self.stats.minors += 1
 
     def on_gc_collect_step(self, duration, oldstate, newstate):
@@ -1514,6 +1515,34 @@ class TestIncrementalMiniMarkGC(TestMiniMarkGC):
         assert steps == 4 * collects   # 4 steps for each major collection
         assert minors == steps         # one minor collection for each step
 
+    def define_freeze(cls):
+        class Node(object):
+            def __init__(self, x, next):
+                self.x = x
+                self.next = next
+        def f():
+            nodes = [None] * 20     # large enough to use card marking
+            for i in range(20):
+                nodes[i] = Node(i, None)
+            frozen = rgc.freeze()
+            for i in range(20):
+                nodes[i].next = Node(100 + i, None)
+                nodes[i * 7 % 20] = Node(200 + i, nodes[i * 7 % 20])
+                llop.gc__collect(lltype.Void, 1)
+            llop.gc__collect(lltype.Void)
+            total = 0
+            for node in nodes:
+                while node is not None:
+                    total += node.x
+                    node = node.next
+            return (frozen > 20) * 1000000 + total
+        return f
+
+    def test_freeze(self):
+        run = self.runner("freeze")
+        res = run([])
+        assert res == 1000000 + 6447     # same result as untranslated
+
 # ________________________________________________________________
 # tagged pointers
 
@@ -442,3 +442,32 @@ class SubBuffer(Buffer):
     @specialize.ll_and_arg(1)
     def typed_write(self, TP, byte_offset, value):
         return self.buffer.typed_write(TP, byte_offset + self.offset, value)
+
+
+def raw_address_buffers(buffers):
+    """Returns a list with the buffers of 'buffers' whose raw address can be
+    taken, and RawByteBuffer copies of the other ones, e.g. to pass them to
+    readv() or sendmsg().  After reading into the result, call
+    copy_back_raw_buffers() to store the data into the original buffers."""
+    result = []
+    for buf in buffers:
+        try:
+            buf.get_raw_address()
+        except ValueError:
+            raw = RawByteBuffer(buf.getlength())
+            raw.setslice(0, buf.as_str())
+            buf = raw
+        result.append(buf)
+    return result
+
+def copy_back_raw_buffers(buffers, raw_buffers, nbytes):
+    """Copies the first 'nbytes' bytes read into the 'raw_buffers' returned
+    by raw_address_buffers(buffers) back to the buffers that were copied."""
+    for i in range(len(buffers)):
+        if nbytes <= 0:
+            break
+        raw = raw_buffers[i]
+        length = min(raw.getlength(), nbytes)
+        if raw is not buffers[i]:
+            buffers[i].setslice(0, raw.getslice(0, 1, length))
+        nbytes -= length
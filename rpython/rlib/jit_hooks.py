@@ -128,6 +128,14 @@ def stats_asmmemmgr_allocated(warmrunnerdesc):
 def stats_asmmemmgr_used(warmrunnerdesc):
     return warmrunnerdesc.metainterp_sd.cpu.asmmemmgr.get_stats()[1]
 
+@register_helper(annmodel.SomeInteger())
+def stats_memmgr_max_bytes(warmrunnerdesc):
+    return warmrunnerdesc.memory_manager.max_bytes
+
+@register_helper(annmodel.SomeInteger())
+def stats_memmgr_alive_bytes(warmrunnerdesc):
+    return warmrunnerdesc.memory_manager.alive_bytes
+
 @register_helper(None)
 def stats_memmgr_release_all(warmrunnerdesc):
     warmrunnerdesc.memory_manager.release_all_loops()
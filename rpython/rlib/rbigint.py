@@ -91,6 +91,27 @@ else:
 
 KARATSUBA_SQUARE_CUTOFF = 2 * KARATSUBA_CUTOFF
 
+# For still larger operands, use Toom-Cook 3-way multiplication, which
+# splits the operands in three parts and needs five multiplications of
+# numbers a third of the size.  It is O(N**1.465).
+
+TOOM3_CUTOFF = 10 * KARATSUBA_CUTOFF
+TOOM3_SQUARE_CUTOFF = TOOM3_CUTOFF
+
+# For long division, use the O(N**2) school algorithm unless both the
+# divisor and the quotient contain more than BURNIKEL_ZIEGLER_CUTOFF
+# digits.  In that case use the recursive algorithm of Burnikel and
+# Ziegler, which is as fast as the multiplication it is built on.
+
+BURNIKEL_ZIEGLER_CUTOFF = 16 * KARATSUBA_CUTOFF
+
+# For converting a string in a base that is not a power of two, use the
+# O(N**2) digit-by-digit algorithm unless the string contains more than
+# FROMSTR_RECURSIVE_CUTOFF digits.  In that case, split it in two halves,
+# convert each half recursively and combine them with one multiplication.
+
+FROMSTR_RECURSIVE_CUTOFF = 4000
+
 # For exponentiation, use the binary left-to-right algorithm
 # unless the exponent contains more than FIVEARY_CUTOFF digits.
 # In that case, do 5 bits at a time.  The potential drawback is that
@@ -98,6 +119,12 @@ KARATSUBA_SQUARE_CUTOFF = 2 * KARATSUBA_CUTOFF
 
 FIVEARY_CUTOFF = 8
 
+# For modular exponentiation with a modulus of more than BARRETT_CUTOFF
+# digits, reduce the intermediate results with Barrett's method: two
+# multiplications by precomputed values instead of a long division.
+
+BARRETT_CUTOFF = 3 * KARATSUBA_CUTOFF
+
 @specialize.argtype(0)
 def _mask_digit(x):
     return UDIGIT_MASK(x & MASK)
@@ -732,13 +759,17 @@ class rbigint(object):
         elif USE_KARATSUBA:
             if self is other:
                 i = KARATSUBA_SQUARE_CUTOFF
+                j = TOOM3_SQUARE_CUTOFF
             else:
                 i = KARATSUBA_CUTOFF
+                j = TOOM3_CUTOFF
 
             if selfsize <= i:
                 result = _x_mul(self, other)
                 """elif 2 * selfsize <= othersize:
                     result = _k_lopsided_mul(self, other)"""
+            elif selfsize > j and 3 * selfsize > 2 * othersize:
+                result = _tc_mul(self, other)
             else:
                 result = _k_mul(self, other)
         else:
@@ -1021,6 +1052,11 @@ class rbigint(object):
         # At this point self, other, and modulus are guaranteed non-negative UNLESS
         # modulus is NULL, in which case self may be negative. */
 
+        # for a large modulus, precompute what Barrett's reduction needs
+        mu = None
+        if modulus is not None and modulus.numdigits() > BARRETT_CUTOFF:
+            mu = _barrett_mu(modulus)
+
         z = ONERBIGINT
 
         # python adaptation: moved macros REDUCE(X) and MULT(X, Y, result)
@@ -1034,9 +1070,9 @@ class rbigint(object):
                 bi = other.digit(size_b)
                 j = 1 << (SHIFT-1)
                 while j != 0:
-                    z = _help_mult(z, z, modulus)
+                    z = _help_mult(z, z, modulus, mu)
                     if bi & j:
-                        z = _help_mult(z, self, modulus)
+                        z = _help_mult(z, self, modulus, mu)
                     j >>= 1
 
 
@@ -1047,7 +1083,7 @@ class rbigint(object):
             table = [z] * 32
             table[0] = z
             for i in range(1, 32):
-                table[i] = _help_mult(table[i-1], self, modulus)
+                table[i] = _help_mult(table[i-1], self, modulus, mu)
 
             # Note that here SHIFT is not a multiple of 5.  The difficulty
             # is to extract 5 bits at a time from 'other', starting from the
@@ -1081,9 +1117,9 @@ class rbigint(object):
                     j += SHIFT
                 #
                 for k in range(5):
-                    z = _help_mult(z, z, modulus)
+                    z = _help_mult(z, z, modulus, mu)
                 if index:
-                    z = _help_mult(z, table[index], modulus)
+                    z = _help_mult(z, table[index], modulus, mu)
             #
             assert j == -5
 
@@ -1156,6 +1192,11 @@ class rbigint(object):
         # At this point self, iother, and modulus are guaranteed non-negative UNLESS
         # modulus is NULL, in which case self may be negative. */
 
+        # for a large modulus, precompute what Barrett's reduction needs
+        mu = None
+        if modulus is not None and modulus.numdigits() > BARRETT_CUTOFF:
+            mu = _barrett_mu(modulus)
+
         z = ONERBIGINT
 
         # python adaptation: moved macros REDUCE(X) and MULT(X, Y, result)
@@ -1165,9 +1206,9 @@ class rbigint(object):
         j = 1 << (SHIFT-1)
 
         while j != 0:
-            z = _help_mult(z, z, modulus)
+            z = _help_mult(z, z, modulus, mu)
             if iother & j:
-                z = _help_mult(z, self, modulus)
+                z = _help_mult(z, self, modulus, mu)
             j >>= 1
 
         if negativeOutput and z.sign != 0:
@@ -1479,19 +1520,43 @@ MAX_DIGITS_THAT_CAN_FIT_IN_INT = rbigint.fromint(-sys.maxint - 1).numdigits()
 # Helper Functions
 
 
-def _help_mult(x, y, c):
+def _help_mult(x, y, c, mu=None):
     """
     Multiply two values, then reduce the result:
-    result = X*Y % c.  If c is None, skip the mod.
+    result = X*Y % c.  If c is None, skip the mod.  If mu is not None,
+    it is _barrett_mu(c), and X and Y are non-negative and have at most
+    as many digits as c.
     """
     res = x.mul(y)
     # Perform a modular reduction, X = X % c, but leave X alone if c
     # is NULL.
     if c is not None:
-        res = res.mod(c)
+        if mu is not None:
+            res = _barrett_reduce(res, c, mu)
+        else:
+            res = res.mod(c)
 
     return res
 
+def _barrett_mu(c):
+    """ Precompute BASE**(2*k) // c, where c is positive and has k digits,
+    for _barrett_reduce() """
+    k = c.numdigits()
+    return _join_digits(ONERBIGINT, 2 * k, NULLRBIGINT).floordiv(c)
+
+def _barrett_reduce(x, c, mu):
+    """ Return x % c for 0 <= x < BASE**(2*k), where c has k digits and
+    mu is _barrett_mu(c).  See HAC Algorithm 14.42:
+    http://www.cacr.math.uwaterloo.ca/hac/about/chap14.pdf """
+    k = c.numdigits()
+    q = _extract_digits(x, k - 1, x.numdigits()).mul(mu)
+    q = _extract_digits(q, k + 1, q.numdigits())
+    r = x.sub(q.mul(c))
+    # the estimated quotient q is too small by at most 2
+    while r.ge(c):
+        r = r.sub(c)
+    return r
+
 @specialize.argtype(0)
 def digits_from_nonneg_long(l):
     digits = []
@@ -1908,6 +1973,87 @@ def _k_mul(a, b):
     ret._normalize()
     return ret
 
+def _tc_split(n, size):
+    """
+    A helper for Toom-Cook multiplication (tc_mul).  Returns hi, mid and
+    lo such that abs(n) == (hi << 2*size) + (mid << size) + lo, viewing the
+    shifts as being by digits.
+    """
+    size_n = n.numdigits()
+    size_lo = min(size_n, size)
+    size_mid = min(size_n, 2 * size)
+    lo = rbigint(n._digits[:size_lo] or NULLDIGITS, 1)
+    mid = rbigint(n._digits[size_lo:size_mid] or NULLDIGITS, 1)
+    hi = rbigint(n._digits[size_mid:size_n] or NULLDIGITS, 1)
+    lo._normalize()
+    mid._normalize()
+    hi._normalize()
+    return hi, mid, lo
+
+def _tc_mul(a, b):
+    """
+    Toom-Cook 3-way multiplication.  Ignores the input signs, and returns
+    the absolute value of the product.  Uses the evaluation points 0, 1,
+    -1, -2 and infinity, and the interpolation sequence of Bodrato and
+    Zanoni, "What about Toom-Cook matrices optimality?" (2006).
+    """
+    asize = a.numdigits()
+    bsize = b.numdigits()
+
+    # a = a2*X*X + a1*X + a0 and b = b2*X*X + b1*X + b0, where X is
+    # BASE**shift.  Evaluate both polynomials at 0, 1, -1, -2 and
+    # infinity, multiply the values pointwise, and interpolate the
+    # product polynomial r4*X**4 + r3*X**3 + r2*X*X + r1*X + r0.
+    shift = (bsize + 2) // 3
+    a2, a1, a0 = _tc_split(a, shift)
+    t = a0.add(a2)
+    pa1 = t.add(a1)
+    pam1 = t.sub(a1)
+    pam2 = pam1.add(a2).lshift(1).sub(a0)
+    if a is b:
+        # squaring: the same values, and mul() takes its squaring path
+        b2, b0 = a2, a0
+        pb1, pbm1, pbm2 = pa1, pam1, pam2
+    else:
+        b2, b1, b0 = _tc_split(b, shift)
+        t = b0.add(b2)
+        pb1 = t.add(b1)
+        pbm1 = t.sub(b1)
+        pbm2 = pbm1.add(b2).lshift(1).sub(b0)
+
+    r0 = a0.mul(b0)
+    v1 = pa1.mul(pb1)
+    vm1 = pam1.mul(pbm1)
+    vm2 = pam2.mul(pbm2)
+    r4 = a2.mul(b2)
+
+    # interpolation; all the divisions are exact
+    r3 = vm2.sub(v1).int_floordiv(3)
+    r1 = v1.sub(vm1).rshift(1)
+    r2 = vm1.sub(r0)
+    r3 = r2.sub(r3).rshift(1).add(r4.lshift(1))
+    r2 = r2.add(r1).sub(r4)
+    r1 = r1.sub(r3)
+
+    # All the coefficients are the (non-negative) coefficients of the
+    # product polynomial, so they can be added into place.  r0 and r4
+    # don't overlap and are copied.
+    ret = rbigint([NULLDIGIT] * (asize + bsize), 1)
+    assert r0.sign >= 0 and r4.sign >= 0
+    assert r0.numdigits() <= 2 * shift
+    for i in range(r0.numdigits()):
+        ret._digits[i] = r0._digits[i]
+    if r4.sign != 0:
+        assert 4 * shift + r4.numdigits() <= ret.numdigits()
+        for i in range(r4.numdigits()):
+            ret._digits[4 * shift + i] = r4._digits[i]
+    for ofs, r in [(shift, r1), (2 * shift, r2), (3 * shift, r3)]:
+        assert r.sign >= 0
+        if r.sign != 0:
+            _v_iadd(ret, ofs, ret.numdigits() - ofs, r, r.numdigits())
+    ret._normalize()
+    return ret
+
 def _inplace_divrem1(pout, pin, n):
     """
     Divide bigint pin by non-zero digit n, storing quotient
@@ -2158,6 +2304,9 @@ def _divrem(a, b):
     if size_b == 1:
         z, urem = _divrem1(a, b.digit(0))
         rem = rbigint([_store_digit(urem)], int(urem != 0), 1)
+    elif (size_b > BURNIKEL_ZIEGLER_CUTOFF and
+          size_a - size_b > BURNIKEL_ZIEGLER_CUTOFF):
+        z, rem = _divmod_big(a.abs(), b.abs())
     else:
         z, rem = _x_divrem(a, b)
     # Set the signs.
@@ -2170,6 +2319,101 @@ def _divrem(a, b):
         rem.sign = - rem.sign
     return z, rem
 
+def _extract_digits(a, start, count):
+    """ Return the non-negative bigint made of the 'count' digits of 'a'
+    starting at index 'start', i.e. (|a| >> (start * SHIFT)) % B**count,
+    with B = 2**SHIFT """
+    assert start >= 0
+    stop = min(start + count, a.numdigits())
+    if start >= stop:
+        return NULLRBIGINT
+    z = rbigint(a._digits[start:stop], 1, stop - start)
+    z._normalize()
+    return z
+
+def _join_digits(hi, n, lo):
+    """ Return hi * B**n + lo, for non-negative hi and lo < B**n """
+    if hi.sign == 0:
+        return lo
+    size_lo = lo.numdigits()
+    size_hi = hi.numdigits()
+    assert size_lo <= n
+    z = rbigint([NULLDIGIT] * (n + size_hi), 1, n + size_hi)
+    i = 0
+    while i < size_lo:
+        z._digits[i] = lo._digits[i]
+        i += 1
+    i = 0
+    while i < size_hi:
+        z._digits[n + i] = hi._digits[i]
+        i += 1
+    return z
+
+def _div2n1n(a, b, n):
+    """ Divide the non-negative bigint a < B**n * b by b, which has
+    exactly n digits and the highest bit of its top digit set.  Returns
+    (q, r) with a = b*q + r and 0 <= r < b. """
+    if a.numdigits() - n <= BURNIKEL_ZIEGLER_CUTOFF:
+        return _divrem(a, b)
+    pad = n & 1
+    if pad:
+        a = _join_digits(a, 1, NULLRBIGINT)
+        b = _join_digits(b, 1, NULLRBIGINT)
+        n += 1
+    half_n = n >> 1
+    b1 = _extract_digits(b, half_n, half_n)
+    b2 = _extract_digits(b, 0, half_n)
+    q1, r = _div3n2n(_extract_digits(a, n, a.numdigits()),
+                     _extract_digits(a, half_n, half_n), b, b1, b2, half_n)
+    q2, r = _div3n2n(r, _extract_digits(a, 0, half_n), b, b1, b2, half_n)
+    if pad:
+        r = _extract_digits(r, 1, r.numdigits())
+    return _join_digits(q1, half_n, q2), r
+
+def _div3n2n(a12, a3, b, b1, b2, n):
+    """ Helper for _div2n1n: divide a12 * B**n + a3 by b = b1 * B**n + b2,
+    where b1 and b2 have n digits. """
+    if _extract_digits(a12, n, a12.numdigits()).eq(b1):
+        q = rbigint([_store_digit(MASK)] * n, 1, n)
+        r = a12.sub(_join_digits(b1, n, NULLRBIGINT)).add(b1)
+    else:
+        q, r = _div2n1n(a12, b1, n)
+    r = _join_digits(r, n, a3).sub(q.mul(b2))
+    while r.sign < 0:
+        q = q.int_sub(1)
+        r = r.add(b)
+    return q, r
+
+def _divmod_big(a, b):
+    """ Divide the non-negative bigint a by the positive bigint b using the
+    recursive algorithm of Burnikel and Ziegler: the school algorithm,
+    but with 'digits' of as many bits as b, each step being done by
+    _div2n1n() """
+    # normalize: shift b left so that the highest bit of its top digit
+    # is set, and shift a left by the same amount
+    d = SHIFT - bits_in_digit(b.digit(b.numdigits() - 1))
+    if d:
+        a = a.lshift(d)
+        b = b.lshift(d)
+    n = b.numdigits()
+    count = (a.numdigits() + n - 1) // n
+    z = rbigint([NULLDIGIT] * (count * n), 1, count * n)
+    r = NULLRBIGINT
+    i = count - 1
+    while i >= 0:
+        q, r = _div2n1n(_join_digits(r, n, _extract_digits(a, i * n, n)),
+                        b, n)
+        j = 0
+        while j < q.numdigits():
+            z._digits[i * n + j] = q._digits[j]
+            j += 1
+        i -= 1
+    z._normalize()
+    if d:
+        r = r.rshift(d)
+    # the caller may change the signs of the results
+    return z, rbigint(r._digits, r.sign, r.numdigits())
+
 def _x_int_lt(a, b, eq=False):
     """ Compare bigint a with int b for less than or less than or equal """
     osign = 1
@@ -2905,6 +3149,12 @@ def _decimalstr_to_bigint(s):
     elif s[p] == '+':
         p += 1
 
+    if lim - p > FROMSTR_RECURSIVE_CUTOFF:
+        a = _str_to_bigint_recursive(s, p, lim, 10, ord('0'))
+        if sign:
+            a = a.neg()
+        return a
+
     a = NULLRBIGINT
     tens = 1
     dig = 0
@@ -2921,26 +3171,61 @@ def _decimalstr_to_bigint(s):
         a.sign = -1
     return a
 
+def _str_to_bigint_linear(s, start, stop, base, ord0):
+    # turns the digits s[start:stop] into a bigint, where the character
+    # 'chr(ord0 + i)' stands for the digit i
+    a = NULLRBIGINT
+    digitmax = BASE_MAX[base]
+    tens = 1
+    dig = 0
+    p = start
+    while p < stop:
+        dig = dig * base + ord(s[p]) - ord0
+        p += 1
+        tens *= base
+        if tens == digitmax or p == stop:
+            a = _muladd1(a, tens, dig)
+            tens = 1
+            dig = 0
+    return a
+
+def _str_to_bigint_recursive(s, start, stop, base, ord0):
+    # same as _str_to_bigint_linear(), but long strings are split at a
+    # power base**(mindigits * 2**i), which is cached for str()
+    if stop - start <= FROMSTR_RECURSIVE_CUTOFF or base < 3:
+        return _str_to_bigint_linear(s, start, stop, base, ord0)
+    size = _parts_cache.get_mindigits(base)
+    if size >= stop - start:
+        return _str_to_bigint_linear(s, start, stop, base, ord0)
+    pts = _parts_cache.get_cached_parts(base)
+    i = 0
+    while size * 2 < stop - start:
+        size *= 2
+        i += 1
+    while len(pts) <= i:
+        pts.append(pts[-1].mul(pts[-1]))
+    mid = stop - size
+    hi = _str_to_bigint_recursive(s, start, mid, base, ord0)
+    lo = _str_to_bigint_recursive(s, mid, stop, base, ord0)
+    return hi.mul(pts[i]).add(lo)
+
 def parse_digit_string(parser):
     # helper for fromstr
     base = parser.base
     if (base & (base - 1)) == 0 and base >= 2:
         return parse_string_from_binary_base(parser)
-    a = NULLRBIGINT
-    digitmax = BASE_MAX[base]
-    tens, dig = 1, 0
+    # collect the digits first, so that long strings can be converted with
+    # a subquadratic algorithm
+    builder = StringBuilder()
     while True:
         digit = parser.next_digit()
-        if tens == digitmax or digit < 0:
-            a = _muladd1(a, tens, dig)
-            if digit < 0:
-                break
-            dig = digit
-            tens = base
-        else:
-            dig = dig * base + digit
-            tens *= base
-    a.sign *= parser.sign
+        if digit < 0:
+            break
+        builder.append(chr(digit))
+    s = builder.build()
+    a = _str_to_bigint_recursive(s, 0, len(s), base, 0)
+    if parser.sign < 0:
+        a = a.neg()
     return a
 
 def parse_string_from_binary_base(parser):
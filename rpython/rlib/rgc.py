@@ -30,6 +30,19 @@ def collect_step():
     gc.collect()
     return _encode_states(1, 0)
 
+def freeze():
+    """
+    Do a full collection, then move all the surviving objects to a
+    permanent generation that the following collections neither mark nor
+    sweep, so that the memory pages of these objects stay shared with the
+    children after a fork().  The frozen objects are never freed, and
+    their finalizers and destructors never run.
+
+    Return the number of objects frozen, or 0 if the GC doesn't support it.
+    """
+    gc.collect()
+    return 0
+
 def _encode_states(oldstate, newstate):
     return oldstate << 8 | newstate
 
@@ -213,6 +226,18 @@ class CollectStepEntry(ExtRegistryEntry):
         return hop.genop('gc__collect_step', hop.args_v, resulttype=hop.r_result)
 
 
+class FreezeEntry(ExtRegistryEntry):
+    _about_ = freeze
+
+    def compute_result_annotation(self):
+        from rpython.annotator import model as annmodel
+        return annmodel.SomeInteger(nonneg=True)
+
+    def specialize_call(self, hop):
+        hop.exception_cannot_occur()
+        return hop.genop('gc__freeze', hop.args_v, resulttype=hop.r_result)
+
+
 class SetMaxHeapSizeEntry(ExtRegistryEntry):
     _about_ = set_max_heap_size
 
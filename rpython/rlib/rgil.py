@@ -4,6 +4,7 @@ from rpython.translator.tool.cbuild import ExternalCompilationInfo
 from rpython.rtyper.lltypesystem import lltype, llmemory, rffi
 from rpython.rtyper.extregistry import ExtRegistryEntry
 from rpython.rlib.objectmodel import not_rpython, we_are_translated
+from rpython.rlib.rarithmetic import r_longlong
 
 # these functions manipulate directly the GIL, whose definition does not
 # escape the C code itself
@@ -42,6 +43,37 @@ _gil_get_holder = llexternal('RPyGilGetHolder', [], lltype.Signed,
                              _nowrapper=True, sandboxsafe=True,
                              compilation_info=eci)
 
+_gil_set_switch_interval = llexternal('RPyGilSetSwitchInterval',
+                                      [lltype.Signed], lltype.Void,
+                                      _nowrapper=True, sandboxsafe=True,
+                                      compilation_info=eci)
+
+_gil_get_switch_interval = llexternal('RPyGilGetSwitchInterval',
+                                      [], lltype.Signed,
+                                      _nowrapper=True, sandboxsafe=True,
+                                      compilation_info=eci)
+
+_gil_set_drop_ticker = llexternal('RPyGilSetDropTicker',
+                                  [rffi.VOIDP], lltype.Void,
+                                  _nowrapper=True, sandboxsafe=True,
+                                  compilation_info=eci)
+
+_gil_get_stat = llexternal('RPyGilGetStat', [lltype.Signed], rffi.LONGLONG,
+                           _nowrapper=True, sandboxsafe=True,
+                           compilation_info=eci)
+
+_gil_reset_stats = llexternal('RPyGilResetStats', [], lltype.Void,
+                              _nowrapper=True, sandboxsafe=True,
+                              compilation_info=eci)
+
+# indexes for get_stat(), must match the RPY_GIL_STAT_* in thread.h
+STAT_CONTENDED      = 0   # number of times a thread had to wait for the GIL
+STAT_WAIT_TIME      = 1   # total time spent waiting, in microseconds
+STAT_MAX_WAIT_TIME  = 2   # longest single wait, in microseconds
+STAT_DROP_REQUESTS  = 3   # waits that ended after asking the holder to drop
+STAT_HANDOFFS       = 4   # yield_thread() calls that gave the GIL away
+STATS = 5
+
 # ____________________________________________________________
 
 
@@ -118,6 +150,8 @@ class EmulatedGilHolder:
         self._tid = self._get_ident()
         self._lock = thread.allocate_lock()
         self._lock.acquire()
+        self.switch_interval = 5000
+        self.stats = [0] * STATS
 
     def _get_ident(self):
         from rpython.rlib import rthread
@@ -131,8 +165,16 @@ class EmulatedGilHolder:
         self._lock.release()
 
     def acquire(self):
+        import time
         assert self._tid != self._get_ident()
-        self._lock.acquire()
+        if not self._lock.acquire(False):
+            start = time.time()
+            self._lock.acquire()
+            waited = int((time.time() - start) * 1000000.0)
+            self.stats[STAT_CONTENDED] += 1
+            self.stats[STAT_WAIT_TIME] += waited
+            if waited > self.stats[STAT_MAX_WAIT_TIME]:
+                self.stats[STAT_MAX_WAIT_TIME] = waited
         assert self._tid == 0
         self._tid = self._get_ident()
 
@@ -227,3 +269,42 @@ def am_I_holding_the_GIL():
     from rpython.rlib import rthread
     my_tid = rthread.get_or_make_ident()
     return gil_get_holder() == my_tid
+
+def set_switch_interval(microseconds):
+    """Set how long a thread waiting for the GIL lets the current holder
+    run before asking it to drop the GIL.  See thread_gil.c."""
+    if we_are_translated():
+        _gil_set_switch_interval(microseconds)
+    else:
+        allocate()
+        _emulated_gil_holder.switch_interval = max(microseconds, 1)
+
+def get_switch_interval():
+    if we_are_translated():
+        return _gil_get_switch_interval()
+    else:
+        allocate()
+        return _emulated_gil_holder.switch_interval
+
+def set_drop_ticker(ticker):
+    """Register the address of a 'long' that waiting threads set to -1
+    when they want the GIL holder to drop it, like a signal handler does
+    with the ticker of rsignal.pypysig_getaddr_occurred()."""
+    if we_are_translated():
+        _gil_set_drop_ticker(rffi.cast(rffi.VOIDP, ticker))
+
+def get_stat(index):
+    """Return one of the STAT_* statistics, as a r_longlong."""
+    assert 0 <= index < STATS
+    if we_are_translated():
+        return _gil_get_stat(index)
+    else:
+        allocate()
+        return r_longlong(_emulated_gil_holder.stats[index])
+
+def reset_stats():
+    if we_are_translated():
+        _gil_reset_stats()
+    else:
+        allocate()
+        _emulated_gil_holder.stats = [0] * STATS
@@ -10,7 +10,8 @@ from rpython.rlib._os_support import (
     _CYGWIN, _MACRO_ON_POSIX, UNDERSCORE_ON_WIN32, _WIN32,
     _prefer_unicode, _preferred_traits, _preferred_traits2)
 from rpython.rlib.objectmodel import (
-    specialize, enforceargs, register_replacement_for, NOT_CONSTANT)
+    specialize, enforceargs, register_replacement_for, NOT_CONSTANT,
+    keepalive_until_here)
 from rpython.rlib.rarithmetic import intmask, widen
 from rpython.rlib.signature import signature
 from rpython.tool.sourcetools import func_renamer
@@ -625,6 +626,47 @@ if not _WIN32:
         with rffi.scoped_nonmovingbuffer(data) as buf:
             return handle_posix_error('pwrite', c_pwrite(fd, buf, count, offset))
 
+    class CConfig:
+        _compilation_info_ = ExternalCompilationInfo(
+            includes=['sys/uio.h', 'limits.h'])
+        IOVEC = rffi_platform.Struct('struct iovec',
+                                     [('iov_base', rffi.VOIDP),
+                                      ('iov_len', rffi.SIZE_T)])
+        IOV_MAX = rffi_platform.DefinedConstantInteger('IOV_MAX')
+    config = rffi_platform.configure(CConfig)
+    IOVEC = config['IOVEC']
+    IOV_MAX = config['IOV_MAX'] or 1024
+    IOVECP = rffi.CArrayPtr(IOVEC)
+    c_readv = external('readv', [rffi.INT, IOVECP, rffi.INT], rffi.SSIZE_T,
+                       compilation_info=CConfig._compilation_info_,
+                       save_err=rffi.RFFI_SAVE_ERRNO)
+    c_writev = external('writev', [rffi.INT, IOVECP, rffi.INT], rffi.SSIZE_T,
+                        compilation_info=CConfig._compilation_info_,
+                        save_err=rffi.RFFI_SAVE_ERRNO)
+
+    @specialize.arg(0, 1)
+    def _vectored_io(name, c_func, fd, buffers):
+        # 'buffers' is a list of rlib buffers; the data is read or written
+        # directly at their raw addresses
+        count = len(buffers)
+        if count > IOV_MAX:
+            raise OSError(errno.EINVAL, None)
+        with lltype.scoped_alloc(IOVECP.TO, count) as iov:
+            for i in range(count):
+                buf = buffers[i]
+                iov[i].c_iov_base = rffi.cast(rffi.VOIDP,
+                                              buf.get_raw_address())
+                iov[i].c_iov_len = rffi.cast(rffi.SIZE_T, buf.getlength())
+            res = c_func(fd, iov, count)
+        keepalive_until_here(buffers)
+        return handle_posix_error(name, res)
+
+    def readv(fd, buffers):
+        return _vectored_io('readv', c_readv, fd, buffers)
+
+    def writev(fd, buffers):
+        return _vectored_io('writev', c_writev, fd, buffers)
+
     if HAVE_FALLOCATE:
         c_posix_fallocate = external('posix_fallocate',
                                      [rffi.INT, OFF_T, OFF_T], rffi.INT,
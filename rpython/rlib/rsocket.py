@@ -1133,15 +1133,6 @@ class RSocket(object):
         :param address: address of the recepient. Useful for when sending on connectionless sockets. Default None
         :return: Bytes sent from the message
         """
-        need_to_free_address = True
-        if address is None:
-            need_to_free_address = False
-            addr = lltype.nullptr(_c.sockaddr)
-            addrlen = 0
-        else:
-            addr = address.lock()
-            addrlen = address.addrlen
-
         no_of_messages = len(messages)
         messages_ptr = lltype.malloc(
             rffi.CCHARPP.TO, no_of_messages + 1, flavor='raw')
@@ -1153,6 +1144,50 @@ class RSocket(object):
             messages_length_ptr[counter] = rffi.cast(rffi.SIGNED, len(message))
             counter += 1
         messages_ptr[counter] = lltype.nullptr(rffi.CCHARP.TO)
+        try:
+            return self._sendmsg(messages_ptr, messages_length_ptr,
+                                 no_of_messages, ancillary, flags, address)
+        finally:
+            for i in range(no_of_messages):
+                lltype.free(messages_ptr[i], flavor='raw')
+            lltype.free(messages_ptr, flavor='raw')
+            lltype.free(messages_length_ptr, flavor='raw')
+
+    @jit.dont_look_inside
+    def sendmsg_buffers(self, buffers, ancillary=None, flags=0, address=None):
+        """
+        Like sendmsg(), but the message is a list of rlib buffers whose
+        data is sent directly from their raw addresses, without copying it.
+        """
+        no_of_messages = len(buffers)
+        messages_ptr = lltype.malloc(
+            rffi.CCHARPP.TO, no_of_messages + 1, flavor='raw')
+        messages_length_ptr = lltype.malloc(
+            rffi.SIGNEDP.TO, no_of_messages, flavor='raw', zero=True)
+        try:
+            for i in range(no_of_messages):
+                messages_ptr[i] = buffers[i].get_raw_address()
+                messages_length_ptr[i] = rffi.cast(rffi.SIGNED,
+                                                   buffers[i].getlength())
+            messages_ptr[no_of_messages] = lltype.nullptr(rffi.CCHARP.TO)
+            return self._sendmsg(messages_ptr, messages_length_ptr,
+                                 no_of_messages, ancillary, flags, address)
+        finally:
+            keepalive_until_here(buffers)
+            lltype.free(messages_ptr, flavor='raw')
+            lltype.free(messages_length_ptr, flavor='raw')
+
+    def _sendmsg(self, messages_ptr, messages_length_ptr, no_of_messages,
+                 ancillary, flags, address):
+        need_to_free_address = True
+        if address is None:
+            need_to_free_address = False
+            addr = lltype.nullptr(_c.sockaddr)
+            addrlen = 0
+        else:
+            addr = address.lock()
+            addrlen = address.addrlen
+
         if ancillary is not None:
             size_of_ancillary = len(ancillary)
         else:
@@ -1189,10 +1224,6 @@ class RSocket(object):
 
         if need_to_free_address:
             address.unlock()
-        for i in range(len(messages)):
-            lltype.free(messages_ptr[i], flavor='raw')
-        lltype.free(messages_ptr, flavor='raw')
-        lltype.free(messages_length_ptr, flavor='raw')
 
         if size_of_ancillary > 0:
             for i in range(len(ancillary)):
@@ -4,7 +4,7 @@ from rpython.rlib.unroll import unrolling_iterable
 from rpython.rlib.rsre import rsre_char, rsre_constants as consts
 from rpython.tool.sourcetools import func_with_new_name
 from rpython.rlib.objectmodel import we_are_translated, not_rpython
-from rpython.rlib import jit
+from rpython.rlib import jit, rstring, rutf8
 from rpython.rlib.rsre.rsre_jit import install_jitdriver, install_jitdriver_spec
 
 _seen_specname = {}
@@ -51,11 +51,15 @@ class EndOfString(Exception):
     pass
 
 class CompiledPattern(object):
-    _immutable_fields_ = ['pattern[*]', 'flags']
+    _immutable_fields_ = ['pattern[*]', 'flags', 'literal_chars[*]',
+                          'literal_bytes', 'literal_utf8',
+                          'literal_min', 'literal_max', 'nfa?']
+    nfa = None    # the program of the NFA engine, see rsre_nfa.py
 
     def __init__(self, pattern, flags):
         self.pattern = pattern
         self.flags = flags
+        self._init_required_literal()
         # check we don't get the old value of MAXREPEAT
         # during the untranslated tests. 
         # On python3, MAXCODE can appear in patterns. It will be 65535
@@ -74,6 +78,165 @@ class CompiledPattern(object):
         assert result >= 0
         return result
 
+    def _init_required_literal(self):
+        # 'literal_chars' is a string of characters that is part of every
+        # match, found at least 'literal_min' and at most 'literal_max'
+        # characters after the start of the match (-1 if unbounded), or
+        # an empty list.  The searches skip the positions from where
+        # this literal cannot be reached.
+        chars, minimum, maximum = find_required_literal(self.pattern)
+        self.literal_chars = chars[:]
+        self.literal_min = minimum
+        self.literal_max = maximum
+        # the literal encoded as a byte string (None if it cannot be)
+        # and in utf-8
+        self.literal_bytes = None
+        for c in chars:
+            if c > 255:
+                break
+        else:
+            self.literal_bytes = ''.join([chr(c) for c in chars])
+        self.literal_utf8 = ''.join([rutf8.unichr_as_utf8(c,
+                                                          allow_surrogates=True)
+                                     for c in chars])
+
+# ____________________________________________________________
+# Analysis of the compiled code, finding a literal string that every match
+# must contain.  This is in the top-level sequence of the pattern, and
+# the minimum and maximum widths of what precedes it give the possible
+# distances from the start of the match.
+
+MAX_WIDTH = 1 << 30     # larger widths are considered unbounded
+
+def _add_width(a, b):
+    # adds two maximum widths, where -1 means unbounded
+    if a < 0 or b < 0 or a + b > MAX_WIDTH:
+        return -1
+    return a + b
+
+def _mul_width(a, count):
+    # multiplies a maximum width, where -1 means unbounded
+    if a == 0:
+        return 0
+    if a < 0 or count > MAX_WIDTH // a:
+        return -1
+    return a * count
+
+def _sequence_width(code, ppos, end):
+    """Returns (min, max) for the number of characters matched by the
+    sequence code[ppos:end].  'min' is a lower bound, and 'max' an upper
+    bound or -1 if unbounded or unknown."""
+    minimum = 0
+    maximum = 0
+    while ppos < end:
+        op = code[ppos]
+        if op == consts.OPCODE_SUCCESS:
+            break
+        op_min, op_max, ppos = _op_width(code, ppos)
+        if ppos < 0:
+            return minimum, -1
+        minimum = min(minimum + op_min, MAX_WIDTH)
+        maximum = _add_width(maximum, op_max)
+    return minimum, maximum
+
+def _op_width(code, ppos):
+    """Returns (min, max, next_ppos) for the operation at code[ppos].
+    'next_ppos' is -1 if the operation is not supported."""
+    op = code[ppos]
+    if op == consts.OPCODE_ANY or op == consts.OPCODE_ANY_ALL:
+        return 1, 1, ppos + 1
+    if (op == consts.OPCODE_LITERAL or
+            op == consts.OPCODE_LITERAL_IGNORE or
+            op == consts.OPCODE_NOT_LITERAL or
+            op == consts.OPCODE_NOT_LITERAL_IGNORE or
+            op == consts.OPCODE_CATEGORY):
+        return 1, 1, ppos + 2
+    if op == consts.OPCODE_IN or op == consts.OPCODE_IN_IGNORE:
+        # <IN> <skip> <set>
+        return 1, 1, ppos + 1 + code[ppos + 1]
+    if op == consts.OPCODE_AT or op == consts.OPCODE_MARK:
+        return 0, 0, ppos + 2
+    if op == consts.OPCODE_ASSERT or op == consts.OPCODE_ASSERT_NOT:
+        # <ASSERT> <skip> <back> <pattern>
+        return 0, 0, ppos + 1 + code[ppos + 1]
+    if op == consts.OPCODE_GROUPREF or op == consts.OPCODE_GROUPREF_IGNORE:
+        return 0, -1, ppos + 2
+    if op == consts.OPCODE_BRANCH:
+        # <BRANCH> <skip> code <JUMP> <skip> ... <0>
+        minimum = MAX_WIDTH
+        maximum = 0
+        ppos += 1
+        while code[ppos]:
+            skip = code[ppos]
+            alt_min, alt_max = _sequence_width(code, ppos + 1, ppos + skip - 2)
+            minimum = min(minimum, alt_min)
+            if alt_max < 0 or maximum < 0:
+                maximum = -1
+            else:
+                maximum = max(maximum, alt_max)
+            ppos += skip
+        return minimum, maximum, ppos + 1
+    if op == consts.OPCODE_REPEAT_ONE or op == consts.OPCODE_MIN_REPEAT_ONE:
+        # <REPEAT_ONE> <skip> <min> <max> item <SUCCESS> tail
+        end = ppos + 1 + code[ppos + 1]
+        item_min, item_max = _sequence_width(code, ppos + 4, end)
+        return (_repeat_min(item_min, code[ppos + 2]),
+                _repeat_max(item_max, code[ppos + 3]), end)
+    if op == consts.OPCODE_REPEAT:
+        # <REPEAT> <skip> <min> <max> item <UNTIL> tail
+        until = ppos + 1 + code[ppos + 1]
+        item_min, item_max = _sequence_width(code, ppos + 4, until)
+        return (_repeat_min(item_min, code[ppos + 2]),
+                _repeat_max(item_max, code[ppos + 3]), until + 1)
+    return 0, -1, -1
+
+def _repeat_min(item_min, count):
+    result = _mul_width(item_min, count)
+    if result < 0:
+        return MAX_WIDTH
+    return result
+
+def _repeat_max(item_max, count):
+    if count == rsre_char.MAXREPEAT and item_max != 0:
+        return -1
+    return _mul_width(item_max, count)
+
+def find_required_literal(code):
+    """Returns (chars, min, max): the longest run of LITERAL characters in
+    the top-level sequence of 'code', and the minimum and maximum (or -1)
+    distances between the start of a match and that run."""
+    ppos = 0
+    if code and code[0] == consts.OPCODE_INFO:
+        ppos = 1 + code[1]
+    minimum = 0
+    maximum = 0
+    best = []
+    best_min = best_max = 0
+    run = []
+    run_min = run_max = 0
+    while ppos < len(code):
+        op = code[ppos]
+        if op == consts.OPCODE_LITERAL:
+            if not run:
+                run_min = minimum
+                run_max = maximum
+            run.append(code[ppos + 1])
+        elif op != consts.OPCODE_MARK and op != consts.OPCODE_AT:
+            # the zero-width MARK and AT don't interrupt the run
+            if len(run) > len(best):
+                best, best_min, best_max = run, run_min, run_max
+            run = []
+            if op == consts.OPCODE_SUCCESS:
+                break
+        op_min, op_max, ppos = _op_width(code, ppos)
+        if ppos < 0:
+            break
+        minimum = min(minimum + op_min, MAX_WIDTH)
+        maximum = _add_width(maximum, op_max)
+    if len(run) > len(best):
+        best, best_min, best_max = run, run_min, run_max
+    return best, best_min, best_max
+
 class AbstractMatchContext(object):
     """Abstract base class"""
     _immutable_fields_ = ['end']
@@ -137,6 +300,11 @@ class AbstractMatchContext(object):
     def maximum_distance(self, position_low, position_high):
         raise NotImplementedError
     @not_rpython
+    def find_literal(self, pattern, position):
+        """Returns the position of the first occurrence of the required
+        literal of 'pattern' at or after 'position', or -1."""
+        raise NotImplementedError
+    @not_rpython
     def get_single_byte(self, base_position, index):
         raise NotImplementedError
 
@@ -222,6 +390,19 @@ class FixedMatchContext(AbstractMatchContext):
     def maximum_distance(self, position_low, position_high):
         return position_high - position_low
 
+    def find_literal(self, pattern, position):
+        # overridden in StrMatchContext to use the faster rstring.find()
+        chars = pattern.literal_chars
+        last = self.end - len(chars)
+        while position <= last:
+            i = 0
+            while i < len(chars) and self.str(position + i) == chars[i]:
+                i += 1
+            if i == len(chars):
+                return position
+            position += 1
+        return -1
+
 
 class BufMatchContext(FixedMatchContext):
     """Concrete subclass for matching in a buffer."""
@@ -272,6 +453,12 @@ class StrMatchContext(FixedMatchContext):
     def get_single_byte(self, base_position, index):
         return self.str(base_position + index)
 
+    def find_literal(self, pattern, position):
+        if pattern.literal_bytes is None:
+            return -1     # some character of the literal is not a byte
+        return rstring.find(self._string, pattern.literal_bytes,
+                            position, self.end)
+
     def _real_pos(self, index):
         return index     # overridden by tests
 
@@ -1145,6 +1332,8 @@ def match_context(ctx, pattern):
     ctx.original_pos = ctx.match_start
     if ctx.end < ctx.match_start:
         return False
+    if pattern.nfa is not None:
+        return rsre_nfa.nfa_match(ctx, pattern, False)
     ctx.jitdriver_Match.jit_merge_point(ctx=ctx, pattern=pattern)
     return sre_match(ctx, pattern, 0, ctx.match_start, None) is not None
 
@@ -1152,12 +1341,18 @@ def search_context(ctx, pattern):
     ctx.original_pos = ctx.match_start
     if ctx.end < ctx.match_start:
         return False
+    if pattern.nfa is not None:
+        return rsre_nfa.nfa_match(ctx, pattern, True)
     base = 0
     charset = False
     if pattern.pat(base) == consts.OPCODE_INFO:
         flags = pattern.pat(2)
         if flags & consts.SRE_INFO_PREFIX:
             if pattern.pat(5) > 1:
+                if (pattern.literal_min > 0 and
+                        next_required_literal(ctx, pattern, ctx.match_start,
+                                              -1) < ctx.ZERO):
+                    return False   # the required literal is not there
                 return fast_search(ctx, pattern)
         else:
             charset = (flags & consts.SRE_INFO_CHARSET)
@@ -1168,16 +1363,49 @@ def search_context(ctx, pattern):
         return charset_search(ctx, pattern, base)
     return regular_search(ctx, pattern, base)
 
+@specializectx
+def next_required_literal(ctx, pattern, start, literal_pos):
+    """Returns 'literal_pos', a previously found occurrence of the required
+    literal of 'pattern', if a match starting at 'start' could still
+    contain it.  Otherwise, returns the next occurrence that it could
+    contain, or -1 if there is none."""
+    try:
+        position = ctx.next_n(start, pattern.literal_min, ctx.end)
+    except EndOfString:
+        return -1
+    if position <= literal_pos:
+        return literal_pos
+    return ctx.find_literal(pattern, position)
+
+@specializectx
+def skip_to_literal(ctx, pattern, start, literal_pos):
+    """Returns the first position from 'start' where a match containing
+    the occurrence of the required literal at 'literal_pos' can start."""
+    if pattern.literal_max < 0:
+        return start
+    try:
+        return ctx.prev_n(literal_pos, pattern.literal_max, start)
+    except EndOfString:
+        return start
+
 install_jitdriver('RegularSearch',
                   greens=['base', 'pattern'],
-                  reds=['start', 'ctx'],
+                  reds=['literal_pos', 'start', 'ctx'],
                   debugprint=(1, 0))
 
 def regular_search(ctx, pattern, base):
     start = ctx.match_start
+    literal_pos = -1
     while True:
         ctx.jitdriver_RegularSearch.jit_merge_point(ctx=ctx, pattern=pattern,
-                                                    start=start, base=base)
+                                                    start=start, base=base,
+                                                    literal_pos=literal_pos)
+        if pattern.literal_chars:
+            literal_pos = next_required_literal(ctx, pattern, start,
+                                                literal_pos)
+            if literal_pos < ctx.ZERO:
+                break
+            start = skip_to_literal(ctx, pattern, start, literal_pos)
         if sre_match(ctx, pattern, base, start, None) is not None:
             ctx.match_start = start
             return True
@@ -1188,7 +1416,7 @@ def regular_search(ctx, pattern, base):
 
 install_jitdriver_spec("LiteralSearch",
                        greens=['base', 'character', 'pattern'],
-                       reds=['start', 'ctx'],
+                       reds=['literal_pos', 'start', 'ctx'],
                        debugprint=(2, 0, 1))
 @specializectx
 def literal_search(ctx, pattern, base):
@@ -1197,9 +1425,17 @@ def literal_search(ctx, pattern, base):
     character = pattern.pat(base + 1)
     base += 2
     start = ctx.match_start
+    literal_pos = -1
     while start < ctx.end:
         ctx.jitdriver_LiteralSearch.jit_merge_point(ctx=ctx, start=start,
-                                          base=base, character=character, pattern=pattern)
+                                          base=base, character=character, pattern=pattern,
+                                          literal_pos=literal_pos)
+        if pattern.literal_chars:
+            literal_pos = next_required_literal(ctx, pattern, start,
+                                                literal_pos)
+            if literal_pos < ctx.ZERO:
+                break
+            start = skip_to_literal(ctx, pattern, start, literal_pos)
         start1 = ctx.next(start)
         if ctx.str(start) == character:
             if sre_match(ctx, pattern, base, start1, None) is not None:
@@ -1210,15 +1446,23 @@ def literal_search(ctx, pattern, base):
 
 install_jitdriver_spec("CharsetSearch",
                        greens=['base', 'pattern'],
-                       reds=['start', 'ctx'],
+                       reds=['literal_pos', 'start', 'ctx'],
                        debugprint=(1, 0))
 @specializectx
 def charset_search(ctx, pattern, base):
     # pattern starts with a character from a known set
     start = ctx.match_start
+    literal_pos = -1
     while start < ctx.end:
         ctx.jitdriver_CharsetSearch.jit_merge_point(ctx=ctx, start=start,
-                                                    base=base, pattern=pattern)
+                                                    base=base, pattern=pattern,
+                                                    literal_pos=literal_pos)
+        if pattern.literal_chars:
+            literal_pos = next_required_literal(ctx, pattern, start,
+                                                literal_pos)
+            if literal_pos < ctx.ZERO:
+                break
+            start = skip_to_literal(ctx, pattern, start, literal_pos)
         if rsre_char.check_charset(ctx, pattern, 5, ctx.str(start)):
             if sre_match(ctx, pattern, base, start, None) is not None:
                 ctx.match_start = start
@@ -1281,3 +1525,5 @@ def fast_search(ctx, pattern):
         string_position = ctx.next(string_position)
         if string_position >= ctx.end:
             return False
+
+from rpython.rlib.rsre import rsre_nfa    # circular import
@@ -0,0 +1,519 @@
+"""
+An alternate matching engine for the patterns without backreferences,
+lookaround assertions or repetitions of something that can be empty.
+
+The compiled code is translated to a Thompson NFA which is simulated
+with the Pike VM: all the threads progress together, one character at a
+time, kept in priority order and each with its own chain of marks.
+This takes a time linear in the length of the string, and finds the same
+match and the same marks as the backtracking engine of rsre_core, which
+follows the threads in this order one after the other.
+
+Before that, a DFA built lazily from the sets of NFA states, and cached
+on the program, checks quickly whether there is a match at all.  This
+only works when the pattern has no AT opcode, whose result depends on
+the position in the string and not just on the current character.
+"""
+
+from rpython.rlib import jit
+from rpython.rlib.rsre import rsre_char, rsre_constants as consts
+from rpython.rlib.rsre.rsre_core import (specializectx, Mark, sre_at,
+    unroll_char_checker, _sequence_width)
+
+
+ENGINE_AUTO = 0        # the NFA engine only for some nested repetitions
+ENGINE_BACKTRACK = 1
+ENGINE_NFA = 2
+
+# the instructions of the NFA program
+I_CHAR = 0             # <arg=ppos of a single-character opcode>
+I_SPLIT = 1            # <arg=preferred target> <arg2=other target>
+I_JMP = 2              # <arg=target>
+I_MARK = 3             # <arg=gid>
+I_AT = 4               # <arg=atcode>
+I_MATCH = 5
+
+MAX_PROGRAM = 10000    # larger programs are not supported
+MAX_DFA_STATES = 1000  # after that many states the DFA is not used
+
+
+class NotSupported(Exception):
+    def __init__(self, msg):
+        self.msg = msg
+
+
+class NfaProgram(object):
+    """The NFA program, along with the cache of the DFA states."""
+
+    def __init__(self, ops, args, args2):
+        self.ops = ops
+        self.args = args
+        self.args2 = args2
+        self.use_dfa = I_AT not in ops
+        self.dfa_states = {}
+        self.dfa_start = None
+        self.dfa_search_start = None
+
+
+class NfaCompiler(object):
+
+    def __init__(self, code):
+        self.code = code
+        self.ops = []
+        self.args = []
+        self.args2 = []
+
+    def compile(self):
+        code = self.code
+        ppos = 0
+        if code and code[0] == consts.OPCODE_INFO:
+            ppos = 1 + code[1]
+        self.compile_sequence(ppos, len(code))
+        self.emit(I_MATCH)
+        return NfaProgram(self.ops[:], self.args[:], self.args2[:])
+
+    def emit(self, op, arg=0, arg2=0):
+        if len(self.ops) >= MAX_PROGRAM:
+            raise NotSupported("pattern too large for the nfa engine")
+        self.ops.append(op)
+        self.args.append(arg)
+        self.args2.append(arg2)
+        return len(self.ops) - 1
+
+    def compile_sequence(self, ppos, end):
+        code = self.code
+        while ppos < end:
+            op = code[ppos]
+            if op == consts.OPCODE_SUCCESS:
+                break
+            ppos = self.compile_op(ppos)
+
+    def compile_op(self, ppos):
+        code = self.code
+        op = code[ppos]
+        width = char_op_width(code, ppos)
+        if width > 0:
+            self.emit(I_CHAR, ppos)
+            return ppos + width
+        if op == consts.OPCODE_MARK:
+            self.emit(I_MARK, code[ppos + 1])
+            return ppos + 2
+        if op == consts.OPCODE_AT:
+            self.emit(I_AT, code[ppos + 1])
+            return ppos + 2
+        if op == consts.OPCODE_BRANCH:
+            # <BRANCH> <skip> code <JUMP> <skip> ... <0>
+            jumps = []
+            ppos += 1
+            while code[ppos]:
+                skip = code[ppos]
+                if code[ppos + skip]:
+                    split = self.emit(I_SPLIT, len(self.ops) + 1)
+                    self.compile_sequence(ppos + 1, ppos + skip - 2)
+                    jumps.append(self.emit(I_JMP))
+                    self.args2[split] = len(self.ops)
+                else:
+                    self.compile_sequence(ppos + 1, ppos + skip - 2)
+                ppos += skip
+            for jump in jumps:
+                self.args[jump] = len(self.ops)
+            return ppos + 1
+        if (op == consts.OPCODE_REPEAT_ONE or
+                op == consts.OPCODE_MIN_REPEAT_ONE):
+            # <REPEAT_ONE> <skip> <min> <max> item <SUCCESS> tail
+            end = ppos + 1 + code[ppos + 1]
+            if ppos + 4 + char_op_width(code, ppos + 4) != end - 1:
+                raise NotSupported("unsupported repeated item")
+            self.compile_repeat(ppos + 4, end - 1, code[ppos + 2],
+                                code[ppos + 3],
+                                op == consts.OPCODE_REPEAT_ONE)
+            return end
+        if op == consts.OPCODE_REPEAT:
+            # <REPEAT> <skip> <min> <max> item <UNTIL> tail
+            until = ppos + 1 + code[ppos + 1]
+            if _sequence_width(code, ppos + 4, until)[0] == 0:
+                raise NotSupported("repetition of something that can be "
+                                   "empty")
+            self.compile_repeat(ppos + 4, until, code[ppos + 2],
+                                code[ppos + 3],
+                                code[until] == consts.OPCODE_MAX_UNTIL)
+            return until + 1
+        raise NotSupported("opcode %d not supported by the nfa engine" % op)
+
+    def compile_repeat(self, ppos, end, minimum, maximum, greedy):
+        # every copy of the item takes at least one instruction
+        if minimum > MAX_PROGRAM or (maximum != rsre_char.MAXREPEAT and
+                                     maximum - minimum > MAX_PROGRAM):
+            raise NotSupported("pattern too large for the nfa engine")
+        for i in range(minimum):
+            self.compile_sequence(ppos, end)
+        if maximum == rsre_char.MAXREPEAT:
+            # L: SPLIT(L+1, out)  item  JMP(L)
+            split = self.emit(I_SPLIT)
+            self.compile_sequence(ppos, end)
+            self.emit(I_JMP, split)
+            self.set_split(split, split + 1, len(self.ops), greedy)
+        else:
+            splits = []
+            for i in range(maximum - minimum):
+                splits.append(self.emit(I_SPLIT))
+                self.compile_sequence(ppos, end)
+            for split in splits:
+                self.set_split(split, split + 1, len(self.ops), greedy)
+
+    def set_split(self, split, item, out, greedy):
+        if greedy:
+            self.args[split] = item
+            self.args2[split] = out
+        else:
+            self.args[split] = out
+            self.args2[split] = item
+
+def char_op_width(code, ppos):
+    # the length of the single-character opcode at code[ppos], or 0
+    op = code[ppos]
+    if op == consts.OPCODE_ANY or op == consts.OPCODE_ANY_ALL:
+        return 1
+    if (op == consts.OPCODE_LITERAL or
+            op == consts.OPCODE_LITERAL_IGNORE or
+            op == consts.OPCODE_NOT_LITERAL or
+            op == consts.OPCODE_NOT_LITERAL_IGNORE):
+        return 2
+    if op == consts.OPCODE_IN or op == consts.OPCODE_IN_IGNORE:
+        return 1 + code[ppos + 1]
+    return 0
+
+class AutoScanner(object):
+    """Walks the code once, without compiling it, to decide whether
+    ENGINE_AUTO uses the NFA engine.  Like NfaCompiler, raises
+    NotSupported for the patterns that the NFA engine cannot run."""
+
+    def __init__(self, code):
+        self.code = code
+        self.splits = 0
+        # true if some repetition contains a repetition or an alternation
+        self.nested_repeat = False
+        self.lazy_repeat = False
+
+    def scan(self):
+        code = self.code
+        ppos = 0
+        if code and code[0] == consts.OPCODE_INFO:
+            ppos = 1 + code[1]
+        self.scan_sequence(ppos, len(code))
+
+    def scan_sequence(self, ppos, end):
+        code = self.code
+        while ppos < end and code[ppos] != consts.OPCODE_SUCCESS:
+            ppos = self.scan_op(ppos)
+
+    def scan_op(self, ppos):
+        # the same cases as NfaCompiler.compile_op()
+        code = self.code
+        op = code[ppos]
+        width = char_op_width(code, ppos)
+        if width > 0:
+            return ppos + width
+        if op == consts.OPCODE_MARK or op == consts.OPCODE_AT:
+            return ppos + 2
+        if op == consts.OPCODE_BRANCH:
+            ppos += 1
+            while code[ppos]:
+                skip = code[ppos]
+                if code[ppos + skip]:
+                    self.splits += 1
+                self.scan_sequence(ppos + 1, ppos + skip - 2)
+                ppos += skip
+            return ppos + 1
+        if (op == consts.OPCODE_REPEAT_ONE or
+                op == consts.OPCODE_MIN_REPEAT_ONE):
+            end = ppos + 1 + code[ppos + 1]
+            if ppos + 4 + char_op_width(code, ppos + 4) != end - 1:
+                raise NotSupported("unsupported repeated item")
+            self.scan_repeat(code[ppos + 2], code[ppos + 3],
+                             op == consts.OPCODE_REPEAT_ONE)
+            return end
+        if op == consts.OPCODE_REPEAT:
+            until = ppos + 1 + code[ppos + 1]
+            if _sequence_width(code, ppos + 4, until)[0] == 0:
+                raise NotSupported("repetition of something that can be "
+                                   "empty")
+            splits_before = self.splits
+            self.scan_sequence(ppos + 4, until)
+            if self.splits > splits_before:
+                self.nested_repeat = True
+            self.scan_repeat(code[ppos + 2], code[ppos + 3],
+                             code[until] == consts.OPCODE_MAX_UNTIL)
+            return until + 1
+        raise NotSupported("opcode %d not supported by the nfa engine" % op)
+
+    def scan_repeat(self, minimum, maximum, greedy):
+        if minimum != maximum:
+            self.splits += 1
+        if not greedy:
+            # even with minimum == maximum, see select_engine()
+            self.lazy_repeat = True
+
+def select_engine(pattern, engine=ENGINE_AUTO):
+    """Decides if the CompiledPattern 'pattern' uses the NFA engine, and
+    then stores its program in 'pattern.nfa'.  Must be called before the
+    pattern is used.  With ENGINE_NFA, raises NotSupported if the pattern
+    cannot use it.  With ENGINE_AUTO, the NFA engine is only used for the
+    patterns with nested repetitions, whose backtracking can take an
+    exponential time, and only if they have no lazy repetition: with
+    these, the backtracking engine can give other results (e.g. the
+    fullmatch() of '((a)?.{2}?)+' on 'baa'), and ENGINE_AUTO must not
+    change the results.  The NFA program is only built if it is used."""
+    if engine == ENGINE_BACKTRACK:
+        return False
+    if engine == ENGINE_AUTO:
+        scanner = AutoScanner(pattern.pattern)
+        try:
+            scanner.scan()
+        except NotSupported:
+            return False
+        if not scanner.nested_repeat or scanner.lazy_repeat:
+            return False
+    try:
+        program = NfaCompiler(pattern.pattern).compile()
+    except NotSupported:
+        if engine == ENGINE_NFA:
+            raise
+        return False
+    pattern.nfa = program
+    return True
+
+# ____________________________________________________________
+
+@specializectx
+def check_char(ctx, pattern, ptr, ppos):
+    op = pattern.pattern[ppos]
+    for op1, checkerfn in unroll_char_checker:
+        if op1 == op:
+            return checkerfn(ctx, pattern, ptr, ppos)
+    return False
+
+
+class ThreadList(object):
+    """The threads at one position of the string, in priority order."""
+
+    def __init__(self, size):
+        self.pcs = [0] * size
+        self.marks = [None] * size
+        self.starts = [0] * size
+        self.count = 0
+        self.seen = [0] * size
+        self.stamp = 1
+        self.stack_pcs = []
+        self.stack_marks = []
+
+    def clear(self):
+        self.count = 0
+        self.stamp += 1
+
+@specializectx
+def add_thread(ctx, program, tlist, pc, marks, start, ptr):
+    # follows the jumps, splits, marks and assertions from 'pc', adding
+    # the threads that reach a character or the end of the program.
+    # The first thread to reach an instruction wins: the others have the
+    # same future but a lower priority.
+    stack_pcs = tlist.stack_pcs
+    stack_marks = tlist.stack_marks
+    stack_pcs.append(pc)
+    stack_marks.append(marks)
+    while stack_pcs:
+        pc = stack_pcs.pop()
+        marks = stack_marks.pop()
+        if tlist.seen[pc] == tlist.stamp:
+            continue
+        tlist.seen[pc] = tlist.stamp
+        op = program.ops[pc]
+        if op == I_JMP:
+            stack_pcs.append(program.args[pc])
+            stack_marks.append(marks)
+        elif op == I_SPLIT:
+            stack_pcs.append(program.args2[pc])
+            stack_marks.append(marks)
+            stack_pcs.append(program.args[pc])
+            stack_marks.append(marks)
+        elif op == I_MARK:
+            stack_pcs.append(pc + 1)
+            stack_marks.append(Mark(program.args[pc], ptr, marks))
+        elif op == I_AT:
+            if sre_at(ctx, program.args[pc], ptr):
+                stack_pcs.append(pc + 1)
+                stack_marks.append(marks)
+        else:
+            i = tlist.count
+            tlist.pcs[i] = pc
+            tlist.marks[i] = marks
+            tlist.starts[i] = start
+            tlist.count = i + 1
+
+@specializectx
+@jit.dont_look_inside
+def nfa_match(ctx, pattern, searching):
+    """Match or search with the NFA engine, setting the match_start,
+    match_end and match_marks of 'ctx' like rsre_core does."""
+    program = pattern.nfa
+    if program.use_dfa and not dfa_may_match(ctx, pattern, program,
+                                             searching):
+        return False
+    size = len(program.ops)
+    clist = ThreadList(size)
+    nlist = ThreadList(size)
+    matched = False
+    match_start = ptr = ctx.match_start
+    match_end = ptr
+    match_marks = None
+    while True:
+        if not matched and (searching or ptr == ctx.match_start):
+            # a new thread starting here, with the lowest priority
+            add_thread(ctx, program, clist, 0, None, ptr, ptr)
+        if clist.count == 0 and (matched or not searching):
+            break
+        at_end = ptr >= ctx.end
+        if not at_end:
+            next_ptr = ctx.next(ptr)
+        else:
+            next_ptr = ptr
+        for i in range(clist.count):
+            pc = clist.pcs[i]
+            if program.ops[pc] == I_MATCH:
+                if ctx.fullmatch_only and ptr != ctx.end:
+                    continue
+                matched = True
+                match_start = clist.starts[i]
+                match_end = ptr
+                match_marks = clist.marks[i]
+                break     # the lower-priority threads are not needed
+            if not at_end and check_char(ctx, pattern, ptr,
+                                         program.args[pc]):
+                add_thread(ctx, program, nlist, pc + 1, clist.marks[i],
+                           clist.starts[i], next_ptr)
+        if at_end:
+            break
+        ptr = next_ptr
+        clist, nlist = nlist, clist
+        nlist.clear()
+    if matched:
+        ctx.match_start = match_start
+        ctx.match_end = match_end
+        ctx.match_marks = match_marks
+    return matched
+
+# ____________________________________________________________
+
+class DfaState(object):
+    """A set of NFA threads, without marks and priorities.  'pcs' is the
+    sorted list of the I_CHAR instructions, and 'accepting' is true if
+    I_MATCH is also reached."""
+
+    def __init__(self, pcs, accepting):
+        self.pcs = pcs
+        self.accepting = accepting
+        self.transitions = {}      # {character: DfaState}
+
+def dfa_closure(program, seen, pcs, pc):
+    # like add_thread(), for a program without I_AT instructions
+    stack = [pc]
+    while stack:
+        pc = stack.pop()
+        if seen[pc]:
+            continue
+        seen[pc] = True
+        op = program.ops[pc]
+        if op == I_JMP:
+            stack.append(program.args[pc])
+        elif op == I_SPLIT:
+            stack.append(program.args2[pc])
+            stack.append(program.args[pc])
+        elif op == I_MARK:
+            stack.append(pc + 1)
+        else:
+            pcs.append(pc)
+
+def dfa_state(program, pcs, searching):
+    # returns the unique DfaState for the given threads, or None if there
+    # are too many states already
+    if searching:
+        dfa_closure(program, [False] * len(program.ops), pcs, 0)
+    pcs.sort()
+    accepting = False
+    char_pcs = []
+    previous = -1
+    for pc in pcs:
+        if pc == previous:
+            continue
+        previous = pc
+        if program.ops[pc] == I_MATCH:
+            accepting = True
+        else:
+            char_pcs.append(pc)
+    key_parts = [str(pc) for pc in char_pcs]
+    if searching:
+        key_parts.append('s')
+    if accepting:
+        key_parts.append('m')
+    key = ','.join(key_parts)
+    try:
+        return program.dfa_states[key]
+    except KeyError:
+        pass
+    if len(program.dfa_states) >= MAX_DFA_STATES:
+        return None
+    state = DfaState(char_pcs, accepting)
+    program.dfa_states[key] = state
+    return state
+
+@specializectx
+def dfa_next(ctx, pattern, program, state, ptr, searching):
+    c = ctx.str(ptr)
+    try:
+        return state.transitions[c]
+    except KeyError:
+        pass
+    seen = [False] * len(program.ops)
+    pcs = []
+    for pc in state.pcs:
+        if check_char(ctx, pattern, ptr, program.args[pc]):
+            dfa_closure(program, seen, pcs, pc + 1)
+    result = dfa_state(program, pcs, searching)
+    if result is not None:
+        state.transitions[c] = result
+    return result
+
+@specializectx
+def dfa_may_match(ctx, pattern, program, searching):
+    """Returns False if the DFA proves that there is no match."""
+    if searching:
+        state = program.dfa_search_start
+    else:
+        state = program.dfa_start
+    if state is None:
+        pcs = []
+        if not searching:
+            dfa_closure(program, [False] * len(program.ops), pcs, 0)
+        state = dfa_state(program, pcs, searching)
+        if state is None:
+            program.use_dfa = False
+            return True
+        if searching:
+            program.dfa_search_start = state
+        else:
+            program.dfa_start = state
+    ptr = ctx.match_start
+    while True:
+        if state.accepting and (not ctx.fullmatch_only or ptr == ctx.end):
+            return True
+        if ptr >= ctx.end:
+            return False
+        if not state.pcs and not searching:
+            return False
+        state = dfa_next(ctx, pattern, program, state, ptr, searching)
+        if state is None:
+            # too many states: give up on the DFA for this program
+            program.use_dfa = False
+            program.dfa_states.clear()
+            return True
+        ptr = ctx.next(ptr)
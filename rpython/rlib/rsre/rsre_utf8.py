@@ -3,7 +3,7 @@ from rpython.rlib.debug import check_nonneg
 from rpython.rlib.rsre.rsre_core import AbstractMatchContext, EndOfString
 from rpython.rlib.rsre import rsre_char
 from rpython.rlib.objectmodel import we_are_translated
-from rpython.rlib import rutf8
+from rpython.rlib import rstring, rutf8
 
 
 class Utf8MatchContext(AbstractMatchContext):
@@ -71,6 +71,12 @@ class Utf8MatchContext(AbstractMatchContext):
         # may overestimate if there are non-ascii chars
         return position_high - position_low
 
+    def find_literal(self, pattern, position):
+        # the result is the start of a character, because utf-8 is
+        # self-synchronizing
+        return rstring.find(self._utf8, pattern.literal_utf8,
+                            position, self.end)
+
 
 def make_utf8_ctx(utf8string, bytestart, byteend):
     if bytestart < 0: bytestart = 0
@@ -106,6 +106,16 @@ class MatchContextForTests(StrMatchContext):
         assert isinstance(index, int)
         return Position(base_position._p + index)
 
+    def find_literal(self, pattern, position):
+        assert isinstance(position, Position)
+        if pattern.literal_bytes is None:
+            return -1
+        result = self._string.find(pattern.literal_bytes, position._p,
+                                   self.end._p)
+        if result < 0:
+            return -1
+        return Position(result)
+
 
 def match(pattern, string, start=0, end=sys.maxint, fullmatch=False):
     start, end = _adjust(start, end, len(string))
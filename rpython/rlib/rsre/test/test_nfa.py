@@ -0,0 +1,179 @@
+import random, py
+from rpython.rlib.rsre import rsre_core, rsre_nfa, rsre_utf8, rsre_char
+from rpython.rlib.rsre.rpy import get_code
+from rpython.rlib.rsre.test import support
+
+def setup_module(mod):
+    from rpython.rlib.unicodedata import unicodedb
+    rsre_char.set_unicode_db(unicodedb)
+
+
+def get_nfa_code(regexp):
+    code = get_code(regexp)
+    assert rsre_nfa.select_engine(code, rsre_nfa.ENGINE_NFA)
+    return code
+
+def summary(ctx):
+    # everything that the app-level match object can see
+    if ctx is None:
+        return None
+    if isinstance(ctx.match_start, support.Position):
+        real_pos = ctx._real_pos
+    else:
+        real_pos = lambda pos: pos
+    marks = []
+    mark = ctx.match_marks
+    while mark is not None:
+        marks.append((mark.gid, real_pos(mark.position)))
+        mark = mark.prev
+    return real_pos(ctx.match_start), real_pos(ctx.match_end), marks
+
+PATTERNS = [
+    r'a|ab|abc',
+    r'(a|ab)(c|bcd)(d*)',
+    r'(a+)+b',
+    r'(a|aa)*c',
+    r'((a)|b)*?(b+)',
+    r'(?:(a)|b)*',
+    r'(\w+)\s*=\s*(\w+|"[^"]*")',
+    r'x{2,4}?(x*)',
+    r'(ab){2,3}(a)?',
+    r'(.*?)(\d+)(.*)',
+    r'^(?:(a)|(b))+$',
+    r'\bab(c|d)?\b',
+    r'(?i)(AB|a)+c',
+    r'[^ab]+(b)',
+    r'((?:ab|a)(?:c|bc))+',
+    r'(a?b)+?c',
+    ]
+STRINGS = ['', 'a', 'ab', 'abc', 'abcd', 'aabcd', 'aaab', 'aaaac', 'ababa',
+           'bab', 'xxxxxx', 'key = "v w"', 'k=v', 'abababa', 'x12y34',
+           'ab abc abd', 'AbAbAC', 'ccb', 'abcabcbcd']
+
+def check_same(regexp, string, fullmatch=True, nfa=None):
+    backtrack = get_code(regexp)
+    if nfa is None:
+        nfa = get_nfa_code(regexp)
+    funcs = [rsre_core.match, rsre_core.search, support.search, support.match]
+    if fullmatch:
+        funcs.append(rsre_core.fullmatch)
+    for start in range(len(string) + 1):
+        for end in [len(string), len(string) - 1]:
+            if end < start:
+                continue
+            for func in funcs:
+                expected = summary(func(backtrack, string, start, end))
+                got = summary(func(nfa, string, start, end))
+                assert got == expected, (regexp, string, start, end, func)
+            expected = summary(rsre_utf8.utf8search(backtrack, string,
+                                                    start, end))
+            got = summary(rsre_utf8.utf8search(nfa, string, start, end))
+            assert got == expected, (regexp, string, start, end)
+
+def test_same_results():
+    for regexp in PATTERNS:
+        for string in STRINGS:
+            check_same(regexp, string)
+
+def test_random_patterns():
+    r = random.Random(42)
+    pieces = ['a', 'b', '.', '[ab]', '(a)', '(b|ab)', '(?:a|b)', '(a|)b']
+    suffixes = ['', '*', '+', '?', '*?', '+?', '{1,2}', '{2}?']
+    for i in range(200):
+        regexp = ''.join([r.choice(pieces) + r.choice(suffixes)
+                          for j in range(r.randrange(1, 5))])
+        if r.random() < 0.3:
+            regexp = '(%s)+' % (regexp,)
+        code = get_code(regexp)
+        try:
+            rsre_nfa.select_engine(code, rsre_nfa.ENGINE_NFA)
+        except rsre_nfa.NotSupported:
+            continue
+        for j in range(5):
+            string = ''.join([r.choice('ab') for k in range(r.randrange(8))])
+            # the backtracking fullmatch() can wrongly succeed with lazy
+            # repeats nested in a REPEAT, e.g. '((a)+?.{2}?)+' on 'ababb'
+            check_same(regexp, string, fullmatch=False)
+
+def test_auto_same_results():
+    # ENGINE_AUTO must not change any result, fullmatch() included
+    r = random.Random(43)
+    pieces = ['a', 'b', '.', '[ab]', '(a)', '(b|ab)', '(?:a|b)']
+    suffixes = ['', '*', '+', '?', '*?', '+?', '{1,2}', '{2}?']
+    selected = 0
+    for i in range(300):
+        regexp = '(%s)+' % ''.join([r.choice(pieces) + r.choice(suffixes)
+                                    for j in range(r.randrange(1, 4))])
+        code = get_code(regexp)
+        if not rsre_nfa.select_engine(code):
+            assert code.nfa is None
+            continue
+        selected += 1
+        for j in range(5):
+            string = ''.join([r.choice('ab') for k in range(r.randrange(8))])
+            check_same(regexp, string, nfa=code)
+    assert selected > 20
+
+def test_select_engine():
+    def engine(regexp, engine=rsre_nfa.ENGINE_AUTO):
+        code = get_code(regexp)
+        return rsre_nfa.select_engine(code, engine)
+    assert engine(r'(a+)+b')
+    assert engine(r'(xy|z)*w')
+    assert engine(r'(?:a\w*)*b')
+    assert not engine(r'a+b')
+    assert not engine(r'(ab)+')
+    # lazy repetitions stay on the backtracking engine
+    assert not engine(r'((a)+?.{2}?)+')
+    assert not engine(r'(a+?)+b')
+    assert not engine(r'(a+b)+?c')
+    assert not engine(r'((a)?.{2}?)+')
+    assert engine(r'(a+.{2})+')
+    assert not engine(r'(a+)+b', rsre_nfa.ENGINE_BACKTRACK)
+    assert engine(r'a+b', rsre_nfa.ENGINE_NFA)
+    # not supported
+    assert not engine(r'(a+)\1(a+)+')
+    assert not engine(r'(?=a)(a+)+')
+    assert not engine(r'(a*)+b')
+    for regexp in [r'(a)\1', r'(?<=a)b', r'(?!a)', r'(a)?(?(1)b|c)',
+                   r'(a*)*', r'(?:ab){10000}', r'a{,100000}']:
+        code = get_code(regexp)
+        py.test.raises(rsre_nfa.NotSupported, rsre_nfa.select_engine,
+                       code, rsre_nfa.ENGINE_NFA)
+        assert code.nfa is None
+
+def test_no_catastrophic_backtracking():
+    code = get_code(r'(a+)+b')
+    assert rsre_nfa.select_engine(code)
+    string = 'a' * 100
+    assert rsre_core.search(code, string) is None
+    assert rsre_core.match(code, string) is None
+    res = rsre_core.search(code, string + 'b')
+    assert res.span() == (0, 101)
+    assert res.span(1) == (0, 100)
+
+def test_dfa_cache():
+    code = get_nfa_code(r'(x|y)+z')
+    program = code.nfa
+    assert program.use_dfa
+    assert rsre_core.search(code, 'xyxyq' * 10) is None
+    assert len(program.dfa_states) > 0
+    assert program.dfa_search_start is not None
+    states = len(program.dfa_states)
+    assert rsre_core.search(code, 'qyxyz').span() == (1, 5)
+    assert len(program.dfa_states) == states + 1    # only the accepting one
+    # patterns with AT opcodes don't use the DFA
+    assert not get_nfa_code(r'\b(x|y)+z').nfa.use_dfa
+
+def test_dfa_too_many_states(monkeypatch):
+    monkeypatch.setattr(rsre_nfa, 'MAX_DFA_STATES', 3)
+    code = get_nfa_code(r'(a|b)*a(a|b)(a|b)(a|b)c')
+    assert rsre_core.search(code, 'bbababababc').span() == (0, 11)
+    assert not code.nfa.use_dfa
+    assert len(code.nfa.dfa_states) == 0
+    assert rsre_core.search(code, 'abababbbbc') is None
+
+def test_fullmatch_nested_lazy():
+    code = get_nfa_code(r'((a)+?.{2}?)+')
+    assert rsre_core.fullmatch(code, 'ababb') is None
+    assert rsre_core.fullmatch(code, 'abaabb').span() == (0, 6)
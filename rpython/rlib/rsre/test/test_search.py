@@ -230,6 +230,67 @@ class BaseTestSearch:
                     assert match is None
                     assert res is None
 
+    def test_required_literal_search(self):
+        P = self.P
+        for pattern, string, span in [
+                (r'(\d+) ERROR', 'x 12 WARN 3 ERROR 4 ERROR', (10, 17)),
+                (r'(\d+) ERROR', '12 WARN 3 WARN', None),
+                (r'(GET|POST) /api/(\w+)', 'GET /x POST /api/y', (7, 18)),
+                (r'\w\w:\d\d ERR', 'ab:12 ab:12 ERR', (6, 15)),
+                (r'[a-z]{2,3}ERR', 'abcdERR', (1, 7)),
+                (r'(?:a|bc)+X', 'bcbcaX', (0, 6)),
+                (r'(\w)\1X', 'aabbX', (2, 5)),
+                (r'.*ERROR', 'line one\nline ERROR two', (9, 19)),
+                (r'x(?=ab)', 'xaxab', (2, 3)),
+                ]:
+            r_code, r = get_code_and_re(pattern)
+            assert r_code.literal_chars
+            match = r.search(string)
+            res = self.search(r_code, string)
+            if span is None:
+                assert match is None and res is None
+            else:
+                assert match.span() == span
+                assert res.span() == (P(span[0]), P(span[1]))
+            for start in range(len(string) + 1):
+                match = r.search(string, start)
+                res = self.search(r_code, string, start)
+                if match is None:
+                    assert res is None
+                else:
+                    assert res.span() == (P(match.start()), P(match.end()))
+
+
+def test_find_required_literal():
+    def find(pattern):
+        r_code = get_code(pattern)
+        chars, minimum, maximum = rsre_core.find_required_literal(
+            r_code.pattern)
+        return ''.join([chr(c) for c in chars]), minimum, maximum
+    assert find(r'(\d+) ERROR') == (' ERROR', 1, -1)
+    assert find(r'(GET|POST) /api') == (' /api', 3, 4)
+    assert find(r'\d\d:\d\d ERR') == (' ERR', 5, 5)
+    assert find(r'a(b)c[de]fghi') == ('fghi', 4, 4)
+    assert find(r'^ab\bcd') == ('abcd', 0, 0)
+    assert find(r'x{2,5}?yy') == ('yy', 2, 5)
+    assert find(r'(?:ab){3}z') == ('z', 6, 6)
+    assert find(r'(a)\1zz') == ('zz', 1, -1)
+    assert find(r'(?<=q)rs') == ('rs', 0, 0)
+    assert find(r'a|b') == ('', 0, 0)
+    assert find(r'[ab]+') == ('', 0, 0)
+    assert find(r'(?i)abc') == ('', 0, 0)
+
+def test_find_literal_generic():
+    r_code = get_code(u'(\\d+)\u1234z')
+    assert r_code.literal_bytes is None
+    assert r_code.literal_utf8 == u'\u1234z'.encode('utf-8')
+    ctx = rsre_core.UnicodeMatchContext(u'1\u1234 2\u1234z', 0, 6)
+    assert ctx.find_literal(r_code, 0) == 4
+    assert ctx.find_literal(r_code, 5) == -1
+    assert rsre_core.search(r_code, '12\xe1\x88\xb4z') is None
+    res = rsre_utf8.utf8search(r_code, u'1\u1234 2\u1234z'.encode('utf-8'))
+    assert res.span() == (5, 10)
+
 
 class TestSearchCustom(BaseTestSearch):
     search = staticmethod(support.search)
@@ -1,7 +1,7 @@
 # minimal test: just checks that (parts of) rsre can be translated
 
 from rpython.rtyper.test.test_llinterp import gengraph, interpret
-from rpython.rlib.rsre import rsre_core
+from rpython.rlib.rsre import rsre_core, rsre_nfa
 from rpython.rlib.rsre.rsre_re import compile
 
 def main(n):
@@ -12,6 +12,10 @@ def main(n):
     #
     unicodestr = unichr(n) * n
     pattern = rsre_core.CompiledPattern(pattern)
+    try:
+        rsre_nfa.select_engine(pattern, n % 3)
+    except rsre_nfa.NotSupported:
+        pass
     ctx = rsre_core.UnicodeMatchContext(pattern, unicodestr,
                                         0, len(unicodestr), 0)
     rsre_core.search_context(ctx)
@@ -1,6 +1,7 @@
 from rpython.rlib.objectmodel import specialize
 from rpython.rlib.rvmprof.rvmprof import _get_vmprof, VMProfError
 from rpython.rlib.rvmprof.rvmprof import vmprof_execute_code, MAX_FUNC_NAME
+from rpython.rlib.rvmprof.rvmprof import DEFAULT_ALLOC_INTERVAL
 from rpython.rlib.rvmprof.rvmprof import _was_registered
 from rpython.rlib.rvmprof.cintf import VMProfPlatformUnsupported
 from rpython.rtyper.lltypesystem import rffi, lltype
@@ -32,8 +33,10 @@ def get_unique_id(code):
         return code._vmprof_unique_id
     return 0
 
-def enable(fileno, interval, memory=0, native=0, real_time=0):
-    _get_vmprof().enable(fileno, interval, memory, native, real_time)
+def enable(fileno, interval, memory=0, native=0, real_time=0,
+           alloc_interval=0):
+    _get_vmprof().enable(fileno, interval, memory, native, real_time,
+                         alloc_interval)
 
 def disable():
     _get_vmprof().disable()
@@ -42,6 +45,15 @@ def is_enabled():
     vmp = _get_vmprof()
     return vmp.is_enabled
 
+def get_alloc_interval():
+    """Return the allocation sampling interval in bytes, or 0.  For the
+    GC hooks' get_gc_alloc_sample_interval()."""
+    return _get_vmprof().alloc_interval
+
+def report_allocation(size, sampled_bytes):
+    """For the GC hooks' on_gc_alloc_sample()."""
+    _get_vmprof().report_allocation(size, sampled_bytes)
+
 def get_profile_path(space):
     vmp = _get_vmprof()
     if not vmp.is_enabled:
@@ -145,6 +145,10 @@ def setup():
     vmprof_start_sampling = rffi.llexternal("vmprof_start_sampling", [],
                                             lltype.Void, compilation_info=eci,
                                             _nowrapper=True)
+    vmprof_report_allocation = rffi.llexternal("vmprof_report_allocation",
+                                               [rffi.LONG, rffi.LONG],
+                                               rffi.INT, compilation_info=eci,
+                                               _nowrapper=True)
 
     return CInterface(locals())
 
@@ -22,6 +22,9 @@ VMPROF_JITTED_TAG = 3
 VMPROF_JITTING_TAG = 4
 VMPROF_GC_TAG = 5
 
+# allocation sampling interval, in bytes, when enabled without giving one
+DEFAULT_ALLOC_INTERVAL = 512 * 1024
+
 class VMProfError(Exception):
     msg = ''   # annotation hack
     def __init__(self, msg):
@@ -55,6 +58,7 @@ class VMProf(object):
 
     def _cleanup_(self):
         self.is_enabled = False
+        self.alloc_interval = 0
 
     @jit.dont_look_inside
     @specialize.argtype(1)
@@ -129,18 +133,25 @@ class VMProf(object):
         self._gather_all_code_objs = gather_all_code_objs
 
     @jit.dont_look_inside
-    def enable(self, fileno, interval, memory=0, native=0, real_time=0):
+    def enable(self, fileno, interval, memory=0, native=0, real_time=0,
+               alloc_interval=0):
         """Enable vmprof.  Writes go to the given 'fileno'.
         The sampling interval is given by 'interval' as a number of
         seconds, as a float which must be smaller than 1.0.
+        If 'alloc_interval' is not 0, the GC also records the stack of
+        the allocation that crosses every 'alloc_interval' bytes
+        allocated (this needs GC hooks calling report_allocation()).
         Raises VMProfError if something goes wrong.
         """
         assert fileno >= 0
         if self.is_enabled:
             raise VMProfError("vmprof is already enabled")
+        if alloc_interval < 0:
+            raise VMProfError("the allocation interval must be positive")
 
         if PLAT_WINDOWS:
             native = 0 # force disabled on Windows
+            alloc_interval = 0 # no allocation sampling on Windows either
         lines = 0 # not supported on PyPy currently
 
         p_error = self.cintf.vmprof_init(fileno, interval, memory, lines, "pypy", native, real_time)
@@ -152,6 +163,7 @@ class VMProf(object):
         if res < 0:
             raise VMProfError(os.strerror(rposix.get_saved_errno()))
         self.is_enabled = True
+        self.alloc_interval = alloc_interval
 
     @jit.dont_look_inside
     def disable(self):
@@ -161,6 +173,7 @@ class VMProf(object):
         if not self.is_enabled:
             raise VMProfError("vmprof is not enabled")
         self.is_enabled = False
+        self.alloc_interval = 0
         res = self.cintf.vmprof_disable()
         if res < 0:
             raise VMProfError(os.strerror(rposix.get_saved_errno()))
@@ -173,6 +186,14 @@ class VMProf(object):
         if self.cintf.vmprof_register_virtual_function(name, uid, 500000) < 0:
             raise VMProfError("vmprof buffers full!  disk full or too slow")
 
+    def report_allocation(self, size, sampled_bytes):
+        """Write the current stack as an allocation sample, standing for
+        'sampled_bytes' bytes allocated, for an object of 'size' bytes.
+        Meant to be called from GC hooks: it does not allocate.
+        """
+        if self.alloc_interval > 0:
+            self.cintf.vmprof_report_allocation(sampled_bytes, size)
+
     def stop_sampling(self):
         """
         Temporarily stop the sampling of stack frames. Signals are still
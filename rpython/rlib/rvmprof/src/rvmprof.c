@@ -46,3 +46,63 @@ void vmprof_start_sampling(void)
 {
     vmprof_ignore_signals(0);
 }
+
+#ifdef VMPROF_UNIX
+/* not declared in shared/vmp_stack.h */
+int vmp_walk_and_record_python_stack_only(PY_STACK_FRAME_T *frame,
+                                          void ** result, int max_depth,
+                                          int depth, intptr_t pc);
+
+int vmprof_report_allocation(long sampled_bytes, long size)
+{
+    /* Called by the GC, outside any signal handler.  Writes a record
+       with the same layout as the stack samples taken by the signal
+       handler with 'memory' enabled:
+
+           MARKER_ALLOCATION, sampled_bytes, depth, stack[depth],
+           thread state (always NULL), size
+
+       where 'sampled_bytes' is the number of allocated bytes that this
+       sample stands for, and 'size' is the size of the allocated object.
+       Only the Python-level stack is recorded. */
+    int result = 0;
+    long val = vmprof_enter_signal();
+
+    if (val == 0) {
+        int fd = vmp_profile_fileno();
+        struct profbuf_s *p = reserve_buffer(fd);
+        if (p == NULL) {
+            /* no free buffer right now: drop this sample */
+            result = -1;
+        } else {
+            struct prof_stacktrace_s *st = (struct prof_stacktrace_s *)p->data;
+            int depth;
+            st->marker = MARKER_ALLOCATION;
+            st->count = sampled_bytes;
+            depth = vmp_walk_and_record_python_stack_only(
+                get_vmprof_stack(), st->stack, MAX_STACK_DEPTH-2, 0, 0);
+            if (depth == 0) {
+                cancel_buffer(p);
+            } else {
+                st->depth = depth;
+                st->stack[depth++] = NULL;
+                st->stack[depth++] = (void *)size;
+                p->data_offset = offsetof(struct prof_stacktrace_s, marker);
+                p->data_size = (depth * sizeof(void *) +
+                                sizeof(struct prof_stacktrace_s) -
+                                offsetof(struct prof_stacktrace_s, marker));
+                commit_buffer(fd, p);
+            }
+        }
+    }
+    vmprof_exit_signal();
+    return result;
+}
+#else
+int vmprof_report_allocation(long sampled_bytes, long size)
+{
+    /* Never called: rvmprof.enable() turns allocation sampling off on
+       Windows, where there is no vmp_walk_and_record_python_stack_only() */
+    return -1;
+}
+#endif
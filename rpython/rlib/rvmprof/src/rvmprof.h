@@ -3,6 +3,9 @@
 #include <signal.h>
 #include "shared/vmprof.h"
 
+/* not in shared/vmprof.h: allocation samples are specific to RPython */
+#define MARKER_ALLOCATION '\x09'
+
 #define SINGLE_BUF_SIZE (8192 - 2 * sizeof(unsigned int))
 
 #ifdef VMPROF_WINDOWS
@@ -40,6 +43,7 @@ RPY_EXTERN intptr_t vmprof_get_traceback(void *, void *, void**, intptr_t);
 RPY_EXTERN long vmprof_get_profile_path(char *, long);
 RPY_EXTERN int vmprof_stop_sampling(void);
 RPY_EXTERN void vmprof_start_sampling(void);
+RPY_EXTERN int vmprof_report_allocation(long, long);
 
 long vmprof_write_header_for_jit_addr(intptr_t *result, long n,
                                       intptr_t addr, int max_depth);
@@ -0,0 +1,111 @@
+#! /usr/bin/env python
+"""
+Times the multiplication, the squaring and the modular exponentiation of
+rbigint over a range of operand sizes, to check the Toom-3 and Barrett
+code paths and to tune TOOM3_CUTOFF, TOOM3_SQUARE_CUTOFF and
+BARRETT_CUTOFF.
+
+For every size n (in digits of SHIFT bits) it prints the time taken by
+_k_mul() and by _tc_mul() to multiply two n-digits numbers and to square
+one, and the time taken by pow(a, e, m) for a n-digits modulus with and
+without Barrett reduction.
+
+    rpython -O2 rpython/rlib/test/targetbigintmulbenchmark.py
+    ./targetbigintmulbenchmark-c [maxsize]
+
+It also runs untranslated, but give it a small maxsize then.
+"""
+
+import sys
+from time import time
+from rpython.rlib.rarithmetic import r_ulonglong
+from rpython.rlib.rbigint import (rbigint, _k_mul, _tc_mul, _help_mult,
+    _barrett_mu, _store_digit, MASK, ONERBIGINT)
+
+# __________  Entry point  __________
+
+def make_number(ndigits, seed):
+    digits = [_store_digit(0)] * ndigits
+    x = seed
+    for i in range(ndigits):
+        x = (x * 1103515245 + 12345) & 0x7fffffff
+        digits[i] = _store_digit((x * 40503) & MASK)
+    digits[ndigits - 1] = _store_digit(MASK)    # no leading zero
+    return rbigint(digits, 1, ndigits)
+
+def bench_mul(n):
+    a = make_number(n, 1)
+    b = make_number(n, 2)
+    assert _k_mul(a, b).eq(_tc_mul(a, b))
+    assert _k_mul(a, a).eq(_tc_mul(a, a))
+    repeat = max(1, 2000000 // n)
+    t = time()
+    for i in range(repeat):
+        _k_mul(a, b)
+    t_k = (time() - t) / repeat
+    t = time()
+    for i in range(repeat):
+        _tc_mul(a, b)
+    t_tc = (time() - t) / repeat
+    t = time()
+    for i in range(repeat):
+        _k_mul(a, a)
+    t_ksq = (time() - t) / repeat
+    t = time()
+    for i in range(repeat):
+        _tc_mul(a, a)
+    t_tcsq = (time() - t) / repeat
+    print "mul %d digits: karatsuba %f, toom-3 %f" % (n, t_k, t_tc)
+    print "square %d digits: karatsuba %f, toom-3 %f" % (n, t_ksq, t_tcsq)
+
+def modpow(a, e, m, mu):
+    # left-to-right binary exponentiation, like the core of rbigint.pow()
+    z = ONERBIGINT
+    i = e.bit_length() - 1
+    while i >= 0:
+        z = _help_mult(z, z, m, mu)
+        if e.abs_rshift_and_mask(r_ulonglong(i), 1):
+            z = _help_mult(z, a, m, mu)
+        i -= 1
+    return z
+
+def bench_pow(n):
+    m = make_number(n, 3)
+    a = make_number(n, 4).mod(m)
+    e = make_number(4, 5)
+    mu = _barrett_mu(m)
+    assert modpow(a, e, m, None).eq(modpow(a, e, m, mu))
+    repeat = max(1, 20000 // n)
+    t = time()
+    for i in range(repeat):
+        modpow(a, e, m, None)
+    t_div = (time() - t) / repeat
+    t = time()
+    for i in range(repeat):
+        modpow(a, e, m, mu)
+    t_barrett = (time() - t) / repeat
+    print "pow with %d digits modulus: division %f, barrett %f" % (
+        n, t_div, t_barrett)
+
+def entry_point(argv):
+    maxsize = 6400
+    if len(argv) > 1:
+        maxsize = int(argv[1])
+    n = 25
+    while n <= maxsize:
+        bench_mul(n)
+        n = n * 3 // 2
+    n = 10
+    while n <= maxsize // 8:
+        bench_pow(n)
+        n = n * 3 // 2
+    return 0
+
+# _____ Define and setup target ___
+
+def target(*args):
+    return entry_point, None
+
+if __name__ == '__main__':
+    res = entry_point(sys.argv)
+    sys.exit(res)
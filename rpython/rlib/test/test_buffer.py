@@ -4,7 +4,8 @@ from rpython.rtyper.lltypesystem import lltype, rffi
 from rpython.rlib.rarithmetic import r_singlefloat
 from rpython.rlib.buffer import (
     StringBuffer, SubBuffer, Buffer, RawBuffer,
-    LLBuffer, RawByteBuffer, ByteBuffer)
+    LLBuffer, RawByteBuffer, ByteBuffer,
+    raw_address_buffers, copy_back_raw_buffers)
 from rpython.annotator.annrpython import RPythonAnnotator
 from rpython.annotator.model import SomeInteger
 from rpython.jit.metainterp.test.support import LLJitMixin
@@ -82,6 +83,31 @@ def test_setzeros():
     buf.setzeros(2, 3)
     assert buf.as_str() == 'AB\x00\x00\x00FGH'
 
+def test_raw_address_buffers():
+    class ListBuffer(Buffer):
+        def __init__(self, data):
+            self.readonly = False
+            self.data = list(data)
+        def getlength(self):
+            return len(self.data)
+        def getitem(self, index):
+            return self.data[index]
+        def setitem(self, index, char):
+            self.data[index] = char
+
+    buf1 = RawByteBuffer(3)
+    buf2 = ListBuffer('defg')
+    buf3 = ListBuffer('hij')
+    raw = raw_address_buffers([buf1, buf2, buf3])
+    assert raw[0] is buf1
+    assert isinstance(raw[1], RawByteBuffer)
+    assert raw[1].as_str() == 'defg'
+    raw[1].setslice(0, 'DEFG')
+    raw[2].setslice(0, 'HIJ')
+    copy_back_raw_buffers([buf1, buf2, buf3], raw, 5)
+    assert buf2.as_str() == 'DEfg'
+    assert buf3.as_str() == 'hij'
+
 
 class BaseTypedReadTest:
 
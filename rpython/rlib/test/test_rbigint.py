@@ -10,8 +10,8 @@ import pytest
 from rpython.rlib import rbigint as lobj
 from rpython.rlib.rarithmetic import r_uint, r_longlong, r_ulonglong, intmask
 from rpython.rlib.rbigint import (rbigint, SHIFT, MASK, KARATSUBA_CUTOFF,
-    _store_digit, _mask_digit, InvalidEndiannessError, InvalidSignednessError,
-    gcd_lehmer, lehmer_xgcd, gcd_binary)
+    TOOM3_CUTOFF, _store_digit, _mask_digit, InvalidEndiannessError,
+    InvalidSignednessError, gcd_lehmer, lehmer_xgcd, gcd_binary)
 from rpython.rlib.rfloat import NAN
 from rpython.rtyper.test.test_llinterp import interpret
 from rpython.translator.c.test.test_standalone import StandaloneTests
@@ -342,6 +342,28 @@ class Test_rbigint(object):
         assert x.tolong() == 0
         assert x.tobool() is False
 
+    def test_fromdecimalstr_recursive(self, monkeypatch):
+        monkeypatch.setattr(lobj, 'FROMSTR_RECURSIVE_CUTOFF', 20)
+        for n in [21, 100, 345, 1000]:
+            s = ''.join([str(randint(0, 9)) for i in range(n)])
+            for sign in ['', '+', '-']:
+                x = rbigint.fromdecimalstr(sign + s)
+                assert x.tolong() == long(sign + s)
+        s = '0' * 500 + '12'
+        assert rbigint.fromdecimalstr(s).tolong() == 12
+        assert rbigint.fromdecimalstr('-' + '0' * 500).tolong() == 0
+
+    def test_fromstr_recursive(self, monkeypatch):
+        monkeypatch.setattr(lobj, 'FROMSTR_RECURSIVE_CUTOFF', 20)
+        for base in [3, 10, 36]:
+            digits = '0123456789abcdefghijklmnopqrstuvwxyz'[:base]
+            s = ''.join([digits[randint(0, base - 1)] for i in range(500)])
+            assert rbigint.fromstr(s, base).tolong() == long(s, base)
+            assert rbigint.fromstr('-' + s, base).tolong() == -long(s, base)
+        s = '_'.join(['12345'] * 100)
+        x = rbigint.fromstr(s, 10, allow_underscores=True)
+        assert x.tolong() == long(s.replace('_', ''))
+
     def test_fromstr(self):
         from rpython.rlib.rstring import ParseStringError
         assert rbigint.fromstr('123L').tolong() == 123
@@ -977,6 +999,35 @@ class TestInternalFunctions(object):
             assert div.tolong() == _div
             assert rem.tolong() == _rem
 
+    def test__divmod_big(self, monkeypatch):
+        # use a small cutoff to exercise the recursion with small numbers
+        monkeypatch.setattr(lobj, 'BURNIKEL_ZIEGLER_CUTOFF', 3)
+        for i in range(30):
+            y = long(randint(1, 1 << randint(1, 30 * SHIFT)))
+            x = long(randint(0, y << randint(1, 30 * SHIFT)))
+            if i % 3 == 0:
+                # exercises the case where the top digits of the remainder
+                # are equal to the top half of the divisor
+                y = (1 << y.bit_length()) - 1
+                x = y * (x // y) - 1
+            div, rem = lobj._divmod_big(rbigint.fromlong(x),
+                                        rbigint.fromlong(y))
+            assert (div.tolong(), rem.tolong()) == divmod(x, y)
+
+    def test_divmod_big_signs(self, monkeypatch):
+        monkeypatch.setattr(lobj, 'BURNIKEL_ZIEGLER_CUTOFF', 3)
+        x = long(randint(1 << (20 * SHIFT), 1 << (30 * SHIFT)))
+        y = long(randint(1 << (8 * SHIFT), 1 << (10 * SHIFT)))
+        for sx, sy in (1, 1), (1, -1), (-1, -1), (-1, 1):
+            sx *= x
+            sy *= y
+            f1 = rbigint.fromlong(sx)
+            f2 = rbigint.fromlong(sy)
+            div, rem = f1.divmod(f2)
+            assert (div.tolong(), rem.tolong()) == divmod(sx, sy)
+            assert f1.floordiv(f2).tolong() == sx // sy
+            assert f1.mod(f2).tolong() == sx % sy
+
     def test_divmod(self):
         x = 12345678901234567890L
         for i in range(100):
@@ -1060,6 +1111,49 @@ class TestInternalFunctions(object):
         ret = lobj._k_mul(f1, f2)
         assert ret.tolong() == f1.tolong() * f2.tolong()
 
+    def test__tc_mul(self):
+        digs = TOOM3_CUTOFF + 7
+        f1 = bigint([lobj.MASK] * digs, 1)
+        f2 = lobj._x_add(f1, bigint([1], 1))
+        ret = lobj._tc_mul(f1, f2)
+        assert ret.tolong() == f1.tolong() * f2.tolong()
+        ret = lobj._tc_mul(f1, f1)
+        assert ret.tolong() == f1.tolong() ** 2
+
+    def test_mul_toom3(self, monkeypatch):
+        # use small cutoffs to exercise the recursion with small numbers
+        monkeypatch.setattr(lobj, 'KARATSUBA_CUTOFF', 2)
+        monkeypatch.setattr(lobj, 'KARATSUBA_SQUARE_CUTOFF', 3)
+        monkeypatch.setattr(lobj, 'TOOM3_CUTOFF', 5)
+        monkeypatch.setattr(lobj, 'TOOM3_SQUARE_CUTOFF', 6)
+        for i in range(20):
+            x = long(randint(0, 1 << randint(1, 40 * SHIFT)))
+            y = long(randint(0, 1 << randint(1, 40 * SHIFT)))
+            if i % 4 == 0:
+                y = (1 << y.bit_length()) - 1
+            if i % 2:
+                x = -x
+            f1 = rbigint.fromlong(x)
+            f2 = rbigint.fromlong(y)
+            assert f1.mul(f2).tolong() == x * y
+            assert f1.mul(f1).tolong() == x * x
+
+    def test_pow_barrett(self, monkeypatch):
+        monkeypatch.setattr(lobj, 'BARRETT_CUTOFF', 2)
+        for i in range(5):
+            x = long(randint(0, 1 << randint(1, 12 * SHIFT)))
+            y = long(randint(0, 1 << randint(1, 2 * SHIFT)))
+            z = long(randint(1, 1 << randint(1, 8 * SHIFT)))
+            for sx, sz in (1, 1), (-1, 1), (1, -1):
+                sx *= x
+                sz *= z
+                f1 = rbigint.fromlong(sx)
+                f3 = rbigint.fromlong(sz)
+                v = f1.pow(rbigint.fromlong(y), f3)
+                assert v.tolong() == pow(sx, y, sz)
+                v = f1.int_pow(y & 0xffff, f3)
+                assert v.tolong() == pow(sx, y & 0xffff, sz)
+
     def test_longlong(self):
         max = 1L << (r_longlong.BITS-1)
         f1 = rbigint.fromlong(max-1)    # fits in r_longlong
@@ -160,6 +160,70 @@ class BaseTestGIL(StandaloneTests):
         data = cbuilder.cmdexec('')
         assert data == "OK\n"
 
+    def test_switch_interval(self):
+        import sys, time
+        from rpython.rlib import rthread
+        from rpython.rtyper.lltypesystem import lltype, rffi
+
+        # an opaque call that doesn't release the GIL, so that the busy
+        # loop below re-reads the memory written by the other thread
+        c_getpid = rffi.llexternal('getpid', [], rffi.INT,
+                                   releasegil=False, _nowrapper=True)
+
+        class Glob:
+            pass
+        glob = Glob()
+
+        def waiter():
+            glob.waiter_started = True
+            # time.sleep() releases the GIL; when it returns, the main
+            # thread is in the busy loop and we have to wait for the GIL
+            time.sleep(0.01)
+            glob.waiter_done = True
+            glob.lock.release()
+
+        def main(argv):
+            rgil.allocate()
+            ticker = lltype.malloc(rffi.CArray(lltype.Signed), 1, flavor='raw')
+            ticker[0] = sys.maxint
+            rgil.set_switch_interval(1000)
+            rgil.set_drop_ticker(ticker)
+            glob.lock = rthread.allocate_lock()
+            glob.lock.acquire(True)
+            glob.waiter_started = False
+            glob.waiter_done = False
+            rthread.start_new_thread(waiter, ())
+            while not glob.waiter_started:
+                time.sleep(0.001)
+            rgil.reset_stats()
+            # busy loop that only gives the GIL away when asked to
+            yields = 0
+            n = 0
+            while not glob.waiter_done and n < 100000000:
+                if ticker[0] < 0:
+                    ticker[0] = sys.maxint
+                    rgil.yield_thread()
+                    yields += 1
+                c_getpid()
+                n += 1
+            glob.lock.acquire(True)
+            print rgil.get_switch_interval()
+            print yields >= 1
+            print rgil.get_stat(rgil.STAT_CONTENDED) >= 1
+            print rgil.get_stat(rgil.STAT_DROP_REQUESTS) >= 1
+            print rgil.get_stat(rgil.STAT_HANDOFFS) >= 1
+            print rgil.get_stat(rgil.STAT_MAX_WAIT_TIME) >= 1000
+            print (rgil.get_stat(rgil.STAT_WAIT_TIME) >=
+                   rgil.get_stat(rgil.STAT_MAX_WAIT_TIME))
+            lltype.free(ticker, flavor='raw')
+            return 0
+
+        self.config = get_combined_translation_config(
+            overrides={"translation.thread": True})
+        t, cbuilder = self.compile(main)
+        data = cbuilder.cmdexec('')
+        assert data == "1000\n" + "1\n" * 6
+
 
 class TestGILShadowStack(BaseTestGIL):
     gc = 'minimark'
@@ -753,6 +753,26 @@ def test_pwrite():
         os.close(fd)
     py.test.raises(OSError, rposix.pwrite, fd, b'ea', 1)
 
+@rposix_requires('writev')
+def test_readv_writev():
+    from rpython.rlib.buffer import RawByteBuffer
+    fname = str(udir.join('os_test_readv.txt'))
+    fd = os.open(fname, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0777)
+    try:
+        buf1, buf2 = RawByteBuffer(5), RawByteBuffer(6)
+        buf1.setslice(0, b'Hello')
+        buf2.setslice(0, b' world')
+        assert rposix.writev(fd, [buf1, buf2]) == 11
+        os.lseek(fd, 0, 0)
+        buf1, buf2 = RawByteBuffer(3), RawByteBuffer(20)
+        assert rposix.readv(fd, [buf1, buf2]) == 11
+        assert buf1.as_str() == b'Hel'
+        assert buf2.as_str()[:8] == b'lo world'
+        assert rposix.readv(fd, []) == 0
+    finally:
+        os.close(fd)
+    py.test.raises(OSError, rposix.writev, fd, [RawByteBuffer(1)])
+
 @rposix_requires('posix_fadvise')
 def test_posix_fadvise():
     if sys.maxint <= 2**32:
@@ -195,6 +195,21 @@ def test_socketpair_recvinto():
     s1.close()
     s2.close()
 
+@pytest.mark.skipif(not rsocket._c.HAVE_SENDMSG, reason='No sendmsg')
+def test_socketpair_sendmsg_buffers():
+    s1, s2 = socketpair()
+    count = s1.sendmsg(['abc', 'de'])
+    assert count == 5
+    assert s2.recv(100) == 'abcde'
+    buf1, buf2 = RawByteBuffer(3), RawByteBuffer(4)
+    buf1.setslice(0, 'xyz')
+    buf2.setslice(0, '1234')
+    count = s1.sendmsg_buffers([buf1, buf2])
+    assert count == 7
+    assert s2.recv(100) == 'xyz1234'
+    s1.close()
+    s2.close()
+
 @pytest.mark.skipif(sys.platform == "win32",
         reason='No socketpair on Windows')
 def test_socketpair_recvfrom_into():
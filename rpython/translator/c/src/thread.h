@@ -30,12 +30,24 @@ typedef enum RPyLockStatus {
 RPY_EXTERN void RPyGilAllocate(void);
 RPY_EXTERN long RPyGilYieldThread(void);
 RPY_EXTERN void RPyGilAcquireSlowPath(void);
+RPY_EXTERN void RPyGilSetSwitchInterval(long);
+RPY_EXTERN long RPyGilGetSwitchInterval(void);
+RPY_EXTERN void RPyGilSetDropTicker(void *);
+RPY_EXTERN long long RPyGilGetStat(long);
+RPY_EXTERN void RPyGilResetStats(void);
 #define RPyGilAcquire _RPyGilAcquire
 #define RPyGilRelease _RPyGilRelease
 #define RPyFetchFastGil _RPyFetchFastGil
 #define RPyGilGetHolder _RPyGilGetHolder
 #define RPY_FASTGIL_LOCKED(x)   (x != 0)
 
+#define RPY_GIL_STAT_CONTENDED       0
+#define RPY_GIL_STAT_WAIT_TIME       1
+#define RPY_GIL_STAT_MAX_WAIT_TIME   2
+#define RPY_GIL_STAT_DROP_REQUESTS   3
+#define RPY_GIL_STAT_HANDOFFS        4
+#define RPY_GIL_STATS                5
+
 RPY_EXTERN long rpy_fastgil;
 
 #endif
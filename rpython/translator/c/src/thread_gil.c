@@ -45,6 +45,10 @@ The slow path works as follows:
      stealer".
 
   7. To become the stealer, you need to acquire 'mutex_gil_stealer'.
+     The waiting threads become the stealer in first-in-first-out
+     order: each one takes a ticket when it starts waiting, and only
+     the thread whose ticket is 'rpy_gil_now_serving' keeps the mutex.
+     Another thread that gets it puts it back and tries again later.
 
   8. Once you are the stealer, you try to acquire the GIL by running the
      following loop:
@@ -72,6 +76,24 @@ To sum up, there are various possible patterns of interaction:
     most of my time waiting for mutex_gil_stealer, and then go to point 8
 
 
+The switch interval:
+
+  9. The thread holding the GIL normally gives it away only every
+     'sys.checkinterval' bytecodes, which can be a long time if it runs
+     a JIT-compiled loop, or never if it is stuck in C code.  So if the
+     stealer has been waiting for longer than the switch interval, it
+     asks the holder to drop the GIL by setting the ticker registered
+     with RPyGilSetDropTicker() to -1, like a signal handler does (in
+     PyPy it is the signal module's counter).  The holder then runs its
+     periodic actions at the next bytecode and calls
+     RPyGilYieldThread(), which hands the GIL over to the stealer.
+     Because of the tickets of point (7), the stealer is the thread that
+     has been waiting for the longest time, and the yielding thread
+     takes a new ticket behind all the threads already waiting.
+
+  10. A few statistics are kept in 'rpy_gil_stats'.  They are only
+      updated by the thread holding the GIL.
+
 */
 
 
@@ -81,6 +103,7 @@ To sum up, there are various possible patterns of interaction:
    also call RPyGilAcquire/RPyGilRelease; see test_standalone.TestShared.
 */
 
+#include <string.h>
 #include "src/threadlocal.h"
 
 long rpy_fastgil = 0;
@@ -88,6 +111,11 @@ static long rpy_waiting_threads = -42;    /* GIL not initialized */
 static volatile int rpy_early_poll_n = 0;
 static mutex1_t mutex_gil_stealer;
 static mutex2_t mutex_gil;
+static long rpy_gil_next_ticket = 0;    /* see point (7) */
+static long rpy_gil_now_serving = 0;    /* protected by mutex_gil_stealer */
+static long rpy_switch_interval = 5000;     /* in microseconds */
+static volatile long *rpy_gil_drop_ticker = NULL;
+static long long rpy_gil_stats[RPY_GIL_STATS];
 
 
 static void rpy_init_mutexes(void)
@@ -95,6 +123,8 @@ static void rpy_init_mutexes(void)
     mutex1_init(&mutex_gil_stealer);
     mutex2_init_locked(&mutex_gil);
     rpy_waiting_threads = 0;
+    rpy_gil_next_ticket = 0;
+    rpy_gil_now_serving = 0;
 }
 
 void RPyGilAllocate(void)
@@ -118,8 +148,9 @@ void RPyGilAcquireSlowPath(void)
        with the GIL.
      */
     if (1) {      /* preserve commit history */
-        int n;
-        long old_waiting_threads;
+        int n, drop_requested = 0;
+        long old_waiting_threads, my_ticket;
+        long long start_time, stealer_time, waited;
 
         if (rpy_waiting_threads < 0) {
             /* <arigo> I tried to have RPyGilAllocate() called from
@@ -136,6 +167,8 @@ void RPyGilAcquireSlowPath(void)
             abort();
         }
 
+        start_time = rpy_gil_monotonic_usec();
+
         /* Register me as one of the threads that is actively waiting
            for the GIL.  The number of such threads is found in
            rpy_waiting_threads. */
@@ -192,14 +225,26 @@ void RPyGilAcquireSlowPath(void)
         /* Now we are in point (3): mutex_gil might be released, but
            rpy_fastgil might still contain an arbitrary tid */
 
-        /* Enter the waiting queue from the end.  Assuming a roughly
-           first-in-first-out order, this will nicely give the threads
-           a round-robin chance.
+        /* Enter the waiting queue from the end.  The tickets of point
+           (7) make it first-in-first-out, which gives the threads a
+           round-robin chance: mutex_gil_stealer alone does not, because
+           mutexes are not fair.  The unsigned arithmetic is only there
+           to make the wrap-around well-defined.
         */
-        mutex1_lock(&mutex_gil_stealer);
+        my_ticket = (long)((unsigned long)atomic_increment(
+                                              &rpy_gil_next_ticket) - 1);
+        while (1) {
+            mutex1_lock(&mutex_gil_stealer);
+            if (rpy_gil_now_serving == my_ticket)
+                break;
+            /* not our turn: let the thread with the right ticket in */
+            mutex1_unlock(&mutex_gil_stealer);
+            rpy_yield_thread();
+        }
         mutex2_loop_start(&mutex_gil);
 
         /* We are now the stealer thread.  Steals! */
+        stealer_time = rpy_gil_monotonic_usec();
         while (1) {
             /* Busy-looping here.  Try to look again if 'rpy_fastgil' is
                released.
@@ -223,11 +268,31 @@ void RPyGilAcquireSlowPath(void)
                 rpy_fastgil = _rpygil_get_my_ident();
                 break;
             }
+            /* Point (9): if we have been the stealer for longer than
+               the switch interval, ask the holder to drop the GIL.  We
+               set the ticker again at every iteration because the holder
+               may overwrite it while decrementing it.
+            */
+            if (rpy_gil_drop_ticker != NULL &&
+                    rpy_gil_monotonic_usec() - stealer_time >=
+                        rpy_switch_interval) {
+                *rpy_gil_drop_ticker = -1;
+                drop_requested = 1;
+            }
             /* Loop back. */
         }
         atomic_decrement(&rpy_waiting_threads);
         mutex2_loop_stop(&mutex_gil);
+        rpy_gil_now_serving = (long)((unsigned long)my_ticket + 1);
         mutex1_unlock(&mutex_gil_stealer);
+
+        /* We have got the GIL, so we can update the statistics */
+        waited = rpy_gil_monotonic_usec() - start_time;
+        rpy_gil_stats[RPY_GIL_STAT_CONTENDED] += 1;
+        rpy_gil_stats[RPY_GIL_STAT_WAIT_TIME] += waited;
+        if (waited > rpy_gil_stats[RPY_GIL_STAT_MAX_WAIT_TIME])
+            rpy_gil_stats[RPY_GIL_STAT_MAX_WAIT_TIME] = waited;
+        rpy_gil_stats[RPY_GIL_STAT_DROP_REQUESTS] += drop_requested;
     }
     assert(RPY_FASTGIL_LOCKED(rpy_fastgil));
 }
@@ -239,6 +304,7 @@ long RPyGilYieldThread(void)
     assert(RPY_FASTGIL_LOCKED(rpy_fastgil));
     if (rpy_waiting_threads <= 0)
         return 0;
+    rpy_gil_stats[RPY_GIL_STAT_HANDOFFS] += 1;
 
     /* Explicitly release the 'mutex_gil'.
      */
@@ -255,6 +321,34 @@ long RPyGilYieldThread(void)
     return 1;
 }
 
+void RPyGilSetSwitchInterval(long microseconds)
+{
+    if (microseconds < 1)
+        microseconds = 1;
+    rpy_switch_interval = microseconds;
+}
+
+long RPyGilGetSwitchInterval(void)
+{
+    return rpy_switch_interval;
+}
+
+void RPyGilSetDropTicker(void *ticker)
+{
+    rpy_gil_drop_ticker = (volatile long *)ticker;
+}
+
+long long RPyGilGetStat(long index)
+{
+    assert(0 <= index && index < RPY_GIL_STATS);
+    return rpy_gil_stats[index];
+}
+
+void RPyGilResetStats(void)
+{
+    memset(rpy_gil_stats, 0, sizeof(rpy_gil_stats));
+}
+
 /********** for tests only **********/
 
 /* These functions are usually defined as a macros RPyXyz() in thread.h
@@ -226,6 +226,21 @@ long RPyThreadReleaseLock(struct RPyOpaque_ThreadLock *lock)
 /* GIL code                                                 */
 /************************************************************/
 
+static long long rpy_gil_monotonic_usec(void)
+{
+    static LARGE_INTEGER frequency = {0};
+    LARGE_INTEGER counter;
+    if (frequency.QuadPart == 0)
+        QueryPerformanceFrequency(&frequency);
+    QueryPerformanceCounter(&counter);
+    return (long long)(counter.QuadPart * 1000000.0 / frequency.QuadPart);
+}
+
+static INLINE void rpy_yield_thread(void)
+{
+    SwitchToThread();
+}
+
 typedef HANDLE mutex2_t;   /* a semaphore, on Windows */
 
 static INLINE void mutex2_init(mutex2_t *mutex) {
@@ -474,6 +474,7 @@ long RPyThreadReleaseLock(struct RPyOpaque_ThreadLock *lock)
 /************************************************************/
 
 #include <time.h>
+#include <sched.h>
 
 #define ASSERT_STATUS(call)                             \
     if (call != 0) {                                    \
@@ -501,6 +502,24 @@ static inline void timespec_delay(struct timespec *t, double incr)
     t->tv_nsec = nsec;
 }
 
+static inline long long rpy_gil_monotonic_usec(void)
+{
+#ifdef CLOCK_MONOTONIC
+    struct timespec t;
+    clock_gettime(CLOCK_MONOTONIC, &t);
+    return t.tv_sec * 1000000LL + t.tv_nsec / 1000;
+#else
+    struct timeval tv;
+    RPY_GETTIMEOFDAY(&tv);
+    return tv.tv_sec * 1000000LL + tv.tv_usec;
+#endif
+}
+
+static inline void rpy_yield_thread(void)
+{
+    sched_yield();
+}
+
 typedef pthread_mutex_t mutex1_t;
 
 static inline void mutex1_init(mutex1_t *mutex) {
@@ -0,0 +1,92 @@
+#! /usr/bin/env python
+"""
+Times the division and the decimal parsing of rbigint over a range of
+operand sizes, to check the subquadratic algorithms and to tune
+BURNIKEL_ZIEGLER_CUTOFF and FROMSTR_RECURSIVE_CUTOFF.
+
+For every size n (in digits of SHIFT bits) it prints the time taken by
+_x_divrem() and by _divmod_big() to divide a 2n-digits number by a
+n-digits number, and the time taken by rbigint.fromdecimalstr() to parse
+a number of 10*n decimal digits.
+
+    rpython -O2 targetbigintdivbenchmark.py
+    ./targetbigintdivbenchmark-c [maxsize]
+
+It also runs untranslated, but give it a small maxsize then.
+"""
+
+import sys
+from time import time
+from rpython.rlib.rbigint import (rbigint, _x_divrem, _divmod_big,
+    _store_digit, MASK)
+
+# __________  Entry point  __________
+
+def make_number(ndigits, seed):
+    digits = [_store_digit(0)] * ndigits
+    x = seed
+    for i in range(ndigits):
+        x = (x * 1103515245 + 12345) & 0x7fffffff
+        digits[i] = _store_digit((x * 40503) & MASK)
+    digits[ndigits - 1] = _store_digit(MASK)    # no leading zero
+    return rbigint(digits, 1, ndigits)
+
+def make_decimal(ndigits, seed):
+    chars = ['0'] * ndigits
+    x = seed
+    for i in range(ndigits):
+        x = (x * 1103515245 + 12345) & 0x7fffffff
+        chars[i] = chr(ord('0') + (x >> 16) % 10)
+    chars[0] = '7'
+    return ''.join(chars)
+
+def bench_div(n):
+    a = make_number(2 * n, 1)
+    b = make_number(n, 2)
+    q1, r1 = _x_divrem(a, b)
+    q2, r2 = _divmod_big(a, b)
+    assert q1.eq(q2) and r1.eq(r2)
+    repeat = max(1, 20000 // n)
+    t = time()
+    for i in range(repeat):
+        _x_divrem(a, b)
+    t_school = (time() - t) / repeat
+    t = time()
+    for i in range(repeat):
+        _divmod_big(a, b)
+    t_bz = (time() - t) / repeat
+    print "divide %d by %d digits: school %f, burnikel-ziegler %f" % (
+        2 * n, n, t_school, t_bz)
+
+def bench_fromstr(n):
+    s = make_decimal(10 * n, 3)
+    assert rbigint.fromdecimalstr(s).str() == s
+    repeat = max(1, 20000 // n)
+    t = time()
+    for i in range(repeat):
+        rbigint.fromdecimalstr(s)
+    t_parse = (time() - t) / repeat
+    print "parse %d decimal digits: %f" % (len(s), t_parse)
+
+def entry_point(argv):
+    maxsize = 6400
+    if len(argv) > 1:
+        maxsize = int(argv[1])
+    n = 25
+    while n <= maxsize:
+        bench_div(n)
+        n *= 2
+    n = 25
+    while n <= maxsize:
+        bench_fromstr(n)
+        n *= 2
+    return 0
+
+# _____ Define and setup target ___
+
+def target(*args):
+    return entry_point, None
+
+if __name__ == '__main__':
+    res = entry_point(sys.argv)
+    sys.exit(res)
@@ -0,0 +1,58 @@
+"""
+Times the major collections of incminimark over a range of heap sizes, to
+compare the marking with and without helper threads:
+
+    rpython -O2 targetgcmarkbench.py
+    PYPY_GC_MARK_THREADS=1 ./targetgcmarkbench-c [max_megabytes]
+    PYPY_GC_MARK_THREADS=8 ./targetgcmarkbench-c [max_megabytes]
+
+For every heap size it builds binary trees of that total size and prints
+the average time of a full collection (rgc.collect()), which is mostly
+spent marking the live trees.
+"""
+
+import time
+from rpython.rlib import rgc
+
+
+class Node(object):
+    def __init__(self, left, right, value):
+        self.left = left
+        self.right = right
+        self.value = value
+
+def make_tree(depth):
+    if depth == 0:
+        return Node(None, None, 0)
+    return Node(make_tree(depth - 1), make_tree(depth - 1), depth)
+
+TREE_DEPTH = 14
+NODE_SIZE = 32      # approximately, in bytes, on 64-bit
+TREE_SIZE = NODE_SIZE << (TREE_DEPTH + 1)
+
+def bench(megabytes, repeat):
+    trees = [make_tree(TREE_DEPTH)
+             for i in range(max(1, (megabytes << 20) // TREE_SIZE))]
+    rgc.collect()
+    t = time.time()
+    for i in range(repeat):
+        rgc.collect()
+    t = (time.time() - t) / repeat
+    print "heap %d MB: %d trees, full collection %f ms" % (
+        megabytes, len(trees), t * 1000.0)
+    assert trees[-1].left.right.value == TREE_DEPTH - 2
+
+def entry_point(argv):
+    max_megabytes = 1024
+    if len(argv) > 1:
+        max_megabytes = int(argv[1])
+    megabytes = 16
+    while megabytes <= max_megabytes:
+        bench(megabytes, 5)
+        megabytes *= 2
+    return 0
+
+# _____ Define and setup target ___
+
+def target(*args):
+    return entry_point, None
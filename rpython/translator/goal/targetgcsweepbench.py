@@ -0,0 +1,77 @@
+"""
+Measures the latency of small "requests" that allocate, while a large
+old heap keeps incminimark busy with major collections, to compare
+sweeping in the mutator with sweeping in a background thread:
+
+    rpython -O2 targetgcsweepbench.py
+    ./targetgcsweepbench-c [requests] [live_megabytes]
+    PYPY_GC_BACKGROUND_SWEEP=1 ./targetgcsweepbench-c [requests] [live_megabytes]
+
+Every request builds and drops a few short-lived objects and replaces
+some of the old ones, so that the major collections have garbage to
+sweep.  It prints the median, the 99th percentile and the maximum time
+taken by a request.
+"""
+
+import time
+from rpython.rlib.listsort import TimSort
+
+
+class Node(object):
+    def __init__(self, next, value):
+        self.next = next
+        self.value = value
+
+def make_chain(length, value):
+    node = None
+    for i in range(length):
+        node = Node(node, value + i)
+    return node
+
+CHAIN_LENGTH = 64
+NODE_SIZE = 32      # approximately, in bytes, on 64-bit
+
+def request(old, i):
+    # short-lived garbage, plus one old chain replaced by a new one
+    total = 0
+    for j in range(20):
+        total += make_chain(8, j).value
+    index = (i * 7919) % len(old)
+    old[index] = make_chain(CHAIN_LENGTH, i)
+    return total
+
+def percentile(sorted_times, fraction):
+    index = int(len(sorted_times) * fraction)
+    if index >= len(sorted_times):
+        index = len(sorted_times) - 1
+    return sorted_times[index]
+
+def entry_point(argv):
+    requests = 200000
+    live_megabytes = 256
+    if len(argv) > 1:
+        requests = int(argv[1])
+    if len(argv) > 2:
+        live_megabytes = int(argv[2])
+    nchains = max(1, (live_megabytes << 20) // (NODE_SIZE * CHAIN_LENGTH))
+    old = [make_chain(CHAIN_LENGTH, i) for i in range(nchains)]
+    times = [0.0] * requests
+    start = time.time()
+    for i in range(requests):
+        t = time.time()
+        request(old, i)
+        times[i] = time.time() - t
+    total = time.time() - start
+    TimSort(times).sort()
+    print "%d requests, %d MB live: total %f s" % (requests, live_megabytes,
+                                                   total)
+    print "p50 %f ms, p99 %f ms, max %f ms" % (
+        percentile(times, 0.5) * 1000.0, percentile(times, 0.99) * 1000.0,
+        times[-1] * 1000.0)
+    assert old[-1].next.value == old[-1].value - 1
+    return 0
+
+# _____ Define and setup target ___
+
+def target(*args):
+    return entry_point, None